@@ -1261,9 +1261,71 @@ def tab_test_commissions() -> rx.Component:
             color_scheme="red"  # Rojo para indicar precaución
         ),
         
+        # Historial de jobs programados (jobruns)
+        rx.box(
+            rx.vstack(
+                rx.hstack(
+                    rx.heading(
+                        "🗂️ Últimas ejecuciones de jobs",
+                        size="5",
+                        color=rx.color_mode_cond(
+                            light=Custom_theme().light_colors()["text"],
+                            dark=Custom_theme().dark_colors()["text"]
+                        ),
+                    ),
+                    admin_button(
+                        "🔄 Actualizar",
+                        on_click=AdminState.load_job_runs
+                    ),
+                    justify="between",
+                    align="center",
+                    width="100%"
+                ),
+                rx.table.root(
+                    rx.table.header(
+                        rx.table.row(
+                            rx.table.column_header_cell("Job"),
+                            rx.table.column_header_cell("Estado"),
+                            rx.table.column_header_cell("Inicio (UTC)"),
+                            rx.table.column_header_cell("Duración (s)"),
+                            rx.table.column_header_cell("Filas"),
+                            rx.table.column_header_cell("Worker"),
+                            rx.table.column_header_cell("Error"),
+                        )
+                    ),
+                    rx.table.body(
+                        rx.foreach(
+                            AdminState.job_runs,
+                            lambda run: rx.table.row(
+                                rx.table.cell(run.job_id),
+                                rx.table.cell(run.status),
+                                rx.table.cell(run.started_at),
+                                rx.table.cell(run.duration_seconds),
+                                rx.table.cell(run.rows_affected),
+                                rx.table.cell(run.worker),
+                                rx.table.cell(run.error),
+                            )
+                        )
+                    ),
+                    width="100%",
+                    variant="surface",
+                    size="1"
+                ),
+                spacing="3",
+                align="start",
+                width="100%"
+            ),
+            padding="1.5rem",
+            border_radius="12px",
+            border=f"1px solid {rx.color_mode_cond(light='#E5E7EB', dark='#374151')}",
+            width="100%",
+            overflow_x="auto"
+        ),
+        
         spacing="4",
         width="100%",
         max_width="800px",
+        on_mount=AdminState.load_job_runs,
     )
 
 
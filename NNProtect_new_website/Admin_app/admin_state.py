@@ -30,6 +30,7 @@ from NNProtect_new_website.mlm_service.exchange_service import ExchangeService
 from NNProtect_new_website.mlm_service.genealogy_service import GenealogyService
 from NNProtect_new_website.mlm_service.rank_service import RankService
 from NNProtect_new_website.mlm_service.mlm_user_manager import MLMUserManager
+from NNProtect_new_website.utils.async_db import AsyncDB
 
 
 class OrganizationMember(BaseModel):
@@ -52,6 +53,17 @@ class UserAddress(BaseModel):
     country: str
 
 
+class JobRunRow(BaseModel):
+    """Ejecución de job programado (historial jobruns)"""
+    job_id: str
+    status: str
+    worker: str
+    started_at: str
+    duration_seconds: float
+    rows_affected: int
+    error: str
+
+
 class AdminState(rx.State):
     """Estado principal de Admin App"""
 
@@ -195,8 +207,151 @@ class AdminState(rx.State):
     def set_result_wallet_balance(self, value: str):
         self.result_wallet_balance = value
     
+    @staticmethod
+    def _query_user_search(session, query: str):
+        """
+        Busca un usuario por member_id o email y arma TODA su información.
+        Solo lee de BD: no modifica el estado (corre en el pool de AsyncDB).
+
+        Returns:
+            Dict con los campos result_* y "organization", o None si no existe
+        """
+        # Buscar por member_id o email
+        user = None
+        if query.isdigit():
+            # Buscar por member_id
+            user = session.exec(
+                sqlmodel.select(Users).where(Users.member_id == int(query))
+            ).first()
+        else:
+            # Buscar por email
+            user = session.exec(
+                sqlmodel.select(Users).where(Users.email_cache == query)
+            ).first()
+        
+        if not user:
+            return None
+        
+        # Obtener UserProfile
+        profile = session.exec(
+            sqlmodel.select(UserProfiles).where(UserProfiles.user_id == user.id)
+        ).first()
+        
+        # Obtener TODAS las direcciones del usuario
+        user_addresses_relations = session.exec(
+            sqlmodel.select(UserAddresses).where(UserAddresses.user_id == user.id)
+        ).all()
+        
+        addresses_list = []
+        primary_address = None
+        for ua in user_addresses_relations:
+            addr = session.exec(
+                sqlmodel.select(Addresses).where(Addresses.id == ua.address_id)
+            ).first()
+            if addr:
+                addresses_list.append(UserAddress(
+                    street=addr.street,
+                    city=addr.city,
+                    state=addr.state,
+                    zip_code=addr.zip_code,
+                    country=addr.country
+                ))
+                if not primary_address:
+                    primary_address = addr
+        
+        # Obtener Wallet
+        wallet = session.exec(
+            sqlmodel.select(Wallets).where(Wallets.member_id == user.member_id)
+        ).first()
+        
+        # Calcular PV y PVG del usuario
+        orders = session.exec(
+            sqlmodel.select(Orders)
+            .where(Orders.member_id == user.member_id)
+            .where(Orders.status == "PAYMENT_CONFIRMED")
+        ).all()
+        
+        pv_total = sum(order.total_pv or 0 for order in orders)
+        
+        # Calcular PVG (suma de PV de toda su organización)
+        pvg_total = pv_total  # Iniciar con su propio PV
+        organization = session.exec(
+            sqlmodel.select(Users).where(Users.sponsor_id == user.member_id)
+        ).all()
+        
+        for member in organization:
+            member_orders = session.exec(
+                sqlmodel.select(Orders)
+                .where(Orders.member_id == member.member_id)
+                .where(Orders.status == "PAYMENT_CONFIRMED")
+            ).all()
+            pvg_total += sum(order.total_pv or 0 for order in member_orders)
+        
+        # Obtener ancestor_id del UserTreePath
+        tree_path = session.exec(
+            sqlmodel.select(UserTreePath)
+            .where(UserTreePath.descendant_id == user.member_id)
+            .where(UserTreePath.depth == 1)
+        ).first()
+        
+        # Construir organización para la tabla
+        org_list = []
+        for member in organization:
+            member_address = session.exec(
+                sqlmodel.select(UserAddresses).where(UserAddresses.user_id == member.id)
+            ).first()
+            
+            addr = None
+            if member_address:
+                addr = session.exec(
+                    sqlmodel.select(Addresses).where(Addresses.id == member_address.address_id)
+                ).first()
+            
+            member_orders = session.exec(
+                sqlmodel.select(Orders)
+                .where(Orders.member_id == member.member_id)
+                .where(Orders.status == "PAYMENT_CONFIRMED")
+            ).all()
+            
+            member_pv = sum(order.total_pv or 0 for order in member_orders)
+            
+            org_list.append(OrganizationMember(
+                nombre=f"{member.first_name} {member.last_name}",
+                member_id=member.member_id,
+                pais=addr.country if addr else "N/A",
+                pv=int(member_pv),
+                pvg=int(member_pv),
+                nivel=1,
+                ciudad=addr.city if addr else "N/A"
+            ))
+        
+        # TODOS los campos solicitados
+        return {
+            "result_user_id": user.id if user.id else 0,
+            "result_member_id": str(user.member_id),
+            "result_first_name": user.first_name,
+            "result_last_name": user.last_name,
+            "result_email": user.email_cache or "N/A",
+            "result_gender": profile.gender.value if profile and profile.gender else "N/A",
+            "result_phone": profile.phone_number if profile else "N/A",
+            "result_date_of_birth": profile.date_of_birth.strftime("%Y-%m-%d") if profile and profile.date_of_birth else "N/A",
+            "result_status": user.status.value if hasattr(user.status, 'value') else str(user.status),
+            "result_sponsor_id": str(user.sponsor_id) if user.sponsor_id else "N/A",
+            "result_ancestor_id": str(tree_path.ancestor_id) if tree_path else "N/A",
+            "result_referral_link": user.referral_link or "N/A",
+            "result_country": primary_address.country if primary_address else user.country_cache or "N/A",
+            "result_pv": f"{pv_total:.2f}",
+            "result_pvg": f"{pvg_total:.2f}",
+            "result_current_rank": user.status.value if hasattr(user.status, 'value') else "N/A",
+            "result_highest_rank": user.status.value if hasattr(user.status, 'value') else "N/A",  # TODO: implementar highest_rank
+            "result_wallet_balance": f"{wallet.balance:.2f}" if wallet else "0.00",
+            "result_addresses": addresses_list,
+            "result_fecha_registro": user.created_at.strftime("%Y-%m-%d %H:%M:%S") if user.created_at else "N/A",
+            "organization": org_list,
+        }
+
     @rx.event
-    def search_user(self):
+    async def search_user(self):
         """Busca un usuario por member_id o email y obtiene TODA su información"""
         self.is_loading_search = True
         self.has_result = False
@@ -208,143 +363,19 @@ class AdminState(rx.State):
                 self.show_error("Ingresa un Member ID o Email para buscar")
                 return
             
-            with rx.session() as session:
-                # Buscar por member_id o email
-                user = None
-                if query.isdigit():
-                    # Buscar por member_id
-                    user = session.exec(
-                        sqlmodel.select(Users).where(Users.member_id == int(query))
-                    ).first()
-                else:
-                    # Buscar por email
-                    user = session.exec(
-                        sqlmodel.select(Users).where(Users.email_cache == query)
-                    ).first()
-                
-                if not user:
-                    self.show_error(f"Usuario no encontrado")
-                    return
-                
-                # Obtener UserProfile
-                profile = session.exec(
-                    sqlmodel.select(UserProfiles).where(UserProfiles.user_id == user.id)
-                ).first()
-                
-                # Obtener TODAS las direcciones del usuario
-                user_addresses_relations = session.exec(
-                    sqlmodel.select(UserAddresses).where(UserAddresses.user_id == user.id)
-                ).all()
-                
-                addresses_list = []
-                primary_address = None
-                for ua in user_addresses_relations:
-                    addr = session.exec(
-                        sqlmodel.select(Addresses).where(Addresses.id == ua.address_id)
-                    ).first()
-                    if addr:
-                        addresses_list.append(UserAddress(
-                            street=addr.street,
-                            city=addr.city,
-                            state=addr.state,
-                            zip_code=addr.zip_code,
-                            country=addr.country
-                        ))
-                        if not primary_address:
-                            primary_address = addr
-                
-                # Obtener Wallet
-                wallet = session.exec(
-                    sqlmodel.select(Wallets).where(Wallets.member_id == user.member_id)
-                ).first()
-                
-                # Calcular PV y PVG del usuario
-                orders = session.exec(
-                    sqlmodel.select(Orders)
-                    .where(Orders.member_id == user.member_id)
-                    .where(Orders.status == "PAYMENT_CONFIRMED")
-                ).all()
-                
-                pv_total = sum(order.total_pv or 0 for order in orders)
-                
-                # Calcular PVG (suma de PV de toda su organización)
-                pvg_total = pv_total  # Iniciar con su propio PV
-                organization = session.exec(
-                    sqlmodel.select(Users).where(Users.sponsor_id == user.member_id)
-                ).all()
-                
-                for member in organization:
-                    member_orders = session.exec(
-                        sqlmodel.select(Orders)
-                        .where(Orders.member_id == member.member_id)
-                        .where(Orders.status == "PAYMENT_CONFIRMED")
-                    ).all()
-                    pvg_total += sum(order.total_pv or 0 for order in member_orders)
-                
-                # Obtener ancestor_id del UserTreePath
-                tree_path = session.exec(
-                    sqlmodel.select(UserTreePath)
-                    .where(UserTreePath.descendant_id == user.member_id)
-                    .where(UserTreePath.depth == 1)
-                ).first()
-                
-                # Asignar TODOS los campos solicitados
-                self.result_user_id = user.id if user.id else 0
-                self.result_member_id = str(user.member_id)
-                self.result_first_name = user.first_name
-                self.result_last_name = user.last_name
-                self.result_email = user.email_cache or "N/A"
-                self.result_gender = profile.gender.value if profile and profile.gender else "N/A"
-                self.result_phone = profile.phone_number if profile else "N/A"
-                self.result_date_of_birth = profile.date_of_birth.strftime("%Y-%m-%d") if profile and profile.date_of_birth else "N/A"
-                self.result_status = user.status.value if hasattr(user.status, 'value') else str(user.status)
-                self.result_sponsor_id = str(user.sponsor_id) if user.sponsor_id else "N/A"
-                self.result_ancestor_id = str(tree_path.ancestor_id) if tree_path else "N/A"
-                self.result_referral_link = user.referral_link or "N/A"
-                self.result_country = primary_address.country if primary_address else user.country_cache or "N/A"
-                self.result_pv = f"{pv_total:.2f}"
-                self.result_pvg = f"{pvg_total:.2f}"
-                self.result_current_rank = user.status.value if hasattr(user.status, 'value') else "N/A"
-                self.result_highest_rank = user.status.value if hasattr(user.status, 'value') else "N/A"  # TODO: implementar highest_rank
-                self.result_wallet_balance = f"{wallet.balance:.2f}" if wallet else "0.00"
-                self.result_addresses = addresses_list
-                self.result_fecha_registro = user.created_at.strftime("%Y-%m-%d %H:%M:%S") if user.created_at else "N/A"
-                
-                self.has_result = True
-                
-                # Construir organización para la tabla
-                org_list = []
-                for member in organization:
-                    member_address = session.exec(
-                        sqlmodel.select(UserAddresses).where(UserAddresses.user_id == member.id)
-                    ).first()
-                    
-                    addr = None
-                    if member_address:
-                        addr = session.exec(
-                            sqlmodel.select(Addresses).where(Addresses.id == member_address.address_id)
-                        ).first()
-                    
-                    member_orders = session.exec(
-                        sqlmodel.select(Orders)
-                        .where(Orders.member_id == member.member_id)
-                        .where(Orders.status == "PAYMENT_CONFIRMED")
-                    ).all()
-                    
-                    member_pv = sum(order.total_pv or 0 for order in member_orders)
-                    
-                    org_list.append(OrganizationMember(
-                        nombre=f"{member.first_name} {member.last_name}",
-                        member_id=member.member_id,
-                        pais=addr.country if addr else "N/A",
-                        pv=int(member_pv),
-                        pvg=int(member_pv),
-                        nivel=1,
-                        ciudad=addr.city if addr else "N/A"
-                    ))
-                
-                self.search_user_organization = org_list
-                self.show_success(f"Usuario encontrado: {user.first_name} {user.last_name}")
+            result = await AsyncDB.run_in_session(self._query_user_search, query, label="admin.search_user")
+            
+            if not result:
+                self.show_error(f"Usuario no encontrado")
+                return
+            
+            organization = result.pop("organization")
+            for field, value in result.items():
+                setattr(self, field, value)
+            
+            self.has_result = True
+            self.search_user_organization = organization
+            self.show_success(f"Usuario encontrado: {self.result_first_name} {self.result_last_name}")
                 
         except ValueError:
             self.show_error("El Member ID debe ser un número válido")
@@ -356,7 +387,7 @@ class AdminState(rx.State):
             self.is_loading_search = False
     
     @rx.event
-    def update_user(self):
+    async def update_user(self):
         """Actualiza SOLO los 8 campos editables del usuario"""
         self.is_updating_user = True
         
@@ -438,9 +469,9 @@ class AdminState(rx.State):
                 session.refresh(user)
                 
                 self.show_success(f"Usuario {user.member_id} actualizado correctamente")
-                
-                # Recargar datos actualizados
-                self.search_user()
+            
+            # Recargar datos actualizados
+            await self.search_user()
                 
         except Exception as e:
             self.show_error(f"Error al actualizar usuario: {str(e)}")
@@ -1025,10 +1056,7 @@ class AdminState(rx.State):
                             from ..mlm_service.mlm_user_manager import MLMUserManager
                             
                             print(f"  🔄 Actualizando UnilevelReports para member_id={user.member_id}")
-                            MLMUserManager.update_unilevel_report_for_order(
-                                order_member_id=user.member_id,
-                                period_id=period.id
-                            )
+                            MLMUserManager.apply_order_to_unilevel_report(session, order)
                             print(f"  ✅ UnilevelReports actualizado correctamente con PVG por nivel y totales")
                         except Exception as e_unilevel:
                             print(f"  ⚠️  Error actualizando UnilevelReports para user {user.member_id}: {e_unilevel}")
@@ -1066,16 +1094,10 @@ class AdminState(rx.State):
                             import traceback
                             traceback.print_exc()
                         
-                        # ✅ CRÍTICO: Verificar y actualizar rango del usuario tras cambio de PVG
-                        rank_updated = RankService.check_and_update_rank(session, user.member_id)
-                        if rank_updated:
-                            print(f"  🎉 User {user.member_id} promovido a nuevo rango")
-                        
-                        # ✅ CRÍTICO: Verificar y actualizar rango de cada ancestro tras cambio de PVG
-                        for path in ancestor_paths:
-                            ancestor_rank_updated = RankService.check_and_update_rank(session, path.ancestor_id)
-                            if ancestor_rank_updated:
-                                print(f"  🎉 Ancestro {path.ancestor_id} promovido a nuevo rango")
+                        # ✅ CRÍTICO: Verificar y actualizar rango del usuario y de sus ancestros tras cambio de PVG (en lote)
+                        promotions = RankService.evaluate_upline_ranks(session, user.member_id)
+                        for promoted_id in promotions:
+                            print(f"  🎉 User {promoted_id} promovido a nuevo rango")
 
                         total_orders += 1
 
@@ -1206,6 +1228,10 @@ class AdminState(rx.State):
                 self.network_progress = 0
                 self.network_current_user = 0
 
+                # Sin órdenes la genealogía no se lee durante la creación:
+                # se escribe en lote (INSERT multi-fila) antes de cada commit
+                genealogy_batch = None if self.network_create_orders else []
+
                 while queue and created_count < total_users:
                     sponsor_id, current_level = queue.pop(0)
                     
@@ -1228,7 +1254,8 @@ class AdminState(rx.State):
                             country_config=self.network_country,
                             default_rank=default_rank,
                             products_map=products_map if self.network_create_orders else None,
-                            current_period=current_period
+                            current_period=current_period,
+                            genealogy_batch=genealogy_batch
                         )
                         
                         created_count += 1
@@ -1240,10 +1267,15 @@ class AdminState(rx.State):
                         
                         # Commit cada 50 usuarios
                         if created_count % 50 == 0:
+                            if genealogy_batch:
+                                GenealogyService.add_members_to_tree_bulk(session, genealogy_batch)
+                                genealogy_batch.clear()
                             session.commit()
                             print(f"  [{created_count}/{total_users}] usuarios creados... ({self.network_progress}%)")
 
                 # Commit final
+                if genealogy_batch:
+                    GenealogyService.add_members_to_tree_bulk(session, genealogy_batch)
                 session.commit()
                 
                 # Progreso completo
@@ -1276,9 +1308,14 @@ class AdminState(rx.State):
         country_config: str,
         default_rank,
         products_map: dict | None = None,
-        current_period = None
+        current_period = None,
+        genealogy_batch: list | None = None
     ) -> Users:
-        """Crea un usuario MLM completo con todos sus datos"""
+        """
+        Crea un usuario MLM completo con todos sus datos.
+        Si se pasa genealogy_batch, el par (member_id, sponsor_id) se acumula ahí y el
+        llamador escribe la genealogía del lote con GenealogyService.add_members_to_tree_bulk.
+        """
         from datetime import date
         
         # Determinar país
@@ -1347,27 +1384,12 @@ class AdminState(rx.State):
         )
         session.add(user_address)
         
-        # 4. USERTREEPATHS - Copiar árbol del sponsor
-        self_path = UserTreePath(
-            sponsor_id=sponsor_id,
-            ancestor_id=member_id,
-            descendant_id=member_id,
-            depth=0
-        )
-        session.add(self_path)
-        
-        sponsor_ancestors = session.exec(
-            sqlmodel.select(UserTreePath).where(UserTreePath.descendant_id == sponsor_id)
-        ).all()
-        
-        for ancestor_path in sponsor_ancestors:
-            new_path = UserTreePath(
-                sponsor_id=sponsor_id,
-                ancestor_id=ancestor_path.ancestor_id,
-                descendant_id=member_id,
-                depth=ancestor_path.depth + 1
-            )
-            session.add(new_path)
+        # 4. USERTREEPATHS - Copiar árbol del sponsor (INSERT ... SELECT)
+        # Con genealogy_batch se difiere al INSERT multi-fila del lote
+        if genealogy_batch is not None:
+            genealogy_batch.append((member_id, sponsor_id))
+        else:
+            GenealogyService.add_member_to_tree(session, member_id, sponsor_id)
         
         # 5. WALLETS
         currency = self._get_currency(country)
@@ -1526,16 +1548,10 @@ class AdminState(rx.State):
         
         print(f"  ✅ Orden creada: {total_pv} PV → User {user.member_id} (PVG: +{total_pv}, propagado a {len(ancestor_paths)} ancestros)")
         
-        # ✅ CRÍTICO: Verificar y actualizar rango del usuario tras cambio de PVG
-        rank_updated = RankService.check_and_update_rank(session, user.member_id)
-        if rank_updated:
-            print(f"  🎉 User {user.member_id} promovido a nuevo rango")
-        
-        # ✅ CRÍTICO: Verificar y actualizar rango de cada ancestro tras cambio de PVG
-        for path in ancestor_paths:
-            ancestor_rank_updated = RankService.check_and_update_rank(session, path.ancestor_id)
-            if ancestor_rank_updated:
-                print(f"  🎉 Ancestro {path.ancestor_id} promovido a nuevo rango")
+        # ✅ CRÍTICO: Verificar y actualizar rango del usuario y de sus ancestros tras cambio de PVG (en lote)
+        promotions = RankService.evaluate_upline_ranks(session, user.member_id)
+        for promoted_id in promotions:
+            print(f"  🎉 User {promoted_id} promovido a nuevo rango")
         
         # 💰 NUEVO: CALCULAR COMISIONES INSTANTÁNEAMENTE (Uninivel + Matching)
         # Esto permite que el dashboard muestre ganancias en tiempo real
@@ -1890,6 +1906,26 @@ class AdminState(rx.State):
     
     is_loading_commissions: bool = False
     commission_results: dict = {}
+    job_runs: list[JobRunRow] = []
+    
+    @rx.event
+    def load_job_runs(self):
+        """
+        Carga las últimas ejecuciones de jobs programados (JobRunner.RECENT_RUNS_LIMIT).
+        """
+        try:
+            from database.engine_config import get_configured_engine
+            from NNProtect_new_website.jobs.job_runner import JobRunner
+            
+            with sqlmodel.Session(get_configured_engine()) as session:
+                self.job_runs = [
+                    JobRunRow(**JobRunner.run_to_dict(run))
+                    for run in JobRunner.get_recent_runs(session)
+                ]
+                
+        except Exception as e:
+            print(f"❌ Error cargando historial de jobs: {e}")
+            self.show_error(f"Error cargando historial de jobs: {str(e)}")
     
     @rx.event
     def process_period_end_and_commissions(self):
@@ -1902,9 +1938,7 @@ class AdminState(rx.State):
         try:
             from database.engine_config import get_configured_engine
             from database.periods import Periods
-            from database.comissions import Commissions, CommissionStatus
-            from NNProtect_new_website.mlm_service.wallet_service import WalletService
-            from NNProtect_new_website.mlm_service.period_reset_service import PeriodResetService
+            from NNProtect_new_website.jobs.monthly_closure import MonthlyClosureJob
             
             engine = get_configured_engine()
             
@@ -1913,18 +1947,21 @@ class AdminState(rx.State):
                 print("🔄 INICIANDO CIERRE DE PERÍODO")
                 print("="*80 + "\n")
                 
-                # 1. Obtener período actual activo
-                all_periods = session.exec(
-                    sqlmodel.select(Periods)
-                    .where(Periods.closed_at == None)
-                ).all()
-                
-                if not all_periods:
-                    self.show_error("❌ No hay un período activo para cerrar")
-                    return
+                # 1. Reanudar cierre interrumpido u obtener período actual activo
+                current_period = MonthlyClosureJob.get_unfinished_closure_period(session)
                 
-                # Ordenar manualmente por starts_on descendente
-                current_period = max(all_periods, key=lambda p: p.starts_on)
+                if not current_period:
+                    all_periods = session.exec(
+                        sqlmodel.select(Periods)
+                        .where(Periods.closed_at == None)
+                    ).all()
+                    
+                    if not all_periods:
+                        self.show_error("❌ No hay un período activo para cerrar")
+                        return
+                    
+                    # Ordenar manualmente por starts_on descendente
+                    current_period = max(all_periods, key=lambda p: p.starts_on)
                 
                 if not current_period:
                     self.show_error("❌ No hay un período activo para cerrar")
@@ -1934,100 +1971,28 @@ class AdminState(rx.State):
                 print(f"   Inicio: {current_period.starts_on}")
                 print(f"   Fin: {current_period.ends_on}\n")
                 
-                # 2. Obtener todas las comisiones PENDING del período
-                pending_commissions = session.exec(
-                    sqlmodel.select(Commissions)
-                    .where(
-                        (Commissions.period_id == current_period.id) &
-                        (Commissions.status == CommissionStatus.PENDING.value)
-                    )
-                ).all()
-                
-                print(f"💸 Comisiones PENDING encontradas: {len(pending_commissions)}\n")
-                
-                # 3. Depositar cada comisión en la wallet del usuario
-                deposited_count = 0
-                deposited_total = 0.0
-                failed_count = 0
-                
-                for commission in pending_commissions:
-                    if commission.id is None:
-                        failed_count += 1
-                        continue
-                        
-                    success = WalletService.deposit_commission(
-                        session=session,
-                        member_id=commission.member_id,
-                        commission_id=commission.id,
-                        amount=commission.amount_converted,
-                        currency=commission.currency_destination,
-                        description=commission.notes
-                    )
-                    
-                    if success:
-                        deposited_count += 1
-                        deposited_total += commission.amount_converted
-                    else:
-                        failed_count += 1
+                # 2-6. Pipeline reanudable: depósitos, cierre, nuevo período y reseteo
+                summary = MonthlyClosureJob.run_closure(session, current_period)
+                deposited_count = summary["deposited_count"]
+                deposited_total = summary["deposited_total"]
+                failed_count = summary["failed_count"]
+                users_reset = summary["users_reset"]
+                new_period_name = summary["new_period"]
                 
                 print(f"\n💰 RESUMEN DE DEPÓSITOS:")
                 print(f"   ✅ Exitosos: {deposited_count}")
                 print(f"   ❌ Fallidos: {failed_count}")
                 print(f"   💵 Total depositado: ${deposited_total:.2f}\n")
                 
-                # 4. Cerrar el período actual
-                current_period.closed_at = datetime.now(timezone.utc)
-                session.add(current_period)
-                
-                print(f"🔒 Período {current_period.name} cerrado exitosamente\n")
-                
-                # 5. Crear nuevo período
-                now = datetime.now(timezone.utc)
-                next_month = now.month + 1 if now.month < 12 else 1
-                next_year = now.year if now.month < 12 else now.year + 1
-                
-                new_period_name = f"{next_year}-{next_month:02d}"
-                
-                # Verificar si ya existe el período
-                existing_period = session.exec(
-                    sqlmodel.select(Periods).where(Periods.name == new_period_name)
-                ).first()
-                
-                if existing_period:
-                    print(f"⚠️  Período {new_period_name} ya existe (ID: {existing_period.id})")
-                    new_period = existing_period
-                    users_reset = 0
-                else:
-                    new_period = Periods(
-                        name=new_period_name,
-                        description=f"Período {new_period_name}",
-                        starts_on=now,
-                        ends_on=datetime(next_year, next_month, 28, 23, 59, 59, tzinfo=timezone.utc)
-                    )
-                    
-                    session.add(new_period)
-                    session.flush()
-                    
-                    print(f"✨ Nuevo período creado: {new_period.name} (ID: {new_period.id})")
-                    
-                    # 6. Resetear TODOS los usuarios para el nuevo período
-                    if new_period.id:
-                        users_reset = PeriodResetService.reset_all_users_for_new_period(
-                            session, new_period.id
-                        )
-                    else:
-                        users_reset = 0
-                
-                session.commit()
-                
                 # Guardar resultados
                 self.commission_results = {
                     "closed_period": current_period.name,
-                    "new_period": new_period.name,
+                    "new_period": new_period_name,
                     "match_bonuses": 0,
                     "auto_bonuses": 0,
                     "commissions_deposited": deposited_count,
                     "commissions_failed": failed_count,
+                    "users_reset": users_reset,
                     "total_amount": round(deposited_total, 2)
                 }
                 
@@ -2037,7 +2002,7 @@ class AdminState(rx.State):
                 
                 self.show_success(
                     f"✅ Período cerrado: {current_period.name} | "
-                    f"Nuevo período: {new_period.name} | "
+                    f"Nuevo período: {new_period_name} | "
                     f"Comisiones depositadas: {deposited_count} (${deposited_total:.2f})"
                 )
                 
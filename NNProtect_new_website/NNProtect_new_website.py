@@ -41,6 +41,7 @@ from .status_bar import pwa_meta_tags, wrap_page_with_statusbar  # ← NUEVO IMP
 from rxconfig import config
 
 from .auth_service.auth_state import AuthState
+from .utils.async_db import AsyncDB
 
 from database import *
 from database import initialize_database
@@ -73,51 +74,46 @@ class DashboardState(rx.State):
     estimated_monthly_earnings: float = 0.0
     estimated_earnings_currency: str = "MXN"
     
-    def load_user_stats(self):
-        """Carga estadísticas de usuarios desde la base de datos."""
+    def _apply_user_counts(self, qualified_count: int, non_qualified_count: int):
+        """Asigna contadores y porcentajes de calificados / no calificados."""
+        self.qualified_count = qualified_count
+        self.non_qualified_count = non_qualified_count
+        self.total_users = qualified_count + non_qualified_count
+        
+        if self.total_users > 0:
+            self.qualified_percentage = (self.qualified_count / self.total_users) * 100
+            self.non_qualified_percentage = (self.non_qualified_count / self.total_users) * 100
+        else:
+            self.qualified_percentage = 0.0
+            self.non_qualified_percentage = 0.0
+    
+    async def load_user_stats(self):
+        """Carga estadísticas de usuarios (contadores materializados, sin contar users)."""
         try:
-            with rx.session() as session:
-                # Contar usuarios calificados
-                self.qualified_count = session.exec(
-                    sqlmodel.select(sqlmodel.func.count(Users.id))
-                    .where(Users.status == UserStatus.QUALIFIED)
-                ).first() or 0
-                
-                # Contar usuarios no calificados
-                self.non_qualified_count = session.exec(
-                    sqlmodel.select(sqlmodel.func.count(Users.id))
-                    .where(Users.status == UserStatus.NO_QUALIFIED)
-                ).first() or 0
-                
-                # Total de usuarios
-                self.total_users = self.qualified_count + self.non_qualified_count
-                
-                # Calcular porcentajes
-                if self.total_users > 0:
-                    self.qualified_percentage = (self.qualified_count / self.total_users) * 100
-                    self.non_qualified_percentage = (self.non_qualified_count / self.total_users) * 100
-                else:
-                    self.qualified_percentage = 0.0
-                    self.non_qualified_percentage = 0.0
-                
-                print(f"📊 Usuarios cargados - Calificados: {self.qualified_count}, No calificados: {self.non_qualified_count}")
+            from .mlm_service.user_status_counter_service import UserStatusCounterService
+            
+            counts = await AsyncDB.run_in_session(UserStatusCounterService.get_counts, label="dashboard.user_counts")
+            
+            self._apply_user_counts(counts[UserStatus.QUALIFIED.value], counts[UserStatus.NO_QUALIFIED.value])
+            print(f"📊 Usuarios cargados - Calificados: {self.qualified_count}, No calificados: {self.non_qualified_count}")
                 
         except Exception as e:
             print(f"❌ Error cargando estadísticas de usuarios: {e}")
             import traceback
             traceback.print_exc()
     
-    async def load_rank_progression(self):
+    async def load_dashboard(self, use_cache: bool = True):
         """
-        Carga la progresión del usuario hacia el siguiente rango.
+        Carga todo el dashboard con un solo snapshot (una consulta a BD).
         
-        ACTUALIZADO: Ahora también dispara el recálculo de ganancias estimadas
-        cuando detecta cambios en el PVG (principio reactivo).
+        Incluye PVG, progresión al siguiente rango, ganancias estimadas del
+        período (Alcance + Uninivel + Matching) y contadores de calificados.
+        El snapshot se cachea por miembro (DashboardSnapshotService.TTL_SECONDS).
+        
+        Principio DRY: Todos los loaders del dashboard leen del mismo snapshot.
         """
         try:
-            from database.user_rank_history import UserRankHistory
-            from database.ranks import Ranks
-            from datetime import datetime, timezone
+            from .mlm_service.dashboard_snapshot_service import DashboardSnapshotService
             
             # Obtener member_id desde AuthState (acceso async)
             auth_state = await self.get_state(AuthState)
@@ -130,203 +126,44 @@ class DashboardState(rx.State):
             
             member_id = profile_data["member_id"]
             
-            with rx.session() as session:
-                # Obtener PVG actual del usuario
-                user = session.exec(
-                    sqlmodel.select(Users).where(Users.member_id == member_id)
-                ).first()
-                
-                if not user:
-                    print(f"⚠️  Usuario {member_id} no encontrado")
-                    return
-                
-                # Guardar PVG anterior para detectar cambios
-                previous_pvg = self.current_pvg
-                self.current_pvg = user.pvg_cache or 0
-                
-                # Obtener rank_id actual del período corriendo (no por fecha, sino por period_id)
-                from database.periods import Periods
-                from .utils.timezone_mx import get_mexico_now
-                
-                now = get_mexico_now()
-                current_period = session.exec(
-                    sqlmodel.select(Periods)
-                    .where(
-                        (Periods.starts_on <= now) &
-                        (Periods.ends_on >= now)
-                    )
-                ).first()
-                
-                if not current_period:
-                    print(f"⚠️  No hay período activo")
-                    return
-                
-                current_rank_history = session.exec(
-                    sqlmodel.select(UserRankHistory)
-                    .where(
-                        (UserRankHistory.member_id == member_id) &
-                        (UserRankHistory.period_id == current_period.id)
-                    )
-                    .order_by(sqlmodel.desc(UserRankHistory.rank_id))
-                ).first()
-                
-                current_rank_id = current_rank_history.rank_id if current_rank_history else 1
-                
-                # Obtener siguiente rango
-                next_rank = session.exec(
-                    sqlmodel.select(Ranks)
-                    .where(Ranks.id == current_rank_id + 1)
-                    .order_by(Ranks.id)
-                ).first()
-                
-                if next_rank:
-                    self.next_rank_pvg = next_rank.pvg_required
-                    
-                    # Calcular porcentaje de progreso
-                    if self.next_rank_pvg > 0:
-                        self.rank_progress_percentage = int((self.current_pvg / self.next_rank_pvg) * 100)
-                    else:
-                        self.rank_progress_percentage = 0
-                else:
-                    # Usuario está en el rango máximo
-                    current_rank = session.exec(
-                        sqlmodel.select(Ranks).where(Ranks.id == current_rank_id)
-                    ).first()
-                    self.next_rank_pvg = current_rank.pvg_required if current_rank else 0
-                    self.rank_progress_percentage = 100
-                
-                print(f"📊 Progresión de rango - PVG: {self.current_pvg}/{self.next_rank_pvg} ({self.rank_progress_percentage:.1f}%)")
-                
-                # ✅ NUEVO: Si el PVG cambió, recalcular ganancias estimadas automáticamente
-                if self.current_pvg != previous_pvg:
-                    print(f"🔄 PVG cambió de {previous_pvg} a {self.current_pvg} - Recalculando ganancias...")
-                    await self.load_estimated_monthly_earnings()
+            snapshot = await AsyncDB.run_in_session(
+                DashboardSnapshotService.get_snapshot, member_id, use_cache=use_cache, label="dashboard.snapshot"
+            )
+            
+            if not snapshot:
+                print(f"⚠️  Usuario {member_id} no encontrado")
+                return
+            
+            self.current_pvg = snapshot["pvg"]
+            self.next_rank_pvg = snapshot["next_rank_pvg"]
+            self.rank_progress_percentage = snapshot["rank_progress_percentage"]
+            self.estimated_monthly_earnings = snapshot["estimated_monthly_earnings"]
+            self.estimated_earnings_currency = snapshot["currency"]
+            self._apply_user_counts(snapshot["qualified_count"], snapshot["non_qualified_count"])
+            
+            if snapshot["period_id"] is None:
+                print(f"⚠️  No hay período activo")
+            
+            print(f"📊 Progresión de rango - PVG: {self.current_pvg}/{self.next_rank_pvg} ({self.rank_progress_percentage:.1f}%)")
+            print(f"💰 Proyección mensual: ${self.estimated_monthly_earnings:,.2f} {self.estimated_earnings_currency}")
                 
         except Exception as e:
-            print(f"❌ Error cargando progresión de rango: {e}")
+            print(f"❌ Error cargando dashboard: {e}")
             import traceback
             traceback.print_exc()
     
+    async def load_rank_progression(self):
+        """Carga la progresión del usuario hacia el siguiente rango (desde el snapshot)."""
+        await self.load_dashboard()
+    
     async def load_estimated_monthly_earnings(self):
         """
-        Calcula la proyección REAL de ganancias mensuales.
-        
-        ESTRATEGIA SIMPLE (Principio KISS de Adrian):
-        1. Sumar TODAS las comisiones YA CALCULADAS del período
-        2. Esto incluye Uninivel, Matching y Alcance que ya están en BD
+        Proyección de ganancias mensuales (desde el snapshot).
         
-        La ventaja: NO re-calcular, solo mostrar lo que YA existe.
-        Si quieres proyección futura, las comisiones deben calcularse primero.
-        
-        ACTUALIZADO: Retorna $0 si PVG=0 (cuando los usuarios fueron reseteados).
-        
-        Arquitectura: Adrian (KISS) + Giovanni (QA Financial)
+        Suma las comisiones YA CALCULADAS del período (Uninivel, Matching y
+        Alcance); $0 si PVG=0 (usuarios reseteados).
         """
-        try:
-            from database.comissions import Commissions, BonusType
-            from database.periods import Periods
-            from .mlm_service.exchange_service import ExchangeService
-            
-            # Obtener member_id desde AuthState
-            auth_state = await self.get_state(AuthState)
-            profile_data = auth_state.profile_data
-            
-            if not isinstance(profile_data, dict) or "member_id" not in profile_data:
-                print("⚠️  No se pudo obtener member_id del usuario")
-                return
-            
-            member_id = profile_data["member_id"]
-            
-            with rx.session() as session:
-                # Obtener usuario para moneda y PVG
-                user = session.exec(
-                    sqlmodel.select(Users).where(Users.member_id == member_id)
-                ).first()
-                
-                if not user:
-                    print(f"⚠️  Usuario {member_id} no encontrado")
-                    return
-                
-                # ✅ Si el PVG está en 0, las ganancias deben ser $0 (periodo reseteado)
-                if (user.pvg_cache or 0) == 0:
-                    self.estimated_monthly_earnings = 0.0
-                    self.estimated_earnings_currency = ExchangeService.get_country_currency(user.country_cache or "MX")
-                    print(f"📊 Ganancias estimadas: $0.00 (PVG=0, usuario reseteado)")
-                    return
-                
-                self.estimated_earnings_currency = ExchangeService.get_country_currency(user.country_cache or "MX")
-                
-                # Obtener período actual
-                from .utils.timezone_mx import get_mexico_now
-                now = get_mexico_now()
-                current_period = session.exec(
-                    sqlmodel.select(Periods)
-                    .where(
-                        (Periods.starts_on <= now) &
-                        (Periods.ends_on >= now)
-                    )
-                ).first()
-                
-                if not current_period:
-                    print(f"⚠️  No hay período activo")
-                    self.estimated_monthly_earnings = 0.0
-                    return
-                
-                # Sumar TODAS las comisiones del período (Uninivel + Matching + Alcance)
-                total_earnings = session.exec(
-                    sqlmodel.select(sqlmodel.func.sum(Commissions.amount_converted))
-                    .where(
-                        (Commissions.member_id == member_id) &
-                        (Commissions.period_id == current_period.id) &
-                        (Commissions.bonus_type.in_([
-                            BonusType.BONO_UNINIVEL.value,
-                            BonusType.BONO_MATCHING.value,
-                            BonusType.BONO_ALCANCE.value
-                        ]))
-                    )
-                ).first()
-                
-                self.estimated_monthly_earnings = float(total_earnings) if total_earnings else 0.0
-                
-                # Desglose por tipo de bono (para debug)
-                bonos_alcance = session.exec(
-                    sqlmodel.select(sqlmodel.func.sum(Commissions.amount_converted))
-                    .where(
-                        (Commissions.member_id == member_id) &
-                        (Commissions.period_id == current_period.id) &
-                        (Commissions.bonus_type == BonusType.BONO_ALCANCE.value)
-                    )
-                ).first() or 0.0
-                
-                bonos_uninivel = session.exec(
-                    sqlmodel.select(sqlmodel.func.sum(Commissions.amount_converted))
-                    .where(
-                        (Commissions.member_id == member_id) &
-                        (Commissions.period_id == current_period.id) &
-                        (Commissions.bonus_type == BonusType.BONO_UNINIVEL.value)
-                    )
-                ).first() or 0.0
-                
-                bonos_matching = session.exec(
-                    sqlmodel.select(sqlmodel.func.sum(Commissions.amount_converted))
-                    .where(
-                        (Commissions.member_id == member_id) &
-                        (Commissions.period_id == current_period.id) &
-                        (Commissions.bonus_type == BonusType.BONO_MATCHING.value)
-                    )
-                ).first() or 0.0
-                
-                print(f"💰 Proyección mensual (comisiones calculadas):")
-                print(f"   Bonos Alcance:  ${bonos_alcance:,.2f}")
-                print(f"   Bonos Uninivel: ${bonos_uninivel:,.2f}")
-                print(f"   Bonos Matching: ${bonos_matching:,.2f}")
-                print(f"   TOTAL:          ${self.estimated_monthly_earnings:,.2f} {self.estimated_earnings_currency}")
-                
-        except Exception as e:
-            print(f"❌ Error calculando proyección de ganancias: {e}")
-            import traceback
-            traceback.print_exc()
-            self.estimated_monthly_earnings = 0.0
+        await self.load_dashboard()
     
     async def refresh_dashboard_data(self):
         """
@@ -334,37 +171,17 @@ class DashboardState(rx.State):
         
         Este método debe ser llamado cada vez que cambien los PVG del usuario,
         sin importar cuánto sea el cambio (0→1, 293→293.1, etc.).
-        
-        PATRONES APLICADOS:
-        - Reactivo: Responde automáticamente a cambios de datos
-        - KISS: Simplemente llama a los métodos existentes
-        - DRY: Reutiliza load_rank_progression y load_estimated_monthly_earnings
+        Ignora el snapshot cacheado y lo reemplaza con uno recién leído.
         
         CASOS DE USO:
         - Después de crear una orden (PVG aumenta)
         - Después de confirmar pago (PVG se actualiza)
         - Después de cualquier actualización manual de PVG
         - Después de reset de período (PVG vuelve a 0)
-        
-        Arquitectura: Adrian (KISS) + Giovanni (Reactivo)
         """
-        try:
-            print("🔄 Refrescando datos del dashboard...")
-            
-            # 1. Recargar progresión de rango (incluye PVG actual)
-            await self.load_rank_progression()
-            
-            # 2. Recargar ganancias estimadas (se dispara automáticamente si PVG cambió)
-            # Nota: load_rank_progression ya llama a load_estimated_monthly_earnings si detecta cambio
-            # pero lo llamamos explícitamente aquí por si acaso
-            await self.load_estimated_monthly_earnings()
-            
-            print("✅ Dashboard refrescado correctamente")
-            
-        except Exception as e:
-            print(f"❌ Error refrescando dashboard: {e}")
-            import traceback
-            traceback.print_exc()
+        print("🔄 Refrescando datos del dashboard...")
+        await self.load_dashboard(use_cache=False)
+        print("✅ Dashboard refrescado correctamente")
 
 
 def index() -> rx.Component:
@@ -983,9 +800,7 @@ def index() -> rx.Component:
         width="100%",                  # Ancho de la ventana
         on_mount=[
             AuthState.load_user_from_token,
-            DashboardState.load_user_stats,
-            DashboardState.load_rank_progression,
-            DashboardState.load_estimated_monthly_earnings
+            DashboardState.load_dashboard
         ],
     )
 
@@ -13,11 +13,14 @@ import os
 import random
 import asyncio
 import re
+import threading
+import time
 from typing import Optional, Dict, Any, List
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from dotenv import load_dotenv
 
 # Timezone utilities
+from ..utils.async_db import AsyncDB
 from ..utils.timezone_mx import get_mexico_now
 
 # Database imports
@@ -34,6 +37,7 @@ from database.usertreepaths import UserTreePath
 # Importar nuevos managers para Supabase
 from .supabase_auth_manager import SupabaseAuthManager
 from ..mlm_service.mlm_user_manager import MLMUserManager
+from ..mlm_service.profile_cache import ProfileCache
 
 
 @dataclass
@@ -62,20 +66,27 @@ class AuthenticationManager:
     @classmethod
     def create_jwt_token(cls, user: Users) -> str:
         """Crea un JWT token para el usuario autenticado."""
+        return cls.create_jwt_token_for(user.id, user.first_name, user.last_name)
+
+    @classmethod
+    def create_jwt_token_for(cls, user_id: Optional[int], first_name: Optional[str], last_name: Optional[str]) -> str:
+        """Crea el JWT con datos ya cargados (el login no vuelve a leer Users)."""
         try:
             jwt_secret_key = cls.get_jwt_secret()
             print(f"🔑 Secret key para encode (primeros 20 chars): {jwt_secret_key[:20]}...")
             
-            user_id = int(user.id) if user.id is not None else 0
-            username = f"{user.first_name} {user.last_name}".strip() if user.first_name else "unknown"
+            user_id = int(user_id) if user_id is not None else 0
+            username = f"{first_name} {last_name}".strip() if first_name else "unknown"
             
             # Convertir datetime a timestamp Unix (segundos desde epoch)
-            exp_datetime = get_mexico_now() + datetime.timedelta(minutes=60)
+            issued_datetime = get_mexico_now()
+            exp_datetime = issued_datetime + datetime.timedelta(minutes=60)
             exp_timestamp = int(exp_datetime.timestamp())
             
             login_token = {
                 "id": user_id,
                 "username": username,
+                "iat": int(issued_datetime.timestamp()),  # Identifica la sesión (llave del ProfileCache)
                 "exp": exp_timestamp,  # ✅ Unix timestamp en lugar de datetime
             }
             
@@ -529,6 +540,149 @@ class RegistrationManager:
             raise
 
 
+@dataclass
+class LoginResult:
+    """Resultado del pipeline de login: datos para el State y métricas por fase."""
+    success: bool
+    message: str = ""
+    supabase_user_data: Optional[Dict[str, Any]] = None
+    user_data: Optional[Dict[str, Any]] = None
+    token: str = ""
+    token_issued_at: Optional[int] = None
+    metrics: Dict[str, Any] = field(default_factory=dict)
+
+
+class LoginPipeline:
+    """
+    Pipeline de login con fases independientes en paralelo.
+
+    1. asyncio.gather: Supabase Auth ∥ prefetch del perfil MLM por email
+       (perfil, rangos, wallet y sponsor) → tarda ~max(auth, BD), no la suma
+    2. mlm_fallback: solo si el prefetch no es del usuario autenticado
+       (email_cache distinto o vacío) se carga por supabase_user_id
+    3. jwt: con los datos ya cargados, sin volver a leer Users
+
+    El prefetch no se expone si la autenticación falla. Cada fase se mide en
+    LoginResult.metrics y se acumula por proceso en get_stats().
+
+    Principio POO: Encapsula el orden de las fases, su medición y las
+    dependencias externas (cliente de Supabase y sesión de BD).
+    """
+
+    _stats: Dict[str, Dict[str, float]] = {}
+    _stats_lock = threading.Lock()
+
+    def __init__(self, auth_client=None, session_factory=None):
+        """
+        Args:
+            auth_client: Cliente de Supabase alterno (ej. LocalSupabaseClient)
+            session_factory: Fábrica de sesiones de BD (default rx.session)
+        """
+        self.auth_client = auth_client
+        self.session_factory = session_factory or rx.session
+
+    async def run(self, email: str, password: str) -> LoginResult:
+        """
+        Autentica y carga los datos de sesión.
+
+        Returns:
+            LoginResult (success False con mensaje para el usuario si falla)
+        """
+        started_at = time.perf_counter()
+        steps: Dict[str, float] = {}
+
+        async def timed(step: str, awaitable):
+            step_started = time.perf_counter()
+            try:
+                return await awaitable
+            finally:
+                steps[step] = time.perf_counter() - step_started
+
+        # ⚡ FASE 1: Supabase Auth y prefetch MLM en paralelo
+        (success, message, supabase_user_data), prefetched = await asyncio.gather(
+            timed("supabase_auth", SupabaseAuthManager.sign_in_user(email, password, client=self.auth_client)),
+            timed("profile_prefetch", self._prefetch_profile(email)),
+        )
+
+        if not success or not supabase_user_data:
+            return self._finish(LoginResult(False, message or "Credenciales incorrectas"), steps, started_at)
+
+        supabase_user_id = supabase_user_data.get("id")
+        if not supabase_user_id:
+            return self._finish(LoginResult(False, "Error al obtener ID de usuario de Supabase"), steps, started_at)
+
+        # ⚡ FASE 2: Solo si el prefetch no corresponde al usuario autenticado
+        prefetch_hit = bool(prefetched) and prefetched.get("supabase_user_id") == supabase_user_id
+        user_data = prefetched if prefetch_hit else await timed(
+            "mlm_fallback",
+            self._load(MLMUserManager._load_user_data_sync, supabase_user_id, label="login.mlm_fallback")
+        )
+
+        if not user_data:
+            return self._finish(LoginResult(False, "Usuario no encontrado en el sistema MLM"), steps, started_at, prefetch_hit)
+
+        # ⚡ FASE 3: JWT con los datos ya cargados
+        step_started = time.perf_counter()
+        token = AuthenticationManager.create_jwt_token_for(user_data["id"], user_data["firstname"], user_data["lastname"])
+        token_issued_at = jwt.decode(token, options={"verify_signature": False}).get("iat")
+        steps["jwt"] = time.perf_counter() - step_started
+
+        return self._finish(
+            LoginResult(True, "Login exitoso", supabase_user_data, user_data, token, token_issued_at),
+            steps, started_at, prefetch_hit
+        )
+
+    async def _load(self, fn, *args, label: str):
+        """fn(session, *args) en el pool de AsyncDB con una sesión de session_factory."""
+        def _with_session():
+            with self.session_factory() as session:
+                return fn(session, *args)
+
+        return await AsyncDB.run(_with_session, label=label)
+
+    async def _prefetch_profile(self, email: str) -> Dict[str, Any]:
+        """El prefetch es una optimización: si falla, el login sigue por supabase_user_id."""
+        try:
+            return await self._load(MLMUserManager._load_user_data_by_email_sync, email, label="login.profile_prefetch")
+        except Exception as e:
+            print(f"⚠️ Prefetch de login falló (se usará la carga por supabase_user_id): {e}")
+            return {}
+
+    @classmethod
+    def _finish(cls, result: LoginResult, steps: Dict[str, float], started_at: float, prefetch_hit: bool = False) -> LoginResult:
+        total = time.perf_counter() - started_at
+        result.metrics = {
+            "steps": dict(steps),
+            "total_seconds": total,
+            # Tiempo ahorrado contra ejecutar las fases una tras otra
+            "parallel_savings_seconds": max(0.0, sum(steps.values()) - total),
+            "prefetch_hit": prefetch_hit,
+            "success": result.success,
+        }
+
+        with cls._stats_lock:
+            for step, elapsed in list(steps.items()) + [("total", total)]:
+                stats = cls._stats.setdefault(step, {"calls": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+                stats["calls"] += 1
+                stats["total_seconds"] += elapsed
+                stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+
+        step_summary = ", ".join(f"{step}={elapsed:.3f}s" for step, elapsed in steps.items())
+        print(f"📊 Login {'OK' if result.success else 'FALLIDO'} en {total:.3f}s ({step_summary}; prefetch_hit={prefetch_hit})")
+        return result
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Dict[str, float]]:
+        """Métricas por fase (y total): calls, total_seconds, max_seconds."""
+        with cls._stats_lock:
+            return {step: dict(stats) for step, stats in cls._stats.items()}
+
+    @classmethod
+    def reset_stats(cls) -> None:
+        with cls._stats_lock:
+            cls._stats.clear()
+
+
 class AuthState(rx.State):
     """Estado de autenticación principal con arquitectura limpia."""
     
@@ -765,159 +919,68 @@ class AuthState(rx.State):
         🔧 FIX: Marcado como background=True para evitar LockExpiredError
         en operaciones de autenticación que toman >10s (queries a Supabase + BD MLM).
         
-        ⏱️  PROFILING: Agregados timestamps para identificar bottlenecks.
+        ⚡ LoginPipeline: Supabase Auth y la carga MLM corren en paralelo;
+        las métricas por fase quedan en LoginPipeline.get_stats().
         """
-        import time
-        from datetime import datetime
-        
-        def _timestamp():
-            return datetime.now().strftime("%H:%M:%S.%f")[:-3]
-        
-        t_start = time.time()
-        print(f"\n{'='*80}")
-        print(f"⏱️  [{_timestamp()}] LOGIN_USER - INICIO")
-        print(f"{'='*80}\n")
-        
         async with self:
             self.is_loading = True
             self.error_message = ""
             yield
         
-        t_after_init = time.time()
-        print(f"⏱️  [{_timestamp()}] Fase 0: Init state = {t_after_init - t_start:.3f}s")
-        
         try:
-            await asyncio.sleep(0.1)
-            
             # ✅ VALIDACIÓN BÁSICA - ahora usa email en lugar de username
             async with self:
                 login_identifier = self.email or self.username  # Backward compatibility
+                password = self.password
             
-            if not login_identifier or not self.password:
+            if not login_identifier or not password:
                 async with self:
                     self.error_message = "El email y la contraseña no pueden estar vacíos."
                     self.is_loading = False
                 return
 
-            # ⚡ FASE 1: AUTENTICAR CON SUPABASE
-            t_before_supabase = time.time()
-            print(f"⏱️  [{_timestamp()}] Fase 1: Supabase Auth - INICIO")
-            
-            success, message, supabase_user_data = await SupabaseAuthManager.sign_in_user(
-                login_identifier, self.password
-            )
-            
-            t_after_supabase = time.time()
-            supabase_time = t_after_supabase - t_before_supabase
-            print(f"✅ [{_timestamp()}] Fase 1: Supabase Auth - COMPLETADO en {supabase_time:.3f}s")
-            
-            if not success or not supabase_user_data:
-                async with self:
-                    self.error_message = message or "Credenciales incorrectas"
-                    self.is_loading = False
-                return
-            
-            supabase_user_id = supabase_user_data.get('id')
-            if not supabase_user_id:
+            result = await LoginPipeline().run(login_identifier, password)
+
+            if not result.success:
                 async with self:
-                    self.error_message = "Error al obtener ID de usuario de Supabase"
+                    self.error_message = result.message
                     self.is_loading = False
                 return
+
+            complete_user_data = result.user_data
+            supabase_user_data = result.supabase_user_data
+            logged_user_data = {
+                "id": complete_user_data["id"],
+                "username": f"{complete_user_data['firstname']} {complete_user_data['lastname']}".strip(),
+                "email": supabase_user_data.get('email', ''),
+                "member_id": complete_user_data["member_id"],
+                "status": complete_user_data["status"],
+                "supabase_user_id": supabase_user_data.get('id'),
+            }
+
+            # La primera página (on_mount → load_user_from_token) ya encuentra el perfil cacheado
+            ProfileCache.put(
+                complete_user_data["id"], result.token_issued_at,
+                {"logged_user_data": logged_user_data, "profile_data": complete_user_data}
+            )
             
-            # ⚡ FASE 2: CARGAR DATOS MLM (versión async)
-            t_before_mlm = time.time()
-            print(f"⏱️  [{_timestamp()}] Fase 2: MLM Data Load - INICIO")
-            
-            try:
-                complete_user_data = await MLMUserManager.load_complete_user_data_async(supabase_user_id)
-                
-                t_after_mlm = time.time()
-                mlm_time = t_after_mlm - t_before_mlm
-                print(f"✅ [{_timestamp()}] Fase 2: MLM Data Load - COMPLETADO en {mlm_time:.3f}s")
-                
-                if not complete_user_data:
-                    async with self:
-                        self.error_message = "Usuario no encontrado en el sistema MLM"
-                        self.is_loading = False
-                    return
-                
-                # ⚡ FASE 3: GENERAR TOKEN JWT
-                t_before_jwt = time.time()
-                print(f"⏱️  [{_timestamp()}] Fase 3: JWT Generation - INICIO")
-                
-                with rx.session() as session:
-                    user = session.exec(
-                        sqlmodel.select(Users).where(Users.id == complete_user_data["id"])
-                    ).first()
-                    
-                    if not user:
-                        async with self:
-                            self.error_message = "Error al obtener usuario para generar token"
-                            self.is_loading = False
-                        return
-                    
-                    # Generar token JWT
-                    token = AuthenticationManager.create_jwt_token(user)
-                
-                t_after_jwt = time.time()
-                jwt_time = t_after_jwt - t_before_jwt
-                print(f"✅ [{_timestamp()}] Fase 3: JWT Generation - COMPLETADO en {jwt_time:.3f}s")
-                
-                # ⚡ FASE 4: ESTABLECER SESIÓN
-                t_before_session = time.time()
-                print(f"⏱️  [{_timestamp()}] Fase 4: Session Setup - INICIO")
-                
-                async with self:
-                    self.is_logged_in = True
-                    self.auth_token = token  # 🔑 GUARDAR TOKEN EN COOKIE
-                    self.logged_user_data = {
-                        "id": complete_user_data["id"],
-                        "username": f"{complete_user_data['firstname']} {complete_user_data['lastname']}".strip(),
-                        "email": supabase_user_data.get('email', ''),
-                        "member_id": complete_user_data["member_id"],
-                        "status": complete_user_data["status"],
-                        "supabase_user_id": supabase_user_data.get('id'),
-                    }
-                    
-                    # Cargar datos extendidos del perfil
-                    self.profile_data = complete_user_data
-                    
-                    print(f"✅ Token guardado en cookie (primeros 50 chars): {token[:50]}...")
-                    print(f"✅ is_logged_in establecido a: {self.is_logged_in}")
-                    print(f"✅ profile_data keys: {list(self.profile_data.keys())}")
-                    
-                    self.is_loading = False
-                    yield rx.redirect("/dashboard")
-                
-                t_after_session = time.time()
-                session_time = t_after_session - t_before_session
-                print(f"✅ [{_timestamp()}] Fase 4: Session Setup - COMPLETADO en {session_time:.3f}s")
-                
-                # RESUMEN DE TIEMPOS
-                t_end = time.time()
-                total_time = t_end - t_start
+            async with self:
+                self.is_logged_in = True
+                self.auth_token = result.token  # 🔑 GUARDAR TOKEN EN COOKIE
+                self.logged_user_data = logged_user_data
                 
-                print(f"\n{'='*80}")
-                print(f"📊 RESUMEN DE TIEMPOS")
-                print(f"{'='*80}")
-                print(f"Fase 0 - Init:            {(t_after_init - t_start):.3f}s")
-                print(f"Fase 1 - Supabase Auth:   {supabase_time:.3f}s ({supabase_time/total_time*100:.1f}%)")
-                print(f"Fase 2 - MLM Data:        {mlm_time:.3f}s ({mlm_time/total_time*100:.1f}%)")
-                print(f"Fase 3 - JWT:             {jwt_time:.3f}s ({jwt_time/total_time*100:.1f}%)")
-                print(f"Fase 4 - Session:         {session_time:.3f}s ({session_time/total_time*100:.1f}%)")
-                print(f"{'-'*80}")
-                print(f"TOTAL:                    {total_time:.3f}s")
-                print(f"{'='*80}\n")
+                # Cargar datos extendidos del perfil
+                self.profile_data = complete_user_data
                 
-                # ⚠️ NO usar 'return' aquí - dejar que el evento termine naturalmente
-                # para que Reflex sincronice la cookie con el navegador
+                print(f"✅ Token guardado en cookie (primeros 50 chars): {result.token[:50]}...")
+                print(f"✅ is_logged_in establecido a: {self.is_logged_in}")
+                print(f"✅ profile_data keys: {list(self.profile_data.keys())}")
                 
-            except Exception as mlm_error:
-                print(f"❌ Error cargando datos MLM: {mlm_error}")
-                async with self:
-                    self.error_message = "Error cargando datos del usuario"
-                    self.is_loading = False
-                return
+                self.is_loading = False
+                yield rx.redirect("/dashboard")
+            
+            # ⚠️ NO usar 'return' aquí - dejar que el evento termine naturalmente
+            # para que Reflex sincronice la cookie con el navegador
         
         except Exception as e:
             print(f"❌ ERROR login híbrido: {e}")
@@ -1121,7 +1184,7 @@ class AuthState(rx.State):
         print("DEBUG: ERROR - No hay sponsor válido")
 
     @rx.event
-    def load_user_from_token(self):
+    async def load_user_from_token(self):
         """Carga datos del usuario desde token."""
         print("\n" + "="*80)
         print("🔐 LOAD_USER_FROM_TOKEN EJECUTÁNDOSE")
@@ -1148,58 +1211,40 @@ class AuthState(rx.State):
             return
 
         try:
-            print(f"🔍 Buscando usuario con ID {user_id} en BD...")
-            with rx.session() as session:
-                user = session.exec(
-                    sqlmodel.select(Users).where(Users.id == user_id)
-                ).first()
-
-                if not user:
-                    print(f"❌ ERROR: Usuario con ID {user_id} no encontrado en BD")
-                    self.is_logged_in = False
-                    self.logged_user_data = {}
-                    self.profile_data = {}
-                    print("="*80 + "\n")
-                    return
+            # Tokens emitidos antes de incluir iat: exp también es único por login
+            issued_at = payload.get("iat") or payload.get("exp")
+            user_data = ProfileCache.get(user_id, issued_at)
 
-                print(f"✅ Usuario encontrado: {user.first_name} {user.last_name} (Member ID: {user.member_id})")
-                
-                self.is_logged_in = True
-                print(f"🔓 is_logged_in establecido a: {self.is_logged_in}")
-                
-                self.logged_user_data = {
-                    "id": user.id,
-                    "username": f"{user.first_name} {user.last_name}".strip(),
-                    "email": user.email_cache,
-                    "member_id": user.member_id,
-                    "status": user.status.value if hasattr(user.status, 'value') else str(user.status),
-                }
-                print(f"👤 logged_user_data cargado: {self.logged_user_data}")
-
-                # Cargar datos completos del perfil incluyendo rangos y datos MLM
-                print(f"📋 Supabase User ID: {user.supabase_user_id}")
-                if user.supabase_user_id:
-                    print(f"🔄 Cargando datos MLM completos...")
-                    complete_data = MLMUserManager.load_complete_user_data(user.supabase_user_id)
-                    if complete_data:
-                        self.profile_data = complete_data
-                        print(f"✅ profile_data cargado con datos MLM: {list(complete_data.keys())}")
-                    else:
-                        print(f"⚠️  No se pudieron cargar datos MLM, usando fallback")
-                        # Fallback: cargar datos básicos manualmente
-                        self.profile_data = self._build_basic_profile_data(session, user)
-                        print(f"✅ profile_data cargado con fallback: {list(self.profile_data.keys())}")
-                else:
-                    print(f"⚠️  Usuario sin supabase_user_id, usando fallback")
-                    # Fallback para usuarios sin supabase_user_id
-                    self.profile_data = self._build_basic_profile_data(session, user)
-                    print(f"✅ profile_data cargado con fallback: {list(self.profile_data.keys())}")
-                
-                print(f"\n🎯 RESULTADO FINAL:")
-                print(f"   • is_logged_in: {self.is_logged_in}")
-                print(f"   • member_id: {self.logged_user_data.get('member_id')}")
-                print(f"   • profile_data keys: {list(self.profile_data.keys()) if self.profile_data else 'VACÍO'}")
+            if user_data:
+                print(f"⚡ Perfil de {user_id} servido desde ProfileCache (sin consultas)")
+            else:
+                print(f"🔍 Buscando usuario con ID {user_id} en BD...")
+                user_data = await AsyncDB.run_in_session(
+                    self._load_token_user_data, user_id, label="auth.load_user_from_token"
+                )
+                if user_data:
+                    ProfileCache.put(user_id, issued_at, user_data)
+
+            if not user_data:
+                print(f"❌ ERROR: Usuario con ID {user_id} no encontrado en BD")
+                self.is_logged_in = False
+                self.logged_user_data = {}
+                self.profile_data = {}
                 print("="*80 + "\n")
+                return
+
+            self.is_logged_in = True
+            print(f"🔓 is_logged_in establecido a: {self.is_logged_in}")
+
+            self.logged_user_data = user_data["logged_user_data"]
+            self.profile_data = user_data["profile_data"]
+            print(f"👤 logged_user_data cargado: {self.logged_user_data}")
+            
+            print(f"\n🎯 RESULTADO FINAL:")
+            print(f"   • is_logged_in: {self.is_logged_in}")
+            print(f"   • member_id: {self.logged_user_data.get('member_id')}")
+            print(f"   • profile_data keys: {list(self.profile_data.keys()) if self.profile_data else 'VACÍO'}")
+            print("="*80 + "\n")
 
         except Exception as e:
             print(f"❌ EXCEPTION en load_user_from_token: {e}")
@@ -1207,7 +1252,54 @@ class AuthState(rx.State):
             traceback.print_exc()
             print("="*80 + "\n")
 
-    def _build_basic_profile_data(self, session, user: Users) -> dict:
+    @classmethod
+    def _load_token_user_data(cls, session, user_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Lee de BD los datos de sesión del usuario del token.
+        Solo lee: no modifica el estado (corre en el pool de AsyncDB).
+
+        Returns:
+            Dict con logged_user_data y profile_data, o None si el usuario no existe
+        """
+        user = session.exec(
+            sqlmodel.select(Users).where(Users.id == user_id)
+        ).first()
+
+        if not user:
+            return None
+
+        print(f"✅ Usuario encontrado: {user.first_name} {user.last_name} (Member ID: {user.member_id})")
+
+        logged_user_data = {
+            "id": user.id,
+            "username": f"{user.first_name} {user.last_name}".strip(),
+            "email": user.email_cache,
+            "member_id": user.member_id,
+            "status": user.status.value if hasattr(user.status, 'value') else str(user.status),
+        }
+
+        # Cargar datos completos del perfil incluyendo rangos y datos MLM
+        print(f"📋 Supabase User ID: {user.supabase_user_id}")
+        profile_data = None
+        if user.supabase_user_id:
+            print(f"🔄 Cargando datos MLM completos...")
+            profile_data = MLMUserManager.load_complete_user_data(user.supabase_user_id)
+            if profile_data:
+                print(f"✅ profile_data cargado con datos MLM: {list(profile_data.keys())}")
+            else:
+                print(f"⚠️  No se pudieron cargar datos MLM, usando fallback")
+        else:
+            print(f"⚠️  Usuario sin supabase_user_id, usando fallback")
+
+        if not profile_data:
+            # Fallback: cargar datos básicos manualmente
+            profile_data = cls._build_basic_profile_data(session, user)
+            print(f"✅ profile_data cargado con fallback: {list(profile_data.keys())}")
+
+        return {"logged_user_data": logged_user_data, "profile_data": profile_data}
+
+    @staticmethod
+    def _build_basic_profile_data(session, user: Users) -> dict:
         """Construye datos básicos del perfil cuando no hay supabase_user_id."""
         current_month_rank = MLMUserManager.get_user_current_month_rank(session, user.member_id)
         highest_rank = MLMUserManager.get_user_highest_rank(session, user.member_id)
@@ -1229,10 +1321,10 @@ class AuthState(rx.State):
         }
 
     @rx.event
-    def check_login(self):
+    async def check_login(self):
         """Verifica estado de login basado en token."""
         if self.auth_token:
-            self.load_user_from_token()
+            await self.load_user_from_token()
         else:
             self.is_logged_in = False
             self.logged_user_data = {}
@@ -1257,6 +1349,9 @@ class AuthState(rx.State):
             # Continuar con logout local aunque falle Supabase
         
         # ✅ LIMPIAR ESTADO LOCAL
+        user_id = self.logged_user_data.get("id") if self.logged_user_data else None
+        if user_id:
+            ProfileCache.invalidate(user_ids=[user_id])
         self.auth_token = ""
         self.is_logged_in = False
         self.logged_user_data = {}
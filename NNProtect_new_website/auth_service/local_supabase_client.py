@@ -0,0 +1,110 @@
+"""
+Cliente local (en memoria) que imita supabase.auth para desarrollo y benchmarks sin red.
+
+Responde como el cliente oficial (response.user / response.session) y lanza
+"Invalid login credentials" igual que Supabase, así SupabaseAuthManager no
+necesita casos especiales. La latencia configurable permite medir el login
+con tiempos de red realistas sin depender de Supabase.
+
+Uso:
+    client = LocalSupabaseClient(latency_seconds=0.3)
+    client.add_user("user@test.com", "secreto", user_id="uuid-1", first_name="Ana")
+    await SupabaseAuthManager.sign_in_user("user@test.com", "secreto", client=client)
+
+También se activa para toda la app con SUPABASE_URL=local.
+
+Principios aplicados: KISS, POO
+"""
+
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+
+class LocalSupabaseAuth:
+    """
+    Sustituto de supabase.auth con usuarios en memoria.
+    Principio POO: Mismo contrato que el cliente oficial (respuestas y errores).
+    """
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self._users: Dict[str, Dict[str, Any]] = {}
+        self._current: Optional[SimpleNamespace] = None
+        self._lock = threading.Lock()
+
+    def add_user(self, email: str, password: str, user_id: Optional[str] = None, **metadata) -> str:
+        """Registra un usuario confirmado; regresa su id (UUID como en Supabase)."""
+        user_id = user_id or str(uuid.uuid4())
+        with self._lock:
+            self._users[email.strip().lower()] = {
+                "id": user_id,
+                "email": email.strip().lower(),
+                "password": password,
+                "user_metadata": dict(metadata),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+            }
+        return user_id
+
+    def _simulate_network(self) -> None:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+    def _response(self, record: Dict[str, Any]) -> SimpleNamespace:
+        user = SimpleNamespace(
+            id=record["id"],
+            email=record["email"],
+            user_metadata=dict(record["user_metadata"]),
+            created_at=record["created_at"],
+        )
+        session = SimpleNamespace(
+            access_token=f"local-{uuid.uuid4().hex}", expires_at=int(time.time()) + 3600, user=user
+        )
+        return SimpleNamespace(user=user, session=session)
+
+    def sign_in_with_password(self, credentials: Dict[str, str]) -> SimpleNamespace:
+        self._simulate_network()
+        with self._lock:
+            record = self._users.get(credentials.get("email", "").strip().lower())
+        if not record or record["password"] != credentials.get("password"):
+            raise Exception("Invalid login credentials")
+
+        response = self._response(record)
+        self._current = response.session
+        return response
+
+    def sign_up(self, credentials: Dict[str, Any]) -> SimpleNamespace:
+        self._simulate_network()
+        metadata = (credentials.get("options") or {}).get("data") or {}
+        with self._lock:
+            if credentials["email"].strip().lower() in self._users:
+                raise Exception("User already registered")
+        self.add_user(credentials["email"], credentials["password"], **metadata)
+        with self._lock:
+            record = self._users[credentials["email"].strip().lower()]
+        return self._response(record)
+
+    def sign_out(self) -> None:
+        self._current = None
+
+    def get_session(self) -> Optional[SimpleNamespace]:
+        return self._current
+
+    def get_user(self) -> Optional[SimpleNamespace]:
+        return SimpleNamespace(user=self._current.user) if self._current else None
+
+    def reset_password_email(self, email: str) -> None:
+        self._simulate_network()
+
+
+class LocalSupabaseClient:
+    """Cliente con la misma forma que supabase.Client (solo .auth)."""
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.auth = LocalSupabaseAuth(latency_seconds)
+
+    def add_user(self, email: str, password: str, user_id: Optional[str] = None, **metadata) -> str:
+        return self.auth.add_user(email, password, user_id=user_id, **metadata)
@@ -54,19 +54,25 @@ class SupabaseAuthManager:
             return False, f"Error de registro: {str(e)}", None
 
     @staticmethod
-    async def sign_in_user(email: str, password: str) -> Tuple[bool, str, Optional[Dict[str, Any]]]:
+    async def sign_in_user(email: str, password: str, client=None) -> Tuple[bool, str, Optional[Dict[str, Any]]]:
         """
         Inicia sesión en Supabase Auth.
         Implementación según documentación oficial.
         
+        La llamada HTTP del cliente es síncrona: corre en un hilo para no
+        bloquear el event loop (y poder ir en paralelo con la carga MLM).
+        
+        Args:
+            client: Cliente alterno (ej. LocalSupabaseClient); default el de Supabase
+        
         Returns: (success, message, user_data)
         """
         try:
             # Según la documentación oficial de Supabase
-            response = supabase.auth.sign_in_with_password({
-                "email": email,
-                "password": password
-            })
+            response = await asyncio.to_thread(
+                (client or supabase).auth.sign_in_with_password,
+                {"email": email, "password": password}
+            )
             
             if response.user:
                 user_data = {
@@ -5,6 +5,11 @@ from dotenv import load_dotenv
 load_dotenv()
 
 def get_supabase_client() -> Client:
+    if os.environ.get("SUPABASE_URL") == "local":
+        # Cliente en memoria para desarrollo / benchmarks sin red
+        from .local_supabase_client import LocalSupabaseClient
+        return LocalSupabaseClient(latency_seconds=float(os.environ.get("SUPABASE_LOCAL_LATENCY", "0")))
+
     is_production = (
         os.environ.get("SUPABASE_URL") == "prod" or 
         not os.path.exists(".env") or
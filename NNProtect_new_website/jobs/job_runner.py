@@ -0,0 +1,235 @@
+"""
+Ejecutor de jobs programados con lock distribuido e historial.
+Cada worker de Reflex/granian arranca su propio BackgroundScheduler; el lock
+por job_id evita ejecuciones simultáneas, y cada ejecución queda registrada en
+jobruns con el disparo programado (scheduled_for) al que corresponde. Un worker
+que toma el lock después de que otro ya completó ese disparo no lo repite.
+
+Principios aplicados: KISS, DRY, POO
+"""
+
+import hashlib
+import os
+import socket
+import time
+import uuid
+import sqlmodel
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy.exc import IntegrityError
+
+from database.job_runs import JobRuns, JobLocks, JobRunStatus
+
+
+class JobRunner:
+    """
+    Ejecutor POO de jobs con lock por job_id.
+    Principio POO: Encapsula lock, ejecución y registro de cada corrida.
+
+    - Postgres: pg_try_advisory_lock en una conexión dedicada durante el job
+      (se libera solo si el worker muere)
+    - Otros motores (SQLite): fila en joblocks con vencimiento
+    - Con scheduled_for, ya con el lock se busca una corrida COMPLETED del
+      mismo job_id y disparo; si existe, no se ejecuta (el lock solo evita
+      corridas simultáneas, no que un worker atrasado repita el disparo)
+    """
+
+    LOCK_TTL_SECONDS = 6 * 3600     # Vencimiento del lock de tabla (worker caído)
+    RECENT_RUNS_LIMIT = 20          # Ejecuciones que muestra el admin
+
+    WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+    @classmethod
+    def run(cls, job_id: str, func: Callable[..., Any], engine=None,
+            scheduled_for: Optional[datetime] = None, **job_kwargs) -> Any:
+        """
+        Ejecuta func si este worker obtiene el lock de job_id y registra la corrida.
+        Si otro worker tiene el lock, o ya completó el mismo disparo, no ejecuta nada.
+
+        Args:
+            job_id: Identificador del job (llave del lock)
+            func: Función del job; puede regresar un int o un dict con rows_affected
+            engine: Engine para lock e historial (default get_configured_engine())
+            scheduled_for: Hora programada del disparo (None = ejecución manual, sin deduplicar)
+            job_kwargs: Parámetros para func
+
+        Returns:
+            Resultado de func, o None si no se obtuvo el lock, el disparo ya se completó o falló
+        """
+        if engine is None:
+            from database.engine_config import get_configured_engine
+            engine = get_configured_engine()
+
+        with cls._job_lock(engine, job_id) as acquired:
+            if not acquired:
+                print(f"⏭️  Job {job_id} ya se está ejecutando en otro worker")
+                return None
+
+            scheduled_for = cls._as_naive_utc(scheduled_for)
+            if scheduled_for is not None and cls._slot_completed(engine, job_id, scheduled_for):
+                print(f"⏭️  Job {job_id} del disparo {scheduled_for:%Y-%m-%d %H:%M:%S} ya se completó")
+                return None
+
+            run = cls._start_run(engine, job_id, scheduled_for)
+            started = time.perf_counter()
+
+            try:
+                result = func(**job_kwargs)
+            except Exception as e:
+                cls._finish_run(engine, run, started, status=JobRunStatus.FAILED, error=str(e)[:500])
+                print(f"❌ Job {job_id} falló: {e}")
+                import traceback
+                traceback.print_exc()
+                return None
+
+            cls._finish_run(engine, run, started, status=JobRunStatus.COMPLETED, rows_affected=cls._rows_affected(result))
+            return result
+
+    @classmethod
+    def get_recent_runs(cls, session, limit: Optional[int] = None, job_id: Optional[str] = None) -> List[JobRuns]:
+        """
+        Últimas ejecuciones (más recientes primero).
+
+        Args:
+            session: Sesión de base de datos
+            limit: Máximo de ejecuciones (default RECENT_RUNS_LIMIT)
+            job_id: Filtrar por job (None = todos)
+        """
+        query = sqlmodel.select(JobRuns).order_by(JobRuns.started_at.desc(), JobRuns.id.desc())
+
+        if job_id is not None:
+            query = query.where(JobRuns.job_id == job_id)
+
+        return session.exec(query.limit(limit or cls.RECENT_RUNS_LIMIT)).all()
+
+    @staticmethod
+    def lock_key(job_id: str) -> int:
+        """Llave bigint estable del advisory lock (hash del job_id)."""
+        return int.from_bytes(hashlib.blake2b(job_id.encode(), digest_size=8).digest(), "big", signed=True)
+
+    @classmethod
+    @contextmanager
+    def _job_lock(cls, engine, job_id: str):
+        """Context manager que entrega True si se obtuvo el lock del job."""
+        if engine.dialect.name == "postgresql":
+            key = cls.lock_key(job_id)
+            with engine.connect() as connection:
+                acquired = connection.execute(
+                    sqlmodel.text("SELECT pg_try_advisory_lock(:key)"), {"key": key}
+                ).scalar()
+                connection.commit()  # El lock es de sesión: sobrevive al commit
+
+                try:
+                    yield bool(acquired)
+                finally:
+                    if acquired:
+                        connection.execute(sqlmodel.text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+                        connection.commit()
+            return
+
+        owner = cls._acquire_table_lock(engine, job_id)
+        try:
+            yield owner is not None
+        finally:
+            if owner:
+                cls._release_table_lock(engine, job_id, owner)
+
+    @classmethod
+    def _acquire_table_lock(cls, engine, job_id: str) -> Optional[str]:
+        """Inserta la fila de lock (la llave única hace de exclusión). Regresa el token o None."""
+        now = datetime.now(timezone.utc)
+        owner = f"{cls.WORKER_ID}:{uuid.uuid4().hex[:8]}"
+
+        with sqlmodel.Session(engine) as session:
+            session.execute(
+                sqlmodel.delete(JobLocks).where((JobLocks.job_id == job_id) & (JobLocks.expires_at < now))
+            )
+            session.add(JobLocks(
+                job_id=job_id, owner=owner, acquired_at=now,
+                expires_at=now + timedelta(seconds=cls.LOCK_TTL_SECONDS)
+            ))
+            try:
+                session.commit()
+            except IntegrityError:
+                session.rollback()
+                return None
+
+        return owner
+
+    @classmethod
+    def _release_table_lock(cls, engine, job_id: str, owner: str) -> None:
+        with sqlmodel.Session(engine) as session:
+            session.execute(
+                sqlmodel.delete(JobLocks).where((JobLocks.job_id == job_id) & (JobLocks.owner == owner))
+            )
+            session.commit()
+
+    @staticmethod
+    def _as_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+        """scheduled_for se guarda en UTC sin tzinfo (columna DateTime sin zona)."""
+        if value is None or value.tzinfo is None:
+            return value
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+    @classmethod
+    def _slot_completed(cls, engine, job_id: str, scheduled_for: datetime) -> bool:
+        """¿Hay una corrida COMPLETED del job para este disparo?"""
+        with sqlmodel.Session(engine) as session:
+            return session.exec(
+                sqlmodel.select(JobRuns.id).where(
+                    (JobRuns.job_id == job_id) &
+                    (JobRuns.scheduled_for == scheduled_for) &
+                    (JobRuns.status == JobRunStatus.COMPLETED.value)
+                ).limit(1)
+            ).first() is not None
+
+    @classmethod
+    def _start_run(cls, engine, job_id: str, scheduled_for: Optional[datetime] = None) -> JobRuns:
+        with sqlmodel.Session(engine, expire_on_commit=False) as session:
+            run = JobRuns(
+                job_id=job_id, worker=cls.WORKER_ID, scheduled_for=scheduled_for,
+                started_at=datetime.now(timezone.utc)
+            )
+            session.add(run)
+            session.commit()
+        return run
+
+    @classmethod
+    def _finish_run(cls, engine, run: JobRuns, started: float, status: JobRunStatus,
+                    rows_affected: int = 0, error: Optional[str] = None) -> None:
+        run.status = status.value
+        run.rows_affected = rows_affected
+        run.error = error
+        run.duration_seconds = time.perf_counter() - started
+        run.finished_at = datetime.now(timezone.utc)
+
+        with sqlmodel.Session(engine, expire_on_commit=False) as session:
+            session.add(run)
+            session.commit()
+
+        print(f"🗂️  Job {run.job_id}: {run.status} en {run.duration_seconds:.2f}s ({run.rows_affected} filas)")
+
+    @staticmethod
+    def _rows_affected(result: Any) -> int:
+        """Filas afectadas según lo que regresa el job (int o dict con rows_affected)."""
+        if isinstance(result, bool) or result is None:
+            return 0
+        if isinstance(result, int):
+            return result
+        if isinstance(result, dict):
+            return int(result.get("rows_affected", 0))
+        return 0
+
+    @staticmethod
+    def run_to_dict(run: JobRuns) -> Dict[str, Any]:
+        """Fila de historial lista para el admin."""
+        return {
+            "job_id": run.job_id,
+            "status": run.status,
+            "worker": run.worker,
+            "started_at": run.started_at.strftime("%d/%m/%Y %H:%M:%S") if run.started_at else "",
+            "duration_seconds": round(run.duration_seconds, 2),
+            "rows_affected": run.rows_affected,
+            "error": run.error or "",
+        }
@@ -6,23 +6,42 @@ Calcula todas las comisiones mensuales (Uninivel, Matching, etc).
 Principios aplicados: KISS, DRY, YAGNI, POO
 """
 
+import calendar
+import json
+import time
 import reflex as rx
 import sqlmodel
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime, timezone
 
 from database.users import Users
 from database.periods import Periods
+from database.closure_runs import ClosureRuns, ClosureStage, ClosureRunStatus
 from NNProtect_new_website.mlm_service.commission_service import CommissionService
-from NNProtect_new_website.utils.timezone_mx import get_mexico_now
+from NNProtect_new_website.mlm_service.period_resolver import PeriodResolver
 
 
 class MonthlyClosureJob:
     """
     Job de cierre mensual para cálculo de comisiones recurrentes.
     Principio POO: Encapsula toda la lógica del cierre mensual.
+
+    El cierre es un pipeline reanudable de etapas (ClosureStage). Las etapas
+    masivas avanzan en lotes de CLOSURE_CHUNK_SIZE miembros con un commit por
+    lote; el progreso queda en closureruns y una re-ejecución continúa desde
+    el último checkpoint.
     """
 
+    # Miembros por lote (un commit por lote)
+    CLOSURE_CHUNK_SIZE = 5000
+
+    STAGES = (
+        ClosureStage.DEPOSIT_COMMISSIONS,
+        ClosureStage.CLOSE_PERIOD,
+        ClosureStage.CREATE_NEXT_PERIOD,
+        ClosureStage.RESET_USERS,
+    )
+
     @classmethod
     def execute_monthly_closure(cls) -> bool:
         """
@@ -30,123 +49,44 @@ class MonthlyClosureJob:
         SIMPLIFICADO: Solo paga comisiones PENDING y resetea usuarios.
 
         Pasos:
-        1. Verificar que no se haya ejecutado ya (idempotencia)
-        2. Obtener período actual
-        3. Pagar todas las comisiones PENDING
+        1. Obtener período a cerrar (cierre interrumpido o período actual)
+        2. Verificar que no se haya ejecutado ya (idempotencia)
+        3. Pagar todas las comisiones PENDING (por lotes)
         4. Cerrar período
         5. Crear nuevo período
-        6. Resetear todos los usuarios
+        6. Resetear todos los usuarios (por lotes)
 
         Returns:
             True si el cierre fue exitoso, False si falló
         """
         try:
-            from database.comissions import Commissions, CommissionStatus
-            from NNProtect_new_website.mlm_service.wallet_service import WalletService
-            from NNProtect_new_website.mlm_service.period_reset_service import PeriodResetService
-            
             print("\n" + "="*80)
             print("🔄 INICIANDO CIERRE MENSUAL AUTOMÁTICO")
             print("="*80 + "\n")
 
             with rx.session() as session:
-                # 1. Obtener período actual
-                current_period = cls._get_current_period(session)
+                # 1. Reanudar cierre interrumpido o tomar el período actual
+                current_period = cls.get_unfinished_closure_period(session) or cls._get_current_period(session)
 
                 if not current_period:
                     print("❌ No hay período activo para cerrar")
                     return False
 
                 # 2. Verificar idempotencia (no ejecutar si ya está cerrado)
-                if current_period.closed_at is not None:
+                if current_period.closed_at is not None and not cls._has_unfinished_stages(session, current_period.id):
                     print(f"⚠️  Período {current_period.name} ya está cerrado")
                     return True
 
                 print(f"📅 Período actual: {current_period.name} (ID: {current_period.id})")
 
-                # 3. Obtener todas las comisiones PENDING del período
-                pending_commissions = session.exec(
-                    sqlmodel.select(Commissions)
-                    .where(
-                        (Commissions.period_id == current_period.id) &
-                        (Commissions.status == CommissionStatus.PENDING.value)
-                    )
-                ).all()
-
-                print(f"💸 Comisiones PENDING encontradas: {len(pending_commissions)}\n")
-
-                # 4. Depositar cada comisión en la wallet del usuario
-                deposited_count = 0
-                deposited_total = 0.0
-                failed_count = 0
-
-                for commission in pending_commissions:
-                    if commission.id is None:
-                        failed_count += 1
-                        continue
-
-                    success = WalletService.deposit_commission(
-                        session=session,
-                        member_id=commission.member_id,
-                        commission_id=commission.id,
-                        amount=commission.amount_converted,
-                        currency=commission.currency_destination,
-                        description=commission.notes
-                    )
-
-                    if success:
-                        deposited_count += 1
-                        deposited_total += commission.amount_converted
-                    else:
-                        failed_count += 1
+                # 3-6. Pipeline de etapas con checkpoints
+                summary = cls.run_closure(session, current_period)
 
                 print(f"\n💰 RESUMEN DE DEPÓSITOS:")
-                print(f"   ✅ Exitosos: {deposited_count}")
-                print(f"   ❌ Fallidos: {failed_count}")
-                print(f"   💵 Total depositado: ${deposited_total:.2f}\n")
-
-                # 5. Cerrar el período actual
-                current_period.closed_at = datetime.now(timezone.utc)
-                session.add(current_period)
-
-                print(f"🔒 Período {current_period.name} cerrado exitosamente\n")
-
-                # 6. Crear nuevo período
-                now = datetime.now(timezone.utc)
-                next_month = now.month + 1 if now.month < 12 else 1
-                next_year = now.year if now.month < 12 else now.year + 1
-
-                new_period_name = f"{next_year}-{next_month:02d}"
-
-                # Verificar si ya existe el período
-                existing_period = session.exec(
-                    sqlmodel.select(Periods).where(Periods.name == new_period_name)
-                ).first()
-
-                if existing_period:
-                    print(f"⚠️  Período {new_period_name} ya existe (ID: {existing_period.id})")
-                    new_period = existing_period
-                else:
-                    new_period = Periods(
-                        name=new_period_name,
-                        description=f"Período {new_period_name}",
-                        starts_on=now,
-                        ends_on=datetime(next_year, next_month, 28, 23, 59, 59, tzinfo=timezone.utc)
-                    )
-
-                    session.add(new_period)
-                    session.flush()
-
-                    print(f"✨ Nuevo período creado: {new_period.name} (ID: {new_period.id})")
-
-                    # 7. Resetear TODOS los usuarios para el nuevo período
-                    if new_period.id:
-                        users_reset = PeriodResetService.reset_all_users_for_new_period(
-                            session, new_period.id
-                        )
-                        print(f"🔄 {users_reset} usuarios reseteados para el nuevo período")
-
-                session.commit()
+                print(f"   ✅ Exitosos: {summary['deposited_count']}")
+                print(f"   ❌ Fallidos: {summary['failed_count']}")
+                print(f"   💵 Total depositado: ${summary['deposited_total']:.2f}")
+                print(f"🔄 {summary['users_reset']} usuarios reseteados para el nuevo período")
 
                 print("\n" + "="*80)
                 print("✅ CIERRE MENSUAL COMPLETADO")
@@ -161,23 +101,296 @@ class MonthlyClosureJob:
             return False
 
     @classmethod
-    def _get_current_period(cls, session) -> Optional[Periods]:
+    def run_closure(cls, session, period: Periods, chunk_size: Optional[int] = None) -> Dict[str, Any]:
         """
-        Obtiene el período actual activo.
-        Principio DRY: Método reutilizable.
+        Ejecuta (o reanuda) las etapas del cierre de un período.
+        Principio KISS: Etapas en orden; las completadas se saltan, las
+        interrumpidas continúan desde su checkpoint.
+
+        Args:
+            session: Sesión de base de datos (se hace commit por lote)
+            period: Período a cerrar
+            chunk_size: Miembros por lote (default CLOSURE_CHUNK_SIZE)
+
+        Returns:
+            Resumen del cierre con métricas por etapa
+
+        Raises:
+            Exception: La etapa fallida queda FAILED con su checkpoint
         """
-        try:
-            current_date = get_mexico_now()
+        chunk_size = chunk_size or cls.CLOSURE_CHUNK_SIZE
+        runs = cls._ensure_closure_runs(session, period.id)
+
+        for stage in cls.STAGES:
+            run = runs[stage]
+
+            if run.status == ClosureRunStatus.COMPLETED.value:
+                print(f"⏭️  Etapa {stage.value} ya completada")
+                continue
+
+            print(f"▶️  Etapa {stage.value} (checkpoint: {run.checkpoint})")
+            run.status = ClosureRunStatus.RUNNING.value
+            run.started_at = run.started_at or datetime.now(timezone.utc)
+            run.error = None
+            session.add(run)
+            session.commit()
+
+            try:
+                getattr(cls, f"_stage_{stage.value}")(session, period, run, runs, chunk_size)
+            except Exception as e:
+                session.rollback()
+                run.status = ClosureRunStatus.FAILED.value
+                run.error = str(e)[:500]
+                session.add(run)
+                session.commit()
+                print(f"❌ Etapa {stage.value} falló en checkpoint {run.checkpoint}: {e}")
+                raise
+
+            run.status = ClosureRunStatus.COMPLETED.value
+            run.finished_at = datetime.now(timezone.utc)
+            session.add(run)
+            session.commit()
+            print(f"✅ Etapa {stage.value}: {run.rows_processed} filas en {run.chunks_committed} lotes "
+                  f"({run.duration_seconds:.2f}s, {run.rows_per_second:.0f} filas/s)")
+
+        return cls._closure_summary(period, runs)
+
+    @classmethod
+    def get_unfinished_closure_period(cls, session) -> Optional[Periods]:
+        """
+        Período con un cierre iniciado pero no terminado (para reanudar).
+        """
+        return session.exec(
+            sqlmodel.select(Periods)
+            .where(
+                Periods.id.in_(
+                    sqlmodel.select(ClosureRuns.period_id)
+                    .where(ClosureRuns.status != ClosureRunStatus.COMPLETED.value)
+                )
+            )
+            .order_by(Periods.starts_on)
+        ).first()
+
+    @classmethod
+    def _has_unfinished_stages(cls, session, period_id: int) -> bool:
+        return session.exec(
+            sqlmodel.select(ClosureRuns.id)
+            .where(
+                (ClosureRuns.period_id == period_id) &
+                (ClosureRuns.status != ClosureRunStatus.COMPLETED.value)
+            )
+        ).first() is not None
+
+    @classmethod
+    def _ensure_closure_runs(cls, session, period_id: int) -> Dict[ClosureStage, ClosureRuns]:
+        """
+        Crea (una sola vez) una fila por etapa para el período.
+        Todas se crean juntas para que un cierre interrumpido siempre sea detectable.
+        """
+        existing = {
+            run.stage: run
+            for run in session.exec(
+                sqlmodel.select(ClosureRuns).where(ClosureRuns.period_id == period_id)
+            ).all()
+        }
+
+        for stage in cls.STAGES:
+            if stage.value not in existing:
+                existing[stage.value] = ClosureRuns(period_id=period_id, stage=stage.value)
+                session.add(existing[stage.value])
+
+        session.commit()
+        return {stage: existing[stage.value] for stage in cls.STAGES}
+
+    @classmethod
+    def _next_chunk_bound(cls, session, member_id_column, condition, after_member_id: int, chunk_size: int) -> Optional[int]:
+        """
+        Último member_id del siguiente lote (keyset): los primeros chunk_size
+        member_id distintos mayores a after_member_id que cumplen condition.
+        """
+        chunk = (
+            sqlmodel.select(member_id_column.label("member_id"))
+            .where(condition & (member_id_column > after_member_id))
+            .distinct()
+            .order_by(member_id_column)
+            .limit(chunk_size)
+            .subquery()
+        )
+        return session.exec(sqlmodel.select(sqlmodel.func.max(chunk.c.member_id))).one()
+
+    @classmethod
+    def _commit_checkpoint(cls, session, run: ClosureRuns, checkpoint: int, rows: int, started: float, **totals) -> None:
+        """
+        Confirma el lote junto con el avance del checkpoint (misma transacción).
+        Los totals se acumulan en metadata_json (ej. deposited_total).
+        """
+        run.checkpoint = checkpoint
+        run.rows_processed += rows
+        run.chunks_committed += 1
+        run.duration_seconds += time.perf_counter() - started
+
+        if totals:
+            accumulated = cls._run_metadata(run)
+            for key, value in totals.items():
+                accumulated[key] = accumulated.get(key, 0) + value
+            run.metadata_json = json.dumps(accumulated)
+
+        session.add(run)
+        session.commit()
+
+    @staticmethod
+    def _run_metadata(run: ClosureRuns) -> Dict[str, Any]:
+        return json.loads(run.metadata_json) if run.metadata_json else {}
 
-            current_period = session.exec(
-                sqlmodel.select(Periods)
-                .where(
-                    (Periods.starts_on <= current_date) &
-                    (Periods.ends_on >= current_date)
+    @classmethod
+    def _stage_deposit_commissions(cls, session, period: Periods, run: ClosureRuns, runs, chunk_size: int) -> None:
+        """Etapa 1: comisiones PENDING → wallets, por lotes de miembros."""
+        from database.comissions import Commissions, CommissionStatus
+        from NNProtect_new_website.mlm_service.wallet_service import WalletService
+
+        pending = (
+            (Commissions.period_id == period.id) &
+            (Commissions.status == CommissionStatus.PENDING.value)
+        )
+
+        while True:
+            started = time.perf_counter()
+            last_member_id = cls._next_chunk_bound(session, Commissions.member_id, pending, run.checkpoint, chunk_size)
+            if last_member_id is None:
+                break
+
+            settlement = WalletService.settle_pending_commissions(
+                session, period.id, member_id_range=(run.checkpoint, last_member_id)
+            )
+            cls._commit_checkpoint(
+                session, run, last_member_id, settlement["deposited_count"], started,
+                deposited_total=settlement["deposited_total"],
+                failed_count=settlement["failed_count"]
+            )
+
+    @classmethod
+    def _stage_close_period(cls, session, period: Periods, run: ClosureRuns, runs, chunk_size: int) -> None:
+        """Etapa 2: marcar el período como cerrado."""
+        started = time.perf_counter()
+
+        if period.closed_at is None:
+            period.closed_at = datetime.now(timezone.utc)
+            session.add(period)
+
+        cls._commit_checkpoint(session, run, run.checkpoint, 1, started)
+        print(f"🔒 Período {period.name} cerrado exitosamente")
+
+    @classmethod
+    def _stage_create_next_period(cls, session, period: Periods, run: ClosureRuns, runs, chunk_size: int) -> None:
+        """
+        Etapa 3: crear el período siguiente (si ya existe, no se resetea a nadie).
+        El mes siguiente se toma de period.ends_on, no de la fecha en que corre el
+        cierre (un cierre reanudado días después crea el mismo período).
+        """
+        started = time.perf_counter()
+
+        next_year, next_month = cls._next_month(period.ends_on)
+        new_period_name = f"{next_year}-{next_month:02d}"
+
+        # Verificar si ya existe el período
+        existing_period = session.exec(
+            sqlmodel.select(Periods).where(Periods.name == new_period_name)
+        ).first()
+
+        if existing_period:
+            print(f"⚠️  Período {new_period_name} ya existe (ID: {existing_period.id})")
+            new_period = existing_period
+        else:
+            new_period = Periods(
+                name=new_period_name,
+                description=f"Período {new_period_name}",
+                starts_on=datetime(next_year, next_month, 1, tzinfo=timezone.utc),
+                ends_on=datetime(
+                    next_year, next_month, calendar.monthrange(next_year, next_month)[1],
+                    23, 59, 59, tzinfo=timezone.utc
                 )
-            ).first()
+            )
+
+            session.add(new_period)
+            session.flush()
+
+            print(f"✨ Nuevo período creado: {new_period.name} (ID: {new_period.id})")
+
+        # Período creado: lo usa la etapa de reseteo (también al reanudar)
+        run.metadata_json = json.dumps({
+            "new_period_id": new_period.id,
+            "new_period_name": new_period.name,
+            "reset_users": existing_period is None,
+        })
+        cls._commit_checkpoint(session, run, run.checkpoint, 0 if existing_period else 1, started)
 
-            return current_period
+    @staticmethod
+    def _next_month(ends_on: datetime) -> tuple:
+        """(año, mes) del mes siguiente al que termina el período."""
+        if ends_on.month == 12:
+            return ends_on.year + 1, 1
+        return ends_on.year, ends_on.month + 1
+
+    @classmethod
+    def _stage_reset_users(cls, session, period: Periods, run: ClosureRuns, runs, chunk_size: int) -> None:
+        """Etapa 4: resetear usuarios para el nuevo período, por lotes de miembros."""
+        from NNProtect_new_website.mlm_service.period_reset_service import PeriodResetService
+
+        created = cls._run_metadata(runs[ClosureStage.CREATE_NEXT_PERIOD])
+        if not created.get("reset_users"):
+            return
+
+        while True:
+            started = time.perf_counter()
+            last_member_id = cls._next_chunk_bound(session, Users.member_id, sqlmodel.true(), run.checkpoint, chunk_size)
+            if last_member_id is None:
+                break
+
+            counts = PeriodResetService.bulk_reset_users(
+                session,
+                PeriodResetService.NEW_PERIOD_RESET_VALUES,
+                new_period_id=created["new_period_id"],
+                member_id_range=(run.checkpoint, last_member_id)
+            )
+            cls._commit_checkpoint(
+                session, run, last_member_id, counts["users_updated"], started,
+                rank_history_created=counts["rank_history_created"]
+            )
+
+    @classmethod
+    def _closure_summary(cls, period: Periods, runs: Dict[ClosureStage, ClosureRuns]) -> Dict[str, Any]:
+        deposits = cls._run_metadata(runs[ClosureStage.DEPOSIT_COMMISSIONS])
+        created = cls._run_metadata(runs[ClosureStage.CREATE_NEXT_PERIOD])
+
+        return {
+            "closed_period": period.name,
+            "new_period": created.get("new_period_name"),
+            "new_period_id": created.get("new_period_id"),
+            "deposited_count": runs[ClosureStage.DEPOSIT_COMMISSIONS].rows_processed,
+            "deposited_total": deposits.get("deposited_total", 0.0),
+            "failed_count": deposits.get("failed_count", 0),
+            "users_reset": runs[ClosureStage.RESET_USERS].rows_processed,
+            "stages": {
+                stage.value: {
+                    "rows_processed": run.rows_processed,
+                    "chunks_committed": run.chunks_committed,
+                    "duration_seconds": run.duration_seconds,
+                    "rows_per_second": run.rows_per_second,
+                }
+                for stage, run in runs.items()
+            },
+        }
+
+    @classmethod
+    def _get_current_period(cls, session) -> Optional[Periods]:
+        """
+        Obtiene el período actual activo.
+        Principio DRY: PeriodResolver resuelve cuál es; se regresa la instancia
+        de la sesión porque el pipeline la modifica (closed_at).
+        """
+        try:
+            snapshot = PeriodResolver.get_current(session)
+            return session.get(Periods, snapshot.id) if snapshot else None
 
         except Exception as e:
             print(f"❌ Error obteniendo período actual: {e}")
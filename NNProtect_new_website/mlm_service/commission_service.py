@@ -6,7 +6,7 @@ Principios aplicados: KISS, DRY, YAGNI, POO
 """
 
 import sqlmodel
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime, timezone
 
 from database.users import Users
@@ -14,12 +14,12 @@ from database.orders import Orders, OrderStatus
 from database.order_items import OrderItems
 from database.products import Products
 from database.comissions import Commissions, BonusType
-from database.periods import Periods
 from database.ranks import Ranks
 from database.usertreepaths import UserTreePath
 from .genealogy_service import GenealogyService
 from .exchange_service import ExchangeService
 from .rank_service import RankService
+from .period_resolver import PeriodResolver, PeriodSnapshot
 
 
 class CommissionService:
@@ -93,116 +93,125 @@ class CommissionService:
             Lista de IDs de comisiones creadas
         """
         try:
-            # 1. Verificar que la orden existe y está confirmada
-            order = session.exec(
-                sqlmodel.select(Orders).where(Orders.id == order_id)
+            return cls._apply_fast_start_bonus(session, order_id)
+
+        except Exception as e:
+            print(f"❌ Error procesando Bono Rápido para orden {order_id}: {e}")
+            return []
+
+    @classmethod
+    def _apply_fast_start_bonus(cls, session, order_id: int) -> List[int]:
+        """
+        Núcleo del Bono Rápido.
+        Sin manejo de errores: las excepciones llegan al llamador
+        (process_fast_start_bonus o la etapa del outbox, que reintenta).
+        """
+        # 1. Verificar que la orden existe y está confirmada
+        order = session.exec(
+            sqlmodel.select(Orders).where(Orders.id == order_id)
+        ).first()
+
+        if not order:
+            print(f"❌ Orden {order_id} no encontrada")
+            return []
+
+        if order.status != OrderStatus.PAYMENT_CONFIRMED.value:
+            print(f"⚠️  Orden {order_id} no está confirmada")
+            return []
+
+        # 2. Obtener items de la orden
+        order_items = session.exec(
+            sqlmodel.select(OrderItems).where(OrderItems.order_id == order_id)
+        ).all()
+
+        if not order_items:
+            print(f"⚠️  Orden {order_id} no tiene items")
+            return []
+
+        # 3. Filtrar solo kits (por presentation, NO por type)
+        kit_items = []
+        for item in order_items:
+            product = session.exec(
+                sqlmodel.select(Products).where(Products.id == item.product_id)
             ).first()
 
-            if not order:
-                print(f"❌ Orden {order_id} no encontrada")
-                return []
+            if product and product.presentation == "kit":
+                kit_items.append((item, product))
 
-            if order.status != OrderStatus.PAYMENT_CONFIRMED.value:
-                print(f"⚠️  Orden {order_id} no está confirmada")
-                return []
+        if not kit_items:
+            print(f"⚠️  Orden {order_id} no contiene kits")
+            return []
 
-            # 2. Obtener items de la orden
-            order_items = session.exec(
-                sqlmodel.select(OrderItems).where(OrderItems.order_id == order_id)
-            ).all()
+        # 4. Obtener upline del comprador (niveles 1, 2, 3)
+        buyer_id = order.member_id
+        upline = GenealogyService.get_upline(session, buyer_id, max_depth=3)
 
-            if not order_items:
-                print(f"⚠️  Orden {order_id} no tiene items")
-                return []
+        if not upline:
+            print(f"⚠️  Comprador {buyer_id} no tiene upline")
+            return []
 
-            # 3. Filtrar solo kits (por presentation, NO por type)
-            kit_items = []
-            for item in order_items:
-                product = session.exec(
-                    sqlmodel.select(Products).where(Products.id == item.product_id)
-                ).first()
+        # 5. Crear comisiones por cada kit
+        commission_ids = []
 
-                if product and product.presentation == "kit":
-                    kit_items.append((item, product))
+        # Período y moneda del comprador son los mismos para todos los kits y niveles
+        period = cls._get_current_period(session)
+        buyer_currency = ExchangeService.get_country_currency(order.country)
 
-            if not kit_items:
-                print(f"⚠️  Orden {order_id} no contiene kits")
-                return []
+        for item, product in kit_items:
+            # PV base del kit
+            kit_pv = item.line_pv  # PV total del item (unit_pv * quantity)
 
-            # 4. Obtener upline del comprador (niveles 1, 2, 3)
-            buyer_id = order.member_id
-            upline = GenealogyService.get_upline(session, buyer_id, max_depth=3)
+            # Procesar upline nivel por nivel
+            for level, sponsor_user in enumerate(upline[:3], start=1):
+                percentage = cls.FAST_START_BONUS_PERCENTAGES.get(level, 0)
 
-            if not upline:
-                print(f"⚠️  Comprador {buyer_id} no tiene upline")
-                return []
+                if percentage == 0:
+                    continue
 
-            # 5. Crear comisiones por cada kit
-            commission_ids = []
+                # Calcular comisión en PV
+                commission_pv = kit_pv * percentage
 
-            for item, product in kit_items:
-                # PV base del kit
-                kit_pv = item.line_pv  # PV total del item (unit_pv * quantity)
+                # sponsor_user ya es un objeto Users de get_upline()
+                sponsor_member_id = sponsor_user.member_id
 
-                # Procesar upline nivel por nivel
-                for level, sponsor_user in enumerate(upline[:3], start=1):
-                    percentage = cls.FAST_START_BONUS_PERCENTAGES.get(level, 0)
+                # Moneda del patrocinador (destino)
+                sponsor_currency = ExchangeService.get_country_currency(sponsor_user.country_cache or sponsor_user.country_cache)
 
-                    if percentage == 0:
-                        continue
+                # Convertir PV a VN en la moneda del patrocinador (tasa en memoria)
+                # Si ambos tienen la misma moneda, no hay conversión
+                commission_vn, exchange_rate = ExchangeService.convert_with_rate(
+                    session,
+                    amount=commission_pv,
+                    from_currency=buyer_currency,
+                    to_currency=sponsor_currency,
+                    as_of_date=order.payment_confirmed_at
+                )
 
-                    # Calcular comisión en PV
-                    commission_pv = kit_pv * percentage
-
-                    # sponsor_user ya es un objeto Users de get_upline()
-                    sponsor_member_id = sponsor_user.member_id
-
-                    # Obtener moneda del comprador (origen) y patrocinador (destino)
-                    buyer_currency = ExchangeService.get_country_currency(order.country)
-                    sponsor_currency = ExchangeService.get_country_currency(sponsor_user.country_cache or sponsor_user.country_cache)
-
-                    # Convertir PV a VN en la moneda del patrocinador
-                    # Si ambos tienen la misma moneda, no hay conversión
-                    commission_vn = ExchangeService.convert_amount(
-                        session,
-                        amount=commission_pv,
-                        from_currency=buyer_currency,
-                        to_currency=sponsor_currency,
-                        as_of_date=order.payment_confirmed_at
-                    )
-
-                    # Obtener período actual
-                    period = cls._get_current_period(session)
-
-                    # Crear registro de comisión
-                    commission = Commissions(
-                        member_id=sponsor_member_id,
-                        bonus_type=BonusType.BONO_RAPIDO.value,
-                        source_member_id=buyer_id,
-                        source_order_id=order_id,
-                        period_id=period.id if period else None,
-                        level_depth=level,
-                        amount_vn=commission_pv,
-                        currency_origin=buyer_currency,
-                        amount_converted=commission_vn,
-                        currency_destination=sponsor_currency,
-                        exchange_rate=1.0,  # TODO: Get actual exchange rate
-                        calculated_at=datetime.now(timezone.utc),
-                        paid_at=None,
-                        notes=f"Bono Rápido {percentage*100:.0f}% - Kit: {product.product_name} ({kit_pv} PV)"
-                    )
-
-                    session.add(commission)
-                    session.flush()
-                    commission_ids.append(commission.id)
-
-                    print(f"✅ Comisión Bono Rápido creada: ${commission_vn:.2f} para member_id={sponsor_member_id} (nivel {level})")
+                # Crear registro de comisión
+                commission = Commissions(
+                    member_id=sponsor_member_id,
+                    bonus_type=BonusType.BONO_RAPIDO.value,
+                    source_member_id=buyer_id,
+                    source_order_id=order_id,
+                    period_id=period.id if period else None,
+                    level_depth=level,
+                    amount_vn=commission_pv,
+                    currency_origin=buyer_currency,
+                    amount_converted=commission_vn,
+                    currency_destination=sponsor_currency,
+                    exchange_rate=exchange_rate,
+                    calculated_at=datetime.now(timezone.utc),
+                    paid_at=None,
+                    notes=f"Bono Rápido {percentage*100:.0f}% - Kit: {product.product_name} ({kit_pv} PV)"
+                )
 
-            return commission_ids
+                session.add(commission)
+                session.flush()
+                commission_ids.append(commission.id)
 
-        except Exception as e:
-            print(f"❌ Error procesando Bono Rápido para orden {order_id}: {e}")
-            return []
+                print(f"✅ Comisión Bono Rápido creada: ${commission_vn:.2f} para member_id={sponsor_member_id} (nivel {level})")
+
+        return commission_ids
 
     @classmethod
     def process_direct_bonus(
@@ -232,84 +241,99 @@ class CommissionService:
             ID de la comisión creada, o None si no aplica
         """
         try:
-            # 1. Obtener comprador
-            buyer = session.exec(
-                sqlmodel.select(Users).where(Users.member_id == buyer_id)
-            ).first()
-
-            if not buyer:
-                print(f"❌ Comprador {buyer_id} no encontrado")
-                return None
-
-            # 2. Verificar que tenga patrocinador
-            if not buyer.sponsor_id:
-                print(f"⚠️  Comprador {buyer_id} no tiene patrocinador directo")
-                return None
-
-            # 3. Obtener patrocinador
-            sponsor = session.exec(
-                sqlmodel.select(Users).where(Users.member_id == buyer.sponsor_id)
-            ).first()
-
-            if not sponsor:
-                print(f"❌ Patrocinador {buyer.sponsor_id} no encontrado")
-                return None
+            return cls._apply_direct_bonus(session, buyer_id, order_id, vn_amount)
 
-            # 4. Calcular comisión (25% del VN)
-            DIRECT_BONUS_PERCENTAGE = 0.25
-            commission_vn = vn_amount * DIRECT_BONUS_PERCENTAGE
-
-            # 5. Obtener monedas
-            buyer_currency = ExchangeService.get_country_currency(buyer.country_cache)
-            sponsor_currency = ExchangeService.get_country_currency(sponsor.country_cache)
-
-            # 6. Convertir a moneda del patrocinador si es necesario
-            order = session.exec(
-                sqlmodel.select(Orders).where(Orders.id == order_id)
-            ).first()
-
-            commission_converted = ExchangeService.convert_amount(
-                session=session,
-                amount=commission_vn,
-                from_currency=buyer_currency,
-                to_currency=sponsor_currency,
-                as_of_date=order.payment_confirmed_at if order else datetime.now(timezone.utc)
-            )
-
-            # 7. Obtener período actual
-            period = cls._get_current_period(session)
+        except Exception as e:
+            print(f"❌ Error procesando Bono Directo para orden {order_id}: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
 
-            # 8. Crear registro de comisión
-            commission = Commissions(
-                member_id=sponsor.member_id,
-                bonus_type=BonusType.BONO_DIRECTO.value,
-                source_member_id=buyer_id,
-                source_order_id=order_id,
-                period_id=period.id if period else None,
-                level_depth=1,  # Siempre nivel 1 (directo)
-                amount_vn=commission_vn,
-                currency_origin=buyer_currency,
-                amount_converted=commission_converted,
-                currency_destination=sponsor_currency,
-                exchange_rate=1.0,  # TODO: Get actual exchange rate
-                calculated_at=datetime.now(timezone.utc),
-                paid_at=None,
-                notes=f"Bono Directo 25% VN - Orden #{order_id}"
-            )
+    @classmethod
+    def _apply_direct_bonus(
+        cls,
+        session,
+        buyer_id: int,
+        order_id: int,
+        vn_amount: float
+    ) -> Optional[int]:
+        """
+        Núcleo del Bono Directo.
+        Sin manejo de errores: las excepciones llegan al llamador
+        (process_direct_bonus o la etapa del outbox, que reintenta).
+        """
+        # 1. Obtener comprador
+        buyer = session.exec(
+            sqlmodel.select(Users).where(Users.member_id == buyer_id)
+        ).first()
 
-            session.add(commission)
-            session.flush()
+        if not buyer:
+            print(f"❌ Comprador {buyer_id} no encontrado")
+            return None
 
-            print(f"✅ Bono Directo creado: {commission_converted:.2f} {sponsor_currency} para sponsor {sponsor.member_id}")
+        # 2. Verificar que tenga patrocinador
+        if not buyer.sponsor_id:
+            print(f"⚠️  Comprador {buyer_id} no tiene patrocinador directo")
+            return None
 
-            return commission.id
+        # 3. Obtener patrocinador
+        sponsor = session.exec(
+            sqlmodel.select(Users).where(Users.member_id == buyer.sponsor_id)
+        ).first()
 
-        except Exception as e:
-            print(f"❌ Error procesando Bono Directo para orden {order_id}: {e}")
-            import traceback
-            traceback.print_exc()
+        if not sponsor:
+            print(f"❌ Patrocinador {buyer.sponsor_id} no encontrado")
             return None
 
+        # 4. Calcular comisión (25% del VN)
+        DIRECT_BONUS_PERCENTAGE = 0.25
+        commission_vn = vn_amount * DIRECT_BONUS_PERCENTAGE
+
+        # 5. Obtener monedas
+        buyer_currency = ExchangeService.get_country_currency(buyer.country_cache)
+        sponsor_currency = ExchangeService.get_country_currency(sponsor.country_cache)
+
+        # 6. Convertir a moneda del patrocinador si es necesario
+        order = session.exec(
+            sqlmodel.select(Orders).where(Orders.id == order_id)
+        ).first()
+
+        commission_converted, exchange_rate = ExchangeService.convert_with_rate(
+            session=session,
+            amount=commission_vn,
+            from_currency=buyer_currency,
+            to_currency=sponsor_currency,
+            as_of_date=order.payment_confirmed_at if order else datetime.now(timezone.utc)
+        )
+
+        # 7. Obtener período actual
+        period = cls._get_current_period(session)
+
+        # 8. Crear registro de comisión
+        commission = Commissions(
+            member_id=sponsor.member_id,
+            bonus_type=BonusType.BONO_DIRECTO.value,
+            source_member_id=buyer_id,
+            source_order_id=order_id,
+            period_id=period.id if period else None,
+            level_depth=1,  # Siempre nivel 1 (directo)
+            amount_vn=commission_vn,
+            currency_origin=buyer_currency,
+            amount_converted=commission_converted,
+            currency_destination=sponsor_currency,
+            exchange_rate=exchange_rate,
+            calculated_at=datetime.now(timezone.utc),
+            paid_at=None,
+            notes=f"Bono Directo 25% VN - Orden #{order_id}"
+        )
+
+        session.add(commission)
+        session.flush()
+
+        print(f"✅ Bono Directo creado: {commission_converted:.2f} {sponsor_currency} para sponsor {sponsor.member_id}")
+
+        return commission.id
+
     @classmethod
     def calculate_unilevel_bonus(cls, session, member_id: int, period_id: int) -> List[int]:
         """
@@ -319,7 +343,7 @@ class CommissionService:
         - Porcentajes según rango del miembro
         - Embajadores tienen nivel 10+ infinito
 
-        Principio KISS: Lógica clara por nivel.
+        Principio DRY: Es la liquidación del período filtrada a un solo miembro.
 
         Args:
             session: Sesión de base de datos
@@ -329,189 +353,184 @@ class CommissionService:
         Returns:
             Lista de IDs de comisiones creadas
         """
-        try:
-            # 1. Obtener rango actual del miembro
-            current_rank_id = RankService.get_user_current_rank(session, member_id)
-
-            if not current_rank_id:
-                print(f"⚠️  Usuario {member_id} no tiene rango asignado")
-                return []
-
-            rank = session.exec(
-                sqlmodel.select(Ranks).where(Ranks.id == current_rank_id)
-            ).first()
-
-            if not rank:
-                print(f"❌ Rango {current_rank_id} no encontrado")
-                return []
-
-            # 2. Obtener porcentajes según rango
-            percentages = cls.UNILEVEL_BONUS_PERCENTAGES.get(rank.name, [])
-
-            if not percentages:
-                print(f"⚠️  No hay porcentajes definidos para rango {rank.name}")
-                return []
-
-            # 3. Obtener usuario para moneda
-            user = session.exec(
-                sqlmodel.select(Users).where(Users.member_id == member_id)
-            ).first()
-
-            if not user:
-                print(f"❌ Usuario {member_id} no encontrado")
-                return []
-
-            user_currency = ExchangeService.get_country_currency(user.country_cache)
-
-            # 4. Calcular comisión por cada nivel
-            commission_ids = []
-            max_depth = len(percentages)
-
-            for depth in range(1, max_depth + 1):
-                # Para rangos Embajador (nivel 10+), calcular desde nivel 10 al infinito
-                if depth == 10 and max_depth >= 10:
-                    # Nivel infinito
-                    infinity_percentage = percentages[9]  # Último porcentaje
-                    vn_level = cls._sum_vn_from_depth_to_infinity(
-                        session, member_id, period_id, start_depth=10
-                    )
-                    level_label = "10+"
-                    percentage = infinity_percentage
-                else:
-                    # Nivel específico
-                    percentage = percentages[depth - 1]
-                    vn_level = cls._sum_vn_by_depth(session, member_id, period_id, depth)
-                    level_label = str(depth)
-
-                if vn_level <= 0:
-                    continue
-
-                # Calcular comisión
-                commission_amount = vn_level * (percentage / 100)
-
-                # Crear registro de comisión
-                commission = Commissions(
-                    member_id=member_id,
-                    bonus_type=BonusType.BONO_UNINIVEL.value,
-                    source_member_id=None,
-                    source_order_id=None,
-                    period_id=period_id,
-                    level_depth=depth if depth < 10 else 10,
-                    amount_vn=vn_level,
-                    currency_origin=user_currency,
-                    amount_converted=commission_amount,
-                    currency_destination=user_currency,
-                    exchange_rate=1.0,
-                    calculated_at=datetime.now(timezone.utc),
-                    paid_at=None,
-                    notes=f"Bono Uninivel {percentage}% - Nivel {level_label} - VN: {vn_level:.2f}"
-                )
-
-                session.add(commission)
-                session.flush()
-                commission_ids.append(commission.id)
-
-                print(f"✅ Comisión Uninivel creada: ${commission_amount:.2f} para member_id={member_id} nivel {level_label}")
-
-                # Si procesamos nivel 10+, no continuar (ya se procesó infinito)
-                if depth == 10 and max_depth >= 10:
-                    break
-
-            return commission_ids
-
-        except Exception as e:
-            print(f"❌ Error calculando Bono Uninivel para usuario {member_id}: {e}")
-            return []
+        settlement = cls.calculate_unilevel_bonus_for_period(session, period_id, member_ids=[member_id])
+        return settlement["commission_ids"]
 
     @classmethod
-    def _sum_vn_by_depth(cls, session, member_id: int, period_id: int, depth: int) -> float:
+    def calculate_unilevel_bonus_for_period(
+        cls,
+        session,
+        period_id: int,
+        member_ids=None,
+        dry_run: bool = False
+    ) -> dict:
         """
-        Suma el VN de todas las órdenes de productos (NO kits) de un nivel específico.
-        Principio KISS: Query directo y eficiente.
+        Liquida el Bono Uninivel de TODO el período con una sola agregación.
+
+        Flujo:
+        1. Un GROUP BY sobre usertreepath × órdenes confirmadas × productos (NO kits)
+           que arma la matriz (ancestor_id, nivel) → VN, con el nivel 10+ en un solo bucket,
+           junto con el rango actual y país de cada ancestro
+        2. Aplica UNILEVEL_BONUS_PERCENTAGES sobre la matriz en memoria
+        3. Un INSERT multi-fila de todas las comisiones (omitido en dry_run)
 
         Args:
             session: Sesión de base de datos
-            member_id: ID del miembro (ancestor)
-            period_id: ID del período
-            depth: Profundidad del nivel (1=directo, 2=segundo nivel, etc.)
+            period_id: ID del período mensual
+            member_ids: Limitar a estos receptores: lista o subquery de member_id (None = toda la red)
+            dry_run: Si True, solo calcula y devuelve totales sin escribir
 
         Returns:
-            Total de VN del nivel
+            Dict con commission_ids, commissions, members, total_vn, total_amount y by_member
         """
+        settlement = {
+            "period_id": period_id,
+            "dry_run": dry_run,
+            "commission_ids": [],
+            "commissions": 0,
+            "members": 0,
+            "total_vn": 0.0,
+            "total_amount": 0.0,
+            "by_member": {},
+        }
+
         try:
-            # Subquery para obtener descendientes del nivel específico
-            descendants_subquery = (
-                sqlmodel.select(UserTreePath.descendant_id)
-                .where(
-                    (UserTreePath.ancestor_id == member_id) &
-                    (UserTreePath.depth == depth)
-                )
-                .subquery()
+            infinity_depth = max(len(p) for p in cls.UNILEVEL_BONUS_PERCENTAGES.values())
+            ancestor_rank = cls._current_rank_subquery(
+                "ancestor_rank", list(cls.UNILEVEL_BONUS_PERCENTAGES.keys())
             )
 
-            # Query principal: sumar VN de órdenes confirmadas de productos (NO kits)
-            result = session.exec(
-                sqlmodel.select(sqlmodel.func.sum(OrderItems.line_vn))
-                .join(Orders, OrderItems.order_id == Orders.id)
-                .join(Products, OrderItems.product_id == Products.id)
+            depth_bucket = sqlmodel.case(
+                (UserTreePath.depth >= infinity_depth, infinity_depth),
+                else_=UserTreePath.depth
+            ).label("depth_bucket")
+
+            query = (
+                sqlmodel.select(
+                    UserTreePath.ancestor_id,
+                    depth_bucket,
+                    ancestor_rank.c.rank_name,
+                    Users.country_cache,
+                    sqlmodel.func.sum(OrderItems.line_vn).label("vn")
+                )
+                .join(Orders, Orders.member_id == UserTreePath.descendant_id)
+                .join(OrderItems, OrderItems.order_id == Orders.id)
+                .join(Products, Products.id == OrderItems.product_id)
+                .join(ancestor_rank, ancestor_rank.c.member_id == UserTreePath.ancestor_id)
+                .join(Users, Users.member_id == UserTreePath.ancestor_id)
                 .where(
-                    (Orders.member_id.in_(sqlmodel.select(descendants_subquery))) &
+                    (UserTreePath.depth >= 1) &
                     (Orders.period_id == period_id) &
                     (Orders.status == OrderStatus.PAYMENT_CONFIRMED.value) &
-                    (Products.type != "kit")  # Excluir kits
+                    (Products.presentation != "kit")  # Excluir kits
                 )
-            ).first()
+                .group_by(
+                    UserTreePath.ancestor_id,
+                    depth_bucket,
+                    ancestor_rank.c.rank_name,
+                    Users.country_cache
+                )
+                .order_by(UserTreePath.ancestor_id, depth_bucket)
+            )
+
+            if member_ids is not None:
+                query = query.where(UserTreePath.ancestor_id.in_(member_ids))
 
-            return float(result) if result else 0.0
+            matrix = session.exec(query).all()
+
+            # Aplicar porcentajes sobre la matriz
+            calculated_at = datetime.now(timezone.utc)
+            commission_rows = []
+
+            for ancestor_id, depth, rank_name, country_cache, vn_level in matrix:
+                percentages = cls.UNILEVEL_BONUS_PERCENTAGES[rank_name]
+
+                if depth > len(percentages) or not vn_level or vn_level <= 0:
+                    continue  # Nivel fuera del alcance del rango o sin volumen
+
+                percentage = percentages[depth - 1]
+                level_label = f"{depth}+" if depth == infinity_depth else str(depth)
+                user_currency = ExchangeService.get_country_currency(country_cache)
+                commission_amount = vn_level * (percentage / 100)
+
+                commission_rows.append({
+                    "member_id": ancestor_id,
+                    "bonus_type": BonusType.BONO_UNINIVEL.value,
+                    "source_member_id": None,
+                    "source_order_id": None,
+                    "period_id": period_id,
+                    "level_depth": depth,
+                    "amount_vn": vn_level,
+                    "currency_origin": user_currency,
+                    "amount_converted": commission_amount,
+                    "currency_destination": user_currency,
+                    "exchange_rate": 1.0,
+                    "calculated_at": calculated_at,
+                    "paid_at": None,
+                    "notes": f"Bono Uninivel {percentage}% - Nivel {level_label} - VN: {vn_level:.2f}",
+                })
+
+                by_member = settlement["by_member"]
+                by_member[ancestor_id] = by_member.get(ancestor_id, 0.0) + commission_amount
+                settlement["total_vn"] += vn_level
+                settlement["total_amount"] += commission_amount
+
+            settlement["commissions"] = len(commission_rows)
+            settlement["members"] = len(settlement["by_member"])
+
+            if dry_run:
+                print(f"🔎 Uninivel período {period_id} (dry-run): {settlement['commissions']} comisiones, "
+                      f"{settlement['members']} miembros, total {settlement['total_amount']:.2f}")
+                return settlement
+
+            settlement["commission_ids"] = cls.bulk_insert_commissions(session, commission_rows)
+
+            print(f"✅ Uninivel período {period_id}: {settlement['commissions']} comisiones, "
+                  f"{settlement['members']} miembros, total {settlement['total_amount']:.2f}")
+
+            return settlement
 
         except Exception as e:
-            print(f"❌ Error sumando VN nivel {depth}: {e}")
-            return 0.0
+            print(f"❌ Error liquidando Bono Uninivel del período {period_id}: {e}")
+            return settlement
 
     @classmethod
-    def _sum_vn_from_depth_to_infinity(cls, session, member_id: int, period_id: int, start_depth: int) -> float:
+    def _current_rank_subquery(cls, name: str, rank_names: Optional[List[str]] = None):
         """
-        Suma el VN desde un nivel hasta el infinito (para rangos Embajador).
-        Principio DRY: Similar a _sum_vn_by_depth pero sin límite superior.
+        Subquery (member_id, rank_name) con el rango actual de cada miembro.
+        Rango actual = último UserRankHistory por achieved_on (como RankService.get_user_current_rank).
 
         Args:
-            session: Sesión de base de datos
-            member_id: ID del miembro (ancestor)
-            period_id: ID del período
-            start_depth: Profundidad inicial (típicamente 10)
+            name: Alias de la subquery
+            rank_names: Limitar a estos rangos (None = todos)
 
         Returns:
-            Total de VN desde start_depth hasta infinito
+            Subquery con columnas member_id y rank_name
         """
-        try:
-            # Subquery para obtener todos los descendientes desde start_depth
-            descendants_subquery = (
-                sqlmodel.select(UserTreePath.descendant_id)
-                .where(
-                    (UserTreePath.ancestor_id == member_id) &
-                    (UserTreePath.depth >= start_depth)
-                )
-                .subquery()
+        from database.user_rank_history import UserRankHistory
+
+        latest_rank = (
+            sqlmodel.select(
+                UserRankHistory.member_id,
+                UserRankHistory.rank_id,
+                sqlmodel.func.row_number().over(
+                    partition_by=UserRankHistory.member_id,
+                    order_by=(UserRankHistory.achieved_on.desc(), UserRankHistory.id.desc())
+                ).label("position")
             )
+            .subquery(f"{name}_history")
+        )
 
-            # Query principal: sumar VN de órdenes confirmadas de productos (NO kits)
-            result = session.exec(
-                sqlmodel.select(sqlmodel.func.sum(OrderItems.line_vn))
-                .join(Orders, OrderItems.order_id == Orders.id)
-                .join(Products, OrderItems.product_id == Products.id)
-                .where(
-                    (Orders.member_id.in_(sqlmodel.select(descendants_subquery))) &
-                    (Orders.period_id == period_id) &
-                    (Orders.status == OrderStatus.PAYMENT_CONFIRMED.value) &
-                    (Products.type != "kit")  # Excluir kits
-                )
-            ).first()
+        query = (
+            sqlmodel.select(latest_rank.c.member_id, Ranks.name.label("rank_name"))
+            .join(Ranks, Ranks.id == latest_rank.c.rank_id)
+            .where(latest_rank.c.position == 1)
+        )
 
-            return float(result) if result else 0.0
+        if rank_names is not None:
+            query = query.where(Ranks.name.in_(rank_names))
 
-        except Exception as e:
-            print(f"❌ Error sumando VN desde nivel {start_depth}: {e}")
-            return 0.0
+        return query.subquery(name)
 
     @classmethod
     def calculate_matching_bonus(cls, session, member_id: int, period_id: int) -> List[int]:
@@ -522,7 +541,7 @@ class CommissionService:
         - Se calcula sobre comisiones Uninivel de miembros Embajador en el equipo
         - Porcentajes: 30%/20%/10%/5% según rango y profundidad
 
-        Principio KISS: Lógica clara nivel por nivel.
+        Principio DRY: Es el motor del período filtrado a un solo miembro.
 
         Args:
             session: Sesión de base de datos
@@ -532,122 +551,163 @@ class CommissionService:
         Returns:
             Lista de IDs de comisiones creadas
         """
-        try:
-            # 1. Obtener rango actual del miembro
-            current_rank_id = RankService.get_user_current_rank(session, member_id)
-
-            if not current_rank_id:
-                print(f"⚠️  Usuario {member_id} no tiene rango asignado")
-                return []
-
-            rank = session.exec(
-                sqlmodel.select(Ranks).where(Ranks.id == current_rank_id)
-            ).first()
+        return cls.calculate_matching_bonus_for_period(session, period_id, member_ids=[member_id])
 
-            if not rank:
-                print(f"❌ Rango {current_rank_id} no encontrado")
-                return []
-
-            # 2. Verificar que sea rango Embajador
-            if rank.name not in cls.AMBASSADOR_RANKS:
-                print(f"⚠️  Rango {rank.name} no es elegible para Matching Bonus")
-                return []
-
-            # 3. Obtener porcentajes según rango
-            percentages = cls.MATCHING_BONUS_PERCENTAGES.get(rank.name, [])
-
-            if not percentages:
-                print(f"⚠️  No hay porcentajes Matching para rango {rank.name}")
-                return []
+    @classmethod
+    def calculate_matching_bonus_for_period(
+        cls,
+        session,
+        period_id: int,
+        member_ids=None
+    ) -> List[int]:
+        """
+        Calcula el Bono Matching de TODOS los Embajadores del período en una pasada.
 
-            # 4. Obtener usuario para moneda
-            user = session.exec(
-                sqlmodel.select(Users).where(Users.member_id == member_id)
-            ).first()
+        Flujo (3 statements en total, sin importar el tamaño de la red):
+        1. Un query que:
+           - agrega el Uninivel del período por miembro (GROUP BY member_id)
+           - resuelve el rango actual de cada miembro (último UserRankHistory)
+           - cruza con usertreepath (1 <= depth <= 4) donde ancestro Y descendiente son Embajadores
+        2. Cálculo en memoria del % por rango del ancestro y profundidad
+        3. Un INSERT multi-fila de todas las comisiones BONO_MATCHING
 
-            if not user:
-                print(f"❌ Usuario {member_id} no encontrado")
-                return []
+        No verifica si el Matching del período ya fue calculado: el llamador
+        decide cuándo ejecutarlo (cierre mensual).
 
-            user_currency = ExchangeService.get_country_currency(user.country_cache)
+        Args:
+            session: Sesión de base de datos
+            period_id: ID del período mensual
+            member_ids: Limitar a estos Embajadores receptores: lista o subquery de member_id (None = todos)
 
-            # 5. Obtener todos los descendientes (downline completo)
-            downline = GenealogyService.get_downline(session, member_id)
+        Returns:
+            Lista de IDs de comisiones creadas
+        """
+        try:
+            commission_rows = cls.build_matching_commission_rows(session, period_id, member_ids)
 
-            if not downline:
-                print(f"⚠️  Usuario {member_id} no tiene downline")
-                return []
+            commission_ids = cls.bulk_insert_commissions(session, commission_rows)
 
-            # 6. Calcular comisión por cada nivel de profundidad de Embajadores
-            commission_ids = []
-            max_depth = len(percentages)
+            receivers = len({row["member_id"] for row in commission_rows})
+            print(f"✅ Matching período {period_id}: {len(commission_ids)} comisiones para {receivers} Embajadores")
 
-            for depth in range(1, max_depth + 1):
-                percentage = percentages[depth - 1]
+            return commission_ids
 
-                # Obtener miembros de este nivel específico
-                level_members = GenealogyService.get_level_members(session, member_id, depth)
+        except Exception as e:
+            print(f"❌ Error calculando Matching Bonus del período {period_id}: {e}")
+            return []
 
-                for descendant in level_members:
-                    # Verificar que el descendiente sea Embajador
-                    descendant_rank_id = RankService.get_user_current_rank(session, descendant.member_id)
+    @classmethod
+    def build_matching_commission_rows(cls, session, period_id: int, member_ids=None) -> List[dict]:
+        """
+        Arma (sin insertar) las filas BONO_MATCHING del período.
+        Principio DRY: Lo usan calculate_matching_bonus_for_period y la liquidación por shards.
 
-                    if not descendant_rank_id:
-                        continue
+        Args:
+            session: Sesión de base de datos
+            period_id: ID del período mensual
+            member_ids: Lista o subquery de member_id receptores (None = todos)
 
-                    descendant_rank = session.exec(
-                        sqlmodel.select(Ranks).where(Ranks.id == descendant_rank_id)
-                    ).first()
+        Returns:
+            Lista de dicts con columnas de Commissions, ordenada por receptor y profundidad
+        """
+        max_matching_depth = max(len(p) for p in cls.MATCHING_BONUS_PERCENTAGES.values())
 
-                    if not descendant_rank or descendant_rank.name not in cls.AMBASSADOR_RANKS:
-                        continue
+        ancestor_rank = cls._current_rank_subquery("ancestor_rank", cls.AMBASSADOR_RANKS)
+        descendant_rank = cls._current_rank_subquery("descendant_rank", cls.AMBASSADOR_RANKS)
 
-                    # Obtener comisiones Uninivel del descendiente en este período
-                    uninivel_earned = session.exec(
-                        sqlmodel.select(sqlmodel.func.sum(Commissions.amount_converted))
-                        .where(
-                            (Commissions.member_id == descendant.member_id) &
-                            (Commissions.bonus_type == BonusType.BONO_UNINIVEL.value) &
-                            (Commissions.period_id == period_id)
-                        )
-                    ).first()
-
-                    if not uninivel_earned or uninivel_earned <= 0:
-                        continue
+        # Uninivel ganado por miembro en el período (una sola agregación)
+        unilevel_earnings = (
+            sqlmodel.select(
+                Commissions.member_id,
+                sqlmodel.func.sum(Commissions.amount_converted).label("earned")
+            )
+            .where(
+                (Commissions.bonus_type == BonusType.BONO_UNINIVEL.value) &
+                (Commissions.period_id == period_id)
+            )
+            .group_by(Commissions.member_id)
+            .subquery("unilevel_earnings")
+        )
+
+        query = (
+            sqlmodel.select(
+                UserTreePath.ancestor_id,
+                UserTreePath.descendant_id,
+                UserTreePath.depth,
+                ancestor_rank.c.rank_name,
+                unilevel_earnings.c.earned,
+                Users.country_cache
+            )
+            .join(ancestor_rank, ancestor_rank.c.member_id == UserTreePath.ancestor_id)
+            .join(descendant_rank, descendant_rank.c.member_id == UserTreePath.descendant_id)
+            .join(unilevel_earnings, unilevel_earnings.c.member_id == UserTreePath.descendant_id)
+            .join(Users, Users.member_id == UserTreePath.ancestor_id)
+            .where(
+                (UserTreePath.depth >= 1) &
+                (UserTreePath.depth <= max_matching_depth) &
+                (unilevel_earnings.c.earned > 0)
+            )
+            .order_by(UserTreePath.ancestor_id, UserTreePath.depth, UserTreePath.descendant_id)
+        )
+
+        if member_ids is not None:
+            query = query.where(UserTreePath.ancestor_id.in_(member_ids))
+
+        matches = session.exec(query).all()
+
+        # Cálculo en memoria
+        calculated_at = datetime.now(timezone.utc)
+        commission_rows = []
+
+        for ancestor_id, descendant_id, depth, rank_name, earned, country_cache in matches:
+            percentages = cls.MATCHING_BONUS_PERCENTAGES.get(rank_name, [])
+
+            if depth > len(percentages):
+                continue  # Profundidad fuera del alcance del rango
+
+            percentage = percentages[depth - 1]
+            user_currency = ExchangeService.get_country_currency(country_cache)
+
+            commission_rows.append({
+                "member_id": ancestor_id,
+                "bonus_type": BonusType.BONO_MATCHING.value,
+                "source_member_id": descendant_id,
+                "source_order_id": None,
+                "period_id": period_id,
+                "level_depth": depth,
+                "amount_vn": earned,
+                "currency_origin": user_currency,
+                "amount_converted": earned * (percentage / 100),
+                "currency_destination": user_currency,
+                "exchange_rate": 1.0,
+                "calculated_at": calculated_at,
+                "paid_at": None,
+                "notes": f"Matching Bonus {percentage}% - Nivel {depth} - Embajador: {descendant_id} - Uninivel: {earned:.2f}",
+            })
+
+        return commission_rows
 
-                    # Calcular Matching Bonus
-                    matching_amount = uninivel_earned * (percentage / 100)
-
-                    # Crear registro de comisión
-                    commission = Commissions(
-                        member_id=member_id,
-                        bonus_type=BonusType.BONO_MATCHING.value,
-                        source_member_id=descendant.member_id,
-                        source_order_id=None,
-                        period_id=period_id,
-                        level_depth=depth,
-                        amount_vn=uninivel_earned,
-                        currency_origin=user_currency,
-                        amount_converted=matching_amount,
-                        currency_destination=user_currency,
-                        exchange_rate=1.0,
-                        calculated_at=datetime.now(timezone.utc),
-                        paid_at=None,
-                        notes=f"Matching Bonus {percentage}% - Nivel {depth} - Embajador: {descendant.member_id} - Uninivel: {uninivel_earned:.2f}"
-                    )
-
-                    session.add(commission)
-                    session.flush()
-                    commission_ids.append(commission.id)
-
-                    print(f"✅ Comisión Matching creada: ${matching_amount:.2f} para member_id={member_id} desde {descendant.member_id}")
+    @classmethod
+    def bulk_insert_commissions(cls, session, commission_rows: List[dict]) -> List[int]:
+        """
+        Inserta todas las comisiones con un solo INSERT multi-fila y RETURNING id.
+        Principio DRY: Writer compartido por los cálculos batch de comisiones.
 
-            return commission_ids
+        Args:
+            session: Sesión de base de datos
+            commission_rows: Lista de dicts con columnas de Commissions
 
-        except Exception as e:
-            print(f"❌ Error calculando Matching Bonus para usuario {member_id}: {e}")
+        Returns:
+            Lista de IDs de comisiones creadas (mismo orden que commission_rows)
+        """
+        if not commission_rows:
             return []
 
+        return list(session.scalars(
+            sqlmodel.insert(Commissions).returning(Commissions.id),
+            commission_rows
+        ))
+
     @classmethod
     def process_achievement_bonus(cls, session, member_id: int, new_rank_name: str) -> Optional[int]:
         """
@@ -745,24 +805,97 @@ class CommissionService:
             return None
 
     @classmethod
-    def _get_current_period(cls, session) -> Optional[Periods]:
+    def build_achievement_bonus_rows(
+        cls,
+        session,
+        achieved_ranks: Dict[int, List[str]],
+        users: Dict[int, Users],
+        period_id: Optional[int]
+    ) -> List[dict]:
+        """
+        Filas de Bono por Alcance para varios miembros (mismas reglas que
+        process_achievement_bonus) con una sola consulta de bonos ya cobrados.
+        Listas para bulk_insert_commissions.
+
+        Args:
+            session: Sesión de base de datos
+            achieved_ranks: member_id → nombres de rangos alcanzados (en orden)
+            users: member_id → usuario (country_cache y created_at)
+            period_id: Período de las comisiones
+
+        Returns:
+            Lista de dicts con columnas de Commissions
+        """
+        achieved_ranks = {
+            member_id: [name for name in rank_names if name in cls.ACHIEVEMENT_BONUS_AMOUNTS]
+            for member_id, rank_names in achieved_ranks.items()
+        }
+        achieved_ranks = {member_id: names for member_id, names in achieved_ranks.items() if names}
+
+        if not achieved_ranks:
+            return []
+
+        # Notas de bonos por alcance ya cobrados (una consulta para todos)
+        paid_notes: Dict[int, List[str]] = {}
+        for member_id, notes in session.exec(
+            sqlmodel.select(Commissions.member_id, Commissions.notes)
+            .where(
+                (Commissions.bonus_type == BonusType.BONO_ALCANCE.value) &
+                Commissions.member_id.in_(list(achieved_ranks))
+            )
+        ).all():
+            paid_notes.setdefault(member_id, []).append(notes or "")
+
+        calculated_at = datetime.now(timezone.utc)
+        rows = []
+
+        for member_id, rank_names in achieved_ranks.items():
+            user = users[member_id]
+            user_currency = ExchangeService.get_country_currency(user.country_cache)
+
+            for rank_name in rank_names:
+                if any(rank_name in notes for notes in paid_notes.get(member_id, [])):
+                    continue
+
+                # Rango Emprendedor: máximo 30 días desde inscripción (created_at en UTC, con o sin tzinfo)
+                if rank_name == "Emprendedor":
+                    created_at = user.created_at
+                    if created_at.tzinfo is None:
+                        created_at = created_at.replace(tzinfo=timezone.utc)
+                    if (calculated_at - created_at).days > 30:
+                        continue
+
+                amount = cls.ACHIEVEMENT_BONUS_AMOUNTS[rank_name].get(user_currency)
+                if not amount:
+                    continue
+
+                rows.append({
+                    "member_id": member_id,
+                    "bonus_type": BonusType.BONO_ALCANCE.value,
+                    "source_member_id": None,
+                    "source_order_id": None,
+                    "period_id": period_id,
+                    "level_depth": None,
+                    "amount_vn": amount,
+                    "currency_origin": user_currency,
+                    "amount_converted": amount,
+                    "currency_destination": user_currency,
+                    "exchange_rate": 1.0,
+                    "calculated_at": calculated_at,
+                    "paid_at": None,
+                    "notes": f"Bono por Alcance - Rango: {rank_name} (primera vez)",
+                })
+
+        return rows
+
+    @classmethod
+    def _get_current_period(cls, session) -> Optional[PeriodSnapshot]:
         """
         Obtiene el período actual activo.
-        Principio DRY: Método reutilizable.
+        Principio DRY: Delegado a PeriodResolver (en memoria, sin query en estado estable).
         """
         try:
-            from ..utils.timezone_mx import get_mexico_now
-            current_date = get_mexico_now()
-
-            current_period = session.exec(
-                sqlmodel.select(Periods)
-                .where(
-                    (Periods.starts_on <= current_date) &
-                    (Periods.ends_on >= current_date)
-                )
-            ).first()
-
-            return current_period
+            return PeriodResolver.get_current(session)
 
         except Exception as e:
             print(f"❌ Error obteniendo período actual: {e}")
@@ -0,0 +1,168 @@
+"""
+Servicio POO para el snapshot del dashboard.
+Reúne en una sola consulta lo que muestra el dashboard de un miembro: PVG,
+rango del período y ganancias por tipo de bono. El conteo de calificados viene
+de los contadores materializados (UserStatusCounterService).
+El snapshot se cachea por miembro unos segundos (renders repetidos no tocan BD).
+
+Principios aplicados: KISS, DRY, POO
+"""
+
+import threading
+import time
+import sqlmodel
+from typing import Any, Dict, Optional
+
+from database.users import Users, UserStatus
+from database.comissions import Commissions, BonusType
+from database.user_rank_history import UserRankHistory
+from .exchange_service import ExchangeService
+from .period_resolver import PeriodResolver
+from .rank_ladder import RankLadder
+from .user_status_counter_service import UserStatusCounterService
+
+
+class DashboardSnapshotService:
+    """
+    Servicio POO para el snapshot del dashboard.
+    Principio POO: Encapsula la consulta única, el cálculo de progresión y el cache TTL.
+    """
+
+    TTL_SECONDS = 15            # Vigencia del snapshot por miembro
+    MAX_CACHED_MEMBERS = 10000  # Se descartan los más antiguos al superarlo
+
+    # Bonos que suman a las ganancias estimadas del período
+    EARNINGS_BONUS_TYPES = [
+        BonusType.BONO_ALCANCE.value,
+        BonusType.BONO_UNINIVEL.value,
+        BonusType.BONO_MATCHING.value,
+    ]
+
+    _cache: Dict[int, tuple] = {}       # member_id → (vence, snapshot)
+    _cache_lock = threading.Lock()
+
+    @classmethod
+    def get_snapshot(cls, session, member_id: int, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Snapshot del dashboard del miembro (una consulta; cacheado TTL_SECONDS).
+
+        Args:
+            session: Sesión de base de datos
+            member_id: ID del miembro
+            use_cache: False para forzar lectura (ej. después de una orden)
+
+        Returns:
+            Dict con pvg, currency, current_rank_id, next_rank_pvg,
+            rank_progress_percentage, earnings (por tipo), estimated_monthly_earnings,
+            qualified_count y non_qualified_count; None si el miembro no existe
+        """
+        if use_cache:
+            with cls._cache_lock:
+                cached = cls._cache.get(member_id)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
+
+        snapshot = cls._load_snapshot(session, member_id)
+
+        if snapshot is not None:
+            with cls._cache_lock:
+                cls._cache.pop(member_id, None)
+                cls._cache[member_id] = (time.monotonic() + cls.TTL_SECONDS, snapshot)
+                while len(cls._cache) > cls.MAX_CACHED_MEMBERS:
+                    cls._cache.pop(next(iter(cls._cache)))
+
+        return snapshot
+
+    @classmethod
+    def invalidate(cls, member_id: Optional[int] = None) -> None:
+        """Descarta el snapshot de un miembro (o todos si member_id es None)."""
+        with cls._cache_lock:
+            if member_id is None:
+                cls._cache.clear()
+            else:
+                cls._cache.pop(member_id, None)
+
+    @classmethod
+    def _load_snapshot(cls, session, member_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Una sola sentencia: fila del usuario + rango del período (subquery escalar)
+        + ganancias por tipo (agregado condicional). Período, escalera de rangos
+        y contadores por status vienen de sus caches en memoria.
+        """
+        current_period = PeriodResolver.get_current(session)
+
+        # Sin período activo no hay rango ni ganancias del período
+        in_rank_period = UserRankHistory.period_id == current_period.id if current_period else sqlmodel.false()
+        in_commission_period = Commissions.period_id == current_period.id if current_period else sqlmodel.false()
+
+        current_rank = (
+            sqlmodel.select(sqlmodel.func.max(UserRankHistory.rank_id))
+            .where((UserRankHistory.member_id == member_id) & in_rank_period)
+            .scalar_subquery()
+        )
+
+        earnings = (
+            sqlmodel.select(*[
+                sqlmodel.func.coalesce(sqlmodel.func.sum(
+                    sqlmodel.case((Commissions.bonus_type == bonus_type, Commissions.amount_converted), else_=0.0)
+                ), 0.0).label(bonus_type)
+                for bonus_type in cls.EARNINGS_BONUS_TYPES
+            ])
+            .where(
+                (Commissions.member_id == member_id) &
+                in_commission_period &
+                Commissions.bonus_type.in_(cls.EARNINGS_BONUS_TYPES)
+            )
+            .subquery("earnings")
+        )
+
+        row = session.exec(
+            sqlmodel.select(
+                Users.pvg_cache,
+                Users.country_cache,
+                current_rank.label("current_rank_id"),
+                *earnings.c,
+            )
+            .select_from(Users)
+            .join(earnings, sqlmodel.true())
+            .where(Users.member_id == member_id)
+        ).first()
+
+        if row is None:
+            return None
+
+        pvg = row.pvg_cache or 0
+        current_rank_id = row.current_rank_id or 1
+
+        # Progresión hacia el siguiente rango (escalera en memoria)
+        ladder = RankLadder.get_shared(session)
+        next_rank_id = ladder.next_rank_id(current_rank_id)
+
+        if next_rank_id is not None:
+            next_rank_pvg = ladder.pvg_required[next_rank_id]
+            rank_progress_percentage = int((pvg / next_rank_pvg) * 100) if next_rank_pvg > 0 else 0
+        else:
+            next_rank_pvg = ladder.pvg_required.get(current_rank_id, 0)
+            rank_progress_percentage = 100
+
+        # PVG en 0 = período reseteado: las ganancias se muestran en 0
+        earnings_by_type = {
+            bonus_type: float(getattr(row, bonus_type)) if pvg else 0.0
+            for bonus_type in cls.EARNINGS_BONUS_TYPES
+        }
+
+        status_counts = UserStatusCounterService.get_counts(session)
+
+        return {
+            "member_id": member_id,
+            "period_id": current_period.id if current_period else None,
+            "pvg": pvg,
+            "currency": ExchangeService.get_country_currency(row.country_cache or "MX"),
+            "current_rank_id": current_rank_id,
+            "next_rank_pvg": next_rank_pvg,
+            "rank_progress_percentage": rank_progress_percentage,
+            "earnings": earnings_by_type,
+            "estimated_monthly_earnings": sum(earnings_by_type.values()),
+            "qualified_count": status_counts[UserStatus.QUALIFIED.value],
+            "non_qualified_count": status_counts[UserStatus.NO_QUALIFIED.value],
+        }
@@ -0,0 +1,120 @@
+"""
+Línea de tiempo de tasas de cambio en memoria (por proceso).
+
+La tabla exchangerates tiene pocas filas por par de monedas y cambia rara vez;
+en lugar de una query ordenada por cada conversión se carga una vez:
+- por par (from, to): effective_from ordenados ascendente (bisect por fecha)
+- tasa y effective_until de cada vigencia
+
+Se comparte con ProcessCache (utils/process_cache.py): un cambio ORM a
+ExchangeRates (create_exchange_rate) la invalida; la sesión que hizo el cambio
+convierte con una línea de tiempo propia que ya incluye la tasa nueva y el resto
+del proceso la ve tras el commit. MAX_AGE_SECONDS acota cuánto tarda otro
+proceso en ver un cambio.
+
+Principios aplicados: KISS, POO
+"""
+
+from bisect import bisect_right
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import sqlmodel
+
+from database.exchange_rates import ExchangeRates
+from ..utils.process_cache import ProcessCache
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Fechas leídas de BD vienen sin tzinfo (UTC puro)."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+class ExchangeRateTimeline:
+    """
+    Snapshot inmutable de las tasas de cambio del sistema.
+    Principio POO: Encapsula las vigencias por par con búsqueda O(log n).
+    """
+
+    MAX_AGE_SECONDS = 600
+
+    _cache = ProcessCache(
+        "exchange_rate_timeline",
+        load=lambda session: ExchangeRateTimeline.from_session(session),
+        is_expired=lambda timeline, age_seconds: age_seconds > ExchangeRateTimeline.MAX_AGE_SECONDS,
+    )
+
+    def __init__(self, rates: Iterable[Tuple[str, str, float, datetime, Optional[datetime]]]):
+        """
+        Args:
+            rates: Tuplas (from_currency, to_currency, rate, effective_from, effective_until)
+        """
+        by_pair: Dict[Tuple[str, str], List[tuple]] = {}
+        for from_currency, to_currency, rate, effective_from, effective_until in rates:
+            by_pair.setdefault((from_currency, to_currency), []).append((
+                _as_utc(effective_from),
+                _as_utc(effective_until) if effective_until else None,
+                rate
+            ))
+
+        self._starts: Dict[Tuple[str, str], List[datetime]] = {}
+        self._entries: Dict[Tuple[str, str], List[tuple]] = {}
+
+        for pair, entries in by_pair.items():
+            entries.sort(key=lambda entry: entry[0])
+            self._starts[pair] = [entry[0] for entry in entries]
+            self._entries[pair] = entries
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def rate_for(self, from_currency: str, to_currency: str, as_of_date: datetime) -> Optional[float]:
+        """
+        Tasa vigente del par en as_of_date: la de effective_from más reciente
+        <= as_of_date cuya vigencia no haya terminado (None si no hay).
+        """
+        starts = self._starts.get((from_currency, to_currency))
+        if not starts:
+            return None
+
+        as_of_date = _as_utc(as_of_date)
+        entries = self._entries[(from_currency, to_currency)]
+
+        # Vigencias que ya empezaron, de la más reciente a la más antigua
+        for position in range(bisect_right(starts, as_of_date) - 1, -1, -1):
+            _, effective_until, rate = entries[position]
+            if effective_until is None or effective_until >= as_of_date:
+                return rate
+
+        return None
+
+    @classmethod
+    def from_session(cls, session) -> "ExchangeRateTimeline":
+        """Construye la línea de tiempo con un solo SELECT sobre exchangerates."""
+        rows = session.exec(
+            sqlmodel.select(
+                ExchangeRates.from_currency,
+                ExchangeRates.to_currency,
+                ExchangeRates.rate,
+                ExchangeRates.effective_from,
+                ExchangeRates.effective_until
+            )
+        ).all()
+        return cls(rows)
+
+    @classmethod
+    def get_shared(cls, session) -> "ExchangeRateTimeline":
+        """
+        Línea de tiempo compartida del proceso; se recarga si fue invalidada o expiró.
+        Una sesión con cambios a ExchangeRates sin confirmar recibe una línea de
+        tiempo propia (no se publica al proceso una tasa que puede hacer rollback).
+        """
+        return cls._cache.get(session)
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Descarta la línea de tiempo cacheada."""
+        cls._cache.invalidate()
+
+
+ExchangeRateTimeline._cache.track(ExchangeRates)
@@ -5,11 +5,11 @@ Permite conversión entre monedas usando tasas fijas de la compañía.
 Principios aplicados: KISS, DRY, YAGNI, POO
 """
 
-import sqlmodel
-from typing import Optional
+from typing import Optional, Tuple
 from datetime import datetime, timezone
 
 from database.exchange_rates import ExchangeRates
+from .exchange_rate_timeline import ExchangeRateTimeline
 
 
 class ExchangeService:
@@ -36,7 +36,7 @@ class ExchangeService:
     ) -> float:
         """
         Convierte un monto de una moneda a otra usando tasas de la compañía.
-        Principio KISS: Conversión directa usando tabla de tasas.
+        Principio DRY: Delegado a convert_with_rate.
 
         Args:
             session: Sesión de base de datos
@@ -48,10 +48,37 @@ class ExchangeService:
         Returns:
             Monto convertido en moneda destino
         """
+        converted, _ = cls.convert_with_rate(session, amount, from_currency, to_currency, as_of_date)
+        return converted
+
+    @classmethod
+    def convert_with_rate(
+        cls,
+        session,
+        amount: float,
+        from_currency: str,
+        to_currency: str,
+        as_of_date: Optional[datetime] = None
+    ) -> Tuple[float, float]:
+        """
+        Convierte un monto y regresa también la tasa realmente aplicada
+        (para registrar exchange_rate en la comisión).
+        Principio KISS: Tasa vigente desde la línea de tiempo en memoria, sin query.
+
+        Args:
+            session: Sesión de base de datos
+            amount: Monto a convertir
+            from_currency: Moneda origen (MXN, USD, COP)
+            to_currency: Moneda destino (MXN, USD, COP)
+            as_of_date: Fecha para tasa vigente (default: ahora)
+
+        Returns:
+            Tupla (monto convertido, tasa usada); 1.0 si es la misma moneda o no hay tasa
+        """
         try:
             # Si son la misma moneda, retornar el mismo monto
             if from_currency == to_currency:
-                return amount
+                return amount, 1.0
 
             # Fecha de referencia
             if as_of_date is None:
@@ -62,13 +89,13 @@ class ExchangeService:
 
             if rate is None:
                 print(f"⚠️  No se encontró tasa {from_currency} -> {to_currency}, usando 1:1")
-                return amount
+                return amount, 1.0
 
-            return amount * rate
+            return amount * rate, rate
 
         except Exception as e:
             print(f"❌ Error convirtiendo {amount} {from_currency} -> {to_currency}: {e}")
-            return amount
+            return amount, 1.0
 
     @classmethod
     def _get_exchange_rate(
@@ -80,7 +107,8 @@ class ExchangeService:
     ) -> Optional[float]:
         """
         Obtiene la tasa de cambio vigente para una fecha específica.
-        Principio DRY: Lógica centralizada de búsqueda de tasas.
+        Principio DRY: Lógica centralizada de búsqueda de tasas (bisect sobre
+        ExchangeRateTimeline; solo consulta la BD al cargar o recargar).
 
         Args:
             session: Sesión de base de datos
@@ -92,22 +120,7 @@ class ExchangeService:
             Tasa de cambio o None si no existe
         """
         try:
-            # Buscar tasa vigente
-            exchange_rate = session.exec(
-                sqlmodel.select(ExchangeRates)
-                .where(
-                    (ExchangeRates.from_currency == from_currency) &
-                    (ExchangeRates.to_currency == to_currency) &
-                    (ExchangeRates.effective_from <= as_of_date) &
-                    (
-                        (ExchangeRates.effective_until.is_(None)) |
-                        (ExchangeRates.effective_until >= as_of_date)
-                    )
-                )
-                .order_by(sqlmodel.desc(ExchangeRates.effective_from))
-            ).first()
-
-            return exchange_rate.rate if exchange_rate else None
+            return ExchangeRateTimeline.get_shared(session).rate_for(from_currency, to_currency, as_of_date)
 
         except Exception as e:
             print(f"❌ Error obteniendo tasa {from_currency} -> {to_currency}: {e}")
@@ -141,6 +154,7 @@ class ExchangeService:
         """
         Crea una nueva tasa de cambio en el sistema.
         Principio POO: Método factory para crear tasas.
+        El flush invalida ExchangeRateTimeline: la siguiente conversión ya usa la tasa nueva.
 
         Args:
             session: Sesión de base de datos
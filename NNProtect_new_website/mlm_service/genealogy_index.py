@@ -0,0 +1,484 @@
+"""
+Índice genealógico en memoria (por proceso).
+
+Representa el árbol de patrocinio construido desde users.sponsor_id con arreglos
+compactos (array) en lugar de filas de UserTreePath:
+- parent / first_child / next_sibling: estructura del árbol
+- depth: profundidad desde la raíz
+- tin / tout + euler_order: recorrido de Euler (entrada/salida)
+
+Con el recorrido de Euler:
+- is_ancestor(a, d) es O(1): tin[a] < tin[d] <= tout[a]
+- el downline de a es el rango contiguo euler_order[tin[a] + 1 : tout[a] + 1]
+
+Los registros nuevos se agregan como hojas "pendientes" (sin números de Euler) y se
+resuelven subiendo por parent hasta el primer nodo indexado. Cuando hay demasiados
+pendientes se recalcula el recorrido de Euler.
+
+Frescura entre procesos (cada worker tiene su propio índice):
+- los registros de este proceso se aplican al hacer commit (register_on_commit)
+- cada FRESHNESS_CHECK_SECONDS, get_shared compara max(member_id) y el total de
+  users con el índice; los registros de otros workers (member_id mayores) se
+  agregan y cualquier otra diferencia (bajas, altas fuera de orden) reconstruye
+- cada MAX_AGE_SECONDS se reconstruye completo (cambios de sponsor, que no
+  alteran el total ni el máximo)
+Garantía: un registro hecho en otro worker se ve a más tardar en
+FRESHNESS_CHECK_SECONDS; un cambio de sponsor, en MAX_AGE_SECONDS.
+
+Principios aplicados: KISS, POO
+"""
+
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import sqlmodel
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SASession
+
+from database.users import Users
+
+
+NO_NODE = -1
+
+
+class GenealogyIndex:
+    """
+    Índice genealógico compacto basado en arreglos y recorrido de Euler.
+    Principio POO: Encapsula la estructura del árbol y sus consultas en memoria.
+    """
+
+    # Pendientes tolerados antes de recalcular el recorrido de Euler
+    MIN_PENDING_BEFORE_REBUILD = 1024
+    PENDING_REBUILD_RATIO = 0.01
+
+    # member_id densos (autoincrement): mapeo member_id → slot con array en lugar de dict
+    DENSE_ID_FACTOR = 4
+
+    # Vigencia entre procesos (ver docstring del módulo)
+    FRESHNESS_CHECK_SECONDS = 5
+    MAX_AGE_SECONDS = 600
+
+    SESSION_PENDING_KEY = "genealogy_index_pending"
+
+    _shared: Optional["GenealogyIndex"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, members: Iterable[Tuple[int, Optional[int]]]):
+        """
+        Construye el índice desde pares (member_id, sponsor_id).
+
+        Args:
+            members: Pares (member_id, sponsor_id); sponsor None/0 o desconocido = raíz
+        """
+        members = list(members)
+
+        self._lock = threading.RLock()
+        self.loaded_at = self.checked_at = time.monotonic()
+        self.member_ids = array("i", (member_id for member_id, _ in members))
+        self._build_slot_map()
+
+        size = len(self.member_ids)
+        self.parent = array("i", [NO_NODE]) * size
+        self.first_child = array("i", [NO_NODE]) * size
+        self.next_sibling = array("i", [NO_NODE]) * size
+        self.depth = array("i", [0]) * size
+
+        # Enlazar hijos en orden inverso para conservar el orden de registro
+        for slot in range(size - 1, -1, -1):
+            sponsor_slot = self._slot_of(members[slot][1])
+            if sponsor_slot != NO_NODE and sponsor_slot != slot:
+                self.parent[slot] = sponsor_slot
+                self.next_sibling[slot] = self.first_child[sponsor_slot]
+                self.first_child[sponsor_slot] = slot
+
+        self._build_euler_tour()
+
+    # ------------------------------------------------------------------
+    # Construcción
+    # ------------------------------------------------------------------
+
+    def _build_slot_map(self) -> None:
+        """Mapeo member_id → slot: array si los IDs son densos, dict si no."""
+        size = len(self.member_ids)
+        max_member_id = max(self.member_ids) if size else 0
+
+        if max_member_id <= max(self.DENSE_ID_FACTOR * size, 1024):
+            self._slot_array = array("i", [NO_NODE]) * (max_member_id + 1)
+            self._slot_dict: Optional[Dict[int, int]] = None
+            for slot, member_id in enumerate(self.member_ids):
+                self._slot_array[member_id] = slot
+        else:
+            self._slot_array = None
+            self._slot_dict = {member_id: slot for slot, member_id in enumerate(self.member_ids)}
+
+    def _slot_of(self, member_id: Optional[int]) -> int:
+        """Devuelve el slot de un member_id o NO_NODE si no existe."""
+        if member_id is None or member_id <= 0:
+            return NO_NODE
+
+        if self._slot_dict is not None:
+            return self._slot_dict.get(member_id, NO_NODE)
+
+        if member_id < len(self._slot_array):
+            return self._slot_array[member_id]
+
+        return NO_NODE
+
+    def _assign_slot(self, member_id: int, slot: int) -> None:
+        if self._slot_dict is not None:
+            self._slot_dict[member_id] = slot
+            return
+
+        if member_id >= len(self._slot_array):
+            self._slot_array.extend(array("i", [NO_NODE]) * (member_id + 1 - len(self._slot_array)))
+        self._slot_array[member_id] = slot
+
+    def _build_euler_tour(self) -> None:
+        """
+        Recorrido de Euler iterativo (sin recursión: soporta líneas de miles de niveles).
+        tout[n] = último tin del subárbol de n.
+        """
+        size = len(self.member_ids)
+        self.tin = array("i", [NO_NODE]) * size
+        self.tout = array("i", [NO_NODE]) * size
+        self.euler_order = array("i", [NO_NODE]) * size
+
+        parent, first_child, next_sibling = self.parent, self.first_child, self.next_sibling
+        tin, tout, order, depth = self.tin, self.tout, self.euler_order, self.depth
+        timer = 0
+
+        for root in range(size):
+            if parent[root] != NO_NODE:
+                continue
+
+            node = root
+            depth[root] = 0
+            while node != NO_NODE:
+                tin[node] = timer
+                order[timer] = node
+                timer += 1
+
+                child = first_child[node]
+                if child != NO_NODE:
+                    depth[child] = depth[node] + 1
+                    node = child
+                    continue
+
+                # Hoja: cerrar subárboles hasta encontrar un hermano
+                while True:
+                    tout[node] = timer - 1
+                    if node == root:
+                        node = NO_NODE
+                        break
+                    sibling = next_sibling[node]
+                    if sibling != NO_NODE:
+                        depth[sibling] = depth[node]
+                        node = sibling
+                        break
+                    node = parent[node]
+
+        self._pending: List[int] = []
+
+    # ------------------------------------------------------------------
+    # Registro incremental
+    # ------------------------------------------------------------------
+
+    def add_member(self, member_id: int, sponsor_id: Optional[int]) -> None:
+        """
+        Agrega un miembro recién registrado como hoja pendiente.
+
+        Args:
+            member_id: member_id del nuevo usuario
+            sponsor_id: member_id del sponsor (None para raíz)
+        """
+        with self._lock:
+            if self._slot_of(member_id) != NO_NODE:
+                return  # Ya indexado
+
+            slot = len(self.member_ids)
+            sponsor_slot = self._slot_of(sponsor_id)
+
+            self.member_ids.append(member_id)
+            self._assign_slot(member_id, slot)
+            self.parent.append(sponsor_slot)
+            self.first_child.append(NO_NODE)
+            self.next_sibling.append(NO_NODE)
+            self.depth.append(self.depth[sponsor_slot] + 1 if sponsor_slot != NO_NODE else 0)
+            self.tin.append(NO_NODE)
+            self.tout.append(NO_NODE)
+            self.euler_order.append(NO_NODE)
+
+            if sponsor_slot != NO_NODE:
+                # Agregar al final de la lista de hijos (orden de registro)
+                last = self.first_child[sponsor_slot]
+                if last == NO_NODE:
+                    self.first_child[sponsor_slot] = slot
+                else:
+                    while self.next_sibling[last] != NO_NODE:
+                        last = self.next_sibling[last]
+                    self.next_sibling[last] = slot
+
+            self._pending.append(slot)
+
+            threshold = max(self.MIN_PENDING_BEFORE_REBUILD, int(len(self.member_ids) * self.PENDING_REBUILD_RATIO))
+            if len(self._pending) > threshold:
+                self._build_euler_tour()
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def max_member_id(self) -> int:
+        """Mayor member_id indexado (0 si está vacío)."""
+        with self._lock:
+            return max(self.member_ids, default=0)
+
+    def __len__(self) -> int:
+        return len(self.member_ids)
+
+    def __contains__(self, member_id: int) -> bool:
+        return self._slot_of(member_id) != NO_NODE
+
+    def _is_ancestor_slot(self, ancestor: int, descendant: int) -> bool:
+        """Relación estricta entre dos slots distintos."""
+        tin = self.tin
+
+        # Subir por los pendientes hasta el primer nodo con números de Euler
+        node = descendant
+        while tin[node] == NO_NODE:
+            node = self.parent[node]
+            if node == NO_NODE:
+                return False
+            if node == ancestor:
+                return True
+
+        if tin[ancestor] == NO_NODE:
+            return False  # Un pendiente solo puede tener pendientes debajo
+
+        return tin[ancestor] < tin[node] <= self.tout[ancestor]
+
+    def is_ancestor(self, potential_ancestor: int, descendant: int) -> bool:
+        """
+        Verifica si un miembro es ancestro (depth > 0) de otro en O(1).
+
+        Args:
+            potential_ancestor: member_id del potencial ancestro
+            descendant: member_id del descendiente
+
+        Returns:
+            bool: True si hay relación ancestro-descendiente
+        """
+        with self._lock:
+            ancestor_slot = self._slot_of(potential_ancestor)
+            descendant_slot = self._slot_of(descendant)
+
+            if ancestor_slot == NO_NODE or descendant_slot == NO_NODE or ancestor_slot == descendant_slot:
+                return False
+
+            return self._is_ancestor_slot(ancestor_slot, descendant_slot)
+
+    def get_depth(self, ancestor_id: int, descendant_id: int) -> Optional[int]:
+        """
+        Profundidad de descendant_id bajo ancestor_id (0 = mismo miembro).
+
+        Returns:
+            int o None si no hay relación
+        """
+        with self._lock:
+            ancestor_slot = self._slot_of(ancestor_id)
+            descendant_slot = self._slot_of(descendant_id)
+
+            if ancestor_slot == NO_NODE or descendant_slot == NO_NODE:
+                return None
+
+            if ancestor_slot != descendant_slot and not self._is_ancestor_slot(ancestor_slot, descendant_slot):
+                return None
+
+            return self.depth[descendant_slot] - self.depth[ancestor_slot]
+
+    def get_upline_ids(self, member_id: int, max_depth: Optional[int] = None) -> List[int]:
+        """
+        member_ids ascendentes ordenados por cercanía (1=sponsor directo).
+
+        Args:
+            member_id: member_id del usuario
+            max_depth: Profundidad máxima (None = todos los niveles)
+        """
+        with self._lock:
+            upline = []
+            node = self._slot_of(member_id)
+            if node == NO_NODE:
+                return upline
+
+            node = self.parent[node]
+            while node != NO_NODE and (max_depth is None or len(upline) < max_depth):
+                upline.append(self.member_ids[node])
+                node = self.parent[node]
+
+            return upline
+
+    def _downline_slots(self, member_id: int, max_depth: Optional[int]) -> List[int]:
+        slot = self._slot_of(member_id)
+        if slot == NO_NODE:
+            return []
+
+        slots = []
+        if self.tin[slot] != NO_NODE:
+            slots.extend(self.euler_order[self.tin[slot] + 1:self.tout[slot] + 1])
+
+        slots.extend(pending for pending in self._pending if self._is_ancestor_slot(slot, pending))
+
+        if max_depth is not None:
+            limit = self.depth[slot] + max_depth
+            slots = [descendant for descendant in slots if self.depth[descendant] <= limit]
+
+        return slots
+
+    def get_downline_ids(self, member_id: int, max_depth: Optional[int] = None) -> List[int]:
+        """
+        member_ids descendientes ordenados por profundidad (estable por orden de Euler).
+
+        Args:
+            member_id: member_id del usuario
+            max_depth: Profundidad máxima (None = todos los niveles)
+        """
+        with self._lock:
+            slots = self._downline_slots(member_id, max_depth)
+            slots.sort(key=self.depth.__getitem__)
+            return [self.member_ids[slot] for slot in slots]
+
+    def count_downline(self, member_id: int, max_depth: Optional[int] = None) -> int:
+        """
+        Total de descendientes. Sin max_depth es O(1) sobre el rango de Euler.
+
+        Args:
+            member_id: member_id del usuario
+            max_depth: Profundidad máxima (None = todos los niveles)
+        """
+        with self._lock:
+            slot = self._slot_of(member_id)
+            if slot == NO_NODE:
+                return 0
+
+            if max_depth is None and not self._pending and self.tin[slot] != NO_NODE:
+                return self.tout[slot] - self.tin[slot]
+
+            return len(self._downline_slots(member_id, max_depth))
+
+    def memory_bytes(self) -> int:
+        """Bytes ocupados por los arreglos del índice (sin overhead del objeto)."""
+        arrays = [
+            self.member_ids, self.parent, self.first_child, self.next_sibling,
+            self.depth, self.tin, self.tout, self.euler_order
+        ]
+        total = sum(a.itemsize * len(a) for a in arrays)
+
+        if self._slot_array is not None:
+            total += self._slot_array.itemsize * len(self._slot_array)
+
+        return total
+
+    # ------------------------------------------------------------------
+    # Índice compartido por proceso
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_session(cls, session) -> "GenealogyIndex":
+        """
+        Construye el índice con un solo SELECT member_id, sponsor_id FROM users.
+        """
+        rows = session.exec(
+            sqlmodel.select(Users.member_id, Users.sponsor_id)
+            .where(Users.member_id.is_not(None))
+            .order_by(Users.member_id)
+        ).all()
+        return cls(rows)
+
+    @classmethod
+    def get_shared(cls, session) -> "GenealogyIndex":
+        """
+        Devuelve el índice del proceso, construyéndolo en el primer uso o al
+        pasar MAX_AGE_SECONDS; cada FRESHNESS_CHECK_SECONDS verifica que siga
+        al día con users (registros hechos por otros workers).
+        """
+        shared = cls._shared
+        if shared is None or time.monotonic() - shared.loaded_at > cls.MAX_AGE_SECONDS:
+            with cls._shared_lock:
+                shared = cls._shared
+                if shared is None or time.monotonic() - shared.loaded_at > cls.MAX_AGE_SECONDS:
+                    shared = cls._shared = cls.from_session(session)
+                    print(f"🌳 Índice genealógico construido: {len(shared)} miembros")
+            return shared
+
+        # Con registros propios sin commit, users incluye filas que el índice
+        # aún no debe tener: se verifica en la siguiente llamada
+        if (
+            time.monotonic() - shared.checked_at > cls.FRESHNESS_CHECK_SECONDS
+            and not session.info.get(cls.SESSION_PENDING_KEY)
+        ):
+            shared = cls._catch_up(session, shared)
+        return shared
+
+    @classmethod
+    def _catch_up(cls, session, shared: "GenealogyIndex") -> "GenealogyIndex":
+        """
+        Compara max(member_id) y total de users con el índice (una query).
+        Agrega los member_id mayores al del índice; si aun así no cuadra, reconstruye.
+        """
+        shared.checked_at = time.monotonic()
+        max_member_id, total = session.exec(
+            sqlmodel.select(sqlmodel.func.max(Users.member_id), sqlmodel.func.count(Users.member_id))
+        ).one()
+
+        indexed_max = shared.max_member_id()
+        if total == len(shared) and (max_member_id or 0) == indexed_max:
+            return shared
+
+        missing = session.exec(
+            sqlmodel.select(Users.member_id, Users.sponsor_id)
+            .where(Users.member_id > indexed_max)
+            .order_by(Users.member_id)
+        ).all()
+        if len(shared) + len(missing) == total:
+            for member_id, sponsor_id in missing:
+                shared.add_member(member_id, sponsor_id)
+            return shared
+
+        with cls._shared_lock:
+            if cls._shared is shared:
+                cls._shared = cls.from_session(session)
+                print(f"🌳 Índice genealógico reconstruido: {len(cls._shared)} miembros")
+            return cls._shared
+
+    @classmethod
+    def reset_shared(cls) -> None:
+        """Descarta el índice del proceso (se reconstruye en el siguiente uso)."""
+        with cls._shared_lock:
+            cls._shared = None
+
+    @classmethod
+    def register_on_commit(cls, session, member_id: int, sponsor_id: Optional[int]) -> None:
+        """
+        Agenda un registro para aplicarlo al índice compartido cuando la transacción haga commit.
+        Si la transacción hace rollback, el registro se descarta.
+        """
+        session.info.setdefault(cls.SESSION_PENDING_KEY, []).append((member_id, sponsor_id))
+
+
+@event.listens_for(SASession, "after_commit")
+def _apply_pending_registrations(session) -> None:
+    pending = session.info.pop(GenealogyIndex.SESSION_PENDING_KEY, None)
+    shared = GenealogyIndex._shared
+
+    if not pending or shared is None:
+        return
+
+    for member_id, sponsor_id in pending:
+        shared.add_member(member_id, sponsor_id)
+
+
+@event.listens_for(SASession, "after_rollback")
+def _discard_pending_registrations(session) -> None:
+    session.info.pop(GenealogyIndex.SESSION_PENDING_KEY, None)
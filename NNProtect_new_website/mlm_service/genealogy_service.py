@@ -3,10 +3,11 @@ Servicio de Genealogía MLM.
 Maneja la estructura de red usando UserTreePath (Closure Table Pattern).
 """
 import reflex as rx
-from sqlmodel import select
-from typing import List, Optional
+from sqlmodel import insert, literal, select
+from typing import List, Optional, Tuple
 from database.usertreepaths import UserTreePath
 from database.users import Users
+from .genealogy_index import GenealogyIndex
 
 
 class GenealogyService:
@@ -15,6 +16,12 @@ class GenealogyService:
     Principio: Path Enumeration para queries eficientes sin recursión.
     """
 
+    # Tamaño máximo de las listas IN al cargar Users desde GenealogyIndex
+    IN_CLAUSE_CHUNK_SIZE = 5000
+
+    # Filas UserTreePath por INSERT multi-fila en add_members_to_tree_bulk
+    BULK_INSERT_CHUNK_SIZE = 5000
+
     @staticmethod
     def add_member_to_tree(session, new_member_id: int, sponsor_id: int) -> bool:
         """
@@ -31,42 +38,45 @@ class GenealogyService:
         Returns:
             bool: True si se agregó exitosamente
 
-        Algoritmo:
+        Algoritmo (2 statements, sin cargar filas en Python):
             1. Insertar registro self (depth=0)
-            2. Copiar TODAS las relaciones del sponsor incrementando depth
-            3. Crear relación directa con sponsor (depth=1)
+            2. INSERT INTO usertreepath (ancestor_id, descendant_id, depth, sponsor_id)
+               SELECT ancestor_id, :new_member_id, depth + 1, :sponsor_id
+               FROM usertreepath
+               WHERE descendant_id = :sponsor_id
         """
         try:
+            has_sponsor = sponsor_id is not None and sponsor_id != 0
+
             # 1. Crear relación self (depth=0)
-            self_path = UserTreePath(
-                ancestor_id=new_member_id,
-                descendant_id=new_member_id,
-                depth=0
+            session.execute(
+                insert(UserTreePath).values(
+                    ancestor_id=new_member_id,
+                    descendant_id=new_member_id,
+                    depth=0,
+                    sponsor_id=sponsor_id if has_sponsor else None
+                )
             )
-            session.add(self_path)
+
+            # Mantener el índice en memoria al confirmar la transacción
+            GenealogyIndex.register_on_commit(session, new_member_id, sponsor_id)
 
             # Si no tiene sponsor (primer usuario), terminar aquí
-            if sponsor_id is None or sponsor_id == 0:
+            if not has_sponsor:
                 return True
 
-            # 2. Copiar TODAS las relaciones del sponsor + nueva relación
-            # Equivalente SQL:
-            # INSERT INTO usertreepaths (ancestor_id, descendant_id, depth)
-            # SELECT ancestor_id, new_member_id, depth + 1
-            # FROM usertreepaths
-            # WHERE descendant_id = sponsor_id
-
-            sponsor_paths = session.exec(
-                select(UserTreePath).where(UserTreePath.descendant_id == sponsor_id)
-            ).all()
-
-            for path in sponsor_paths:
-                new_path = UserTreePath(
-                    ancestor_id=path.ancestor_id,
-                    descendant_id=new_member_id,
-                    depth=path.depth + 1
+            # 2. Copiar TODAS las relaciones del sponsor incrementando depth
+            session.execute(
+                insert(UserTreePath).from_select(
+                    ["ancestor_id", "descendant_id", "depth", "sponsor_id"],
+                    select(
+                        UserTreePath.ancestor_id,
+                        literal(new_member_id),
+                        UserTreePath.depth + 1,
+                        literal(sponsor_id)
+                    ).where(UserTreePath.descendant_id == sponsor_id)
                 )
-                session.add(new_path)
+            )
 
             print(f"✅ Genealogía creada: member_id={new_member_id}, sponsor_id={sponsor_id}")
             return True
@@ -76,7 +86,83 @@ class GenealogyService:
             return False
 
     @staticmethod
-    def get_upline(session, member_id: int, max_depth: Optional[int] = None) -> List[Users]:
+    def add_members_to_tree_bulk(session, members: List[Tuple[int, Optional[int]]]) -> int:
+        """
+        Agrega un lote de miembros al árbol genealógico con inserts multi-fila.
+        Pensado para sembrar redes de prueba (miles de usuarios en una transacción).
+
+        Args:
+            session: Sesión de base de datos activa
+            members: Pares (member_id, sponsor_id) en orden topológico
+                     (cada sponsor antes que sus patrocinados, o ya existente en BD)
+
+        Returns:
+            int: Total de filas UserTreePath creadas
+
+        Algoritmo:
+            1. Un SELECT de los paths de los sponsors que ya existen en BD
+            2. Cálculo en memoria de los paths de cada miembro a partir de los de su sponsor
+            3. INSERTs multi-fila en bloques de BULK_INSERT_CHUNK_SIZE
+        """
+        if not members:
+            return 0
+
+        batch_member_ids = {member_id for member_id, _ in members}
+        external_sponsors = {
+            sponsor_id for _, sponsor_id in members
+            if sponsor_id and sponsor_id not in batch_member_ids
+        }
+
+        # 1. Paths existentes de sponsors fuera del lote: {member_id: [(ancestor_id, depth)]}
+        paths_by_member = {sponsor_id: [] for sponsor_id in external_sponsors}
+        if external_sponsors:
+            existing_paths = session.exec(
+                select(UserTreePath.descendant_id, UserTreePath.ancestor_id, UserTreePath.depth)
+                .where(UserTreePath.descendant_id.in_(external_sponsors))
+            ).all()
+            for descendant_id, ancestor_id, depth in existing_paths:
+                paths_by_member[descendant_id].append((ancestor_id, depth))
+
+        # 2 y 3. Calcular paths y escribir en bloques
+        rows = []
+        total_rows = 0
+
+        for member_id, sponsor_id in members:
+            has_sponsor = sponsor_id is not None and sponsor_id != 0
+            sponsor_paths = paths_by_member.get(sponsor_id, []) if has_sponsor else []
+
+            if has_sponsor and not sponsor_paths:
+                print(f"⚠️  Sponsor {sponsor_id} sin genealogía: member_id={member_id} queda como raíz")
+
+            member_paths = [(member_id, 0)] + [(ancestor_id, depth + 1) for ancestor_id, depth in sponsor_paths]
+            paths_by_member[member_id] = member_paths
+
+            rows.extend(
+                {
+                    "ancestor_id": ancestor_id,
+                    "descendant_id": member_id,
+                    "depth": depth,
+                    "sponsor_id": sponsor_id if has_sponsor else None,
+                }
+                for ancestor_id, depth in member_paths
+            )
+
+            GenealogyIndex.register_on_commit(session, member_id, sponsor_id)
+
+            if len(rows) >= GenealogyService.BULK_INSERT_CHUNK_SIZE:
+                session.execute(insert(UserTreePath), rows)
+                total_rows += len(rows)
+                rows = []
+
+        if rows:
+            session.execute(insert(UserTreePath), rows)
+            total_rows += len(rows)
+
+        print(f"✅ Genealogía en lote: {len(members)} miembros, {total_rows} paths")
+        return total_rows
+
+    @staticmethod
+    def get_upline(session, member_id: int, max_depth: Optional[int] = None, use_index: bool = False) -> List[Users]:
         """
         Obtiene los patrocinadores ascendentes de un miembro.
 
@@ -84,6 +170,7 @@ class GenealogyService:
             session: Sesión de base de datos
             member_id: member_id del usuario
             max_depth: Profundidad máxima (None = todos los niveles)
+            use_index: Resolver los member_ids con GenealogyIndex en lugar de UserTreePath
 
         Returns:
             List[Users]: Lista de sponsors ordenados por cercanía (1=directo, 2=abuelo, etc.)
@@ -97,6 +184,10 @@ class GenealogyService:
             ORDER BY utp.depth ASC
         """
         try:
+            if use_index:
+                upline_ids = GenealogyIndex.get_shared(session).get_upline_ids(member_id, max_depth)
+                return GenealogyService._load_users_in_order(session, upline_ids)
+
             query = (
                 select(Users)
                 .join(UserTreePath, Users.member_id == UserTreePath.ancestor_id)
@@ -118,7 +209,7 @@ class GenealogyService:
             return []
 
     @staticmethod
-    def get_downline(session, member_id: int, max_depth: Optional[int] = None) -> List[Users]:
+    def get_downline(session, member_id: int, max_depth: Optional[int] = None, use_index: bool = False) -> List[Users]:
         """
         Obtiene todos los descendientes de un miembro.
 
@@ -126,6 +217,7 @@ class GenealogyService:
             session: Sesión de base de datos
             member_id: member_id del usuario
             max_depth: Profundidad máxima (None = todos los niveles)
+            use_index: Resolver los member_ids con GenealogyIndex en lugar de UserTreePath
 
         Returns:
             List[Users]: Lista de descendientes ordenados por cercanía
@@ -139,6 +231,10 @@ class GenealogyService:
             ORDER BY utp.depth ASC
         """
         try:
+            if use_index:
+                downline_ids = GenealogyIndex.get_shared(session).get_downline_ids(member_id, max_depth)
+                return GenealogyService._load_users_in_order(session, downline_ids)
+
             query = (
                 select(Users)
                 .join(UserTreePath, Users.member_id == UserTreePath.descendant_id)
@@ -208,7 +304,7 @@ class GenealogyService:
         return GenealogyService.get_level_members(session, member_id, level=1)
 
     @staticmethod
-    def count_downline(session, member_id: int, max_depth: Optional[int] = None) -> int:
+    def count_downline(session, member_id: int, max_depth: Optional[int] = None, use_index: bool = False) -> int:
         """
         Cuenta el total de descendientes sin cargar objetos User.
         Más eficiente que len(get_downline()).
@@ -217,11 +313,15 @@ class GenealogyService:
             session: Sesión de base de datos
             member_id: member_id del usuario
             max_depth: Profundidad máxima
+            use_index: Contar con GenealogyIndex (sin query; O(1) sin max_depth)
 
         Returns:
             int: Total de descendientes
         """
         try:
+            if use_index:
+                return GenealogyIndex.get_shared(session).count_downline(member_id, max_depth)
+
             from sqlmodel import func
 
             query = (
@@ -243,7 +343,7 @@ class GenealogyService:
             return 0
 
     @staticmethod
-    def is_ancestor(session, potential_ancestor: int, descendant: int) -> bool:
+    def is_ancestor(session, potential_ancestor: int, descendant: int, use_index: bool = False) -> bool:
         """
         Verifica si un miembro es ancestro de otro.
 
@@ -251,11 +351,15 @@ class GenealogyService:
             session: Sesión de base de datos
             potential_ancestor: member_id del potencial ancestro
             descendant: member_id del descendiente
+            use_index: Verificar con GenealogyIndex (O(1), sin query)
 
         Returns:
             bool: True si hay relación ancestro-descendiente
         """
         try:
+            if use_index:
+                return GenealogyIndex.get_shared(session).is_ancestor(potential_ancestor, descendant)
+
             path = session.exec(
                 select(UserTreePath).where(
                     UserTreePath.ancestor_id == potential_ancestor,
@@ -294,3 +398,28 @@ class GenealogyService:
         except Exception as e:
             print(f"❌ Error obteniendo ancestros: {e}")
             return []
+
+    @staticmethod
+    def _load_users_in_order(session, member_ids: List[int]) -> List[Users]:
+        """
+        Carga los Users de una lista de member_ids conservando el orden de la lista.
+
+        Args:
+            session: Sesión de base de datos
+            member_ids: member_ids en el orden deseado
+
+        Returns:
+            List[Users]: Usuarios existentes en el mismo orden
+        """
+        if not member_ids:
+            return []
+
+        users_by_member_id = {}
+        for start in range(0, len(member_ids), GenealogyService.IN_CLAUSE_CHUNK_SIZE):
+            chunk = member_ids[start:start + GenealogyService.IN_CLAUSE_CHUNK_SIZE]
+            users = session.exec(
+                select(Users).where(Users.member_id.in_(chunk))
+            ).all()
+            users_by_member_id.update((user.member_id, user) for user in users)
+
+        return [users_by_member_id[member_id] for member_id in member_ids if member_id in users_by_member_id]
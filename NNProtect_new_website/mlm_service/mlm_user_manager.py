@@ -4,10 +4,11 @@ Se enfoca únicamente en la lógica de negocio multinivel.
 """
 import reflex as rx
 import sqlmodel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from database.users import Users, UserStatus
 
 # Timezone utilities
+from ..utils.async_db import AsyncDB
 from ..utils.timezone_mx import get_mexico_now, format_mexico_date, format_mexico_datetime, get_mexico_date, get_mexico_datetime_naive
 from datetime import timedelta
 from database.userprofiles import UserProfiles, UserGender
@@ -18,7 +19,10 @@ from database.auth_credentials import AuthCredentials
 from database.usertreepaths import UserTreePath
 from database.unilevel_report import UnilevelReports
 from .rank_service import RankService
+from .rank_ladder import RankLadder
 from .wallet_service import WalletService
+from .user_status_counter_service import UserStatusCounterService  # Registra los eventos de Users (contadores por status)
+from .profile_cache import ProfileCache  # Registra los eventos de invalidación del cache de perfiles
 import os
 
 class MLMUserManager:
@@ -241,22 +245,13 @@ class MLMUserManager:
         Esta versión async permite paralelizar con Supabase auth usando asyncio.gather().
         Mejora performance de login de 59s a <5s.
         """
-        import asyncio
-        from concurrent.futures import ThreadPoolExecutor
-        
         try:
             print(f"⚡ [ASYNC] Buscando datos MLM para Supabase ID: {supabase_user_id}")
             
-            # Ejecutar query de BD en thread pool para no bloquear event loop
-            loop = asyncio.get_event_loop()
-            
-            def _load_user_data():
-                with rx.session() as session:
-                    return MLMUserManager._load_user_data_sync(session, supabase_user_id)
-            
-            # Ejecutar en thread pool
-            result = await loop.run_in_executor(None, _load_user_data)
-            return result
+            # Query de BD en el pool compartido para no bloquear el event loop
+            return await AsyncDB.run_in_session(
+                MLMUserManager._load_user_data_sync, supabase_user_id, label="mlm.load_user_data"
+            )
             
         except Exception as e:
             print(f"❌ Error en load_complete_user_data_async: {str(e)}")
@@ -275,6 +270,28 @@ class MLMUserManager:
             print(f"❌ Usuario MLM no encontrado con supabase_user_id: {supabase_user_id}")
             return {}
         
+        return MLMUserManager._build_user_data(session, user)
+
+    @staticmethod
+    def _load_user_data_by_email_sync(session, email: str) -> dict:
+        """
+        Prefetch del login: mismos datos buscando por email_cache, antes de que
+        Supabase confirme las credenciales. El llamador solo debe usarlos si
+        supabase_user_id coincide con el usuario autenticado.
+        """
+        user = session.exec(
+            sqlmodel.select(Users).where(Users.email_cache == email.strip().lower())
+        ).first()
+
+        if not user:
+            print(f"⚠️ Prefetch de login sin usuario con email_cache: {email}")
+            return {}
+
+        return MLMUserManager._build_user_data(session, user)
+
+    @staticmethod
+    def _build_user_data(session, user: Users) -> dict:
+        """Perfil MLM completo (perfil, rangos, wallet y sponsor) de un usuario ya cargado."""
         print(f"✅ Usuario MLM encontrado: ID={user.id}, Member ID={user.member_id}")
         
         # Cargar perfil con manejo seguro
@@ -329,6 +346,7 @@ class MLMUserManager:
             "gender": gender_value,
             "referral_link": user.referral_link,
             "sponsor_id": user.sponsor_id,
+            "supabase_user_id": user.supabase_user_id,
             "created_at": format_mexico_date(user.created_at) if user.created_at else '',
             "created_at_iso": user.created_at.isoformat() if user.created_at else '',
             "last_login": format_mexico_datetime(user.updated_at) if user.updated_at else '',
@@ -556,67 +574,73 @@ class MLMUserManager:
             # No fallar el registro completo por error de dirección
     
     @staticmethod
-    def get_user_level(user_member_id: int, root_sponsor_id: int) -> int:
+    def get_user_level(user_member_id: int, root_sponsor_id: int, session=None) -> int:
         """
-        Calcula el nivel de un usuario respecto a un sponsor raíz usando BFS.
-        
+        Calcula el nivel de un usuario respecto a un sponsor raíz.
+        Una sola búsqueda por la clave (ancestor_id, descendant_id) de UserTreePath.
+
         Args:
             user_member_id: member_id del usuario a evaluar
             root_sponsor_id: member_id del sponsor raíz (usuario autenticado)
-            
+            session: Sesión activa opcional (si no se pasa se abre una)
+
         Returns:
             int: Nivel del usuario (1, 2, 3, etc.) o 0 si no está en la red
         """
+        if user_member_id == root_sponsor_id:
+            return 0  # El sponsor raíz es nivel 0
+
+        levels = MLMUserManager.get_user_levels([user_member_id], root_sponsor_id, session=session)
+        return levels.get(user_member_id, 0)
+
+    @staticmethod
+    def get_user_levels(user_member_ids: List[int], root_sponsor_id: int, session=None) -> Dict[int, int]:
+        """
+        Calcula en un solo query el nivel de varios usuarios respecto a un sponsor raíz.
+        Principio DRY: Forma batch de get_user_level para reportes de red.
+
+        Args:
+            user_member_ids: member_ids de los usuarios a evaluar
+            root_sponsor_id: member_id del sponsor raíz (usuario autenticado)
+            session: Sesión activa opcional (si no se pasa se abre una)
+
+        Returns:
+            Dict[int, int]: {member_id: nivel}; los usuarios fuera de la red no aparecen
+        """
+        if not user_member_ids:
+            return {}
+
+        def _query(active_session) -> Dict[int, int]:
+            rows = active_session.exec(
+                sqlmodel.select(UserTreePath.descendant_id, UserTreePath.depth)
+                .where(
+                    (UserTreePath.ancestor_id == root_sponsor_id) &
+                    (UserTreePath.descendant_id.in_(user_member_ids))
+                )
+            ).all()
+            return {descendant_id: depth for descendant_id, depth in rows}
+
         try:
-            if user_member_id == root_sponsor_id:
-                return 0  # El sponsor raíz es nivel 0
-            
-            with rx.session() as session:
-                # BFS desde el sponsor raíz hacia abajo
-                from collections import deque
-                
-                # Cola: (member_id, nivel)
-                queue = deque([(root_sponsor_id, 0)])
-                visited = set([root_sponsor_id])
-                
-                while queue:
-                    current_id, current_level = queue.popleft()
-                    
-                    # Buscar todos los usuarios directos de current_id
-                    direct_users = session.exec(
-                        sqlmodel.select(UserTreePath)
-                        .where(UserTreePath.ancestor_id == current_id)
-                    ).all()
-                    
-                    for tree_path in direct_users:
-                        child_id = tree_path.descendant_id
-                        child_level = current_level + 1
-                        
-                        # Si encontramos al usuario buscado
-                        if child_id == user_member_id:
-                            print(f"✅ Usuario {user_member_id} encontrado en nivel {child_level} de {root_sponsor_id}")
-                            return child_level
-                        
-                        # Si no lo hemos visitado, agregarlo a la cola
-                        if child_id not in visited:
-                            visited.add(child_id)
-                            queue.append((child_id, child_level))
-                
-                # Usuario no encontrado en la red
-                print(f"⚠️ Usuario {user_member_id} no encontrado en la red de {root_sponsor_id}")
-                return 0
-                
+            if session is not None:
+                return _query(session)
+
+            with rx.session() as new_session:
+                return _query(new_session)
+
         except Exception as e:
-            print(f"❌ Error calculando nivel de usuario {user_member_id}: {e}")
+            print(f"❌ Error calculando niveles respecto a {root_sponsor_id}: {e}")
             import traceback
             traceback.print_exc()
-            return 0
+            return {}
+
+    # Tamaño de página de la red descendente (keyset sobre depth, member_id)
+    DESCENDANTS_PAGE_SIZE = 200
 
     @staticmethod
     def get_network_descendants(sponsor_member_id: int, root_user_id: Optional[int] = None) -> list:
         """
         Obtiene toda la red descendente de un sponsor usando UserTreePath.
-        Optimizado con Path Enumeration Pattern - elimina recursión innecesaria.
+        Concatena las páginas de iter_network_descendants.
 
         Args:
             sponsor_member_id: member_id del sponsor principal
@@ -625,84 +649,188 @@ class MLMUserManager:
         Returns:
             Lista de diccionarios con datos de usuarios descendentes
         """
+        descendants = []
+        for page in MLMUserManager.iter_network_descendants(sponsor_member_id):
+            descendants.extend(page)
+        return descendants
+
+    @staticmethod
+    def iter_network_descendants(
+        sponsor_member_id: int,
+        start_date=None,
+        end_date=None,
+        min_level: Optional[int] = None,
+        max_level: Optional[int] = None,
+        page_size: Optional[int] = None,
+        session=None
+    ):
+        """
+        Recorre la red descendente página por página (streaming).
+        Cada página es un solo query; nunca se materializa toda la red.
+
+        Args:
+            sponsor_member_id: member_id del sponsor principal
+            start_date / end_date: Rango de fechas de registro (inclusive, date)
+            min_level / max_level: Rango de niveles (inclusive)
+            page_size: Registros por página (default DESCENDANTS_PAGE_SIZE)
+            session: Sesión activa opcional (si no se pasa se abre una)
+
+        Yields:
+            Lista de diccionarios de la página
+        """
+        def _pages(active_session):
+            cursor = None
+            while True:
+                page = MLMUserManager.get_network_descendants_page(
+                    sponsor_member_id,
+                    start_date=start_date,
+                    end_date=end_date,
+                    min_level=min_level,
+                    max_level=max_level,
+                    after=cursor,
+                    page_size=page_size,
+                    session=active_session
+                )
+                if page["items"]:
+                    yield page["items"]
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    return
+
         try:
-            with rx.session() as session:
-                # Query optimizado con JOIN para obtener todos los datos en una sola consulta
-                descendants_query = session.exec(
-                    sqlmodel.select(Users, UserTreePath, UserProfiles)
-                    .join(UserTreePath, Users.member_id == UserTreePath.descendant_id)
-                    .outerjoin(UserProfiles, Users.id == UserProfiles.user_id)
-                    .where(
-                        UserTreePath.ancestor_id == sponsor_member_id,
-                        UserTreePath.depth > 0  # Excluir self-reference
-                    )
-                    .order_by(UserTreePath.depth, Users.member_id)
-                ).all()
+            if session is not None:
+                yield from _pages(session)
+                return
 
-                descendants = []
-                sponsor_cache = {}  # Cache para evitar queries repetidas de sponsors
-
-                for user, tree_path, user_profile in descendants_query:
-                    # Obtener datos del sponsor (con cache)
-                    sponsor_data = {}
-                    if user.sponsor_id:
-                        if user.sponsor_id not in sponsor_cache:
-                            sponsor_result = session.exec(
-                                sqlmodel.select(Users, UserProfiles)
-                                .outerjoin(UserProfiles, Users.id == UserProfiles.user_id)
-                                .where(Users.member_id == user.sponsor_id)
-                            ).first()
-
-                            if sponsor_result:
-                                sponsor_user, sponsor_profile = sponsor_result
-                                sponsor_cache[user.sponsor_id] = {
-                                    "id": sponsor_user.id,
-                                    "member_id": sponsor_user.member_id,
-                                    "first_name": sponsor_user.first_name or "",
-                                    "last_name": sponsor_user.last_name or "",
-                                    "full_name": f"{sponsor_user.first_name or ''} {sponsor_user.last_name or ''}".strip(),
-                                    "phone": sponsor_profile.phone_number if sponsor_profile else "",
-                                    "email": sponsor_user.email_cache or ""
-                                }
-
-                        sponsor_data = sponsor_cache.get(user.sponsor_id, {})
-
-                    # Formatear fecha a DD/MM/YYYY
-                    formatted_date = user.created_at.strftime("%d/%m/%Y") if user.created_at else "N/A"
-
-                    # Nivel ya viene directamente de tree_path.depth (más eficiente)
-                    user_level = tree_path.depth
-
-                    user_data = {
-                        "id": user.id,
-                        "member_id": user.member_id,
-                        "first_name": user.first_name or "",
-                        "last_name": user.last_name or "",
-                        "full_name": f"{user.first_name or ''} {user.last_name or ''}".strip() if (user.first_name or user.last_name) else "N/A",
-                        "email": user.email_cache or "",
-                        "status": user.status.value if hasattr(user.status, 'value') else str(user.status),
-                        "created_at": formatted_date,
-                        "phone": user_profile.phone_number if user_profile else "",
-                        "sponsor_member_id": sponsor_data.get("member_id", None),
-                        "level": user_level,
-                        "sponsor_full_name": sponsor_data.get("full_name", "N/A"),
-                        "sponsor_phone": sponsor_data.get("phone", "N/A")
-                    }
-                    descendants.append(user_data)
-
-                return descendants
+            with rx.session() as new_session:
+                yield from _pages(new_session)
 
         except Exception as e:
             print(f"❌ Error obteniendo red descendente: {e}")
             import traceback
             traceback.print_exc()
-            return []
-    
+
+    @staticmethod
+    def get_network_descendants_page(
+        sponsor_member_id: int,
+        start_date=None,
+        end_date=None,
+        min_level: Optional[int] = None,
+        max_level: Optional[int] = None,
+        after: Optional[tuple] = None,
+        page_size: Optional[int] = None,
+        session=None
+    ) -> dict:
+        """
+        Obtiene una página de la red descendente con paginación keyset sobre (depth, member_id).
+        Filtros de fecha y nivel se aplican en SQL; datos del sponsor vienen en el mismo JOIN.
+
+        Args:
+            sponsor_member_id: member_id del sponsor principal
+            start_date / end_date: Rango de fechas de registro (inclusive, date)
+            min_level / max_level: Rango de niveles (inclusive)
+            after: Cursor (depth, member_id) del último registro de la página anterior
+            page_size: Registros por página (default DESCENDANTS_PAGE_SIZE)
+            session: Sesión activa opcional (si no se pasa se abre una)
+
+        Returns:
+            Dict con items (lista de diccionarios) y next_cursor (None si es la última página)
+        """
+        from sqlalchemy.orm import aliased
+        from datetime import datetime, time
+
+        page_size = page_size or MLMUserManager.DESCENDANTS_PAGE_SIZE
+        sponsor = aliased(Users)
+        sponsor_profile = aliased(UserProfiles)
+
+        query = (
+            sqlmodel.select(
+                Users.id,
+                Users.member_id,
+                Users.first_name,
+                Users.last_name,
+                Users.email_cache,
+                Users.status,
+                Users.created_at,
+                UserTreePath.depth,
+                UserProfiles.phone_number,
+                sponsor.member_id.label("sponsor_member_id"),
+                sponsor.first_name.label("sponsor_first_name"),
+                sponsor.last_name.label("sponsor_last_name"),
+                sponsor_profile.phone_number.label("sponsor_phone")
+            )
+            .join(Users, Users.member_id == UserTreePath.descendant_id)
+            .outerjoin(UserProfiles, UserProfiles.user_id == Users.id)
+            .outerjoin(sponsor, sponsor.member_id == Users.sponsor_id)
+            .outerjoin(sponsor_profile, sponsor_profile.user_id == sponsor.id)
+            .where(
+                (UserTreePath.ancestor_id == sponsor_member_id) &
+                (UserTreePath.depth >= max(min_level or 1, 1))  # Excluir self-reference
+            )
+            .order_by(UserTreePath.depth, UserTreePath.descendant_id)
+            .limit(page_size + 1)
+        )
+
+        if max_level is not None:
+            query = query.where(UserTreePath.depth <= max_level)
+
+        if start_date is not None:
+            query = query.where(Users.created_at >= datetime.combine(start_date, time.min))
+
+        if end_date is not None:
+            query = query.where(Users.created_at < datetime.combine(end_date + timedelta(days=1), time.min))
+
+        if after is not None:
+            after_depth, after_member_id = after
+            query = query.where(
+                (UserTreePath.depth > after_depth) |
+                ((UserTreePath.depth == after_depth) & (UserTreePath.descendant_id > after_member_id))
+            )
+
+        def _query(active_session) -> dict:
+            rows = active_session.exec(query).all()
+            has_more = len(rows) > page_size
+            rows = rows[:page_size]
+            return {
+                "items": [MLMUserManager._format_descendant_row(row) for row in rows],
+                "next_cursor": (rows[-1].depth, rows[-1].member_id) if has_more else None,
+            }
+
+        if session is not None:
+            return _query(session)
+
+        with rx.session() as new_session:
+            return _query(new_session)
+
+    @staticmethod
+    def _format_descendant_row(row) -> dict:
+        """
+        Da forma de diccionario de reporte a una fila de la red descendente.
+        Principio DRY: Mismo formato para todos los reportes de red.
+        """
+        sponsor_full_name = f"{row.sponsor_first_name or ''} {row.sponsor_last_name or ''}".strip()
+
+        return {
+            "id": row.id,
+            "member_id": row.member_id,
+            "first_name": row.first_name or "",
+            "last_name": row.last_name or "",
+            "full_name": f"{row.first_name or ''} {row.last_name or ''}".strip() if (row.first_name or row.last_name) else "N/A",
+            "email": row.email_cache or "",
+            "status": row.status.value if hasattr(row.status, 'value') else str(row.status),
+            "created_at": row.created_at.strftime("%d/%m/%Y") if row.created_at else "N/A",
+            "phone": row.phone_number or "",
+            "sponsor_member_id": row.sponsor_member_id,
+            "level": row.depth,
+            "sponsor_full_name": sponsor_full_name if row.sponsor_member_id else "N/A",
+            "sponsor_phone": (row.sponsor_phone or "") if row.sponsor_member_id else "N/A"
+        }
+
     @staticmethod
     def _filter_registrations_by_date_range(sponsor_member_id: int, start_date, end_date) -> list:
         """
         Método privado que filtra registraciones por rango de fechas.
-        Aplica POO para reutilizar lógica común.
+        El filtro se aplica en SQL sobre users.created_at.
         
         Args:
             sponsor_member_id: member_id del sponsor principal
@@ -712,39 +840,18 @@ class MLMUserManager:
         Returns:
             Lista de usuarios registrados en el rango de fechas
         """
-        try:
-            # Obtener toda la red descendente pasando el sponsor como root para niveles
-            all_descendants = MLMUserManager.get_network_descendants(sponsor_member_id, sponsor_member_id)
-            
-            # Filtrar por rango de fechas
-            filtered_registrations = []
-            from datetime import datetime
-            
-            # Convertir start_date y end_date a date objects para comparación consistente
-            start_date_only = start_date.date() if hasattr(start_date, 'date') else start_date
-            end_date_only = end_date.date() if hasattr(end_date, 'date') else end_date
-            
-            for user in all_descendants:
-                if user.get("created_at") and user["created_at"] != "N/A":
-                    try:
-                        # Parsear string formato DD/MM/YYYY a date object
-                        created_at_str = user["created_at"]  # "26/09/2025"
-                        created_at_date = datetime.strptime(created_at_str, "%d/%m/%Y").date()
-                        
-                        # Comparar fechas
-                        if start_date_only <= created_at_date <= end_date_only:
-                            filtered_registrations.append(user)
-                            
-                    except ValueError as ve:
-                        print(f"⚠️ Error parseando fecha '{user['created_at']}': {ve}")
-                        continue
-            
-            print(f"✅ Filtradas {len(filtered_registrations)} registraciones entre {start_date_only} y {end_date_only}")
-            return filtered_registrations
-            
-        except Exception as e:
-            print(f"❌ Error filtrando registraciones por fecha: {e}")
-            return []
+        # Convertir start_date y end_date a date objects para comparación consistente
+        start_date_only = start_date.date() if hasattr(start_date, 'date') else start_date
+        end_date_only = end_date.date() if hasattr(end_date, 'date') else end_date
+
+        filtered_registrations = []
+        for page in MLMUserManager.iter_network_descendants(
+            sponsor_member_id, start_date=start_date_only, end_date=end_date_only
+        ):
+            filtered_registrations.extend(page)
+
+        print(f"✅ Filtradas {len(filtered_registrations)} registraciones entre {start_date_only} y {end_date_only}")
+        return filtered_registrations
 
     @staticmethod
     def get_todays_registrations(sponsor_member_id: int) -> list:
@@ -781,24 +888,13 @@ class MLMUserManager:
             Lista de usuarios registrados en el período actual
         """
         try:
-            from .period_service import PeriodService
-
-            # Obtener el período actual
-            with rx.session() as session:
-                current_period = PeriodService.get_current_period(session)
+            date_range = MLMUserManager.get_current_period_date_range()
 
-                if not current_period:
-                    print("⚠️ No hay período actual activo")
-                    return []
-
-                # Convertir starts_on y ends_on a date objects para comparación
-                start_date = current_period.starts_on.date()
-                end_date = current_period.ends_on.date()
-
-                print(f"📅 Filtrando registros por período actual: {current_period.name} ({start_date} a {end_date})")
+            if not date_range:
+                return []
 
             # Reutilizar lógica común usando POO
-            return MLMUserManager._filter_registrations_by_date_range(sponsor_member_id, start_date, end_date)
+            return MLMUserManager._filter_registrations_by_date_range(sponsor_member_id, *date_range)
 
         except Exception as e:
             print(f"❌ Error obteniendo inscripciones del mes: {e}")
@@ -806,6 +902,33 @@ class MLMUserManager:
             traceback.print_exc()
             return []
 
+    @staticmethod
+    def get_current_period_date_range() -> Optional[tuple]:
+        """
+        Rango de fechas (start_date, end_date) del período corriendo en este instante.
+
+        Returns:
+            Tupla de date o None si no hay período activo
+        """
+        from .period_resolver import PeriodResolver
+
+        with rx.session() as session:
+            current_period = PeriodResolver.get_current(session, open_only=True)
+
+            if not current_period:
+                print("⚠️ No hay período actual activo")
+                return None
+
+            # Convertir starts_on y ends_on a date objects para comparación
+            start_date = current_period.starts_on.date()
+            end_date = current_period.ends_on.date()
+
+            print(f"📅 Filtrando registros por período actual: {current_period.name} ({start_date} a {end_date})")
+            return start_date, end_date
+
+    # Filas por lote del cursor del lado del servidor en iter_all_registrations
+    ALL_REGISTRATIONS_BATCH_SIZE = 1000
+
     @staticmethod
     def get_all_registrations(sponsor_member_id: int) -> list:
         """
@@ -821,130 +944,106 @@ class MLMUserManager:
         Returns:
             Lista de TODOS los usuarios registrados en la red (histórico completo)
         """
+        print(f"🔄 Obteniendo TODAS las inscripciones para member_id: {sponsor_member_id}")
+
+        descendants = []
+        for batch in MLMUserManager.iter_all_registrations(sponsor_member_id):
+            descendants.extend(batch)
+
+        print(f"✅ Obtenidas {len(descendants)} inscripciones totales en la red")
+        return descendants
+
+    @staticmethod
+    def iter_all_registrations(sponsor_member_id: int, batch_size: Optional[int] = None, session=None):
+        """
+        Recorre TODAS las inscripciones de la red en lotes (streaming).
+
+        Un solo query: el CTE recursivo sobre sponsor_id ya trae perfil del usuario,
+        sponsor y perfil del sponsor por JOIN. Con yield_per el resultado se lee con
+        cursor del lado del servidor, así la memoria no crece con el tamaño de la red.
+
+        Args:
+            sponsor_member_id: member_id del sponsor principal
+            batch_size: Filas por lote (default ALL_REGISTRATIONS_BATCH_SIZE)
+            session: Sesión activa opcional (si no se pasa se abre una)
+
+        Yields:
+            Lista de diccionarios del lote (mismo formato que get_network_descendants)
+        """
+        batch_size = batch_size or MLMUserManager.ALL_REGISTRATIONS_BATCH_SIZE
+
+        # CTE recursivo - Igual que tu SQL
+        # path como texto ',1,5,9,' para evitar ciclos (portable Postgres/SQLite)
+        recursive_query = sqlmodel.text("""
+            WITH RECURSIVE network_tree AS (
+                -- Caso base: el usuario raíz
+                SELECT
+                    u.id,
+                    u.member_id,
+                    u.sponsor_id,
+                    1 AS level,
+                    ',' || u.member_id || ',' AS path
+                FROM users u
+                WHERE u.member_id = :root_member_id
+
+                UNION ALL
+
+                -- Caso recursivo: todos los referidos directos e indirectos
+                SELECT
+                    u.id,
+                    u.member_id,
+                    u.sponsor_id,
+                    nt.level + 1 AS level,
+                    nt.path || u.member_id || ',' AS path
+                FROM users u
+                INNER JOIN network_tree nt ON u.sponsor_id = nt.member_id
+                WHERE nt.path NOT LIKE '%,' || u.member_id || ',%'  -- Evitar ciclos
+            )
+            SELECT
+                u.id,
+                u.member_id,
+                u.first_name,
+                u.last_name,
+                u.email_cache,
+                u.status,
+                u.created_at,
+                nt.level AS depth,
+                p.phone_number,
+                s.member_id AS sponsor_member_id,
+                s.first_name AS sponsor_first_name,
+                s.last_name AS sponsor_last_name,
+                sp.phone_number AS sponsor_phone
+            FROM network_tree nt
+            JOIN users u ON u.id = nt.id
+            LEFT JOIN userprofiles p ON p.user_id = u.id
+            LEFT JOIN users s ON s.member_id = nt.sponsor_id
+            LEFT JOIN userprofiles sp ON sp.user_id = s.id
+            WHERE nt.level > 1  -- Excluir el usuario raíz
+            ORDER BY nt.level, nt.member_id
+        """).bindparams(root_member_id=sponsor_member_id).columns(
+            created_at=Users.__table__.c.created_at.type
+        )
+
+        def _batches(active_session):
+            result = active_session.execute(
+                recursive_query,
+                execution_options={"yield_per": batch_size}
+            )
+            for partition in result.partitions():
+                yield [MLMUserManager._format_descendant_row(row) for row in partition]
+
         try:
-            print(f"🔄 Obteniendo TODAS las inscripciones para member_id: {sponsor_member_id}")
-            
-            with rx.session() as session:
-                # CTE recursivo - Igual que tu SQL
-                # Busca todos los descendientes usando sponsor_id
-                recursive_query = sqlmodel.text("""
-                    WITH RECURSIVE network_tree AS (
-                        -- Caso base: el usuario raíz
-                        SELECT 
-                            u.id,
-                            u.member_id,
-                            u.first_name,
-                            u.last_name,
-                            u.email_cache,
-                            u.sponsor_id,
-                            u.status,
-                            u.created_at,
-                            1 AS level,
-                            ARRAY[u.member_id] AS path
-                        FROM users u
-                        WHERE u.member_id = :root_member_id
-                        
-                        UNION ALL
-                        
-                        -- Caso recursivo: todos los referidos directos e indirectos
-                        SELECT 
-                            u.id,
-                            u.member_id,
-                            u.first_name,
-                            u.last_name,
-                            u.email_cache,
-                            u.sponsor_id,
-                            u.status,
-                            u.created_at,
-                            nt.level + 1 AS level,
-                            nt.path || u.member_id AS path
-                        FROM users u
-                        INNER JOIN network_tree nt ON u.sponsor_id = nt.member_id
-                        WHERE NOT (u.member_id = ANY(nt.path))  -- Evitar ciclos
-                    )
-                    SELECT 
-                        id,
-                        member_id,
-                        first_name,
-                        last_name,
-                        email_cache,
-                        sponsor_id,
-                        status,
-                        created_at,
-                        level
-                    FROM network_tree
-                    WHERE level > 1  -- Excluir el usuario raíz
-                    ORDER BY level, member_id
-                """)
-                
-                # Ejecutar query con parámetros
-                result = session.execute(
-                    recursive_query.bindparams(root_member_id=sponsor_member_id)
-                )
-                
-                # Procesar resultados
-                descendants = []
-                sponsor_cache = {}  # Cache para sponsors
-                
-                for row in result:
-                    # Obtener datos del sponsor (con cache)
-                    sponsor_data = {}
-                    if row.sponsor_id:
-                        if row.sponsor_id not in sponsor_cache:
-                            sponsor_result = session.exec(
-                                sqlmodel.select(Users, UserProfiles)
-                                .outerjoin(UserProfiles, Users.id == UserProfiles.user_id)
-                                .where(Users.member_id == row.sponsor_id)
-                            ).first()
-
-                            if sponsor_result:
-                                sponsor_user, sponsor_profile = sponsor_result
-                                sponsor_cache[row.sponsor_id] = {
-                                    "id": sponsor_user.id,
-                                    "member_id": sponsor_user.member_id,
-                                    "first_name": sponsor_user.first_name or "",
-                                    "last_name": sponsor_user.last_name or "",
-                                    "full_name": f"{sponsor_user.first_name or ''} {sponsor_user.last_name or ''}".strip(),
-                                    "phone": sponsor_profile.phone_number if sponsor_profile else "",
-                                    "email": sponsor_user.email_cache or ""
-                                }
-
-                        sponsor_data = sponsor_cache.get(row.sponsor_id, {})
-                    
-                    # Obtener teléfono del usuario
-                    user_profile = session.exec(
-                        sqlmodel.select(UserProfiles)
-                        .where(UserProfiles.user_id == row.id)
-                    ).first()
-                    
-                    # Formatear fecha
-                    formatted_date = row.created_at.strftime("%d/%m/%Y") if row.created_at else "N/A"
-                    
-                    user_data = {
-                        "id": row.id,
-                        "member_id": row.member_id,
-                        "first_name": row.first_name or "",
-                        "last_name": row.last_name or "",
-                        "full_name": f"{row.first_name or ''} {row.last_name or ''}".strip() if (row.first_name or row.last_name) else "N/A",
-                        "email": row.email_cache or "",
-                        "status": row.status if isinstance(row.status, str) else row.status.value,
-                        "created_at": formatted_date,
-                        "phone": user_profile.phone_number if user_profile else "",
-                        "sponsor_member_id": sponsor_data.get("member_id", None),
-                        "level": row.level,
-                        "sponsor_full_name": sponsor_data.get("full_name", "N/A"),
-                        "sponsor_phone": sponsor_data.get("phone", "N/A")
-                    }
-                    descendants.append(user_data)
-                
-                print(f"✅ Obtenidas {len(descendants)} inscripciones totales en la red")
-                return descendants
-            
+            if session is not None:
+                yield from _batches(session)
+                return
+
+            with rx.session() as new_session:
+                yield from _batches(new_session)
+
         except Exception as e:
             print(f"❌ Error obteniendo todas las inscripciones: {e}")
             import traceback
             traceback.print_exc()
-            return []
 
     @staticmethod
     def get_period_volumes(member_id: int) -> dict:
@@ -1054,207 +1153,189 @@ class MLMUserManager:
                     result[f"level_{level}_{idx}"] = "0"
             return result
 
+    # Columnas de volumen de UnilevelReports: nivel -> (columna PVG, columna VNG)
+    UNILEVEL_REPORT_LEVEL_COLUMNS = {
+        **{level: (f"pvg_{level}", f"vng_{level}") for level in range(1, 10)},
+        10: ("pvg_10_plus", "vng_10_plus"),
+    }
+
     @staticmethod
-    def update_unilevel_report_for_order(order_member_id: int, period_id: int):
+    def _unilevel_report_volume_columns(depth_column, pv_value, vn_value, aggregate: bool = False) -> list:
         """
-        Actualiza la tabla unilevel_report para todos los ancestros del usuario que hizo la orden.
-        Se debe llamar cada vez que se complete una orden.
-        
+        Construye las columnas de volumen de UnilevelReports a partir de la profundidad
+        en usertreepath. Compartido por el modo delta y la reconstrucción completa.
+
+        - depth = 0      -> pv / vn (volumen personal del comprador)
+        - depth = 1..9   -> pvg_N / vng_N
+        - depth >= 10    -> pvg_10_plus / vng_10_plus
+        - depth > 0      -> pvg_total / vng_total
+
         Args:
-            order_member_id: member_id del usuario que hizo la orden
-            period_id: ID del periodo de la orden
+            depth_column: Columna UserTreePath.depth
+            pv_value: Expresión/valor de PV a repartir
+            vn_value: Expresión/valor de VN a repartir
+            aggregate: Si True envuelve cada columna en SUM() (reconstrucción por GROUP BY)
+
+        Returns:
+            Lista de expresiones etiquetadas con el nombre de la columna destino
         """
-        try:
-            from database.unilevel_report import UnilevelReports
-            from database.users import Users
-            from database.orders import Orders
-            
-            with rx.session() as session:
-                print(f"🔄 Actualizando unilevel_report para orden de member_id={order_member_id}, periodo={period_id}")
-                
-                # 1️⃣ Obtener user_id del comprador
-                buyer = session.exec(
-                    sqlmodel.select(Users).where(Users.member_id == order_member_id)
-                ).first()
-                
-                if not buyer:
-                    print(f"⚠️  Usuario comprador no encontrado")
-                    return
-                
-                # 2️⃣ Actualizar el PV personal del comprador
-                pv_total = session.exec(
-                    sqlmodel.select(sqlmodel.func.sum(Orders.total_pv))
-                    .where(
-                        Orders.member_id == order_member_id,
-                        Orders.period_id == period_id,
-                        Orders.status == "completed"
-                    )
-                ).first() or 0
-                
-                buyer_report = session.exec(
-                    sqlmodel.select(UnilevelReports)
-                    .where(
-                        UnilevelReports.user_id == buyer.id,
-                        UnilevelReports.period_id == period_id
-                    )
-                ).first()
-                
-                # Calcular VN total del comprador
-                vn_total = session.exec(
-                    sqlmodel.select(sqlmodel.func.sum(Orders.total_vn))
-                    .where(
-                        Orders.member_id == order_member_id,
-                        Orders.period_id == period_id,
-                        Orders.status == "completed"
-                    )
-                ).first() or 0.0
-                
-                if buyer_report:
-                    buyer_report.pv = int(pv_total)
-                    buyer_report.vn = float(vn_total)
-                else:
-                    buyer_report = UnilevelReports(
-                        user_id=buyer.id,
-                        period_id=period_id,
-                        pv=int(pv_total),
-                        vn=float(vn_total)
-                    )
-                    session.add(buyer_report)
-                
-                # 🆕 Calcular totales para el comprador (no tiene PVG, solo PV personal)
-                buyer_report.pvg_total = 0
-                buyer_report.vng_total = 0.0
-                
-                # 3️⃣ Obtener todos los ancestros y actualizar sus PVG por nivel
-                ancestors = session.exec(
-                    sqlmodel.select(UserTreePath)
-                    .where(UserTreePath.descendant_id == order_member_id)
-                ).all()
-                
-                for ancestor_path in ancestors:
-                    if ancestor_path.depth == 0:
-                        continue  # Skip self
-                    
-                    ancestor_member_id = ancestor_path.ancestor_id
-                    depth = ancestor_path.depth
-                    
-                    # Obtener user_id del ancestro
-                    ancestor_user = session.exec(
-                        sqlmodel.select(Users).where(Users.member_id == ancestor_member_id)
-                    ).first()
-                    
-                    if not ancestor_user:
-                        continue
-                    
-                    # Calcular PVG para este nivel
-                    descendants_at_this_level = session.exec(
-                        sqlmodel.select(UserTreePath.descendant_id)
-                        .where(
-                            UserTreePath.ancestor_id == ancestor_member_id,
-                            UserTreePath.depth == depth
-                        )
-                    ).all()
-                    
-                    pvg_for_level = session.exec(
-                        sqlmodel.select(sqlmodel.func.sum(Orders.total_pv))
-                        .where(
-                            Orders.member_id.in_(descendants_at_this_level),
-                            Orders.period_id == period_id,
-                            Orders.status == "completed"
-                        )
-                    ).first() or 0
-                    
-                    vng_for_level = session.exec(
-                        sqlmodel.select(sqlmodel.func.sum(Orders.total_vn))
-                        .where(
-                            Orders.member_id.in_(descendants_at_this_level),
-                            Orders.period_id == period_id,
-                            Orders.status == "completed"
-                        )
-                    ).first() or 0.0
-                    
-                    # Actualizar/crear reporte del ancestro
-                    ancestor_report = session.exec(
-                        sqlmodel.select(UnilevelReports)
-                        .where(
-                            UnilevelReports.user_id == ancestor_user.id,
-                            UnilevelReports.period_id == period_id
-                        )
-                    ).first()
-                    
-                    if not ancestor_report:
-                        ancestor_report = UnilevelReports(
-                            user_id=ancestor_user.id,
-                            period_id=period_id
-                        )
-                        session.add(ancestor_report)
-                    
-                    # Actualizar el PVG y VNG del nivel correspondiente
-                    if depth == 1:
-                        ancestor_report.pvg_1 = int(pvg_for_level)
-                        ancestor_report.vng_1 = float(vng_for_level)
-                    elif depth == 2:
-                        ancestor_report.pvg_2 = int(pvg_for_level)
-                        ancestor_report.vng_2 = float(vng_for_level)
-                    elif depth == 3:
-                        ancestor_report.pvg_3 = int(pvg_for_level)
-                        ancestor_report.vng_3 = float(vng_for_level)
-                    elif depth == 4:
-                        ancestor_report.pvg_4 = int(pvg_for_level)
-                        ancestor_report.vng_4 = float(vng_for_level)
-                    elif depth == 5:
-                        ancestor_report.pvg_5 = int(pvg_for_level)
-                        ancestor_report.vng_5 = float(vng_for_level)
-                    elif depth == 6:
-                        ancestor_report.pvg_6 = int(pvg_for_level)
-                        ancestor_report.vng_6 = float(vng_for_level)
-                    elif depth == 7:
-                        ancestor_report.pvg_7 = int(pvg_for_level)
-                        ancestor_report.vng_7 = float(vng_for_level)
-                    elif depth == 8:
-                        ancestor_report.pvg_8 = int(pvg_for_level)
-                        ancestor_report.vng_8 = float(vng_for_level)
-                    elif depth == 9:
-                        ancestor_report.pvg_9 = int(pvg_for_level)
-                        ancestor_report.vng_9 = float(vng_for_level)
-                    elif depth >= 10:
-                        ancestor_report.pvg_10_plus = int(pvg_for_level)
-                        ancestor_report.vng_10_plus = float(vng_for_level)
-                    
-                    # 🆕 Calcular totales agregados
-                    ancestor_report.pvg_total = (
-                        (ancestor_report.pvg_1 or 0) +
-                        (ancestor_report.pvg_2 or 0) +
-                        (ancestor_report.pvg_3 or 0) +
-                        (ancestor_report.pvg_4 or 0) +
-                        (ancestor_report.pvg_5 or 0) +
-                        (ancestor_report.pvg_6 or 0) +
-                        (ancestor_report.pvg_7 or 0) +
-                        (ancestor_report.pvg_8 or 0) +
-                        (ancestor_report.pvg_9 or 0) +
-                        (ancestor_report.pvg_10_plus or 0)
-                    )
-                    
-                    ancestor_report.vng_total = (
-                        (ancestor_report.vng_1 or 0.0) +
-                        (ancestor_report.vng_2 or 0.0) +
-                        (ancestor_report.vng_3 or 0.0) +
-                        (ancestor_report.vng_4 or 0.0) +
-                        (ancestor_report.vng_5 or 0.0) +
-                        (ancestor_report.vng_6 or 0.0) +
-                        (ancestor_report.vng_7 or 0.0) +
-                        (ancestor_report.vng_8 or 0.0) +
-                        (ancestor_report.vng_9 or 0.0) +
-                        (ancestor_report.vng_10_plus or 0.0)
-                    )
-                
-                session.commit()
-                print(f"✅ unilevel_report actualizado correctamente")
-                
-        except Exception as e:
-            print(f"❌ Error actualizando unilevel_report: {e}")
-            import traceback
-            traceback.print_exc()
+        def _bucket(condition, value, zero, label):
+            expression = sqlmodel.case((condition, value), else_=zero)
+            if aggregate:
+                expression = sqlmodel.func.sum(expression)
+            return expression.label(label)
+
+        columns = [
+            _bucket(depth_column == 0, pv_value, 0, "pv"),
+            _bucket(depth_column == 0, vn_value, 0.0, "vn"),
+        ]
+
+        for level, (pvg_column, vng_column) in MLMUserManager.UNILEVEL_REPORT_LEVEL_COLUMNS.items():
+            condition = depth_column >= level if level == 10 else depth_column == level
+            columns.append(_bucket(condition, pv_value, 0, pvg_column))
+            columns.append(_bucket(condition, vn_value, 0.0, vng_column))
+
+        columns.append(_bucket(depth_column > 0, pv_value, 0, "pvg_total"))
+        columns.append(_bucket(depth_column > 0, vn_value, 0.0, "vng_total"))
+        return columns
+
+    @staticmethod
+    def _unilevel_report_insert(session):
+        """
+        INSERT con soporte ON CONFLICT del dialecto activo (Postgres en producción, SQLite en tests).
+        """
+        if session.get_bind().dialect.name == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+
+        return insert(UnilevelReports.__table__)
+
+    @staticmethod
+    def apply_order_to_unilevel_report(session, order) -> int:
+        """
+        Modo DELTA: suma el PV/VN de UNA orden confirmada al reporte unilevel del
+        comprador y de todos sus ancestros con un solo upsert sobre usertreepath.
+
+        Equivalente SQL:
+            INSERT INTO unilevelreports (user_id, period_id, pv, vn, pvg_1, vng_1, ..., pvg_total, vng_total)
+            SELECT u.id, :period_id,
+                   CASE WHEN utp.depth = 0 THEN :pv ELSE 0 END, ...
+                   CASE WHEN utp.depth = 1 THEN :pv ELSE 0 END, ...
+            FROM usertreepath utp
+            JOIN users u ON u.member_id = utp.ancestor_id
+            WHERE utp.descendant_id = :buyer
+            ON CONFLICT (user_id, period_id) DO UPDATE
+               SET pv = unilevelreports.pv + excluded.pv, ...
+
+        NO abre sesión ni hace commit: corre dentro de la transacción del llamador.
+
+        Args:
+            session: Sesión de base de datos activa (transacción del pago)
+            order: Orden confirmada (usa member_id, period_id, total_pv, total_vn)
+
+        Returns:
+            Número de reportes insertados/actualizados (comprador + ancestros)
+        """
+        if not order.period_id:
+            print(f"⚠️  Orden {order.id} sin period_id, unilevel_report no actualizado")
+            return 0
+
+        pv_amount = int(order.total_pv or 0)
+        vn_amount = float(order.total_vn or 0.0)
+
+        if not pv_amount and not vn_amount:
+            return 0
+
+        volume_columns = MLMUserManager._unilevel_report_volume_columns(
+            UserTreePath.depth,
+            sqlmodel.literal(pv_amount),
+            sqlmodel.literal(vn_amount)
+        )
+
+        closure_rows = (
+            sqlmodel.select(
+                Users.id.label("user_id"),
+                sqlmodel.literal(order.period_id).label("period_id"),
+                *volume_columns
+            )
+            .select_from(UserTreePath)
+            .join(Users, Users.member_id == UserTreePath.ancestor_id)
+            .where(UserTreePath.descendant_id == order.member_id)
+        )
+
+        target_columns = ["user_id", "period_id"] + [column.name for column in volume_columns]
+        insert_stmt = MLMUserManager._unilevel_report_insert(session).from_select(target_columns, closure_rows)
+        report_table = UnilevelReports.__table__
+
+        upsert_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=[report_table.c.user_id, report_table.c.period_id],
+            set_={
+                column.name: report_table.c[column.name] + insert_stmt.excluded[column.name]
+                for column in volume_columns
+            }
+        )
+
+        result = session.execute(upsert_stmt)
+        print(f"✅ unilevel_report (delta): +{pv_amount} PV / +{vn_amount:.2f} VN en {result.rowcount} reportes, periodo={order.period_id}")
+        return result.rowcount
+
+    @staticmethod
+    def rebuild_unilevel_report(session, period_id: int) -> int:
+        """
+        Reconstrucción COMPLETA de unilevel_report para un período (reconciliación).
+        Borra los reportes del período y los regenera con un solo INSERT ... SELECT
+        agrupado sobre órdenes confirmadas × usertreepath.
+
+        Una orden cuenta si tiene pago confirmado y no fue cancelada ni reembolsada,
+        igual que el modo delta (que se aplica al confirmar el pago).
+
+        NO hace commit: el llamador decide (ver rebuild_unilevel_report.py).
+
+        Args:
+            session: Sesión de base de datos activa
+            period_id: ID del período a reconstruir
+
+        Returns:
+            Número de reportes regenerados
+        """
+        from database.orders import Orders, OrderStatus
+
+        session.execute(
+            sqlmodel.delete(UnilevelReports).where(UnilevelReports.period_id == period_id)
+        )
+
+        volume_columns = MLMUserManager._unilevel_report_volume_columns(
+            UserTreePath.depth,
+            Orders.total_pv,
+            Orders.total_vn,
+            aggregate=True
+        )
+
+        grouped_rows = (
+            sqlmodel.select(
+                Users.id.label("user_id"),
+                sqlmodel.literal(period_id).label("period_id"),
+                *volume_columns
+            )
+            .select_from(Orders)
+            .join(UserTreePath, UserTreePath.descendant_id == Orders.member_id)
+            .join(Users, Users.member_id == UserTreePath.ancestor_id)
+            .where(
+                (Orders.period_id == period_id) &
+                (Orders.payment_confirmed_at.is_not(None)) &
+                (Orders.status.not_in([OrderStatus.CANCELLED.value, OrderStatus.REFUNDED.value]))
+            )
+            .group_by(Users.id)
+        )
+
+        target_columns = ["user_id", "period_id"] + [column.name for column in volume_columns]
+        result = session.execute(
+            sqlmodel.insert(UnilevelReports).from_select(target_columns, grouped_rows)
+        )
+
+        print(f"✅ unilevel_report reconstruido: {result.rowcount} reportes para periodo={period_id}")
+        return result.rowcount
 
     # 🎯 MÉTODOS PARA GESTIÓN AUTOMÁTICA DE RANGOS
     @staticmethod
@@ -1268,36 +1349,25 @@ class MLMUserManager:
         """
         try:
             from database.user_rank_history import UserRankHistory
-            from database.ranks import Ranks
-            from database.periods import Periods
-            from ..utils.timezone_mx import get_mexico_now
+            from .period_resolver import PeriodResolver
 
-            # Obtener período actual
-            now = get_mexico_now()
-            current_period = session.exec(
-                sqlmodel.select(Periods)
-                .where(
-                    (Periods.starts_on <= now) &
-                    (Periods.ends_on >= now)
-                )
-            ).first()
+            # Obtener período actual (en memoria)
+            current_period = PeriodResolver.get_current(session)
 
             if not current_period:
                 print(f"⚠️  No hay período activo")
                 return "Sin rango"
 
-            # JOIN explícito entre Ranks y UserRankHistory, filtrando por period_id
-            latest_rank = session.exec(
-                sqlmodel.select(Ranks)
-                .join(UserRankHistory, Ranks.id == UserRankHistory.rank_id)
+            # Rango más alto del período; el nombre sale de la escalera en memoria
+            latest_rank_id = session.exec(
+                sqlmodel.select(sqlmodel.func.max(UserRankHistory.rank_id))
                 .where(
                     (UserRankHistory.member_id == member_id) &
                     (UserRankHistory.period_id == current_period.id)
                 )
-                .order_by(sqlmodel.desc(UserRankHistory.rank_id))
-            ).first()
+            ).one()
 
-            return latest_rank.name if latest_rank else "Sin rango"
+            return RankLadder.get_shared(session).name(latest_rank_id, "Sin rango")
 
         except Exception as e:
             print(f"❌ Error obteniendo rango mensual de usuario {member_id}: {e}")
@@ -1313,17 +1383,14 @@ class MLMUserManager:
         """
         try:
             from database.user_rank_history import UserRankHistory
-            from database.ranks import Ranks
 
-            # Buscar el rango más alto de toda la vida con JOIN para obtener el nombre
-            highest_rank = session.exec(
-                sqlmodel.select(Ranks)
-                .join(UserRankHistory, Ranks.id == UserRankHistory.rank_id)
+            # Rango más alto de toda la vida; el nombre sale de la escalera en memoria
+            highest_rank_id = session.exec(
+                sqlmodel.select(sqlmodel.func.max(UserRankHistory.rank_id))
                 .where(UserRankHistory.member_id == member_id)
-                .order_by(sqlmodel.desc(UserRankHistory.rank_id))
-            ).first()
+            ).one()
 
-            return highest_rank.name if highest_rank else "Sin rango"
+            return RankLadder.get_shared(session).name(highest_rank_id, "Sin rango")
 
         except Exception as e:
             print(f"❌ Error obteniendo rango máximo de usuario {member_id}: {e}")
@@ -6,6 +6,8 @@ from rxconfig import config
 from ..shared_ui.layout import main_container_derecha, mobile_header, desktop_sidebar, mobile_sidebar, logged_in_user
 from ..auth_service.auth_state import AuthState
 from .mlm_user_manager import MLMUserManager
+from ..utils.async_db import AsyncDB
+from ..utils.timezone_mx import get_mexico_date
 from typing import List, Dict, Any
 
 def format_date(date_obj) -> str:
@@ -154,11 +156,15 @@ class NetworkReportsState(rx.State):
 				
 			print(f"🔄 Cargando inscripciones del día para member_id: {member_id}")
 			
-			# Obtener inscripciones del día de la red
-			registrations = MLMUserManager.get_todays_registrations(member_id)
-			self.todays_registrations = registrations
+			# Cargar inscripciones del día página por página (la primera se muestra de inmediato)
+			today = get_mexico_date()
+			self.todays_registrations = []
+			pages = MLMUserManager.iter_network_descendants(member_id, start_date=today, end_date=today)
+			async for page in AsyncDB.iterate(pages, label="network_reports.todays_registrations"):
+				self.todays_registrations.extend(page)
+				yield
 			
-			print(f"✅ Cargadas {len(registrations)} inscripciones del día")
+			print(f"✅ Cargadas {len(self.todays_registrations)} inscripciones del día")
 			
 		except Exception as e:
 			print(f"❌ Error cargando inscripciones: {e}")
@@ -185,11 +191,17 @@ class NetworkReportsState(rx.State):
 				
 			print(f"🔄 Cargando inscripciones del mes para member_id: {member_id}")
 			
-			# Obtener inscripciones del mes de la red
-			registrations = MLMUserManager.get_monthly_registrations(member_id)
-			self.monthly_registrations = registrations
+			# Cargar inscripciones del período actual página por página
+			self.monthly_registrations = []
+			date_range = await AsyncDB.run(MLMUserManager.get_current_period_date_range, label="network_reports.period_date_range")
+			if date_range:
+				start_date, end_date = date_range
+				pages = MLMUserManager.iter_network_descendants(member_id, start_date=start_date, end_date=end_date)
+				async for page in AsyncDB.iterate(pages, label="network_reports.monthly_registrations"):
+					self.monthly_registrations.extend(page)
+					yield
 			
-			print(f"✅ Cargadas {len(registrations)} inscripciones del mes")
+			print(f"✅ Cargadas {len(self.monthly_registrations)} inscripciones del mes")
 			
 		except Exception as e:
 			print(f"❌ Error cargando inscripciones del mes: {e}")
@@ -216,11 +228,14 @@ class NetworkReportsState(rx.State):
 				
 			print(f"🔄 Cargando TODAS las inscripciones para member_id: {member_id}")
 			
-			# Obtener TODAS las inscripciones de la red (sin filtro de fecha)
-			registrations = MLMUserManager.get_all_registrations(member_id)
-			self.all_registrations = registrations
+			# Obtener TODAS las inscripciones de la red (sin filtro de fecha) lote por lote
+			self.all_registrations = []
+			batches = MLMUserManager.iter_all_registrations(member_id)
+			async for batch in AsyncDB.iterate(batches, label="network_reports.all_registrations"):
+				self.all_registrations.extend(batch)
+				yield
 			
-			print(f"✅ Cargadas {len(registrations)} inscripciones totales")
+			print(f"✅ Cargadas {len(self.all_registrations)} inscripciones totales")
 			
 		except Exception as e:
 			print(f"❌ Error cargando todas las inscripciones: {e}")
@@ -243,7 +258,7 @@ class NetworkReportsState(rx.State):
 				return
 				
 			print(f"🔄 Cargando volúmenes por periodo para member_id: {member_id}")
-			volumes = MLMUserManager.get_period_volumes(member_id)
+			volumes = await AsyncDB.run(MLMUserManager.get_period_volumes, member_id, label="network_reports.period_volumes")
 			
 			# Asignar valores individuales a las variables de estado
 			self.period_names = volumes.get("period_names", ["N/A", "N/A", "N/A", "N/A", "N/A", "N/A"])
@@ -266,16 +281,54 @@ class NetworkReportsState(rx.State):
 		finally:
 			self.is_loading = False
 	
+	@staticmethod
+	def _query_rank_progression(session, member_id: int):
+		"""
+		PVG del usuario y PVG requerido del siguiente rango (en el rango máximo, el actual).
+
+		Returns:
+			(current_pvg, next_rank_pvg) o None si el usuario no existe
+		"""
+		from database.user_rank_history import UserRankHistory
+		from database.users import Users
+		from .rank_ladder import RankLadder
+		from datetime import datetime, timezone
+		import sqlmodel
+
+		user = session.exec(
+			sqlmodel.select(Users).where(Users.member_id == member_id)
+		).first()
+
+		if not user:
+			return None
+
+		# Obtener rank_id actual del mes
+		now = datetime.now(timezone.utc)
+		current_rank_history = session.exec(
+			sqlmodel.select(UserRankHistory)
+			.where(
+				UserRankHistory.member_id == member_id,
+				sqlmodel.extract('year', UserRankHistory.achieved_on) == now.year,
+				sqlmodel.extract('month', UserRankHistory.achieved_on) == now.month
+			)
+			.order_by(sqlmodel.desc(UserRankHistory.rank_id))
+		).first()
+
+		current_rank_id = current_rank_history.rank_id if current_rank_history else 1
+
+		# Siguiente rango (escalera en memoria); en el rango máximo se usa el actual
+		ladder = RankLadder.get_shared(session)
+		next_rank_id = ladder.next_rank_id(current_rank_id)
+		next_rank_pvg = ladder.pvg_required.get(
+			next_rank_id if next_rank_id is not None else current_rank_id, 0
+		)
+
+		return user.pvg_cache or 0, next_rank_pvg
+
 	@rx.event
 	async def load_rank_progression(self):
 		"""Carga la progresión del usuario hacia el siguiente rango."""
 		try:
-			from database.user_rank_history import UserRankHistory
-			from database.ranks import Ranks
-			from database.users import Users
-			from datetime import datetime, timezone
-			import sqlmodel
-			
 			# Obtener member_id desde AuthState
 			auth_state = await self.get_state(AuthState)
 			profile_data = auth_state.profile_data
@@ -287,49 +340,16 @@ class NetworkReportsState(rx.State):
 			
 			member_id = profile_data["member_id"]
 			
-			with rx.session() as session:
-				# Obtener PVG actual del usuario
-				user = session.exec(
-					sqlmodel.select(Users).where(Users.member_id == member_id)
-				).first()
-				
-				if not user:
-					print(f"⚠️  Usuario {member_id} no encontrado")
-					return
-				
-				self.current_pvg = user.pvg_cache or 0
-				
-				# Obtener rank_id actual del mes
-				now = datetime.now(timezone.utc)
-				current_rank_history = session.exec(
-					sqlmodel.select(UserRankHistory)
-					.where(
-						UserRankHistory.member_id == member_id,
-						sqlmodel.extract('year', UserRankHistory.achieved_on) == now.year,
-						sqlmodel.extract('month', UserRankHistory.achieved_on) == now.month
-					)
-					.order_by(sqlmodel.desc(UserRankHistory.rank_id))
-				).first()
-				
-				current_rank_id = current_rank_history.rank_id if current_rank_history else 1
-				
-				# Obtener siguiente rango
-				next_rank = session.exec(
-					sqlmodel.select(Ranks)
-					.where(Ranks.id == current_rank_id + 1)
-					.order_by(Ranks.id)
-				).first()
-				
-				if next_rank:
-					self.next_rank_pvg = next_rank.pvg_required
-				else:
-					# Usuario está en el rango máximo
-					current_rank = session.exec(
-						sqlmodel.select(Ranks).where(Ranks.id == current_rank_id)
-					).first()
-					self.next_rank_pvg = current_rank.pvg_required if current_rank else 0
-				
-				print(f"📊 Progresión de rango - PVG: {self.current_pvg}/{self.next_rank_pvg}")
+			progression = await AsyncDB.run_in_session(
+				self._query_rank_progression, member_id, label="network_reports.rank_progression"
+			)
+			
+			if progression is None:
+				print(f"⚠️  Usuario {member_id} no encontrado")
+				return
+			
+			self.current_pvg, self.next_rank_pvg = progression
+			print(f"📊 Progresión de rango - PVG: {self.current_pvg}/{self.next_rank_pvg}")
 				
 		except Exception as e:
 			print(f"❌ Error cargando progresión de rango: {e}")
@@ -5,10 +5,11 @@ Principios aplicados: KISS, DRY, YAGNI, POO
 
 import sqlmodel
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
 from database.users import Users, UserStatus
 from database.user_rank_history import UserRankHistory
+from .user_status_counter_service import UserStatusCounterService
 
 
 class PeriodResetService:
@@ -17,6 +18,76 @@ class PeriodResetService:
     Principio DRY: Centraliza la lógica de reseteo en un solo lugar.
     """
 
+    # Rank asignado a todos al iniciar período ("Sin rango")
+    INITIAL_RANK_ID = 1
+
+    # Valores de reseteo de usuarios al iniciar período
+    NEW_PERIOD_RESET_VALUES = {
+        "status": UserStatus.NO_QUALIFIED,
+        "pv_cache": 0,
+        "pvg_cache": 0,
+        "vn_cache": 0.0,
+    }
+
+    @classmethod
+    def bulk_reset_users(
+        cls,
+        session: sqlmodel.Session,
+        values: Dict[str, Any],
+        new_period_id: Optional[int] = None,
+        member_id_range: Optional[Tuple[int, int]] = None
+    ) -> Dict[str, int]:
+        """
+        Reseteo basado en conjuntos: un UPDATE users y, si hay período,
+        un INSERT INTO userrankhistory ... SELECT FROM users.
+        Principio KISS: Dos sentencias sin importar el tamaño de la red,
+        sin cargar usuarios al identity map.
+        Si se resetea el status, los contadores por status se ajustan en la
+        misma transacción (UserStatusCounterService).
+
+        Args:
+            session: Sesión de base de datos
+            values: Columnas de users a resetear (ej. NEW_PERIOD_RESET_VALUES)
+            new_period_id: Si se indica, asigna INITIAL_RANK_ID a todos en ese período
+            member_id_range: (después_de, hasta] para resetear por lotes (None = todos)
+
+        Returns:
+            Dict con users_updated y rank_history_created (para auditoría)
+        """
+        now = datetime.now(timezone.utc)
+
+        in_range = sqlmodel.true()
+        if member_id_range is not None:
+            after_member_id, last_member_id = member_id_range
+            in_range = (Users.member_id > after_member_id) & (Users.member_id <= last_member_id)
+
+        if "status" in values:
+            UserStatusCounterService.record_bulk_status_change(session, in_range, values["status"])
+
+        users_result = session.execute(
+            sqlmodel.update(Users).where(in_range).values(**values, updated_at=now)
+        )
+
+        rank_history_created = 0
+        if new_period_id is not None:
+            rank_result = session.execute(
+                sqlmodel.insert(UserRankHistory).from_select(
+                    ["member_id", "rank_id", "achieved_on", "period_id"],
+                    sqlmodel.select(
+                        Users.member_id,
+                        sqlmodel.literal(cls.INITIAL_RANK_ID),
+                        sqlmodel.literal(now, UserRankHistory.__table__.c.achieved_on.type),
+                        sqlmodel.literal(new_period_id)
+                    ).where(in_range)
+                )
+            )
+            rank_history_created = rank_result.rowcount
+
+        return {
+            "users_updated": users_result.rowcount,
+            "rank_history_created": rank_history_created,
+        }
+
     @classmethod
     def reset_all_users_for_new_period(
         cls,
@@ -43,44 +114,19 @@ class PeriodResetService:
             Cantidad de usuarios reseteados
         """
         try:
-            # 1. Obtener TODOS los usuarios
-            all_users = session.exec(
-                sqlmodel.select(Users)
-            ).all()
-            
-            if not all_users:
+            print(f"\n🔄 Reseteando usuarios para nuevo período...")
+
+            counts = cls.bulk_reset_users(
+                session, cls.NEW_PERIOD_RESET_VALUES, new_period_id=new_period_id
+            )
+
+            if not counts["users_updated"]:
                 print("⚠️  No hay usuarios para resetear")
                 return 0
-            
-            print(f"\n🔄 Reseteando {len(all_users)} usuarios para nuevo período...")
-            
-            resetted_count = 0
-            
-            for user in all_users:
-                # 2. Resetear campos del usuario
-                user.status = UserStatus.NO_QUALIFIED
-                user.pv_cache = 0
-                user.pvg_cache = 0
-                user.vn_cache = 0.0
-                user.updated_at = datetime.now(timezone.utc)
-                
-                session.add(user)
-                
-                # 3. Crear registro en user_rank_history con rank_id=1
-                rank_history = UserRankHistory(
-                    member_id=user.member_id,
-                    rank_id=1,  # Rank "Sin rango" o inicial
-                    achieved_on=datetime.now(timezone.utc),
-                    period_id=new_period_id
-                )
-                
-                session.add(rank_history)
-                resetted_count += 1
-            
-            session.flush()
-            
-            print(f"✅ {resetted_count} usuarios reseteados exitosamente")
-            return resetted_count
+
+            print(f"✅ {counts['users_updated']} usuarios reseteados exitosamente")
+            print(f"✅ {counts['rank_history_created']} registros de rango creados (rank_id={cls.INITIAL_RANK_ID})")
+            return counts["users_updated"]
             
         except Exception as e:
             print(f"❌ Error reseteando usuarios: {e}")
@@ -0,0 +1,141 @@
+"""
+Resolución del período actual en memoria (por proceso).
+
+Comisiones, rangos, pagos, dashboard y el cierre mensual preguntan "¿cuál es el
+período actual?" en cada operación. Los períodos vigentes son muy pocos y solo
+cambian al crear o cerrar un período, así que se cargan una vez:
+- períodos cuyo ends_on no ha pasado (el actual y los ya creados a futuro)
+- la resolución es en memoria, con la misma fecha de referencia (get_mexico_now)
+
+El snapshot se comparte con ProcessCache (utils/process_cache.py: los cambios
+ORM a Periods lo invalidan según la regla común). Además vence cuando termina el
+período que era el actual al cargarlo (cambio de mes) o al pasar MAX_AGE_SECONDS
+(cambios hechos por otro proceso). Un snapshot sin período actual solo dura
+MISS_MAX_AGE_SECONDS: el período que crea otro proceso (ej. el cierre mensual)
+se ve en segundos.
+
+Principios aplicados: KISS, DRY, POO
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+import sqlmodel
+
+from database.periods import Periods
+from ..utils.process_cache import ProcessCache
+from ..utils.timezone_mx import get_mexico_now
+
+
+def _as_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Fechas comparables con get_mexico_now() (sin tzinfo, como las lee la BD)."""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+@dataclass(frozen=True)
+class PeriodSnapshot:
+    """Datos del período (inmutables; se comparten entre sesiones y hilos)."""
+    id: int
+    name: str
+    starts_on: datetime
+    ends_on: datetime
+    closed_at: Optional[datetime] = None
+
+
+class PeriodResolver:
+    """
+    Resolución compartida del período actual.
+    Principio POO: Encapsula carga, vigencia e invalidación de los períodos vigentes.
+    """
+
+    MAX_AGE_SECONDS = 300
+    MISS_MAX_AGE_SECONDS = 5
+
+    _cache = ProcessCache(
+        "period_resolver",
+        load=lambda session: PeriodResolver.from_session(session),
+        is_expired=lambda resolver, age_seconds: resolver.is_expired(get_mexico_now(), age_seconds),
+    )
+
+    def __init__(self, periods: Iterable[PeriodSnapshot], loaded_on: datetime):
+        """
+        Args:
+            periods: Períodos con ends_on >= loaded_on
+            loaded_on: Fecha de referencia de la carga (get_mexico_now)
+        """
+        # El más reciente primero (con traslapes gana el último en iniciar)
+        self.periods: List[PeriodSnapshot] = sorted(periods, key=lambda period: period.starts_on, reverse=True)
+
+        # Vence cuando termina el período actual al cargar
+        current = self.find(loaded_on)
+        self.valid_until: Optional[datetime] = current.ends_on if current else None
+
+    def find(self, as_of: datetime, open_only: bool = False) -> Optional[PeriodSnapshot]:
+        """Período con starts_on <= as_of <= ends_on (y sin cerrar si open_only)."""
+        for period in self.periods:
+            if period.starts_on <= as_of <= period.ends_on and not (open_only and period.closed_at):
+                return period
+        return None
+
+    def is_expired(self, now: datetime, age_seconds: float = 0.0) -> bool:
+        """¿Hay que recargar? (terminó el período actual o pasó la vigencia)."""
+        # Sin período actual al cargar no se cachea el "no hay" por MAX_AGE_SECONDS
+        max_age = self.MAX_AGE_SECONDS if self.valid_until is not None else self.MISS_MAX_AGE_SECONDS
+        if age_seconds > max_age:
+            return True
+        return self.valid_until is not None and now > self.valid_until
+
+    @classmethod
+    def from_session(cls, session) -> "PeriodResolver":
+        """Carga con un solo SELECT los períodos que no han terminado."""
+        now = get_mexico_now()
+        rows = session.exec(
+            sqlmodel.select(Periods.id, Periods.name, Periods.starts_on, Periods.ends_on, Periods.closed_at)
+            .where(Periods.ends_on >= now)
+        ).all()
+
+        periods = [
+            PeriodSnapshot(
+                id=period_id,
+                name=name,
+                starts_on=_as_naive_utc(starts_on),
+                ends_on=_as_naive_utc(ends_on),
+                closed_at=closed_at
+            )
+            for period_id, name, starts_on, ends_on, closed_at in rows
+        ]
+        return cls(periods, loaded_on=now)
+
+    @classmethod
+    def get_shared(cls, session) -> "PeriodResolver":
+        """
+        Resolver compartido del proceso; se recarga si fue invalidado o venció.
+        Una sesión con cambios a Periods sin confirmar recibe un resolver propio
+        (no se publica al proceso un período que puede hacer rollback).
+        """
+        return cls._cache.get(session)
+
+    @classmethod
+    def get_current(cls, session, open_only: bool = False) -> Optional[PeriodSnapshot]:
+        """
+        Período actual (sin query en estado estable).
+
+        Args:
+            session: Sesión de base de datos (solo se usa al recargar)
+            open_only: Excluir períodos ya cerrados (closed_at no nulo)
+
+        Returns:
+            PeriodSnapshot del período actual o None si no hay
+        """
+        return cls.get_shared(session).find(get_mexico_now(), open_only=open_only)
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Descarta los períodos cacheados."""
+        cls._cache.invalidate()
+
+
+PeriodResolver._cache.track(Periods)
@@ -7,12 +7,12 @@ Principios aplicados: KISS, DRY, YAGNI, POO
 
 import sqlmodel
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Dict, Optional
 from calendar import monthrange
 
 from database.periods import Periods
-from database.users import Users, UserStatus
-from database.user_rank_history import UserRankHistory
+from .period_reset_service import PeriodResetService
+from .period_resolver import PeriodResolver
 from ..utils.timezone_mx import get_mexico_now
 
 
@@ -25,35 +25,27 @@ class PeriodService:
     @classmethod
     def get_current_period(cls, session) -> Optional[Periods]:
         """
-        Obtiene el período actual activo.
-        Principio KISS: Método simple para obtener período actual.
+        Obtiene el período actual activo (sin cerrar) como instancia de la sesión.
+        Principio DRY: PeriodResolver resuelve cuál es; session.get lo toma del
+        identity map si ya está cargado. Para solo leer id/fechas usar
+        PeriodResolver.get_current(session, open_only=True) directamente.
 
         Returns:
             Periods object si existe, None si no hay período actual
         """
         try:
-            current_date = get_mexico_now()
-
-            current_period = session.exec(
-                sqlmodel.select(Periods)
-                .where(
-                    (Periods.starts_on <= current_date) &
-                    (Periods.ends_on >= current_date) &
-                    (Periods.closed_at.is_(None))
-                )
-            ).first()
-
-            return current_period
+            snapshot = PeriodResolver.get_current(session, open_only=True)
+            return session.get(Periods, snapshot.id) if snapshot else None
 
         except Exception as e:
             print(f"❌ Error obteniendo período actual: {e}")
             return None
 
     @classmethod
-    def reset_users_for_new_period(cls, session, new_period: Periods) -> bool:
+    def reset_users_for_new_period(cls, session, new_period: Periods) -> Optional[Dict[str, int]]:
         """
         Reinicia los datos de todos los usuarios para el nuevo período.
-        Principio KISS: Una función, una responsabilidad clara.
+        Principio DRY: Usa el reseteo basado en conjuntos de PeriodResetService.
         
         Resetea:
         - status → NO_QUALIFIED
@@ -67,48 +59,27 @@ class PeriodService:
             new_period: Período recién creado
             
         Returns:
-            True si se ejecutó correctamente
+            Dict con users_updated y rank_history_created, None si falló
         """
         try:
             print(f"\n🔄 Reiniciando usuarios para período {new_period.name}...")
             
-            # Obtener todos los usuarios
-            all_users = session.exec(sqlmodel.select(Users)).all()
-            
-            users_updated = 0
-            rank_records_created = 0
-            
-            for user in all_users:
-                # Resetear caches y status
-                user.status = UserStatus.NO_QUALIFIED
-                user.pv_cache = 0
-                user.pvg_cache = 0
-                user.vn_cache = 0
-                session.add(user)
-                users_updated += 1
-                
-                # Crear registro en user_rank_history con rank 1
-                rank_history = UserRankHistory(
-                    member_id=user.member_id,
-                    rank_id=1,
-                    period_id=new_period.id,
-                    achieved_on=datetime.now(timezone.utc)
-                )
-                session.add(rank_history)
-                rank_records_created += 1
-            
-            session.flush()
+            counts = PeriodResetService.bulk_reset_users(
+                session,
+                PeriodResetService.NEW_PERIOD_RESET_VALUES,
+                new_period_id=new_period.id
+            )
             
-            print(f"   ✅ {users_updated} usuarios reiniciados")
-            print(f"   ✅ {rank_records_created} registros de rango creados (rank_id=1)")
+            print(f"   ✅ {counts['users_updated']} usuarios reiniciados")
+            print(f"   ✅ {counts['rank_history_created']} registros de rango creados (rank_id=1)")
             
-            return True
+            return counts
             
         except Exception as e:
             print(f"   ❌ Error reiniciando usuarios: {e}")
             import traceback
             traceback.print_exc()
-            return False
+            return None
 
     @classmethod
     def create_period_for_month(cls, session, year: int, month: int) -> Optional[Periods]:
@@ -0,0 +1,214 @@
+"""
+Cache de perfiles de sesión para AuthState.load_user_from_token.
+
+Cada página protegida ejecuta load_user_from_token en on_mount; sin cache,
+navegar entre páginas repite las mismas lecturas (usuario, perfil, rangos,
+wallet y sponsor) aunque nada haya cambiado. ProfileCache guarda el resultado
+por (user_id, iat del token):
+- un token nuevo (login) es una llave nueva; logout descarta las del usuario
+- cambios vía ORM a Users, UserProfiles, Wallets o UserRankHistory invalidan
+  las entradas que dependen de ese usuario / miembro (incluye al sponsor)
+- los UPDATE/INSERT masivos sobre esas tablas (sin eventos de mapper) se
+  detectan en do_orm_execute: invalidan los miembros indicados en la opción
+  de ejecución profile_cache_members o en los parámetros, y si no hay forma
+  de saberlo, todo el cache
+- la invalidación se repite al terminar la transacción (lo leído mientras
+  seguía abierta era lo confirmado anterior; on_transaction_end de
+  utils/process_cache.py, la misma regla que los demás caches del proceso)
+
+Tamaño acotado por LRU (MAX_ENTRIES). La invalidación solo llega al proceso que
+hizo el cambio: un cambio hecho en otro worker (depósito, rango, perfil) se ve
+aquí a más tardar en MAX_AGE_SECONDS, que por eso es corto; basta para que
+navegar entre páginas con el mismo token no consulte la BD.
+
+Principios aplicados: KISS, POO
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SASession, object_session
+
+from database.users import Users
+from database.userprofiles import UserProfiles
+from database.wallet import Wallets
+from database.user_rank_history import UserRankHistory
+from ..utils.process_cache import on_transaction_end
+
+
+class ProfileCache:
+    """
+    Cache LRU por proceso de los datos de sesión (logged_user_data + profile_data).
+    Principio POO: Encapsula almacenamiento, dependencias e invalidación.
+    """
+
+    MAX_ENTRIES = 5000
+    MAX_AGE_SECONDS = 30  # Retraso máximo ante cambios de otros workers
+
+    SESSION_DIRTY_KEY = "profile_cache_dirty"
+
+    # Opción de ejecución para DML masivo: miembros afectados (el llamador puede
+    # pasar () si los marca él mismo, ej. con los member_id de un RETURNING)
+    PROFILE_MEMBERS_OPTION = "profile_cache_members"
+
+    # (user_id, iat) → (guardado_en, user_ids, member_ids, datos)
+    _entries: "OrderedDict[Tuple[int, Any], tuple]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, user_id: int, issued_at: Any) -> Optional[Dict[str, Any]]:
+        """
+        Datos de sesión cacheados para el token, o None.
+
+        Returns:
+            Copia de {"logged_user_data", "profile_data"} (el State puede mutarla)
+        """
+        key = (user_id, issued_at)
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] > cls.MAX_AGE_SECONDS:
+                del cls._entries[key]
+                return None
+            cls._entries.move_to_end(key)
+            data = entry[3]
+        return copy.deepcopy(data)
+
+    @classmethod
+    def put(cls, user_id: int, issued_at: Any, data: Dict[str, Any]) -> None:
+        """
+        Guarda los datos de sesión del token.
+        Las dependencias (usuario y sponsor) se toman de los propios datos.
+        """
+        user_ids, member_ids = cls._dependencies(data)
+        user_ids.add(user_id)
+
+        with cls._lock:
+            cls._entries[(user_id, issued_at)] = (time.monotonic(), user_ids, member_ids, copy.deepcopy(data))
+            cls._entries.move_to_end((user_id, issued_at))
+            while len(cls._entries) > cls.MAX_ENTRIES:
+                cls._entries.popitem(last=False)
+
+    @staticmethod
+    def _dependencies(data: Dict[str, Any]) -> Tuple[set, set]:
+        """user_ids y member_ids cuyos cambios afectan a la entrada."""
+        user_ids, member_ids = set(), set()
+        profile_data = data.get("profile_data") or {}
+        for source in (data.get("logged_user_data") or {}, profile_data, profile_data.get("sponsor_data") or {}):
+            if source.get("id") is not None:
+                user_ids.add(source["id"])
+            if source.get("member_id") is not None:
+                member_ids.add(source["member_id"])
+        return user_ids, member_ids
+
+    @classmethod
+    def invalidate(cls, user_ids: Iterable[int] = (), member_ids: Iterable[int] = ()) -> None:
+        """Descarta las entradas que dependen de alguno de los usuarios / miembros."""
+        user_ids, member_ids = set(user_ids), set(member_ids)
+        if not user_ids and not member_ids:
+            return
+        with cls._lock:
+            stale = [
+                key for key, entry in cls._entries.items()
+                if entry[1] & user_ids or entry[2] & member_ids
+            ]
+            for key in stale:
+                del cls._entries[key]
+
+    @classmethod
+    def clear(cls) -> None:
+        """Descarta todo el cache del proceso."""
+        with cls._lock:
+            cls._entries.clear()
+
+    @classmethod
+    def size(cls) -> int:
+        return len(cls._entries)
+
+    @classmethod
+    def mark_dirty(cls, session, user_ids: Iterable[int] = (), member_ids: Iterable[int] = (), everything: bool = False) -> None:
+        """
+        Invalida ya y registra en la sesión qué volver a invalidar al terminar su transacción.
+
+        Args:
+            session: Sesión que hizo el cambio (None: solo invalida)
+            user_ids / member_ids: Usuarios / miembros modificados
+            everything: Cambio masivo sin miembros conocidos
+        """
+        user_ids, member_ids = set(user_ids), set(member_ids)
+        if everything:
+            cls.clear()
+        else:
+            cls.invalidate(user_ids, member_ids)
+
+        if session is None:
+            return
+        dirty = session.info.setdefault(cls.SESSION_DIRTY_KEY, {"user_ids": set(), "member_ids": set(), "everything": False})
+        dirty["user_ids"] |= user_ids
+        dirty["member_ids"] |= member_ids
+        dirty["everything"] = dirty["everything"] or everything
+
+
+# Tabla → cómo obtener (user_ids, member_ids) de una fila del ORM
+_TRACKED_MODELS = {
+    Users: lambda target: ({target.id}, {target.member_id}),
+    UserProfiles: lambda target: ({target.user_id}, set()),
+    Wallets: lambda target: (set(), {target.member_id}),
+    UserRankHistory: lambda target: (set(), {target.member_id}),
+}
+_TRACKED_TABLES = {model.__table__ for model in _TRACKED_MODELS}
+
+
+def _register_mapper_events(model, dependencies) -> None:
+    def _mark_row(mapper, connection, target) -> None:
+        user_ids, member_ids = dependencies(target)
+        ProfileCache.mark_dirty(
+            object_session(target),
+            user_ids={user_id for user_id in user_ids if user_id is not None},
+            member_ids={member_id for member_id in member_ids if member_id is not None},
+        )
+
+    for event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(model, event_name, _mark_row)
+
+
+for _model, _dependencies in _TRACKED_MODELS.items():
+    _register_mapper_events(_model, _dependencies)
+
+
+@event.listens_for(SASession, "do_orm_execute")
+def _mark_bulk_dml(orm_execute_state) -> None:
+    """UPDATE / INSERT / DELETE masivos sobre tablas del perfil (no disparan eventos de mapper)."""
+    if not (orm_execute_state.is_update or orm_execute_state.is_insert or orm_execute_state.is_delete):
+        return
+    if getattr(orm_execute_state.statement, "table", None) not in _TRACKED_TABLES:
+        return
+
+    session = orm_execute_state.session
+    declared = orm_execute_state.execution_options.get(ProfileCache.PROFILE_MEMBERS_OPTION)
+    if declared is not None:
+        ProfileCache.mark_dirty(session, member_ids=declared)
+        return
+
+    parameters = orm_execute_state.parameters
+    rows = parameters if isinstance(parameters, list) else [parameters] if parameters else []
+    if rows and all(isinstance(row, dict) and row.get("member_id") is not None for row in rows):
+        ProfileCache.mark_dirty(session, member_ids={row["member_id"] for row in rows})
+        return
+
+    ProfileCache.mark_dirty(session, everything=True)
+
+
+def _invalidate_after_transaction(dirty: Dict[str, Any]) -> None:
+    if dirty["everything"]:
+        ProfileCache.clear()
+    else:
+        ProfileCache.invalidate(dirty["user_ids"], dirty["member_ids"])
+
+
+on_transaction_end(ProfileCache.SESSION_DIRTY_KEY, _invalidate_after_transaction)
@@ -10,6 +10,7 @@ from typing import List
 
 from database.users import Users
 from .rank_service import RankService
+from .period_reset_service import PeriodResetService
 
 
 class PVResetService:
@@ -28,19 +29,12 @@ class PVResetService:
             Número de usuarios reseteados
         """
         try:
-            # Obtener todos los usuarios
-            all_users = session.exec(
-                sqlmodel.select(Users)
-            ).all()
-
-            reset_count = 0
-            for user in all_users:
-                user.pv_cache = 0
-                user.pvg_cache = 0
-                session.add(user)
-                reset_count += 1
+            # Un solo UPDATE users (Principio DRY: mismo reseteo que el cambio de período)
+            counts = PeriodResetService.bulk_reset_users(
+                session, {"pv_cache": 0, "pvg_cache": 0}
+            )
+            reset_count = counts["users_updated"]
 
-            session.flush()
             print(f"✅ PV/PVG reseteado para {reset_count} usuarios")
             return reset_count
 
@@ -6,12 +6,13 @@ Principios aplicados: KISS, DRY, YAGNI, POO
 """
 
 import sqlmodel
-from typing import Optional
+from typing import List, Optional, Tuple
 
 from database.users import Users
 from database.orders import Orders
+from database.usertreepaths import UserTreePath
 from .rank_service import RankService
-from .genealogy_service import GenealogyService
+from .profile_cache import ProfileCache
 
 
 class PVUpdateService:
@@ -29,7 +30,7 @@ class PVUpdateService:
         1. Obtener orden y validar
         2. Actualizar PV del comprador (pv_cache)
         3. Actualizar PVG de todos los ancestros
-        4. Verificar y actualizar rango del comprador
+        4. Verificar y actualizar rangos del comprador y sus ancestros (en lote)
 
         Principio KISS: Proceso lineal y directo.
 
@@ -56,42 +57,23 @@ class PVUpdateService:
 
             print(f"📊 Procesando actualización PV/PVG para orden {order_id}...")
 
-            # 2. Actualizar PV del comprador
-            buyer = session.exec(
-                sqlmodel.select(Users).where(Users.member_id == order.member_id)
-            ).first()
+            # 2-3. PV del comprador y PVG del comprador y sus ancestros
+            buyer = cls.apply_order_pv(session, order)
 
             if not buyer:
                 print(f"❌ Comprador {order.member_id} no encontrado")
                 return False
 
-            # Sumar PV de la orden al cache
-            pv_anterior = buyer.pv_cache
-            buyer.pv_cache += order.total_pv
-
-            # Actualizar PVG del comprador (PVG incluye su propio PV)
-            pvg_anterior = buyer.pvg_cache
-            buyer.pvg_cache += order.total_pv
-
-            session.add(buyer)
-            session.flush()
-
-            print(f"✅ PV actualizado para member_id={buyer.member_id}: {pv_anterior} -> {buyer.pv_cache} (+{order.total_pv})")
-            print(f"✅ PVG actualizado para member_id={buyer.member_id}: {pvg_anterior} -> {buyer.pvg_cache} (+{order.total_pv})")
-
-            # 3. Actualizar PVG de todos los ancestros (excluyendo el comprador)
-            cls._update_pvg_for_ancestors(session, buyer.member_id, order.total_pv)
-
-            # 3b. Actualizar tabla unilevel_report para el comprador y ancestros
-            print("📊 Actualizando unilevel_report...")
+            # 3b. Sumar la orden al unilevel_report del comprador y ancestros (delta, misma transacción)
             from .mlm_user_manager import MLMUserManager
-            MLMUserManager.update_unilevel_report_for_order(order.member_id, order.period_id)
+            MLMUserManager.apply_order_to_unilevel_report(session, order)
 
-            # 4. Verificar y actualizar rango del comprador
-            rank_updated = RankService.check_and_update_rank(session, buyer.member_id)
+            # 4. Verificar y actualizar rango del comprador y de toda su línea ascendente
+            # (todos cambiaron de PVG) en lote, con queries constantes
+            promotions = RankService.evaluate_upline_ranks(session, buyer.member_id)
 
-            if rank_updated:
-                print(f"🎖️  Rango actualizado para member_id={buyer.member_id}")
+            if promotions:
+                print(f"🎖️  Rangos actualizados para {len(promotions)} miembros de la línea de member_id={buyer.member_id}")
 
             # ⚠️ NO hacer commit aquí - el PaymentService hará el commit final
             # Esto garantiza atomicidad: todo o nada
@@ -106,37 +88,111 @@ class PVUpdateService:
             return False
 
     @classmethod
-    def _update_pvg_for_ancestors(cls, session, member_id: int, pv_amount: int) -> None:
+    def apply_order_pv(cls, session, order: Orders) -> Optional[Users]:
         """
-        Actualiza PVG_cache de todos los ancestros cuando se añade PV.
-        Excluye al propio usuario (ya se actualizó su PVG en el paso anterior).
-
-        Principio DRY: Método reutilizable para actualizar PVG.
+        Suma el PV de la orden al comprador (pv_cache y pvg_cache) y al PVG de sus ancestros.
+        Sin manejo de errores ni commit: lo usan process_order_pv_update y la etapa
+        pv_update del outbox de pagos (que reintenta si falla).
 
         Args:
             session: Sesión de base de datos
+            order: Orden con pago confirmado
+
+        Returns:
+            Comprador actualizado, o None si no existe
+        """
+        buyer = session.exec(
+            sqlmodel.select(Users).where(Users.member_id == order.member_id)
+        ).first()
+
+        if not buyer:
+            return None
+
+        # Sumar PV de la orden al cache
+        pv_anterior = buyer.pv_cache
+        buyer.pv_cache += order.total_pv
+
+        # Actualizar PVG del comprador (PVG incluye su propio PV)
+        pvg_anterior = buyer.pvg_cache
+        buyer.pvg_cache += order.total_pv
+
+        session.add(buyer)
+        session.flush()
+
+        print(f"✅ PV actualizado para member_id={buyer.member_id}: {pv_anterior} -> {buyer.pv_cache} (+{order.total_pv})")
+        print(f"✅ PVG actualizado para member_id={buyer.member_id}: {pvg_anterior} -> {buyer.pvg_cache} (+{order.total_pv})")
+
+        # Actualizar PVG de todos los ancestros (excluyendo el comprador)
+        updated_ancestors = cls._update_pvg_for_ancestors(session, buyer.member_id, order.total_pv)
+        print(f"📈 PVG actualizado para {len(updated_ancestors)} ancestros (+{order.total_pv}) en un solo UPDATE")
+
+        return buyer
+
+    @classmethod
+    def propagate_pvg_to_upline(cls, session, member_id: int, pv_amount: int) -> List[Tuple[int, int, int]]:
+        """
+        Suma pv_amount al pvg_cache de TODA la línea ascendente en un solo statement.
+        Excluye al propio usuario (depth > 0).
+
+        Equivalente SQL:
+            UPDATE users
+            SET pvg_cache = users.pvg_cache + :pv_amount
+            FROM usertreepath
+            WHERE users.member_id = usertreepath.ancestor_id
+              AND usertreepath.descendant_id = :member_id
+              AND usertreepath.depth > 0
+            RETURNING users.member_id, users.pv_cache, users.pvg_cache
+
+        Principio KISS: Un round-trip sin importar la profundidad de la red.
+
+        Args:
+            session: Sesión de base de datos (transacción del llamador)
             member_id: ID del miembro que generó el PV
             pv_amount: Cantidad de PV a sumar
+
+        Returns:
+            Lista de tuplas (member_id, pv_cache, pvg_cache) ya actualizadas,
+            listas para evaluar rangos en memoria sin volver a leer Users
         """
-        try:
-            # Obtener todos los ancestros (incluyendo self)
-            all_ancestors = GenealogyService.get_all_ancestors(session, member_id)
+        if not pv_amount:
+            return []
+
+        result = session.execute(
+            sqlmodel.update(Users)
+            .where(
+                (Users.member_id == UserTreePath.ancestor_id) &
+                (UserTreePath.descendant_id == member_id) &
+                (UserTreePath.depth > 0)  # Excluir self
+            )
+            .values(pvg_cache=Users.pvg_cache + pv_amount)
+            .returning(Users.member_id, Users.pv_cache, Users.pvg_cache)
+            .execution_options(profile_cache_members=())  # Se marcan abajo con el RETURNING
+        )
+
+        upline = [(row.member_id, row.pv_cache, row.pvg_cache) for row in result]
+
+        # Solo los perfiles de la línea ascendente cambiaron (no todo el cache)
+        ProfileCache.mark_dirty(session, member_ids=[ancestor_id for ancestor_id, _, _ in upline])
+        return upline
 
-            # Excluir al propio usuario (depth > 0)
-            ancestors = [ancestor_id for ancestor_id in all_ancestors if ancestor_id != member_id]
+    @classmethod
+    def _update_pvg_for_ancestors(cls, session, member_id: int, pv_amount: int) -> List[Tuple[int, int, int]]:
+        """
+        Actualiza PVG_cache de todos los ancestros cuando se añade PV.
+        Excluye al propio usuario (ya se actualizó su PVG en el paso anterior).
 
-            for ancestor_id in ancestors:
-                ancestor = session.exec(
-                    sqlmodel.select(Users).where(Users.member_id == ancestor_id)
-                ).first()
+        Principio DRY: Delegado a propagate_pvg_to_upline (UPDATE ... FROM usertreepath).
 
-                if ancestor:
-                    pvg_anterior = ancestor.pvg_cache
-                    ancestor.pvg_cache += pv_amount
-                    session.add(ancestor)
-                    print(f"📈 PVG actualizado para ancestor member_id={ancestor_id}: {pvg_anterior} -> {ancestor.pvg_cache} (+{pv_amount})")
+        Args:
+            session: Sesión de base de datos
+            member_id: ID del miembro que generó el PV
+            pv_amount: Cantidad de PV a sumar
 
-            session.flush()
+        Returns:
+            Lista de tuplas (member_id, pv_cache, pvg_cache) de los ancestros actualizados
+        """
+        try:
+            return cls.propagate_pvg_to_upline(session, member_id, pv_amount)
 
         except Exception as e:
             print(f"❌ Error actualizando PVG de ancestros: {e}")
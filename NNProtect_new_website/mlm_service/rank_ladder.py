@@ -0,0 +1,119 @@
+"""
+Escalera de rangos en memoria (por proceso).
+
+La tabla ranks tiene un puñado de filas y casi nunca cambia; en lugar de
+consultarla en cada cálculo de rango o resolución de nombre, se carga una vez:
+- umbrales de PVG ordenados (bisect para el rango que corresponde a un PVG)
+- mapas id → nombre / nombre → id y PVG requerido por rango
+
+Se comparte con ProcessCache (utils/process_cache.py): los cambios ORM a Ranks
+la invalidan según la regla común; las sentencias bulk (insert/update de Core)
+deben llamar invalidate(). MAX_AGE_SECONDS acota cuánto tarda otro proceso en
+ver un cambio.
+
+Principios aplicados: KISS, POO
+"""
+
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import sqlmodel
+
+from database.ranks import Ranks
+from ..utils.process_cache import ProcessCache
+
+
+class RankLadder:
+    """
+    Snapshot inmutable de los rangos del sistema.
+    Principio POO: Encapsula umbrales y nombres con búsquedas O(log n) / O(1).
+    """
+
+    MAX_AGE_SECONDS = 600
+
+    _cache = ProcessCache(
+        "rank_ladder",
+        load=lambda session: RankLadder.from_session(session),
+        is_expired=lambda ladder, age_seconds: age_seconds > RankLadder.MAX_AGE_SECONDS,
+    )
+
+    def __init__(self, ranks: Iterable[Tuple[int, str, int]]):
+        """
+        Args:
+            ranks: Tuplas (id, name, pvg_required)
+        """
+        self.names: Dict[int, str] = {}
+        self.ids: Dict[str, int] = {}
+        self.pvg_required: Dict[int, int] = {}
+
+        for rank_id, name, pvg_required in ranks:
+            self.names[rank_id] = name
+            self.ids[name] = rank_id
+            self.pvg_required[rank_id] = pvg_required or 0
+
+        self.ordered_ids: List[int] = sorted(self.names)
+
+        # Umbrales (> 0) ascendentes; con umbrales repetidos gana el id mayor
+        by_threshold: Dict[int, int] = {}
+        for rank_id in self.ordered_ids:
+            if self.pvg_required[rank_id] > 0:
+                by_threshold[self.pvg_required[rank_id]] = rank_id
+
+        self._thresholds = sorted(by_threshold)
+        self._threshold_ids = [by_threshold[threshold] for threshold in self._thresholds]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, rank_id: int) -> bool:
+        return rank_id in self.names
+
+    def rank_for_pvg(self, pvg: int, default_rank_id: int) -> int:
+        """Rango más alto cuyo pvg_required <= pvg (default si no alcanza ninguno)."""
+        position = bisect_right(self._thresholds, pvg)
+        return self._threshold_ids[position - 1] if position else default_rank_id
+
+    def name(self, rank_id: Optional[int], default: Optional[str] = None) -> Optional[str]:
+        """Nombre del rango, o default si no existe."""
+        return self.names.get(rank_id, default)
+
+    def id_for(self, name: str) -> Optional[int]:
+        """ID del rango por nombre."""
+        return self.ids.get(name)
+
+    def next_rank_id(self, rank_id: int) -> Optional[int]:
+        """Siguiente rango en la escalera (None si rank_id es el máximo)."""
+        position = bisect_right(self.ordered_ids, rank_id)
+        return self.ordered_ids[position] if position < len(self.ordered_ids) else None
+
+    def ranks_between(self, after_rank_id: int, up_to_rank_id: int) -> List[Tuple[int, str]]:
+        """(id, name) de los rangos con after_rank_id < id <= up_to_rank_id, en orden."""
+        return [
+            (rank_id, self.names[rank_id])
+            for rank_id in self.ordered_ids
+            if after_rank_id < rank_id <= up_to_rank_id
+        ]
+
+    @classmethod
+    def from_session(cls, session) -> "RankLadder":
+        """Construye la escalera con un solo SELECT sobre ranks."""
+        rows = session.exec(
+            sqlmodel.select(Ranks.id, Ranks.name, Ranks.pvg_required)
+        ).all()
+        return cls(rows)
+
+    @classmethod
+    def get_shared(cls, session) -> "RankLadder":
+        """
+        Escalera compartida del proceso; se recarga si fue invalidada o expiró.
+        Una sesión con cambios a Ranks sin confirmar recibe una escalera propia.
+        """
+        return cls._cache.get(session)
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Descarta la escalera cacheada."""
+        cls._cache.invalidate()
+
+
+RankLadder._cache.track(Ranks)
@@ -7,16 +7,15 @@ Principios aplicados: KISS, DRY, YAGNI, POO
 
 import reflex as rx
 import sqlmodel
-from typing import Optional
+from typing import Dict, Iterable, Optional
 from datetime import datetime, timezone
 
 from database.users import Users
-from database.ranks import Ranks
 from database.user_rank_history import UserRankHistory
-from database.periods import Periods
 from database.orders import Orders, OrderStatus
 from database.usertreepaths import UserTreePath
-from ..utils.timezone_mx import get_mexico_now
+from .rank_ladder import RankLadder
+from .period_resolver import PeriodResolver, PeriodSnapshot
 
 
 class RankService:
@@ -138,11 +137,9 @@ class RankService:
         """
         try:
             # Verificar que el nuevo rango existe
-            new_rank = session.exec(
-                sqlmodel.select(Ranks).where(Ranks.id == new_rank_id)
-            ).first()
+            ladder = RankLadder.get_shared(session)
 
-            if not new_rank:
+            if new_rank_id not in ladder:
                 print(f"❌ Rango con ID {new_rank_id} no existe")
                 return False
 
@@ -169,7 +166,7 @@ class RankService:
             session.add(rank_history)
             session.flush()
 
-            print(f"✅ Usuario {member_id} promovido a rango {new_rank.name} (id={new_rank_id})")
+            print(f"✅ Usuario {member_id} promovido a rango {ladder.name(new_rank_id)} (id={new_rank_id})")
 
             # =================================================================
             # DISPARAR BONOS POR ALCANCE DE TODOS LOS RANGOS INTERMEDIOS
@@ -178,27 +175,20 @@ class RankService:
             
             # Obtener todos los rangos entre el actual y el nuevo
             start_rank = current_rank_id if current_rank_id else 1
-            intermediate_ranks = session.exec(
-                sqlmodel.select(Ranks)
-                .where(
-                    (Ranks.id > start_rank) &
-                    (Ranks.id <= new_rank_id)
-                )
-                .order_by(Ranks.id)
-            ).all()
+            intermediate_ranks = ladder.ranks_between(start_rank, new_rank_id)
             
             bonuses_generated = 0
             total_bonus_amount = 0.0
             
-            for rank in intermediate_ranks:
+            for _, rank_name in intermediate_ranks:
                 # Intentar generar bono para este rango
                 achievement_commission_id = CommissionService.process_achievement_bonus(
-                    session, member_id, rank.name
+                    session, member_id, rank_name
                 )
                 
                 if achievement_commission_id:
                     bonuses_generated += 1
-                    print(f"   ✅ Bono por Alcance generado: {rank.name}")
+                    print(f"   ✅ Bono por Alcance generado: {rank_name}")
                     
                     # Obtener monto del bono generado
                     from database.comissions import Commissions
@@ -227,23 +217,19 @@ class RankService:
         Principio YAGNI: Solo para reportes específicos.
         """
         try:
-            # Query separado para evitar problemas de JOIN en SQLModel
             rank_history = session.exec(
                 sqlmodel.select(UserRankHistory)
                 .where(UserRankHistory.member_id == member_id)
                 .order_by(sqlmodel.desc(UserRankHistory.achieved_on))
             ).all()
             
-            # Obtener nombres de rangos por separado
+            # Nombres de rangos desde la escalera en memoria
+            ladder = RankLadder.get_shared(session)
             result = []
             for history in rank_history:
-                rank = session.exec(
-                    sqlmodel.select(Ranks).where(Ranks.id == history.rank_id)
-                ).first()
-                
                 result.append({
                     "rank_id": history.rank_id,
-                    "rank_name": rank.name if rank else "Desconocido",
+                    "rank_name": ladder.name(history.rank_id, "Desconocido"),
                     "achieved_on": history.achieved_on,
                     "period_id": history.period_id
                 })
@@ -350,27 +336,22 @@ class RankService:
             # Calcular PVG
             pvg = cls.get_pvg(session, member_id, period_id)
 
-            # Obtener todos los rangos ordenados por PVG requerido (descendente)
-            ranks = session.exec(
-                sqlmodel.select(Ranks)
-                .where(Ranks.pvg_required > 0)
-                .order_by(sqlmodel.desc(Ranks.pvg_required))
-            ).all()
-
-            # Encontrar el rango más alto que cumple el requisito
-            for rank in ranks:
-                if pvg >= rank.pvg_required:
-                    return rank.id
-
-            # Si tiene PV suficiente pero no cumple ningún umbral de PVG
-            return cls.DEFAULT_RANK_ID
+            # Rango más alto cuyo PVG requerido se cumple (bisect sobre la escalera en memoria);
+            # si no cumple ningún umbral de PVG queda en "Sin rango"
+            return RankLadder.get_shared(session).rank_for_pvg(pvg, cls.DEFAULT_RANK_ID)
 
         except Exception as e:
             print(f"❌ Error calculando rango de usuario {member_id}: {e}")
             return None
     
     @classmethod
-    def calculate_rank_from_cache(cls, session, member_id: int) -> Optional[int]:
+    def calculate_rank_from_cache(
+        cls,
+        session,
+        member_id: int,
+        pv_cache: Optional[int] = None,
+        pvg_cache: Optional[int] = None
+    ) -> Optional[int]:
         """
         Calcula el rango usando pv_cache y pvg_cache (más eficiente).
         Usado cuando se actualizan los caches en tiempo real.
@@ -378,48 +359,50 @@ class RankService:
         Args:
             session: Sesión de base de datos
             member_id: ID del miembro
+            pv_cache: PV ya conocido en memoria (ej. RETURNING de la propagación PVG)
+            pvg_cache: PVG ya conocido en memoria; si ambos se pasan no se consulta Users
         
         Returns:
             rank_id del rango alcanzado o None si no cumple requisitos
         """
         try:
-            # Obtener usuario con sus caches
-            user = session.exec(
-                sqlmodel.select(Users).where(Users.member_id == member_id)
-            ).first()
-            
-            if not user:
-                print(f"❌ Usuario {member_id} no encontrado")
-                return None
+            if pv_cache is None or pvg_cache is None:
+                # Obtener usuario con sus caches
+                user = session.exec(
+                    sqlmodel.select(Users).where(Users.member_id == member_id)
+                ).first()
+                
+                if not user:
+                    print(f"❌ Usuario {member_id} no encontrado")
+                    return None
+
+                pv_cache = user.pv_cache
+                pvg_cache = user.pvg_cache
             
             # Verificar PV mínimo personal
-            if user.pv_cache < 1465:
+            if pv_cache < 1465:
                 return cls.DEFAULT_RANK_ID  # "Sin rango"
             
             # Usar pvg_cache para determinar rango
-            pvg = user.pvg_cache
-            
-            # Obtener todos los rangos ordenados por PVG requerido (descendente)
-            ranks = session.exec(
-                sqlmodel.select(Ranks)
-                .where(Ranks.pvg_required > 0)
-                .order_by(sqlmodel.desc(Ranks.pvg_required))
-            ).all()
-            
-            # Encontrar el rango más alto que cumple el requisito
-            for rank in ranks:
-                if pvg >= rank.pvg_required:
-                    return rank.id
+            pvg = pvg_cache
             
-            # Si tiene PV suficiente pero no cumple ningún umbral de PVG
-            return cls.DEFAULT_RANK_ID
+            # Rango más alto cuyo PVG requerido se cumple (bisect sobre la escalera en memoria);
+            # si no cumple ningún umbral de PVG queda en "Sin rango"
+            return RankLadder.get_shared(session).rank_for_pvg(pvg, cls.DEFAULT_RANK_ID)
         
         except Exception as e:
             print(f"❌ Error calculando rango desde cache de usuario {member_id}: {e}")
             return None
 
     @classmethod
-    def check_and_update_rank(cls, session, member_id: int, use_cache: bool = True) -> bool:
+    def check_and_update_rank(
+        cls,
+        session,
+        member_id: int,
+        use_cache: bool = True,
+        pv_cache: Optional[int] = None,
+        pvg_cache: Optional[int] = None
+    ) -> bool:
         """
         Verifica si el usuario califica para nuevo rango y lo actualiza.
         Principio POO: Encapsula lógica de detección y actualización.
@@ -428,6 +411,8 @@ class RankService:
             session: Sesión de base de datos
             member_id: ID del miembro
             use_cache: Si True, usa pv_cache/pvg_cache (más rápido); si False, recalcula desde órdenes
+            pv_cache: PV en memoria (opcional, evita releer Users cuando use_cache=True)
+            pvg_cache: PVG en memoria (opcional, evita releer Users cuando use_cache=True)
 
         Returns:
             True si hubo promoción, False si no
@@ -435,7 +420,9 @@ class RankService:
         try:
             # Calcular rango que corresponde (usando cache o recalculando)
             if use_cache:
-                calculated_rank_id = cls.calculate_rank_from_cache(session, member_id)
+                calculated_rank_id = cls.calculate_rank_from_cache(
+                    session, member_id, pv_cache=pv_cache, pvg_cache=pvg_cache
+                )
             else:
                 current_period = cls._get_current_period(session)
                 period_id = current_period.id if current_period else None
@@ -458,23 +445,132 @@ class RankService:
             return False
 
     @classmethod
-    def _get_current_period(cls, session) -> Optional[Periods]:
+    def evaluate_upline_ranks(cls, session, member_id: int) -> Dict[int, int]:
         """
-        Obtiene el período actual activo.
-        Principio KISS: Método helper simple.
+        Evalúa el rango del miembro y de toda su línea ascendente (todos cambiaron
+        de PVG con la orden) con un número fijo de queries.
+
+        Args:
+            session: Sesión de base de datos
+            member_id: Comprador (su PV/PVG y el de sus ancestros ya actualizados)
+
+        Returns:
+            Dict member_id → nuevo rank_id de los miembros promovidos
         """
-        try:
-            current_date = get_mexico_now()
+        upline_ids = sqlmodel.select(UserTreePath.ancestor_id).where(
+            UserTreePath.descendant_id == member_id
+        )
 
-            current_period = session.exec(
-                sqlmodel.select(Periods)
-                .where(
-                    (Periods.starts_on <= current_date) &
-                    (Periods.ends_on >= current_date)
-                )
-            ).first()
+        members = session.exec(
+            sqlmodel.select(Users).where(
+                (Users.member_id == member_id) | Users.member_id.in_(upline_ids)
+            )
+        ).all()
+
+        return cls.evaluate_ranks_batch(session, members)
+
+    @classmethod
+    def evaluate_ranks_batch(cls, session, members: Iterable[Users]) -> Dict[int, int]:
+        """
+        Evalúa y aplica promociones de rango para varios miembros a la vez.
+        Mismas reglas que check_and_update_rank (pv_cache/pvg_cache contra la
+        escalera en memoria) y promote_user_rank (Bono por Alcance de cada rango
+        intermedio), pero con queries constantes sin importar cuántos miembros:
+        rango actual (1), período (1), historial (1 INSERT), bonos cobrados (1)
+        y comisiones (1 INSERT). Sin commit; errores se propagan al llamador.
+
+        Args:
+            session: Sesión de base de datos
+            members: Usuarios con pv_cache y pvg_cache ya actualizados
+
+        Returns:
+            Dict member_id → nuevo rank_id de los miembros promovidos
+        """
+        users = {user.member_id: user for user in members}
+        if not users:
+            return {}
+
+        ladder = RankLadder.get_shared(session)
+
+        # Rango actual de todos (último UserRankHistory por achieved_on) en una query
+        latest_rank = (
+            sqlmodel.select(
+                UserRankHistory.member_id,
+                UserRankHistory.rank_id,
+                sqlmodel.func.row_number().over(
+                    partition_by=UserRankHistory.member_id,
+                    order_by=(UserRankHistory.achieved_on.desc(), UserRankHistory.id.desc())
+                ).label("position")
+            )
+            .where(UserRankHistory.member_id.in_(list(users)))
+            .subquery("latest_rank")
+        )
+        current_ranks = dict(session.exec(
+            sqlmodel.select(latest_rank.c.member_id, latest_rank.c.rank_id)
+            .where(latest_rank.c.position == 1)
+        ).all())
+
+        # Promociones en memoria
+        promotions = {}
+        for member_id, user in users.items():
+            if user.pv_cache < 1465:
+                calculated_rank_id = cls.DEFAULT_RANK_ID
+            else:
+                calculated_rank_id = ladder.rank_for_pvg(user.pvg_cache, cls.DEFAULT_RANK_ID)
+
+            current_rank_id = current_ranks.get(member_id)
+            if not current_rank_id or calculated_rank_id > current_rank_id:
+                promotions[member_id] = calculated_rank_id
+
+        if not promotions:
+            return {}
+
+        current_period = cls._get_current_period(session)
+        period_id = current_period.id if current_period else None
+        achieved_on = datetime.now(timezone.utc)
+
+        session.execute(
+            sqlmodel.insert(UserRankHistory),
+            [
+                {"member_id": member_id, "rank_id": rank_id, "achieved_on": achieved_on, "period_id": period_id}
+                for member_id, rank_id in promotions.items()
+            ]
+        )
+
+        # Bonos por Alcance de todos los rangos intermedios no cobrados
+        from .commission_service import CommissionService
+
+        achieved_ranks = {
+            member_id: [
+                rank_name
+                for _, rank_name in ladder.ranks_between(current_ranks.get(member_id) or 1, rank_id)
+            ]
+            for member_id, rank_id in promotions.items()
+        }
+        if period_id is None:
+            # Las comisiones requieren período: sin período activo no se generan bonos
+            print(f"⚠️ No hay período actual activo, no se generan Bonos por Alcance")
+            bonus_rows = []
+        else:
+            bonus_rows = CommissionService.build_achievement_bonus_rows(
+                session, achieved_ranks, users, period_id
+            )
+            CommissionService.bulk_insert_commissions(session, bonus_rows)
 
-            return current_period
+        for member_id, rank_id in promotions.items():
+            print(f"✅ Usuario {member_id} promovido a rango {ladder.name(rank_id)} (id={rank_id})")
+        print(f"🎖️  {len(promotions)} promociones de rango y {len(bonus_rows)} Bonos por Alcance en lote")
+
+        return promotions
+
+    @classmethod
+    def _get_current_period(cls, session) -> Optional[PeriodSnapshot]:
+        """
+        Obtiene el período actual activo.
+        Principio KISS: Delegado a PeriodResolver (en memoria, sin query en estado estable).
+        """
+        try:
+            return PeriodResolver.get_current(session)
 
         except Exception as e:
             print(f"❌ Error obteniendo período actual: {e}")
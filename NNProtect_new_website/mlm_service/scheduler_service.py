@@ -1,6 +1,7 @@
 """
 Servicio de tareas programadas para MLM.
 Maneja jobs automáticos: períodos, reseteo PV/PVG, etc.
+Cada worker arranca su scheduler; JobRunner asegura que cada job corra en uno solo.
 
 Principios aplicados: KISS, DRY, YAGNI, POO
 """
@@ -8,9 +9,12 @@ Principios aplicados: KISS, DRY, YAGNI, POO
 import reflex as rx
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from datetime import datetime, timezone
+from apscheduler.triggers.interval import IntervalTrigger
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 from .period_service import PeriodService
+from .period_resolver import PeriodResolver
 from .pv_reset_service import PVResetService
 
 
@@ -23,6 +27,16 @@ class SchedulerService:
     _scheduler: BackgroundScheduler = None
     _started: bool = False
 
+    # Jobs que corren con lock por job_id (un solo worker) e historial en jobruns
+    LOCKED_JOBS = {
+        'monthly_period_and_reset': '_monthly_period_and_reset_job',
+        'finalize_periods': '_finalize_periods_job',
+        'sharded_settlement': '_sharded_settlement_job',
+    }
+
+    # Ventana para ubicar el disparo programado más reciente (cubre los jobs mensuales)
+    SLOT_LOOKBACK = timedelta(days=32)
+
     @classmethod
     def start_scheduler(cls):
         """
@@ -38,7 +52,8 @@ class SchedulerService:
 
             # Tarea: Crear nuevo periodo y resetear PV/PVG el día 1 a las 00:00:00 UTC
             cls._scheduler.add_job(
-                func=cls._monthly_period_and_reset_job,
+                func=cls._run_scheduled_job,
+                args=['monthly_period_and_reset'],
                 trigger=CronTrigger(day=1, hour=0, minute=0, second=0),
                 id='monthly_period_and_reset',
                 name='Creación de periodo y reseteo mensual PV/PVG',
@@ -47,13 +62,27 @@ class SchedulerService:
 
             # Tarea: Finalizar periodos vencidos diariamente a las 00:01 UTC
             cls._scheduler.add_job(
-                func=cls._finalize_periods_job,
+                func=cls._run_scheduled_job,
+                args=['finalize_periods'],
                 trigger=CronTrigger(hour=0, minute=1, second=0),
                 id='finalize_periods',
                 name='Finalización de períodos vencidos',
                 replace_existing=True
             )
 
+            # Tarea: Aplicar efectos posteriores al pago (outbox) cada pocos segundos
+            # Sin JobRunner: cada evento se bloquea con SKIP LOCKED, todos los workers pueden drenar
+            from ..payment_service.payment_outbox_service import PaymentOutboxService
+            cls._scheduler.add_job(
+                func=cls._payment_outbox_job,
+                trigger=IntervalTrigger(seconds=PaymentOutboxService.POLL_SECONDS),
+                id='payment_outbox',
+                name='Outbox de pagos: PV, rangos y comisiones',
+                replace_existing=True,
+                max_instances=1,
+                coalesce=True
+            )
+
             cls._scheduler.start()
             cls._started = True
             print("✅ Scheduler iniciado correctamente")
@@ -71,6 +100,44 @@ class SchedulerService:
             cls._started = False
             print("✅ Scheduler detenido")
 
+    @classmethod
+    def _run_locked_job(cls, job_id: str, **job_kwargs):
+        """
+        Ejecuta un job de LOCKED_JOBS con JobRunner: solo el worker que obtiene
+        el lock lo corre y la ejecución queda registrada en jobruns.
+        """
+        from ..jobs.job_runner import JobRunner
+        return JobRunner.run(job_id, getattr(cls, cls.LOCKED_JOBS[job_id]), **job_kwargs)
+
+    @classmethod
+    def _run_scheduled_job(cls, job_id: str):
+        """
+        Disparo del scheduler: como _run_locked_job, con la hora programada del
+        disparo para que un worker atrasado no repita uno ya completado.
+        """
+        from ..jobs.job_runner import JobRunner
+        return JobRunner.run(
+            job_id, getattr(cls, cls.LOCKED_JOBS[job_id]), scheduled_for=cls._last_fire_time(job_id)
+        )
+
+    @classmethod
+    def _last_fire_time(cls, job_id: str, now: Optional[datetime] = None) -> Optional[datetime]:
+        """
+        Disparo programado más reciente (<= now) del trigger del job.
+        Todos los workers obtienen el mismo valor aunque su scheduler dispare con retraso.
+        """
+        job = cls._scheduler.get_job(job_id) if cls._scheduler else None
+        if job is None:
+            return None
+
+        now = now or datetime.now(timezone.utc)
+        last_fire_time = None
+        fire_time = job.trigger.get_next_fire_time(None, now - cls.SLOT_LOOKBACK)
+        while fire_time is not None and fire_time <= now:
+            last_fire_time = fire_time
+            fire_time = job.trigger.get_next_fire_time(fire_time, fire_time + timedelta(seconds=1))
+        return last_fire_time
+
     @classmethod
     def _monthly_period_and_reset_job(cls):
         """
@@ -78,60 +145,119 @@ class SchedulerService:
         1. Resetea PV/PVG de todos los usuarios a 0
         2. Crea nuevo periodo para el mes
         3. Ajusta rangos según valores reseteados
-        """
-        try:
-            print(f"[{datetime.now(timezone.utc)}] 🔄 Iniciando proceso mensual: reseteo y nuevo periodo...")
 
-            with rx.session() as session:
-                # Paso 1: Resetear PV/PVG
-                print("📊 Paso 1/3: Reseteando PV/PVG...")
-                PVResetService.monthly_reset_and_rank_adjustment(session)
+        Los errores se propagan a JobRunner, que los registra en jobruns.
+        """
+        print(f"[{datetime.now(timezone.utc)}] 🔄 Iniciando proceso mensual: reseteo y nuevo periodo...")
 
-                # Paso 2: Crear nuevo periodo
-                print("📅 Paso 2/3: Creando nuevo periodo...")
-                PeriodService.auto_create_current_month_period(session)
+        with rx.session() as session:
+            # Paso 1: Resetear PV/PVG
+            print("📊 Paso 1/3: Reseteando PV/PVG...")
+            if not PVResetService.monthly_reset_and_rank_adjustment(session):
+                raise RuntimeError("Falló el reseteo mensual de PV/PVG")
 
-                # Paso 3: Commit de cambios
-                session.commit()
-                print("✅ Proceso mensual completado exitosamente")
+            # Paso 2: Crear nuevo periodo
+            print("📅 Paso 2/3: Creando nuevo periodo...")
+            PeriodService.auto_create_current_month_period(session)
 
-        except Exception as e:
-            print(f"❌ Error en proceso mensual: {e}")
-            import traceback
-            traceback.print_exc()
+            # Paso 3: Commit de cambios
+            session.commit()
+            print("✅ Proceso mensual completado exitosamente")
 
     @classmethod
-    def _finalize_periods_job(cls):
+    def _finalize_periods_job(cls) -> int:
         """
         Job para finalizar periodos vencidos.
         Se ejecuta diariamente a las 00:01 UTC.
+
+        Returns:
+            Número de períodos finalizados (rows_affected en jobruns)
+        """
+        print(f"[{datetime.now(timezone.utc)}] 🔍 Verificando periodos vencidos...")
+
+        with rx.session() as session:
+            finalized_count = PeriodService.auto_finalize_past_periods(session)
+            session.commit()
+
+        if finalized_count > 0:
+            print(f"✅ {finalized_count} periodo(s) finalizado(s)")
+        else:
+            print("ℹ️  No hay periodos por finalizar")
+
+        return finalized_count
+
+    @classmethod
+    def _payment_outbox_job(cls):
+        """
+        Worker del outbox de pagos: aplica un lote de eventos pendientes.
+        Se ejecuta cada PaymentOutboxService.POLL_SECONDS.
         """
         try:
-            print(f"[{datetime.now(timezone.utc)}] 🔍 Verificando periodos vencidos...")
+            from ..payment_service.payment_outbox_service import PaymentOutboxService
 
             with rx.session() as session:
-                finalized_count = PeriodService.auto_finalize_past_periods(session)
-                session.commit()
+                summary = PaymentOutboxService.process_pending(session)
+
+            if summary["completed"] or summary["retried"] or summary["failed"]:
+                print(f"📨 Outbox: {summary['completed']} aplicados, {summary['retried']} reintentos, "
+                      f"{summary['failed']} fallidos (lag máx {summary['max_lag_seconds']:.1f}s)")
 
-                if finalized_count > 0:
-                    print(f"✅ {finalized_count} periodo(s) finalizado(s)")
-                else:
-                    print("ℹ️  No hay periodos por finalizar")
+            return summary
 
         except Exception as e:
-            print(f"❌ Error finalizando periodos: {e}")
+            print(f"❌ Error procesando outbox de pagos: {e}")
+            return None
+
+    @classmethod
+    def _sharded_settlement_job(cls, period_id: int = None, workers: int = None, strategy: str = None, phases=None):
+        """
+        Job de liquidación mensual paralela (Uninivel, Matching y depósito a wallets).
+        Por default liquida el período actual con ShardedSettlementService.DEFAULT_WORKERS.
+
+        Returns:
+            Resumen de ShardedSettlementService.settle_period con rows_affected
+        """
+        from .sharded_settlement_service import ShardedSettlementService
+
+        if period_id is None:
+            with rx.session() as session:
+                current_period = PeriodResolver.get_current(session, open_only=True)
+                if not current_period:
+                    print("❌ No hay período activo para liquidar")
+                    return None
+                period_id = current_period.id
+
+        print(f"[{datetime.now(timezone.utc)}] 🧩 Iniciando liquidación por shards del período {period_id}...")
+
+        summary = ShardedSettlementService.settle_period(
+            period_id,
+            workers=workers,
+            strategy=strategy or ShardedSettlementService.STRATEGY_HASH,
+            phases=phases or ShardedSettlementService.PHASES
+        )
+
+        phases_summary = summary["phases"]
+        summary["rows_affected"] = (
+            sum(phases_summary[phase]["commissions"] for phase in ("unilevel", "matching") if phase in phases_summary)
+            + phases_summary.get("deposit", {}).get("deposited_count", 0)
+        )
+
+        print("✅ Liquidación por shards completada")
+        return summary
 
     @classmethod
-    def run_job_manually(cls, job_id: str):
+    def run_job_manually(cls, job_id: str, **job_kwargs):
         """
         Ejecuta un job manualmente (útil para testing).
+        Los jobs de LOCKED_JOBS respetan el lock y quedan en jobruns.
 
         Args:
-            job_id: 'monthly_period_and_reset' o 'finalize_periods'
+            job_id: 'monthly_period_and_reset', 'finalize_periods', 'payment_outbox' o 'sharded_settlement'
+            job_kwargs: Parámetros del job (sharded_settlement: period_id, workers, strategy, phases)
         """
-        if job_id == 'monthly_period_and_reset':
-            cls._monthly_period_and_reset_job()
-        elif job_id == 'finalize_periods':
-            cls._finalize_periods_job()
+        if job_id in cls.LOCKED_JOBS:
+            return cls._run_locked_job(job_id, **job_kwargs)
+        elif job_id == 'payment_outbox':
+            return cls._payment_outbox_job()
         else:
             print(f"⚠️  Job ID '{job_id}' no reconocido")
@@ -0,0 +1,303 @@
+"""
+Servicio POO para liquidación mensual en paralelo por shards.
+Reparte a los receptores en shards (piernas bajo la raíz o hash de member_id)
+y ejecuta Uninivel, Matching y depósito a wallets de cada shard en un proceso
+con su propio engine.
+
+Principios aplicados: KISS, DRY, POO
+"""
+
+import math
+import multiprocessing
+import os
+import time
+import sqlmodel
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any, Dict, List, Optional, Sequence
+from sqlalchemy.orm import aliased
+
+from database.comissions import Commissions, BonusType
+from database.users import Users
+from database.usertreepaths import UserTreePath
+from .commission_service import CommissionService
+from .wallet_service import WalletService
+
+
+# Engine por proceso (cada worker abre el suyo)
+_worker_engines: Dict[str, Any] = {}
+
+
+def _create_engine(database_url: str):
+    connect_args = {"timeout": 60} if database_url.startswith("sqlite") else {}
+    return sqlmodel.create_engine(database_url, pool_pre_ping=True, connect_args=connect_args)
+
+
+def _get_worker_engine(database_url: str):
+    """Engine del proceso actual para database_url (se crea una vez por proceso)."""
+    engine = _worker_engines.get(database_url)
+    if engine is None:
+        engine = _create_engine(database_url)
+        _worker_engines[database_url] = engine
+    return engine
+
+
+def _run_shard_phase_in_worker(database_url: str, phase: str, period_id: int, shard: Dict[str, Any]) -> Dict[str, Any]:
+    """Punto de entrada del worker: una fase de un shard en su propia sesión y transacción."""
+    with sqlmodel.Session(_get_worker_engine(database_url)) as session:
+        result = ShardedSettlementService.run_shard_phase(session, phase, period_id, shard)
+        session.commit()
+    return result
+
+
+class ShardedSettlementService:
+    """
+    Servicio POO para liquidación mensual paralela.
+    Principio POO: Encapsula particionado, ejecución por fase y merge determinista.
+
+    Las fases corren en orden con barrera entre ellas (Matching lee el Uninivel
+    de descendientes que pueden estar en otro shard). Cada receptor pertenece a
+    un solo shard, así sus comisiones se calculan igual que en el camino secuencial.
+
+    Cada shard confirma por su cuenta, así que las fases son idempotentes:
+    Uninivel y Matching omiten a los receptores que ya tienen comisiones de
+    liquidación (source_order_id NULL) de ese bono en el período, y el depósito
+    solo toma comisiones PENDING. Re-ejecutar tras un fallo parcial completa
+    los shards pendientes sin duplicar.
+    """
+
+    PHASES = ("unilevel", "matching", "deposit")
+
+    # Bono que escribe cada fase (para omitir receptores ya liquidados)
+    PHASE_BONUS_TYPES = {
+        "unilevel": BonusType.BONO_UNINIVEL.value,
+        "matching": BonusType.BONO_MATCHING.value,
+    }
+
+    STRATEGY_HASH = "hash"          # member_id % shards
+    STRATEGY_SUBTREE = "subtree"    # Piernas bajo la raíz, balanceadas por tamaño
+
+    DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+    @classmethod
+    def settle_period(
+        cls,
+        period_id: int,
+        workers: Optional[int] = None,
+        strategy: str = STRATEGY_HASH,
+        phases: Sequence[str] = PHASES,
+        database_url: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Liquida el período por shards en un ProcessPoolExecutor.
+        Con workers=1 corre en el proceso actual (camino secuencial, un solo shard).
+
+        Args:
+            period_id: ID del período a liquidar
+            workers: Procesos (y shards); default DEFAULT_WORKERS
+            strategy: STRATEGY_HASH o STRATEGY_SUBTREE
+            phases: Fases a ejecutar, en orden (subconjunto de PHASES)
+            database_url: URL de BD para los workers (default Environment.get_database_url())
+
+        Returns:
+            Dict con period_id, workers, strategy, shards y el merge de cada fase
+        """
+        if database_url is None:
+            from ..utils.environment import Environment
+            database_url = Environment.get_database_url()
+
+        workers = workers or cls.DEFAULT_WORKERS
+
+        # Engine desechable: ninguna conexión del padre queda viva al crear los workers
+        planning_engine = _create_engine(database_url)
+        try:
+            with sqlmodel.Session(planning_engine) as session:
+                shards = cls.build_shards(session, strategy, workers)
+        finally:
+            planning_engine.dispose()
+
+        print(f"🧩 Liquidación período {period_id}: {len(shards)} shards ({strategy}), {workers} workers")
+
+        summary = {
+            "period_id": period_id,
+            "workers": workers,
+            "strategy": strategy,
+            "shards": len(shards),
+            "phases": {},
+        }
+
+        # spawn: cada worker arranca limpio (sin engines ni conexiones heredadas) y abre su engine
+        executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) if workers > 1 else None
+
+        try:
+            for phase in phases:
+                started = time.perf_counter()
+
+                if executor:
+                    results = list(executor.map(
+                        _run_shard_phase_in_worker,
+                        repeat(database_url), repeat(phase), repeat(period_id), shards
+                    ))
+                else:
+                    results = [
+                        _run_shard_phase_in_worker(database_url, phase, period_id, shard)
+                        for shard in shards
+                    ]
+
+                merged = cls.merge_phase_results(phase, results)
+                merged["seconds"] = time.perf_counter() - started
+                summary["phases"][phase] = merged
+
+                print(f"✅ Fase {phase}: {merged['seconds']:.2f}s")
+        finally:
+            if executor:
+                executor.shutdown()
+
+        return summary
+
+    @classmethod
+    def build_shards(cls, session, strategy: str, shard_count: int) -> List[Dict[str, Any]]:
+        """
+        Especificación (serializable) de cada shard.
+
+        - hash: member_id % shard_count == index
+        - subtree: piernas (directos de cada raíz) repartidas por tamaño, la más
+          grande primero al shard con menos miembros; las raíces van al shard 0
+
+        Returns:
+            Lista de dicts de shard ordenada por index
+        """
+        if strategy == cls.STRATEGY_HASH:
+            return [
+                {"index": index, "strategy": strategy, "shard_count": shard_count}
+                for index in range(shard_count)
+            ]
+
+        if strategy != cls.STRATEGY_SUBTREE:
+            raise ValueError(f"Estrategia de shards no reconocida: {strategy}")
+
+        leg_path = aliased(UserTreePath)
+        roots = sqlmodel.select(Users.member_id).where(Users.sponsor_id.is_(None))
+        leg_roots = (
+            sqlmodel.select(leg_path.descendant_id)
+            .where((leg_path.depth == 1) & leg_path.ancestor_id.in_(roots))
+        )
+
+        leg_sizes = session.exec(
+            sqlmodel.select(UserTreePath.ancestor_id, sqlmodel.func.count())
+            .where(UserTreePath.ancestor_id.in_(leg_roots))
+            .group_by(UserTreePath.ancestor_id)
+        ).all()
+
+        shards = [
+            {"index": index, "strategy": strategy, "leg_roots": [], "size": 0, "include_roots": index == 0}
+            for index in range(shard_count)
+        ]
+
+        for leg_root, size in sorted(leg_sizes, key=lambda leg: (-leg[1], leg[0])):
+            target = min(shards, key=lambda shard: (shard["size"], shard["index"]))
+            target["leg_roots"].append(leg_root)
+            target["size"] += size
+
+        return shards
+
+    @classmethod
+    def shard_member_ids(cls, shard: Dict[str, Any]):
+        """Subquery de member_id que pertenecen al shard."""
+        if shard["strategy"] == cls.STRATEGY_HASH:
+            return sqlmodel.select(Users.member_id).where(
+                Users.member_id % shard["shard_count"] == shard["index"]
+            )
+
+        members = sqlmodel.select(UserTreePath.descendant_id).where(
+            UserTreePath.ancestor_id.in_(shard["leg_roots"])
+        )
+        if shard["include_roots"]:
+            members = members.union(sqlmodel.select(Users.member_id).where(Users.sponsor_id.is_(None)))
+        return members
+
+    @staticmethod
+    def unsettled_member_ids(member_ids, period_id: int, bonus_type: str):
+        """
+        Subquery de los member_id de member_ids sin comisiones de liquidación
+        de bonus_type en el período (las incrementales por orden no cuentan).
+        """
+        settled = sqlmodel.select(Commissions.member_id).where(
+            (Commissions.period_id == period_id) &
+            (Commissions.bonus_type == bonus_type) &
+            (Commissions.source_order_id.is_(None))
+        )
+        return sqlmodel.select(Users.member_id).where(
+            Users.member_id.in_(member_ids) & Users.member_id.not_in(settled)
+        )
+
+    @classmethod
+    def run_shard_phase(cls, session, phase: str, period_id: int, shard: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Ejecuta una fase para los receptores de un shard (sin commit).
+
+        Returns:
+            Dict con shard, seconds y el resultado de la fase
+        """
+        started = time.perf_counter()
+        member_ids = cls.shard_member_ids(shard)
+        if phase in cls.PHASE_BONUS_TYPES:
+            member_ids = cls.unsettled_member_ids(member_ids, period_id, cls.PHASE_BONUS_TYPES[phase])
+
+        if phase == "unilevel":
+            settlement = CommissionService.calculate_unilevel_bonus_for_period(
+                session, period_id, member_ids=member_ids
+            )
+            result = {"commissions": settlement["commissions"], "by_member": settlement["by_member"]}
+
+        elif phase == "matching":
+            rows = CommissionService.build_matching_commission_rows(session, period_id, member_ids)
+            CommissionService.bulk_insert_commissions(session, rows)
+
+            by_member = {}
+            for row in rows:
+                by_member[row["member_id"]] = by_member.get(row["member_id"], 0.0) + row["amount_converted"]
+            result = {"commissions": len(rows), "by_member": by_member}
+
+        elif phase == "deposit":
+            result = WalletService.settle_pending_commissions(session, period_id, member_ids=member_ids)
+
+        else:
+            raise ValueError(f"Fase de liquidación no reconocida: {phase}")
+
+        result["shard"] = shard["index"]
+        result["seconds"] = time.perf_counter() - started
+        return result
+
+    @classmethod
+    def merge_phase_results(cls, phase: str, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Merge determinista de los shards de una fase.
+        Principio KISS: Cada receptor está en un solo shard; los totales se suman
+        con math.fsum (redondeo exacto, no depende del orden ni del número de shards).
+        """
+        results = sorted(results, key=lambda result: result["shard"])
+        shard_seconds = [result["seconds"] for result in results]
+
+        if phase == "deposit":
+            return {
+                "deposited_count": sum(result["deposited_count"] for result in results),
+                "failed_count": sum(result["failed_count"] for result in results),
+                "deposited_total": math.fsum(result["deposited_total"] for result in results),
+                "shard_seconds": shard_seconds,
+            }
+
+        by_member = {}
+        for result in results:
+            by_member.update(result["by_member"])
+        by_member = dict(sorted(by_member.items()))
+
+        return {
+            "commissions": sum(result["commissions"] for result in results),
+            "members": len(by_member),
+            "total_amount": math.fsum(by_member.values()),
+            "by_member": by_member,
+            "shard_seconds": shard_seconds,
+        }
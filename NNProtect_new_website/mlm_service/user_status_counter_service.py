@@ -0,0 +1,198 @@
+"""
+Contadores materializados de usuarios por status.
+
+El dashboard muestra cuántos usuarios están calificados / no calificados en
+cada carga de página; contar users en cada render es un recorrido completo de
+la tabla para un dato global. En su lugar se mantiene userstatuscounters:
+- altas, bajas y cambios de status vía ORM ajustan el contador en la misma
+  transacción (eventos de mapper de Users); la fila del contador queda
+  bloqueada hasta el commit, así que esas transacciones se serializan por status
+- el reseteo masivo (PeriodResetService.bulk_reset_users) ajusta el contador
+  con el conteo por status del rango que va a resetear
+- la migración inicializa la tabla; rebuild() la reconstruye (reparación
+  desde admin). La lectura nunca escribe: si falta algún status, cuenta users
+  en memoria con un GROUP BY y avisa que hay que reconstruir
+
+La lectura se sirve desde un ProcessCache (utils/process_cache.py) con
+vigencia MAX_AGE_SECONDS (cambios de otros procesos); los cambios hechos en
+este proceso lo invalidan según la regla común.
+
+Principios aplicados: KISS, POO
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import sqlmodel
+from sqlalchemy import event, inspect as sa_inspect
+from sqlalchemy.orm import object_session
+
+from database.users import Users, UserStatus
+from database.user_status_counters import UserStatusCounters
+from ..utils.process_cache import ProcessCache
+
+
+def _status_value(status) -> Optional[str]:
+    """Status como texto (el ORM puede tener el Enum o el valor)."""
+    return status.value if isinstance(status, UserStatus) else status
+
+
+class UserStatusCounterService:
+    """
+    Servicio POO para los contadores de usuarios por status.
+    Principio POO: Encapsula mantenimiento, reconstrucción y cache de lectura.
+    """
+
+    MAX_AGE_SECONDS = 30
+
+    _cache = ProcessCache(
+        "user_status_counters",
+        load=lambda session: UserStatusCounterService.load_counts(session),
+        is_expired=lambda counts, age_seconds: age_seconds > UserStatusCounterService.MAX_AGE_SECONDS,
+    )
+
+    @classmethod
+    def get_counts(cls, session) -> Dict[str, int]:
+        """
+        Usuarios por status (sin tocar users en estado estable). Solo lectura.
+
+        Args:
+            session: Sesión de base de datos (solo se usa al recargar)
+
+        Returns:
+            Dict status → cantidad, con todos los valores de UserStatus
+        """
+        return cls._cache.get(session)
+
+    @classmethod
+    def load_counts(cls, session) -> Dict[str, int]:
+        """Lee userstatuscounters (GROUP BY sobre users si falta algún status)."""
+        rows = session.exec(
+            sqlmodel.select(UserStatusCounters.status, UserStatusCounters.user_count)
+        ).all()
+        counts = {status: user_count for status, user_count in rows}
+
+        if any(status.value not in counts for status in UserStatus):
+            print("⚠️  userstatuscounters incompleta: conteo desde users (ejecutar UserStatusCounterService.rebuild)")
+            counts = cls.count_users(session)
+        return counts
+
+    @staticmethod
+    def count_users(session) -> Dict[str, int]:
+        """Conteo por status directo de users (un GROUP BY, sin escribir)."""
+        rows = session.exec(
+            sqlmodel.select(Users.status, sqlmodel.func.count(Users.id)).group_by(Users.status)
+        ).all()
+
+        counts = {status.value: 0 for status in UserStatus}
+        for status, user_count in rows:
+            counts[_status_value(status)] = user_count
+        return counts
+
+    @classmethod
+    def rebuild(cls, session) -> Dict[str, int]:
+        """
+        Recalcula los contadores desde users (DELETE + INSERT).
+        Reparación desde admin; el llamador hace commit.
+
+        Returns:
+            Dict status → cantidad recalculado
+        """
+        counts = cls.count_users(session)
+
+        now = datetime.now(timezone.utc)
+        session.execute(sqlmodel.delete(UserStatusCounters))
+        session.execute(
+            sqlmodel.insert(UserStatusCounters),
+            [{"status": status, "user_count": user_count, "updated_at": now} for status, user_count in counts.items()]
+        )
+        cls._cache.mark_dirty(session)
+
+        print(f"📊 Contadores de status reconstruidos: {counts}")
+        return counts
+
+    @classmethod
+    def record_bulk_status_change(cls, session, where_clause, new_status: UserStatus) -> None:
+        """
+        Ajusta los contadores para un UPDATE masivo de status (sin eventos ORM).
+        Debe llamarse ANTES del UPDATE: cuenta por status los usuarios de where_clause.
+
+        Args:
+            session: Sesión de base de datos (transacción del UPDATE)
+            where_clause: Filtro de users del UPDATE (ej. rango de member_id)
+            new_status: Status que recibirán
+        """
+        rows = session.exec(
+            sqlmodel.select(Users.status, sqlmodel.func.count(Users.id))
+            .where(where_clause)
+            .group_by(Users.status)
+        ).all()
+
+        new_value = _status_value(new_status)
+        deltas: Dict[str, int] = {}
+        for status, user_count in rows:
+            old_value = _status_value(status)
+            if old_value != new_value:
+                deltas[old_value] = deltas.get(old_value, 0) - user_count
+                deltas[new_value] = deltas.get(new_value, 0) + user_count
+
+        cls.apply_deltas(session.connection(), deltas)
+        cls._cache.mark_dirty(session)
+
+    @staticmethod
+    def apply_deltas(connection, deltas: Dict[str, int]) -> None:
+        """
+        UPDATE user_count = user_count + delta por status (atómico en BD).
+
+        Cada alta o cambio de status de Users toma el lock de fila de uno de
+        estos contadores y lo conserva hasta el commit. Las filas se actualizan
+        siempre en el mismo orden (por status) para que dos transacciones con
+        transiciones opuestas (ej. QUALIFIED → NO_QUALIFIED y al revés) no
+        queden en deadlock.
+        """
+        table = UserStatusCounters.__table__
+        now = datetime.now(timezone.utc)
+        for status, delta in sorted(deltas.items()):
+            if delta:
+                connection.execute(
+                    table.update()
+                    .where(table.c.status == status)
+                    .values(user_count=table.c.user_count + delta, updated_at=now)
+                )
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Descarta los conteos cacheados del proceso."""
+        cls._cache.invalidate()
+
+
+def _apply_user_delta(connection, target, deltas: Dict[str, int]) -> None:
+    UserStatusCounterService.apply_deltas(connection, deltas)
+    UserStatusCounterService._cache.mark_dirty(object_session(target))
+
+
+@event.listens_for(Users, "after_insert")
+def _count_inserted_user(mapper, connection, target) -> None:
+    _apply_user_delta(connection, target, {_status_value(target.status): 1})
+
+
+@event.listens_for(Users, "after_delete")
+def _count_deleted_user(mapper, connection, target) -> None:
+    _apply_user_delta(connection, target, {_status_value(target.status): -1})
+
+
+@event.listens_for(Users.status, "set", active_history=True)
+def _load_previous_status(target, value, oldvalue, initiator):
+    """active_history: el status anterior se carga aunque estuviera expirado."""
+
+
+@event.listens_for(Users, "after_update")
+def _count_status_change(mapper, connection, target) -> None:
+    history = sa_inspect(target).attrs.status.history
+    if not history.has_changes() or not history.deleted:
+        return
+
+    old_value = _status_value(history.deleted[0])
+    new_value = _status_value(target.status)
+    if old_value != new_value:
+        _apply_user_delta(connection, target, {old_value: -1, new_value: 1})
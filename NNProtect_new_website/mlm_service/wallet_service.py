@@ -8,7 +8,7 @@ CRÍTICO: Todas las operaciones son atómicas (todo o nada)
 
 import sqlmodel
 import uuid
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from datetime import datetime, timezone
 
 from database.wallet import (
@@ -24,6 +24,9 @@ class WalletService:
     Principio POO: Encapsula toda la lógica de negocio de wallet.
     """
 
+    # Filas por lote en la liquidación masiva de comisiones
+    SETTLEMENT_CHUNK_SIZE = 5000
+
     @classmethod
     def create_wallet(cls, session, member_id: int, currency: str) -> Optional[int]:
         """
@@ -180,6 +183,162 @@ class WalletService:
             traceback.print_exc()
             return False
 
+    @classmethod
+    def settle_pending_commissions(
+        cls,
+        session,
+        period_id: int,
+        chunk_size: Optional[int] = None,
+        member_id_range: Optional[Tuple[int, int]] = None,
+        member_ids=None
+    ) -> Dict[str, Any]:
+        """
+        Deposita en bloque todas las comisiones PENDING de un período.
+        Principio KISS: Tres sentencias de escritura sin importar el volumen:
+        1. INSERT multi-fila de WalletTransactions (una por comisión, con commission_id)
+        2. UPDATE wallets ... FROM (suma por member_id y moneda)
+        3. UPDATE commissions SET status = PAID
+
+        Solo se liquidan comisiones con wallet ACTIVA en la misma moneda; el resto
+        queda PENDING y se reporta como fallida (igual que deposit_commission).
+
+        Args:
+            session: Sesión de base de datos
+            period_id: ID del período
+            chunk_size: Filas por lote al leer comisiones e insertar transacciones
+            member_id_range: (después_de, hasta] para liquidar por lotes de miembros
+            member_ids: Lista o subquery de member_id a liquidar (None = todos)
+
+        Returns:
+            Dict con deposited_count, deposited_total y failed_count
+        """
+        chunk_size = chunk_size or cls.SETTLEMENT_CHUNK_SIZE
+        now = datetime.now(timezone.utc)
+
+        # Comisiones liquidables: PENDING del período con wallet activa en su moneda
+        pending = (
+            (Commissions.period_id == period_id) &
+            (Commissions.status == CommissionStatus.PENDING.value)
+        )
+        if member_id_range is not None:
+            after_member_id, last_member_id = member_id_range
+            pending = pending & (Commissions.member_id > after_member_id) & (Commissions.member_id <= last_member_id)
+        if member_ids is not None:
+            pending = pending & Commissions.member_id.in_(member_ids)
+        wallet_match = (
+            (Wallets.member_id == Commissions.member_id) &
+            (Wallets.currency == Commissions.currency_destination) &
+            (Wallets.status == WalletStatus.ACTIVE.value)
+        )
+        settleable = pending & (
+            sqlmodel.select(Wallets.id).where(wallet_match).correlate(Commissions).exists()
+        )
+
+        pending_count = session.exec(
+            sqlmodel.select(sqlmodel.func.count(Commissions.id)).where(pending)
+        ).one()
+
+        # 1. Transacciones con balance_before/after corrido por miembro (orden por comisión)
+        result = session.execute(
+            sqlmodel.select(
+                Commissions.id,
+                Commissions.member_id,
+                Commissions.amount_converted,
+                Commissions.currency_destination,
+                Commissions.notes,
+                Wallets.balance
+            )
+            .join(Wallets, wallet_match)
+            .where(pending)
+            .order_by(Commissions.member_id, Commissions.id),
+            execution_options={"yield_per": chunk_size}
+        )
+
+        deposited_count = 0
+        deposited_total = 0.0
+        deposited_members = set()
+        running_member_id = None
+        running_balance = 0.0
+
+        for partition in result.partitions():
+            transactions = []
+
+            for commission_id, member_id, amount, currency, notes, wallet_balance in partition:
+                if member_id != running_member_id:
+                    running_member_id = member_id
+                    running_balance = wallet_balance
+
+                transactions.append({
+                    "transaction_uuid": str(uuid.uuid4()),
+                    "member_id": member_id,
+                    "transaction_type": WalletTransactionType.COMMISSION_DEPOSIT.value,
+                    "status": WalletTransactionStatus.COMPLETED.value,
+                    "amount": amount,
+                    "balance_before": running_balance,
+                    "balance_after": running_balance + amount,
+                    "currency": currency,
+                    "commission_id": commission_id,
+                    "description": notes or f"Depósito de comisión #{commission_id}",
+                    "created_at": now,
+                    "completed_at": now,
+                })
+                running_balance += amount
+                deposited_total += amount
+                deposited_members.add(member_id)
+
+            session.execute(sqlmodel.insert(WalletTransactions), transactions)
+            deposited_count += len(transactions)
+
+        if deposited_count:
+            # Pasos 2 y 3 solo sobre lo escrito en el paso 1: una comisión PENDING
+            # confirmada después del SELECT no tiene transacción y no se toca
+            deposited = pending & Commissions.id.in_(
+                sqlmodel.select(WalletTransactions.commission_id).where(
+                    WalletTransactions.transaction_type == WalletTransactionType.COMMISSION_DEPOSIT.value
+                )
+            )
+
+            # 2. Incrementar balances con un solo UPDATE ... FROM (agregado)
+            totals = (
+                sqlmodel.select(
+                    Commissions.member_id.label("member_id"),
+                    Commissions.currency_destination.label("currency"),
+                    sqlmodel.func.sum(Commissions.amount_converted).label("total")
+                )
+                .where(deposited)
+                .group_by(Commissions.member_id, Commissions.currency_destination)
+                .subquery()
+            )
+            session.execute(
+                sqlmodel.update(Wallets)
+                .where(
+                    (Wallets.member_id == totals.c.member_id) &
+                    (Wallets.currency == totals.c.currency)
+                )
+                .values(balance=Wallets.balance + totals.c.total, updated_at=now)
+                .execution_options(synchronize_session=False, profile_cache_members=deposited_members)
+            )
+
+            # 3. Marcar comisiones como pagadas con un solo UPDATE
+            session.execute(
+                sqlmodel.update(Commissions)
+                .where(deposited)
+                .values(status=CommissionStatus.PAID.value, paid_at=now)
+                .execution_options(synchronize_session=False)
+            )
+
+            # Los objetos Wallets/Commissions ya cargados en la sesión quedan obsoletos
+            session.expire_all()
+
+        failed_count = pending_count - deposited_count
+        print(f"✅ {deposited_count} comisiones depositadas en bloque (${deposited_total:.2f}), {failed_count} fallidas")
+
+        return {
+            "deposited_count": deposited_count,
+            "deposited_total": deposited_total,
+            "failed_count": failed_count,
+        }
+
     @classmethod
     def pay_order_with_wallet(
         cls,
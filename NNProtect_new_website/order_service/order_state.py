@@ -17,6 +17,9 @@ from database.users import Users
 from database.addresses import Addresses
 from database.users_addresses import UserAddresses
 
+# Async DB access
+from ..utils.async_db import AsyncDB
+
 # Timezone utilities
 from ..utils.timezone_mx import format_mexico_date, convert_to_mexico_time
 
@@ -327,44 +330,14 @@ class OrderState(rx.State):
 
             print(f"🔍 Cargando órdenes para member_id: {member_id}")
 
-            # 2. Query a la base de datos
-            with rx.session() as session:
-                # Query principal: obtener órdenes del usuario
-                # Solo órdenes que NO están en estado DRAFT (carritos)
-                orders_query = select(Orders).where(
-                    and_(
-                        Orders.member_id == member_id,
-                        Orders.status != OrderStatus.DRAFT.value
-                    )
-                ).order_by(desc(Orders.payment_confirmed_at))
-
-                db_orders = session.exec(orders_query).all()
-
-                if not db_orders:
-                    print(f"ℹ️ No se encontraron órdenes para member_id: {member_id}")
-                    self.all_orders = []
-                    self.is_loading = False
-                    return
-
-                print(f"✅ Se encontraron {len(db_orders)} órdenes")
-
-                # 3. Formatear cada orden
-                formatted_orders = []
-
-                for order in db_orders:
-                    try:
-                        formatted_order = self._format_order_for_ui(order, session)
-                        if formatted_order:
-                            formatted_orders.append(formatted_order)
-                    except Exception as e:
-                        print(f"⚠️ Error formateando orden {order.id}: {e}")
-                        import traceback
-                        traceback.print_exc()
-                        continue
-
-                # 4. Actualizar estado
-                self.all_orders = formatted_orders
-                print(f"✅ {len(formatted_orders)} órdenes formateadas correctamente")
+            # 2-3. Query y formato en el pool de BD (no bloquea el event loop)
+            formatted_orders = await AsyncDB.run_in_session(
+                self._query_formatted_orders, member_id, label="orders.load_orders"
+            )
+
+            # 4. Actualizar estado
+            self.all_orders = formatted_orders
+            print(f"✅ {len(formatted_orders)} órdenes formateadas correctamente")
 
         except Exception as e:
             print(f"❌ Error cargando órdenes: {e}")
@@ -375,6 +348,51 @@ class OrderState(rx.State):
         finally:
             self.is_loading = False
 
+    def _query_formatted_orders(self, session, member_id: int) -> List[Dict]:
+        """
+        Órdenes del usuario (sin DRAFT) ya formateadas para el UI.
+        Solo lee de BD: no modifica el estado (corre en el pool de AsyncDB).
+
+        Args:
+            session: Sesión de base de datos activa
+            member_id: ID del miembro
+
+        Returns:
+            Lista de órdenes formateadas (vacía si no tiene)
+        """
+        # Query principal: obtener órdenes del usuario
+        # Solo órdenes que NO están en estado DRAFT (carritos)
+        orders_query = select(Orders).where(
+            and_(
+                Orders.member_id == member_id,
+                Orders.status != OrderStatus.DRAFT.value
+            )
+        ).order_by(desc(Orders.payment_confirmed_at))
+
+        db_orders = session.exec(orders_query).all()
+
+        if not db_orders:
+            print(f"ℹ️ No se encontraron órdenes para member_id: {member_id}")
+            return []
+
+        print(f"✅ Se encontraron {len(db_orders)} órdenes")
+
+        # Formatear cada orden
+        formatted_orders = []
+
+        for order in db_orders:
+            try:
+                formatted_order = self._format_order_for_ui(order, session)
+                if formatted_order:
+                    formatted_orders.append(formatted_order)
+            except Exception as e:
+                print(f"⚠️ Error formateando orden {order.id}: {e}")
+                import traceback
+                traceback.print_exc()
+                continue
+
+        return formatted_orders
+
     def _format_order_for_ui(self, order: Orders, session) -> Optional[Dict]:
         """
         Formatea una orden de la base de datos al formato requerido por el UI.
@@ -6,6 +6,7 @@ import reflex as rx
 from typing import List, Dict, Optional, Any
 from datetime import datetime, timezone
 from .order_service import OrderService
+from ..utils.async_db import AsyncDB
 
 
 class OrdersState(rx.State):
@@ -85,7 +86,7 @@ class OrdersState(rx.State):
         return min(max_item, self.total_orders)
 
     @rx.event
-    def on_load(self):
+    async def on_load(self):
         """
         Evento que se ejecuta al cargar la página.
         Carga las órdenes del usuario automáticamente.
@@ -95,10 +96,10 @@ class OrdersState(rx.State):
         if self.user_member_id is None:
             self.user_member_id = 1  # Usuario de prueba
 
-        self.load_orders()
+        await self.load_orders()
 
     @rx.event
-    def load_orders(self):
+    async def load_orders(self):
         """
         Carga todas las órdenes del usuario desde la base de datos.
         """
@@ -111,7 +112,7 @@ class OrdersState(rx.State):
 
         try:
             # Cargar órdenes usando el servicio
-            self._orders = OrderService.get_user_orders(self.user_member_id)
+            self._orders = await AsyncDB.run(OrderService.get_user_orders, self.user_member_id, label="orders.user_orders")
             self._orders_loaded = True
             self.total_orders = len(self._orders)
 
@@ -283,7 +284,7 @@ class OrderDetailState(rx.State):
 
         try:
             # Cargar orden completa con items
-            result = OrderService.get_order_details(order_id)
+            result = await AsyncDB.run(OrderService.get_order_details, order_id, label="orders.order_details")
 
             if result:
                 self.order_data = result["order"]
@@ -6,8 +6,10 @@ Este módulo maneja toda la funcionalidad de procesamiento de pagos:
 - Integración con Stripe
 - Procesamiento de transacciones
 - Webhooks de confirmación de pagos
+- Outbox de efectos posteriores al pago (PV, rangos y comisiones)
 """
 
 from .payment_service import PaymentService
+from .payment_outbox_service import PaymentOutboxService
 
-__all__ = ["PaymentService"]
\ No newline at end of file
+__all__ = ["PaymentService", "PaymentOutboxService"]
\ No newline at end of file
@@ -0,0 +1,254 @@
+"""
+Servicio POO para el outbox de efectos posteriores al pago.
+El pago registra un evento por etapa (PV/PVG, unilevel_report, rango y
+comisiones) en su misma transacción; el worker los aplica después con
+reintentos, sin alargar la respuesta al usuario.
+
+Principios aplicados: KISS, DRY, POO
+"""
+
+import sqlmodel
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import aliased
+
+from database.orders import Orders
+from database.payment_outbox import PaymentOutbox, OutboxStage, OutboxStatus
+from ..mlm_service.pv_update_service import PVUpdateService
+from ..mlm_service.rank_service import RankService
+from ..mlm_service.commission_service import CommissionService
+
+
+class PaymentOutboxService:
+    """
+    Servicio POO para encolar y aplicar los efectos posteriores al pago.
+    Principio POO: Encapsula encolado, reclamo de eventos, reintentos y métricas.
+
+    Cada (order_id, stage) se aplica una sola vez: el evento se bloquea, la
+    etapa corre en un SAVEPOINT y el evento queda COMPLETED en el mismo commit.
+    Las etapas de una orden se aplican en orden; si una falla, las siguientes
+    esperan a su reintento.
+    """
+
+    STAGES = list(OutboxStage)
+
+    BATCH_SIZE = 100            # Eventos por ciclo del worker
+    POLL_SECONDS = 5            # Intervalo del worker (SchedulerService)
+    MAX_ATTEMPTS = 5            # Después queda FAILED
+    RETRY_BASE_SECONDS = 30     # Backoff exponencial: 30s, 60s, 120s, ...
+    METRICS_WINDOW = 1000       # Eventos recientes para el lag promedio
+
+    @classmethod
+    def enqueue_order(cls, session, order_id: int) -> int:
+        """
+        Registra los eventos de todas las etapas de la orden (sin commit).
+        Idempotente: las etapas ya registradas se omiten.
+
+        Args:
+            session: Sesión de base de datos (la del pago)
+            order_id: ID de la orden pagada
+
+        Returns:
+            Número de eventos nuevos
+        """
+        existing = set(session.exec(
+            sqlmodel.select(PaymentOutbox.stage).where(PaymentOutbox.order_id == order_id)
+        ).all())
+
+        now = datetime.now(timezone.utc)
+        events = [
+            PaymentOutbox(order_id=order_id, stage=stage.value, sequence=sequence, created_at=now, available_at=now)
+            for sequence, stage in enumerate(cls.STAGES)
+            if stage.value not in existing
+        ]
+
+        session.add_all(events)
+        session.flush()
+
+        print(f"📨 Outbox: {len(events)} etapas encoladas para orden {order_id}")
+        return len(events)
+
+    @classmethod
+    def process_pending(cls, session, batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Aplica un lote de eventos pendientes (commit por evento).
+
+        Args:
+            session: Sesión de base de datos
+            batch_size: Eventos a reclamar (default BATCH_SIZE)
+
+        Returns:
+            Dict con completed, retried, failed, skipped y max_lag_seconds del lote
+        """
+        summary = {"completed": 0, "retried": 0, "failed": 0, "skipped": 0, "max_lag_seconds": 0.0}
+        blocked_orders = set()
+
+        for event_id, order_id in cls._claim_batch(session, batch_size or cls.BATCH_SIZE):
+            if order_id in blocked_orders:
+                summary["skipped"] += 1
+                continue
+
+            # Bloqueo del evento: si otro worker lo tiene o ya no está pendiente, se omite
+            event = session.exec(
+                sqlmodel.select(PaymentOutbox)
+                .where((PaymentOutbox.id == event_id) & (PaymentOutbox.status == OutboxStatus.PENDING.value))
+                .with_for_update(skip_locked=True)
+            ).first()
+
+            if not event:
+                blocked_orders.add(order_id)
+                summary["skipped"] += 1
+                continue
+
+            event.attempts += 1
+
+            try:
+                with session.begin_nested():
+                    order = session.get(Orders, event.order_id)
+                    getattr(cls, f"_stage_{event.stage}")(session, order)
+
+                event.status = OutboxStatus.COMPLETED.value
+                event.processed_at = datetime.now(timezone.utc)
+                event.last_error = None
+                summary["completed"] += 1
+                summary["max_lag_seconds"] = max(summary["max_lag_seconds"], event.lag_seconds)
+
+            except Exception as e:
+                blocked_orders.add(order_id)
+                event.last_error = str(e)[:500]
+
+                if event.attempts >= cls.MAX_ATTEMPTS:
+                    event.status = OutboxStatus.FAILED.value
+                    summary["failed"] += 1
+                    print(f"❌ Outbox: etapa {event.stage} de orden {order_id} agotó {event.attempts} intentos: {e}")
+                else:
+                    delay = cls.RETRY_BASE_SECONDS * 2 ** (event.attempts - 1)
+                    event.available_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+                    summary["retried"] += 1
+                    print(f"⚠️  Outbox: etapa {event.stage} de orden {order_id} falló (intento {event.attempts}), reintento en {delay}s: {e}")
+
+            session.add(event)
+            session.commit()
+
+        return summary
+
+    @classmethod
+    def get_metrics(cls, session) -> Dict[str, Any]:
+        """
+        Métricas del outbox: backlog por estado y lag (pago → aplicación).
+
+        Returns:
+            Dict con pending, failed, oldest_pending_seconds, avg_lag_seconds y max_lag_seconds
+        """
+        counts = dict(session.exec(
+            sqlmodel.select(PaymentOutbox.status, sqlmodel.func.count())
+            .where(PaymentOutbox.status != OutboxStatus.COMPLETED.value)
+            .group_by(PaymentOutbox.status)
+        ).all())
+
+        oldest_pending = session.exec(
+            sqlmodel.select(sqlmodel.func.min(PaymentOutbox.created_at))
+            .where(PaymentOutbox.status == OutboxStatus.PENDING.value)
+        ).one()
+
+        recent = session.exec(
+            sqlmodel.select(PaymentOutbox.created_at, PaymentOutbox.processed_at)
+            .where(PaymentOutbox.status == OutboxStatus.COMPLETED.value)
+            .order_by(PaymentOutbox.processed_at.desc())
+            .limit(cls.METRICS_WINDOW)
+        ).all()
+        lags = [(processed_at - created_at).total_seconds() for created_at, processed_at in recent]
+
+        return {
+            "pending": counts.get(OutboxStatus.PENDING.value, 0),
+            "failed": counts.get(OutboxStatus.FAILED.value, 0),
+            "oldest_pending_seconds": (
+                (datetime.now(timezone.utc) - cls._as_utc(oldest_pending)).total_seconds()
+                if oldest_pending else 0.0
+            ),
+            "avg_lag_seconds": sum(lags) / len(lags) if lags else 0.0,
+            "max_lag_seconds": max(lags, default=0.0),
+        }
+
+    @classmethod
+    def _claim_batch(cls, session, batch_size: int) -> List[tuple]:
+        """
+        (id, order_id) de eventos listos, en orden de pago y etapa.
+        Excluye etapas cuya etapa previa falló o espera su reintento.
+        """
+        now = datetime.now(timezone.utc)
+        previous = aliased(PaymentOutbox)
+
+        blocked_by_previous = (
+            sqlmodel.select(previous.id)
+            .where(
+                (previous.order_id == PaymentOutbox.order_id) &
+                (previous.sequence < PaymentOutbox.sequence) &
+                (
+                    (previous.status == OutboxStatus.FAILED.value) |
+                    ((previous.status == OutboxStatus.PENDING.value) & (previous.available_at > now))
+                )
+            )
+            .exists()
+        )
+
+        return session.exec(
+            sqlmodel.select(PaymentOutbox.id, PaymentOutbox.order_id)
+            .where(
+                (PaymentOutbox.status == OutboxStatus.PENDING.value) &
+                (PaymentOutbox.available_at <= now) &
+                ~blocked_by_previous
+            )
+            .order_by(PaymentOutbox.created_at, PaymentOutbox.order_id, PaymentOutbox.sequence)
+            .limit(batch_size)
+        ).all()
+
+    @staticmethod
+    def _as_utc(value: datetime) -> datetime:
+        """Fechas leídas de BD vienen sin tzinfo (UTC puro)."""
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+    # ==================== ETAPAS ====================
+
+    @classmethod
+    def _stage_pv_update(cls, session, order: Orders) -> None:
+        """PV del comprador y PVG de su línea ascendente."""
+        if not PVUpdateService.apply_order_pv(session, order):
+            raise ValueError(f"Comprador {order.member_id} no encontrado")
+
+    @classmethod
+    def _stage_unilevel_report(cls, session, order: Orders) -> None:
+        """Delta de la orden en unilevel_report del comprador y ancestros."""
+        from ..mlm_service.mlm_user_manager import MLMUserManager
+        MLMUserManager.apply_order_to_unilevel_report(session, order)
+
+    @classmethod
+    def _stage_rank_check(cls, session, order: Orders) -> None:
+        """Promociones de rango del comprador y su línea ascendente con su PV/PVG actual."""
+        promotions = RankService.evaluate_upline_ranks(session, order.member_id)
+
+        if promotions:
+            print(f"🎖️  Rangos actualizados para {len(promotions)} miembros de la línea de member_id={order.member_id}")
+
+    @classmethod
+    def _stage_direct_bonus(cls, session, order: Orders) -> None:
+        """Bono Directo (25% del VN)."""
+        if order.total_vn > 0:
+            CommissionService._apply_direct_bonus(session, order.member_id, order.id, order.total_vn)
+
+    @classmethod
+    def _stage_fast_start_bonus(cls, session, order: Orders) -> None:
+        """Bono Rápido (solo órdenes con kits)."""
+        CommissionService._apply_fast_start_bonus(session, order.id)
+
+    @classmethod
+    def _stage_unilevel_bonus(cls, session, order: Orders) -> None:
+        """Bono Uninivel incremental de la línea ascendente."""
+        from .payment_service import PaymentService
+        PaymentService._apply_unilevel_for_ancestors(session, order)
+
+    @classmethod
+    def _stage_matching_bonus(cls, session, order: Orders) -> None:
+        """Bono Matching incremental (después del Uninivel, del que depende)."""
+        from .payment_service import PaymentService
+        PaymentService._apply_matching_for_ambassadors(session, order)
@@ -1,10 +1,11 @@
 """
 Servicio POO para procesamiento de pagos.
-Orquesta el flujo completo: pago -> confirmación -> actualización PV -> comisiones.
+Orquesta el flujo de pago: pago -> confirmación -> outbox (PV y comisiones asíncronos).
 
 Principios aplicados: KISS, DRY, YAGNI, POO
 """
 
+import time
 import sqlmodel
 from typing import Optional
 from datetime import datetime, timezone
@@ -12,9 +13,9 @@ from datetime import datetime, timezone
 from database.orders import Orders, OrderStatus
 from database.wallet import Wallets
 from ..mlm_service.wallet_service import WalletService
-from ..mlm_service.pv_update_service import PVUpdateService
 from ..mlm_service.commission_service import CommissionService
-from ..mlm_service.period_service import PeriodService
+from ..mlm_service.period_resolver import PeriodResolver
+from .payment_outbox_service import PaymentOutboxService
 
 
 class PaymentService:
@@ -38,10 +39,10 @@ class PaymentService:
         2. Validar balance de wallet
         3. Debitar monto de wallet
         4. Confirmar pago de orden (cambiar estado + timestamp)
-        5. Actualizar PV del comprador y ancestros
-        6. Disparar cálculo de comisiones
+        5. Encolar en el outbox PV/PVG, unilevel_report, rango y comisiones
+           (PaymentOutboxService los aplica de forma asíncrona, con reintentos)
 
-        Principio: Atomicidad - todo o nada.
+        Principio: Atomicidad - débito, confirmación y outbox: todo o nada.
 
         Args:
             session: Sesión de base de datos
@@ -53,6 +54,7 @@ class PaymentService:
             - success: bool
             - message: str
             - order_id: int (si exitoso)
+            - queued_stages: int (si exitoso) etapas encoladas en el outbox
         """
         try:
             # 1. Validar orden con ROW-LEVEL LOCK (evita double-payment)
@@ -135,29 +137,9 @@ class PaymentService:
             # 4. Confirmar pago de orden
             cls._confirm_order_payment(session, order)
 
-            # 5. Actualizar PV del comprador y ancestros (CRÍTICO)
-            pv_updated = PVUpdateService.process_order_pv_update(session, order_id)
-
-            if not pv_updated:
-                session.rollback()  # ⚠️ Revertir TODO (pago, confirmación, wallet)
-                print(f"❌ Error crítico actualizando PV para orden {order_id}")
-                return {
-                    "success": False,
-                    "message": "Error procesando puntos. Pago no completado. Intente nuevamente."
-                }
-
-            # 6. Disparar cálculo de comisiones
-            try:
-                cls._trigger_commissions(session, order)
-            except Exception as e:
-                session.rollback()  # ⚠️ Revertir TODO si falla comisiones
-                print(f"❌ Error disparando comisiones: {e}")
-                import traceback
-                traceback.print_exc()
-                return {
-                    "success": False,
-                    "message": "Error procesando comisiones. Pago no completado."
-                }
+            # 5. Encolar efectos posteriores (PV/PVG, unilevel_report, rango, comisiones)
+            # en la misma transacción; el worker del outbox los aplica después
+            queued_stages = PaymentOutboxService.enqueue_order(session, order_id)
 
             # Commit final
             session.commit()
@@ -167,7 +149,8 @@ class PaymentService:
             return {
                 "success": True,
                 "message": "Pago procesado exitosamente",
-                "order_id": order_id
+                "order_id": order_id,
+                "queued_stages": queued_stages
             }
 
         except Exception as e:
@@ -193,7 +176,7 @@ class PaymentService:
         """
         try:
             # Obtener período actual
-            current_period = PeriodService.get_current_period(session)
+            current_period = PeriodResolver.get_current(session, open_only=True)
 
             if not current_period:
                 print(f"⚠️  No hay período actual, order.period_id será NULL")
@@ -287,152 +270,26 @@ class PaymentService:
         """
         Calcula el Bono Uninivel INCREMENTALMENTE para los ancestros del comprador.
         
-        ARQUITECTURA OPTIMIZADA (Adrian + Elena + Giovanni):
-        - Calcula comisiones SOLO para los ancestros directos del comprador
+        ARQUITECTURA BATCH:
+        - 1 query: rango del período, nombre de rango y país de TODOS los ancestros
+          (usertreepath × userrankhistory × ranks × users)
+        - Cálculo de todas las comisiones en memoria
+        - 1 INSERT multi-fila con RETURNING de los IDs creados
         - AGREGA comisiones nuevas (no borra las existentes)
-        - Usa el VN de ESTA orden específica
-        - Escalable: O(ancestros) en lugar de O(todos los usuarios)
         
         Flujo:
-        1. Obtener ancestros del comprador con su profundidad
-        2. Para cada ancestro:
-           - Verificar su rango actual
-           - Calcular % según rango y profundidad
-           - Crear comisión Uninivel con VN de esta orden
+        1. lookup:  ancestros con profundidad, rango del período y país
+        2. compute: % según rango y profundidad, monto y moneda por ancestro
+        3. insert:  bulk INSERT ... RETURNING
         
-        Arquitectura: Adrian (Senior Dev) + Elena (Backend) + Giovanni (QA Financial)
+        Los tiempos de cada fase se imprimen por orden.
         
         Args:
             session: Sesión de base de datos
             order: Orden confirmada
         """
         try:
-            from database.comissions import Commissions, BonusType, CommissionStatus
-            from database.usertreepaths import UserTreePath
-            from database.users import Users
-            from database.ranks import Ranks
-            from database.user_rank_history import UserRankHistory
-            from ..mlm_service.exchange_service import ExchangeService
-            
-            # Porcentajes del Bono Uninivel por rango
-            UNILEVEL_BONUS_PERCENTAGES = {
-                "Visionario": [5, 8, 10],
-                "Emprendedor": [5, 8, 10, 10],
-                "Creativo": [5, 8, 10, 10, 5],
-                "Innovador": [5, 8, 10, 10, 5, 4],
-                "Embajador Transformador": [5, 8, 10, 10, 5, 4, 4, 3, 3, 0.5],
-                "Embajador Inspirador": [5, 8, 10, 10, 5, 4, 4, 3, 3, 1.0],
-                "Embajador Consciente": [5, 8, 10, 10, 5, 4, 4, 3, 3, 1.5],
-                "Embajador Solidario": [5, 8, 10, 10, 5, 4, 4, 3, 3, 2.0]
-            }
-            
-            if not order.period_id:
-                print(f"   ⚠️  Orden {order.id} no tiene period_id asignado")
-                return
-            
-            if not order.total_vn or order.total_vn <= 0:
-                print(f"   ⚠️  Orden {order.id} no tiene VN")
-                return
-
-            # 1. Obtener todos los ancestros del comprador con su profundidad
-            ancestor_paths = session.exec(
-                sqlmodel.select(UserTreePath)
-                .where(
-                    (UserTreePath.descendant_id == order.member_id) &
-                    (UserTreePath.depth > 0)
-                )
-                .order_by(UserTreePath.depth)
-            ).all()
-
-            print(f"   📊 Calculando Uninivel para {len(ancestor_paths)} ancestros del comprador...")
-            
-            commissions_created = 0
-
-            for ancestor_path in ancestor_paths:
-                ancestor_id = ancestor_path.ancestor_id
-                depth = ancestor_path.depth
-                
-                # 2. Obtener rango actual del ancestro en este período
-                rank_history = session.exec(
-                    sqlmodel.select(UserRankHistory)
-                    .where(
-                        (UserRankHistory.member_id == ancestor_id) &
-                        (UserRankHistory.period_id == order.period_id)
-                    )
-                    .order_by(sqlmodel.desc(UserRankHistory.rank_id))
-                ).first()
-                
-                if not rank_history:
-                    continue  # Usuario no tiene rango en este período
-                
-                # 3. Obtener información del rango
-                rank = session.exec(
-                    sqlmodel.select(Ranks).where(Ranks.id == rank_history.rank_id)
-                ).first()
-                
-                if not rank:
-                    continue
-                
-                # 4. Obtener porcentajes de Uninivel según rango
-                percentages = UNILEVEL_BONUS_PERCENTAGES.get(rank.name, [])
-                
-                if not percentages:
-                    continue  # Rango sin porcentajes (ej: "Sin rango")
-                
-                # 5. Verificar si este ancestro puede recibir comisión de este nivel
-                if depth > len(percentages) and depth <= 9:
-                    continue  # Fuera del alcance del rango
-                
-                # 6. Obtener porcentaje según profundidad
-                if depth <= 9:
-                    percentage = percentages[depth - 1]
-                elif depth >= 10 and len(percentages) >= 10:
-                    # Nivel 10+ para embajadores
-                    percentage = percentages[9]
-                else:
-                    continue
-                
-                # 7. Calcular comisión para este ancestro
-                commission_amount = order.total_vn * (percentage / 100)
-                
-                # 8. Obtener moneda del ancestro
-                ancestor_user = session.exec(
-                    sqlmodel.select(Users).where(Users.member_id == ancestor_id)
-                ).first()
-                
-                if not ancestor_user:
-                    continue
-                
-                ancestor_currency = ExchangeService.get_country_currency(
-                    ancestor_user.country_cache or "MX"
-                )
-                
-                # 9. Crear comisión Uninivel INCREMENTAL
-                commission = Commissions(
-                    member_id=ancestor_id,
-                    bonus_type=BonusType.BONO_UNINIVEL.value,
-                    source_member_id=order.member_id,
-                    source_order_id=order.id,
-                    period_id=order.period_id,
-                    level_depth=depth if depth <= 10 else 10,
-                    amount_vn=order.total_vn,
-                    currency_origin=order.currency,
-                    amount_converted=commission_amount,
-                    currency_destination=ancestor_currency,
-                    exchange_rate=1.0,
-                    status=CommissionStatus.PENDING.value,
-                    calculated_at=datetime.now(timezone.utc),
-                    notes=f"Uninivel {percentage}% - Nivel {depth} - Orden {order.id} - VN: ${order.total_vn:.2f}"
-                )
-                
-                session.add(commission)
-                commissions_created += 1
-
-            if commissions_created > 0:
-                session.flush()
-                print(f"   ✅ Uninivel: {commissions_created} comisiones creadas incrementalmente")
-            else:
-                print(f"   ℹ️  No se generaron comisiones Uninivel (ancestros sin rango elegible)")
+            cls._apply_unilevel_for_ancestors(session, order)
 
         except Exception as e:
             print(f"   ❌ Error calculando Uninivel incremental: {e}")
@@ -444,6 +301,178 @@ class PaymentService:
             except:
                 pass
 
+    @classmethod
+    def _apply_unilevel_for_ancestors(cls, session, order: Orders) -> list:
+        """
+        Núcleo del Bono Uninivel incremental (lookup, compute, insert).
+        Sin manejo de errores: las excepciones llegan al llamador
+        (_trigger_unilevel_for_ancestors o la etapa del outbox, que reintenta).
+
+        Returns:
+            IDs de las comisiones creadas
+        """
+        if not order.period_id:
+            print(f"   ⚠️  Orden {order.id} no tiene period_id asignado")
+            return []
+        
+        if not order.total_vn or order.total_vn <= 0:
+            print(f"   ⚠️  Orden {order.id} no tiene VN")
+            return []
+
+        # 1. Lookup: un solo query para toda la línea ascendente
+        t_start = time.perf_counter()
+        ancestors = cls._fetch_unilevel_ancestors(session, order)
+        t_lookup = time.perf_counter()
+
+        print(f"   📊 Calculando Uninivel para {len(ancestors)} ancestros con rango en el período...")
+
+        # 2. Compute: filas de comisión en memoria
+        commission_rows = cls._compute_unilevel_commission_rows(order, ancestors)
+        t_compute = time.perf_counter()
+
+        # 3. Insert: un solo INSERT multi-fila con RETURNING
+        commission_ids = CommissionService.bulk_insert_commissions(session, commission_rows)
+        t_insert = time.perf_counter()
+
+        if commission_ids:
+            print(f"   ✅ Uninivel: {len(commission_ids)} comisiones creadas incrementalmente")
+        else:
+            print(f"   ℹ️  No se generaron comisiones Uninivel (ancestros sin rango elegible)")
+
+        print(
+            f"   ⏱️  Uninivel orden {order.id}: "
+            f"lookup={t_lookup - t_start:.4f}s, "
+            f"compute={t_compute - t_lookup:.4f}s, "
+            f"insert={t_insert - t_compute:.4f}s, "
+            f"total={t_insert - t_start:.4f}s"
+        )
+
+        return commission_ids
+
+    @classmethod
+    def _fetch_unilevel_ancestors(cls, session, order: Orders) -> list:
+        """
+        Obtiene en UN query los ancestros del comprador con su profundidad,
+        el nombre de su rango más alto en el período de la orden y su país.
+        Ancestros sin rango en el período quedan fuera (INNER JOIN).
+
+        Equivalente SQL:
+            SELECT utp.ancestor_id, utp.depth, r.name, u.country_cache
+            FROM usertreepath utp
+            JOIN (SELECT member_id, MAX(rank_id) AS rank_id
+                  FROM userrankhistory
+                  WHERE period_id = :period_id
+                    AND member_id IN (ancestros del comprador)
+                  GROUP BY member_id) pr ON pr.member_id = utp.ancestor_id
+            JOIN ranks r ON r.id = pr.rank_id
+            JOIN users u ON u.member_id = utp.ancestor_id
+            WHERE utp.descendant_id = :buyer AND utp.depth > 0
+            ORDER BY utp.depth
+
+        Returns:
+            Lista de filas (ancestor_id, depth, rank_name, country_cache)
+        """
+        from database.usertreepaths import UserTreePath
+        from database.users import Users
+        from database.ranks import Ranks
+        from database.user_rank_history import UserRankHistory
+
+        upline_ids = (
+            sqlmodel.select(UserTreePath.ancestor_id)
+            .where(
+                (UserTreePath.descendant_id == order.member_id) &
+                (UserTreePath.depth > 0)
+            )
+        )
+
+        period_rank = (
+            sqlmodel.select(
+                UserRankHistory.member_id,
+                sqlmodel.func.max(UserRankHistory.rank_id).label("rank_id")
+            )
+            .where(
+                (UserRankHistory.period_id == order.period_id) &
+                (UserRankHistory.member_id.in_(upline_ids))
+            )
+            .group_by(UserRankHistory.member_id)
+            .subquery()
+        )
+
+        return session.exec(
+            sqlmodel.select(
+                UserTreePath.ancestor_id,
+                UserTreePath.depth,
+                Ranks.name.label("rank_name"),
+                Users.country_cache
+            )
+            .join(period_rank, period_rank.c.member_id == UserTreePath.ancestor_id)
+            .join(Ranks, Ranks.id == period_rank.c.rank_id)
+            .join(Users, Users.member_id == UserTreePath.ancestor_id)
+            .where(
+                (UserTreePath.descendant_id == order.member_id) &
+                (UserTreePath.depth > 0)
+            )
+            .order_by(UserTreePath.depth)
+        ).all()
+
+    @classmethod
+    def _compute_unilevel_commission_rows(cls, order: Orders, ancestors: list) -> list:
+        """
+        Calcula en memoria las filas de comisión Uninivel para la orden.
+        Sin acceso a base de datos.
+
+        Reglas (CommissionService.UNILEVEL_BONUS_PERCENTAGES):
+        - Niveles 1-9: porcentaje del nivel si el rango lo alcanza
+        - Nivel 10+: solo rangos Embajador (10 porcentajes)
+
+        Args:
+            order: Orden confirmada
+            ancestors: Filas de _fetch_unilevel_ancestors
+
+        Returns:
+            Lista de dicts listos para INSERT en Commissions
+        """
+        from database.comissions import BonusType, CommissionStatus
+        from ..mlm_service.exchange_service import ExchangeService
+
+        calculated_at = datetime.now(timezone.utc)
+        rows = []
+
+        for ancestor_id, depth, rank_name, country_cache in ancestors:
+            percentages = CommissionService.UNILEVEL_BONUS_PERCENTAGES.get(rank_name, [])
+
+            if not percentages:
+                continue  # Rango sin porcentajes (ej: "Sin rango")
+
+            # Verificar si este ancestro puede recibir comisión de este nivel
+            if depth <= 9:
+                if depth > len(percentages):
+                    continue  # Fuera del alcance del rango
+                percentage = percentages[depth - 1]
+            elif len(percentages) >= 10:
+                percentage = percentages[9]  # Nivel 10+ para embajadores
+            else:
+                continue
+
+            rows.append({
+                "member_id": ancestor_id,
+                "bonus_type": BonusType.BONO_UNINIVEL.value,
+                "source_member_id": order.member_id,
+                "source_order_id": order.id,
+                "period_id": order.period_id,
+                "level_depth": depth if depth <= 10 else 10,
+                "amount_vn": order.total_vn,
+                "currency_origin": order.currency,
+                "amount_converted": order.total_vn * (percentage / 100),
+                "currency_destination": ExchangeService.get_country_currency(country_cache or "MX"),
+                "exchange_rate": 1.0,
+                "status": CommissionStatus.PENDING.value,
+                "calculated_at": calculated_at,
+                "notes": f"Uninivel {percentage}% - Nivel {depth} - Orden {order.id} - VN: ${order.total_vn:.2f}",
+            })
+
+        return rows
+
     @classmethod
     def _trigger_matching_for_ambassadors(cls, session, order: Orders) -> None:
         """
@@ -471,154 +500,167 @@ class PaymentService:
             order: Orden confirmada
         """
         try:
-            from database.comissions import Commissions, BonusType, CommissionStatus
-            from database.usertreepaths import UserTreePath
-            from database.users import Users
-            from database.ranks import Ranks
-            from database.user_rank_history import UserRankHistory
-            from ..mlm_service.exchange_service import ExchangeService
+            cls._apply_matching_for_ambassadors(session, order)
+
+        except Exception as e:
+            print(f"   ❌ Error calculando Matching incremental: {e}")
+            import traceback
+            traceback.print_exc()
+            # Hacer rollback para evitar transacciones inválidas
+            try:
+                session.rollback()
+            except:
+                pass
+
+    @classmethod
+    def _apply_matching_for_ambassadors(cls, session, order: Orders) -> int:
+        """
+        Núcleo del Bono Matching incremental.
+        Sin manejo de errores: las excepciones llegan al llamador
+        (_trigger_matching_for_ambassadors o la etapa del outbox, que reintenta).
+
+        Returns:
+            Número de comisiones Matching creadas
+        """
+        from database.comissions import Commissions, BonusType, CommissionStatus
+        from database.usertreepaths import UserTreePath
+        from database.users import Users
+        from database.user_rank_history import UserRankHistory
+        from ..mlm_service.exchange_service import ExchangeService
+        from ..mlm_service.rank_ladder import RankLadder
+        
+        # Porcentajes del Bono Matching por rango
+        MATCHING_BONUS_PERCENTAGES = {
+            "Embajador Transformador": [30],
+            "Embajador Inspirador": [30, 20],
+            "Embajador Consciente": [30, 20, 10],
+            "Embajador Solidario": [30, 20, 10, 5]
+        }
+        
+        if not order.period_id:
+            print(f"   ⚠️  Orden {order.id} no tiene period_id asignado")
+            return 0
+
+        # 1. Obtener ancestros del comprador que sean embajadores (rank_id >= 6)
+        ancestor_paths = session.exec(
+            sqlmodel.select(UserTreePath)
+            .where(
+                (UserTreePath.descendant_id == order.member_id) &
+                (UserTreePath.depth > 0)
+            )
+        ).all()
+        
+        if not ancestor_paths:
+            print(f"   ℹ️  Comprador no tiene ancestros (usuario raíz)")
+            return 0
+
+        print(f"   📊 Verificando {len(ancestor_paths)} ancestros para Matching...")
+        
+        rank_ladder = RankLadder.get_shared(session)
+        commissions_created = 0
+
+        for ancestor_path in ancestor_paths:
+            ancestor_id = ancestor_path.ancestor_id
             
-            # Porcentajes del Bono Matching por rango
-            MATCHING_BONUS_PERCENTAGES = {
-                "Embajador Transformador": [30],
-                "Embajador Inspirador": [30, 20],
-                "Embajador Consciente": [30, 20, 10],
-                "Embajador Solidario": [30, 20, 10, 5]
-            }
+            # 2. Verificar si el ancestro es embajador (rank_id >= 6)
+            rank_history = session.exec(
+                sqlmodel.select(UserRankHistory)
+                .where(
+                    (UserRankHistory.member_id == ancestor_id) &
+                    (UserRankHistory.period_id == order.period_id)
+                )
+                .order_by(sqlmodel.desc(UserRankHistory.rank_id))
+            ).first()
             
-            if not order.period_id:
-                print(f"   ⚠️  Orden {order.id} no tiene period_id asignado")
-                return
-
-            # 1. Obtener ancestros del comprador que sean embajadores (rank_id >= 6)
-            ancestor_paths = session.exec(
-                sqlmodel.select(UserTreePath)
+            if not rank_history or rank_history.rank_id < 6:
+                continue  # No es embajador
+            
+            # 3. Nombre del rango (escalera en memoria, sin query)
+            rank_name = rank_ladder.name(rank_history.rank_id)
+            
+            if not rank_name:
+                continue
+            
+            # 4. Obtener porcentajes de Matching según rango
+            matching_percentages = MATCHING_BONUS_PERCENTAGES.get(rank_name, [])
+            
+            if not matching_percentages:
+                continue  # Rango sin Matching
+            
+            # 5. Obtener patrocinados DIRECTOS del embajador
+            direct_sponsored = session.exec(
+                sqlmodel.select(UserTreePath.descendant_id)
                 .where(
-                    (UserTreePath.descendant_id == order.member_id) &
-                    (UserTreePath.depth > 0)
+                    (UserTreePath.ancestor_id == ancestor_id) &
+                    (UserTreePath.depth == 1)
                 )
             ).all()
             
-            if not ancestor_paths:
-                print(f"   ℹ️  Comprador no tiene ancestros (usuario raíz)")
-                return
-
-            print(f"   📊 Verificando {len(ancestor_paths)} ancestros para Matching...")
+            if not direct_sponsored:
+                continue
             
-            commissions_created = 0
-
-            for ancestor_path in ancestor_paths:
-                ancestor_id = ancestor_path.ancestor_id
-                
-                # 2. Verificar si el ancestro es embajador (rank_id >= 6)
-                rank_history = session.exec(
-                    sqlmodel.select(UserRankHistory)
+            # 6. Para cada patrocinado directo, buscar sus comisiones Uninivel de ESTA orden
+            for sponsored_id in direct_sponsored:
+                uninivel_commissions = session.exec(
+                    sqlmodel.select(Commissions)
                     .where(
-                        (UserRankHistory.member_id == ancestor_id) &
-                        (UserRankHistory.period_id == order.period_id)
-                    )
-                    .order_by(sqlmodel.desc(UserRankHistory.rank_id))
-                ).first()
-                
-                if not rank_history or rank_history.rank_id < 6:
-                    continue  # No es embajador
-                
-                # 3. Obtener información del rango
-                rank = session.exec(
-                    sqlmodel.select(Ranks).where(Ranks.id == rank_history.rank_id)
-                ).first()
-                
-                if not rank:
-                    continue
-                
-                # 4. Obtener porcentajes de Matching según rango
-                matching_percentages = MATCHING_BONUS_PERCENTAGES.get(rank.name, [])
-                
-                if not matching_percentages:
-                    continue  # Rango sin Matching
-                
-                # 5. Obtener patrocinados DIRECTOS del embajador
-                direct_sponsored = session.exec(
-                    sqlmodel.select(UserTreePath.descendant_id)
-                    .where(
-                        (UserTreePath.ancestor_id == ancestor_id) &
-                        (UserTreePath.depth == 1)
+                        (Commissions.member_id == sponsored_id) &
+                        (Commissions.source_order_id == order.id) &
+                        (Commissions.bonus_type == BonusType.BONO_UNINIVEL.value) &
+                        (Commissions.status == CommissionStatus.PENDING.value)
                     )
                 ).all()
                 
-                if not direct_sponsored:
+                if not uninivel_commissions:
                     continue
                 
-                # 6. Para cada patrocinado directo, buscar sus comisiones Uninivel de ESTA orden
-                for sponsored_id in direct_sponsored:
-                    uninivel_commissions = session.exec(
-                        sqlmodel.select(Commissions)
-                        .where(
-                            (Commissions.member_id == sponsored_id) &
-                            (Commissions.source_order_id == order.id) &
-                            (Commissions.bonus_type == BonusType.BONO_UNINIVEL.value) &
-                            (Commissions.status == CommissionStatus.PENDING.value)
-                        )
-                    ).all()
+                # 7. Calcular Matching: % del Uninivel del patrocinado directo
+                # Nivel 1 de Matching = 30% del Uninivel
+                matching_percentage = matching_percentages[0]  # Primer nivel de Matching
+                
+                for uninivel_comm in uninivel_commissions:
+                    matching_amount = uninivel_comm.amount_converted * (matching_percentage / 100)
+                    
+                    # 8. Obtener moneda del embajador
+                    ancestor_user = session.exec(
+                        sqlmodel.select(Users).where(Users.member_id == ancestor_id)
+                    ).first()
                     
-                    if not uninivel_commissions:
+                    if not ancestor_user:
                         continue
                     
-                    # 7. Calcular Matching: % del Uninivel del patrocinado directo
-                    # Nivel 1 de Matching = 30% del Uninivel
-                    matching_percentage = matching_percentages[0]  # Primer nivel de Matching
+                    ancestor_currency = ExchangeService.get_country_currency(
+                        ancestor_user.country_cache or "MX"
+                    )
                     
-                    for uninivel_comm in uninivel_commissions:
-                        matching_amount = uninivel_comm.amount_converted * (matching_percentage / 100)
-                        
-                        # 8. Obtener moneda del embajador
-                        ancestor_user = session.exec(
-                            sqlmodel.select(Users).where(Users.member_id == ancestor_id)
-                        ).first()
-                        
-                        if not ancestor_user:
-                            continue
-                        
-                        ancestor_currency = ExchangeService.get_country_currency(
-                            ancestor_user.country_cache or "MX"
-                        )
-                        
-                        # 9. Crear comisión Matching INCREMENTAL
-                        matching_commission = Commissions(
-                            member_id=ancestor_id,
-                            bonus_type=BonusType.BONO_MATCHING.value,
-                            source_member_id=sponsored_id,
-                            source_order_id=order.id,
-                            period_id=order.period_id,
-                            level_depth=1,  # Nivel 1 de Matching
-                            amount_vn=uninivel_comm.amount_converted,
-                            currency_origin=uninivel_comm.currency_destination,
-                            amount_converted=matching_amount,
-                            currency_destination=ancestor_currency,
-                            exchange_rate=1.0,
-                            status=CommissionStatus.PENDING.value,
-                            calculated_at=datetime.now(timezone.utc),
-                            notes=f"Matching {matching_percentage}% del Uninivel de {sponsored_id} - Orden {order.id}"
-                        )
-                        
-                        session.add(matching_commission)
-                        commissions_created += 1
-
-            if commissions_created > 0:
-                session.flush()
-                print(f"   ✅ Matching: {commissions_created} comisiones creadas incrementalmente")
-            else:
-                print(f"   ℹ️  No se generaron comisiones Matching (no hay embajadores elegibles)")
+                    # 9. Crear comisión Matching INCREMENTAL
+                    matching_commission = Commissions(
+                        member_id=ancestor_id,
+                        bonus_type=BonusType.BONO_MATCHING.value,
+                        source_member_id=sponsored_id,
+                        source_order_id=order.id,
+                        period_id=order.period_id,
+                        level_depth=1,  # Nivel 1 de Matching
+                        amount_vn=uninivel_comm.amount_converted,
+                        currency_origin=uninivel_comm.currency_destination,
+                        amount_converted=matching_amount,
+                        currency_destination=ancestor_currency,
+                        exchange_rate=1.0,
+                        status=CommissionStatus.PENDING.value,
+                        calculated_at=datetime.now(timezone.utc),
+                        notes=f"Matching {matching_percentage}% del Uninivel de {sponsored_id} - Orden {order.id}"
+                    )
+                    
+                    session.add(matching_commission)
+                    commissions_created += 1
 
-        except Exception as e:
-            print(f"   ❌ Error calculando Matching incremental: {e}")
-            import traceback
-            traceback.print_exc()
-            # Hacer rollback para evitar transacciones inválidas
-            try:
-                session.rollback()
-            except:
-                pass
+        if commissions_created > 0:
+            session.flush()
+            print(f"   ✅ Matching: {commissions_created} comisiones creadas incrementalmente")
+        else:
+            print(f"   ℹ️  No se generaron comisiones Matching (no hay embajadores elegibles)")
+
+        return commissions_created
 
     @classmethod
     def validate_wallet_payment_available(
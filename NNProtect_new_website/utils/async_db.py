@@ -0,0 +1,148 @@
+"""
+Acceso a BD no bloqueante para event handlers de Reflex.
+
+Los handlers async de los States corren en el event loop del worker; una
+query síncrona (rx.session()) ejecutada directamente ahí detiene todos los
+websockets del worker mientras espera a la BD. AsyncDB ejecuta ese trabajo en
+un pool de hilos acotado y devuelve el control al loop:
+- run: cualquier función síncrona de BD (servicios existentes)
+- run_in_session: abre rx.session() en el hilo y llama fn(session, ...)
+- iterate: consume un generador paginado (una página por llamada al pool)
+
+El pool es del tamaño del pool de conexiones persistentes (engine_config:
+pool_size=10) para que los hilos no compitan por conexiones. Cada llamada se
+mide (espera en cola y ejecución) por etiqueta; las lentas se reportan.
+
+Regla: la función que se pasa al pool devuelve datos planos y NO modifica el
+State; las asignaciones al State se hacen en el handler, ya en el loop.
+
+Principios aplicados: KISS, DRY, POO
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+import reflex as rx
+
+
+class AsyncDB:
+    """
+    Capa async de acceso a BD sobre un pool de hilos acotado.
+    Principio POO: Encapsula el pool, la ejecución y las métricas por llamada.
+    """
+
+    MAX_WORKERS = int(os.environ.get("DB_THREAD_POOL_SIZE", "10"))
+
+    # Llamadas que tardan más que esto se reportan en el log
+    SLOW_CALL_SECONDS = 1.0
+
+    _executor: Optional[ThreadPoolExecutor] = None
+    _executor_lock = threading.Lock()
+
+    _stats: Dict[str, Dict[str, float]] = {}
+    _stats_lock = threading.Lock()
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(max_workers=cls.MAX_WORKERS, thread_name_prefix="async-db")
+        return cls._executor
+
+    @classmethod
+    async def run(cls, fn: Callable[..., Any], *args, label: Optional[str] = None, **kwargs) -> Any:
+        """
+        Ejecuta fn(*args, **kwargs) en el pool sin bloquear el event loop.
+
+        Args:
+            fn: Función síncrona (puede abrir su propia sesión)
+            label: Nombre para métricas (default: nombre de la función)
+
+        Returns:
+            Lo que regrese fn (las excepciones se propagan al handler)
+        """
+        label = label or getattr(fn, "__qualname__", repr(fn))
+        context = contextvars.copy_context()
+        submitted_at = time.perf_counter()
+
+        def _timed_call():
+            started_at = time.perf_counter()
+            try:
+                return context.run(fn, *args, **kwargs)
+            finally:
+                cls._record(label, wait=started_at - submitted_at, elapsed=time.perf_counter() - started_at)
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(cls._get_executor(), _timed_call)
+
+    @classmethod
+    async def run_in_session(cls, fn: Callable[..., Any], *args, label: Optional[str] = None, **kwargs) -> Any:
+        """
+        Abre rx.session() en el hilo del pool y ejecuta fn(session, *args, **kwargs).
+
+        Principio DRY: Los loaders solo escriben la consulta, no el manejo de sesión.
+        """
+        def _with_session():
+            with rx.session() as session:
+                return fn(session, *args, **kwargs)
+
+        return await cls.run(_with_session, label=label or getattr(fn, "__qualname__", repr(fn)))
+
+    @classmethod
+    async def iterate(cls, iterator: Iterator[Any], label: Optional[str] = None) -> AsyncIterator[Any]:
+        """
+        Consume un iterador síncrono (ej. páginas de BD) pidiendo cada elemento al pool.
+        Permite seguir haciendo yield al UI página por página; si se deja de
+        consumir antes de terminar, el generador se cierra (libera su sesión).
+        """
+        label = label or "iterate"
+        sentinel = object()
+        try:
+            while True:
+                item = await cls.run(next, iterator, sentinel, label=label)
+                if item is sentinel:
+                    return
+                yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                await cls.run(close, label=label)
+
+    @classmethod
+    def _record(cls, label: str, wait: float, elapsed: float) -> None:
+        with cls._stats_lock:
+            stats = cls._stats.setdefault(
+                label, {"calls": 0, "total_seconds": 0.0, "max_seconds": 0.0, "max_wait_seconds": 0.0}
+            )
+            stats["calls"] += 1
+            stats["total_seconds"] += elapsed
+            stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], wait)
+
+        if elapsed > cls.SLOW_CALL_SECONDS:
+            print(f"🐢 [AsyncDB] {label} tardó {elapsed:.2f}s (espera en cola {wait:.2f}s)")
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Dict[str, float]]:
+        """Métricas por etiqueta: calls, total_seconds, max_seconds, max_wait_seconds."""
+        with cls._stats_lock:
+            return {label: dict(stats) for label, stats in cls._stats.items()}
+
+    @classmethod
+    def reset_stats(cls) -> None:
+        with cls._stats_lock:
+            cls._stats.clear()
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """Cierra el pool (se vuelve a crear en la siguiente llamada)."""
+        with cls._executor_lock:
+            if cls._executor is not None:
+                cls._executor.shutdown(wait=True)
+                cls._executor = None
@@ -0,0 +1,125 @@
+"""
+Caches por proceso con invalidación por transacción.
+
+Períodos vigentes, tasas de cambio, escalera de rangos, contadores por status y
+perfiles de sesión se guardan en memoria porque casi no cambian. Todos siguen
+la misma regla de invalidación:
+- un cambio (evento ORM o DML masivo) invalida en el momento y marca la sesión
+  que lo hizo (session.info[dirty_key])
+- al terminar la transacción raíz de esa sesión (commit, rollback o close) se
+  invalida otra vez: lo que otro hilo cargó mientras seguía abierta era el
+  valor confirmado anterior
+- mientras la sesión está marcada, sus lecturas cargan un valor propio que no
+  se publica al proceso (puede incluir filas que harán rollback)
+- la vigencia (is_expired) acota cuánto tarda otro proceso en ver un cambio
+
+ProcessCache implementa un valor compartido con esta regla; on_transaction_end
+expone solo la parte de sesión para caches con otra forma (ProfileCache).
+
+Principios aplicados: KISS, DRY, POO
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SASession, object_session
+
+
+# dirty_key → callback(valor marcado en session.info)
+_TRANSACTION_END_CALLBACKS: Dict[str, Callable[[Any], None]] = {}
+
+
+def on_transaction_end(dirty_key: str, callback: Callable[[Any], None]) -> None:
+    """
+    Registra callback para las sesiones marcadas con session.info[dirty_key].
+    Al terminar su transacción raíz se retira la marca y se llama callback(marca).
+    """
+    _TRANSACTION_END_CALLBACKS[dirty_key] = callback
+
+
+@event.listens_for(SASession, "after_transaction_end")
+def _run_transaction_end_callbacks(session, transaction) -> None:
+    if transaction.parent is not None:
+        return
+    for dirty_key, callback in _TRANSACTION_END_CALLBACKS.items():
+        dirty = session.info.pop(dirty_key, None)
+        if dirty is not None:
+            callback(dirty)
+
+
+class ProcessCache:
+    """
+    Valor compartido por proceso (snapshot inmutable) con la regla de invalidación del módulo.
+    Principio POO: Encapsula carga, vigencia, versión e invalidación por sesión.
+    """
+
+    def __init__(self, name: str, load: Callable[[Any], Any], is_expired: Callable[[Any, float], bool]):
+        """
+        Args:
+            name: Nombre del cache (prefijo de la marca en session.info)
+            load: load(session) → valor nuevo (una carga desde BD)
+            is_expired: is_expired(valor, segundos desde la carga) → True si hay que recargar
+        """
+        self.dirty_key = f"{name}_dirty"
+        self._load = load
+        self._is_expired = is_expired
+
+        # RLock: un autoflush dentro de load puede invalidar desde el mismo hilo
+        self._lock = threading.RLock()
+        self._entry: Optional[Tuple[Any, float]] = None     # (valor, cargado_en)
+        self._version = 0
+
+        on_transaction_end(self.dirty_key, lambda _dirty: self.invalidate())
+
+    def _fresh(self, entry: Optional[Tuple[Any, float]]) -> bool:
+        return entry is not None and not self._is_expired(entry[0], time.monotonic() - entry[1])
+
+    def get(self, session) -> Any:
+        """Valor compartido; se recarga si fue invalidado o venció. Sesión marcada: valor propio."""
+        if session.info.get(self.dirty_key):
+            return self._load(session)
+
+        entry = self._entry
+        if self._fresh(entry):
+            return entry[0]
+
+        with self._lock:
+            entry = self._entry
+            if self._fresh(entry):
+                return entry[0]
+
+            version = self._version
+            value = self._load(session)
+
+            # Invalidado durante la carga (ej. autoflush de esta sesión): no se publica
+            if self._version == version and not session.info.get(self.dirty_key):
+                self._entry = (value, time.monotonic())
+            return value
+
+    def peek(self) -> Any:
+        """Valor publicado (None si no hay), sin cargar."""
+        entry = self._entry
+        return entry[0] if entry is not None else None
+
+    def invalidate(self) -> None:
+        """Descarta el valor del proceso (sube la versión)."""
+        with self._lock:
+            self._version += 1
+            self._entry = None
+
+    def mark_dirty(self, session) -> None:
+        """Invalida ya y marca la sesión (se invalida otra vez al terminar su transacción)."""
+        if session is not None:
+            session.info[self.dirty_key] = True
+        self.invalidate()
+
+    def track(self, *models) -> None:
+        """Invalida con cada insert / update / delete ORM de los modelos."""
+        def _mark_row(mapper, connection, target) -> None:
+            self.mark_dirty(object_session(target))
+
+        for model in models:
+            for event_name in ("after_insert", "after_update", "after_delete"):
+                event.listen(model, event_name, _mark_row)
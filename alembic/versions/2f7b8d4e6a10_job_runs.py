@@ -0,0 +1,61 @@
+"""jobruns history and joblocks for scheduled jobs
+
+Revision ID: 2f7b8d4e6a10
+Revises: 9d3a6c1e7f25
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f7b8d4e6a10'
+down_revision: Union[str, Sequence[str], None] = '9d3a6c1e7f25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('jobruns',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('worker', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('rows_affected', sa.Integer(), nullable=False),
+    sa.Column('duration_seconds', sa.Float(), nullable=False),
+    sa.Column('error', sqlmodel.sql.sqltypes.AutoString(length=500), nullable=True),
+    sa.Column('started_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('jobruns', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_jobruns_job_id'), ['job_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_jobruns_started_at'), ['started_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_jobruns_status'), ['status'], unique=False)
+
+    op.create_table('joblocks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('owner', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('acquired_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('job_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('joblocks')
+
+    with op.batch_alter_table('jobruns', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_jobruns_status'))
+        batch_op.drop_index(batch_op.f('ix_jobruns_started_at'))
+        batch_op.drop_index(batch_op.f('ix_jobruns_job_id'))
+
+    op.drop_table('jobruns')
@@ -0,0 +1,42 @@
+"""unique unilevelreports (user_id, period_id)
+
+Revision ID: 3f1c9a2b7d10
+Revises: ad8d704c99f5
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a2b7d10'
+down_revision: Union[str, Sequence[str], None] = 'ad8d704c99f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Eliminar duplicados (se conserva el reporte más antiguo); ejecutar
+    # rebuild_unilevel_report.py después para reconciliar los volúmenes.
+    op.execute(
+        """
+        DELETE FROM unilevelreports a
+        USING unilevelreports b
+        WHERE a.user_id = b.user_id
+          AND a.period_id = b.period_id
+          AND a.id > b.id
+        """
+    )
+
+    with op.batch_alter_table('unilevelreports', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_unilevelreports_user_period', ['user_id', 'period_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('unilevelreports', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_unilevelreports_user_period', type_='unique')
@@ -0,0 +1,53 @@
+"""closureruns checkpoint table for the monthly closure
+
+Revision ID: 5b8e2f4c9a71
+Revises: 7c2e4b9d1a36
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e2f4c9a71'
+down_revision: Union[str, Sequence[str], None] = '7c2e4b9d1a36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('closureruns',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('period_id', sa.Integer(), nullable=False),
+    sa.Column('stage', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('checkpoint', sa.Integer(), nullable=False),
+    sa.Column('rows_processed', sa.Integer(), nullable=False),
+    sa.Column('chunks_committed', sa.Integer(), nullable=False),
+    sa.Column('duration_seconds', sa.Float(), nullable=False),
+    sa.Column('metadata_json', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('error', sqlmodel.sql.sqltypes.AutoString(length=500), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['period_id'], ['periods.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('period_id', 'stage', name='uq_closureruns_period_stage')
+    )
+    with op.batch_alter_table('closureruns', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_closureruns_period_id'), ['period_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_closureruns_status'), ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('closureruns', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_closureruns_status'))
+        batch_op.drop_index(batch_op.f('ix_closureruns_period_id'))
+
+    op.drop_table('closureruns')
@@ -0,0 +1,47 @@
+"""userstatuscounters: materialized user counts per status
+
+Revision ID: 6a4d2c8e1b93
+Revises: 2f7b8d4e6a10
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a4d2c8e1b93'
+down_revision: Union[str, Sequence[str], None] = '2f7b8d4e6a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('userstatuscounters',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('user_count', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('status')
+    )
+
+    # Conteo inicial desde users (todos los status, incluso en 0)
+    op.execute(
+        """
+        INSERT INTO userstatuscounters (status, user_count, updated_at)
+        SELECT statuses.status, COUNT(users.id), now()
+        FROM (VALUES ('NO_QUALIFIED'), ('QUALIFIED'), ('SUSPENDED')) AS statuses (status)
+        LEFT JOIN users ON CAST(users.status AS VARCHAR) = statuses.status
+        GROUP BY statuses.status
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('userstatuscounters')
@@ -0,0 +1,30 @@
+"""usertreepath (ancestor_id, depth, descendant_id) index
+
+Revision ID: 7c2e4b9d1a36
+Revises: 3f1c9a2b7d10
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e4b9d1a36'
+down_revision: Union[str, Sequence[str], None] = '3f1c9a2b7d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('usertreepath', schema=None) as batch_op:
+        batch_op.create_index('ix_usertreepath_ancestor_depth_descendant', ['ancestor_id', 'depth', 'descendant_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('usertreepath', schema=None) as batch_op:
+        batch_op.drop_index('ix_usertreepath_ancestor_depth_descendant')
@@ -0,0 +1,32 @@
+"""jobruns.scheduled_for: scheduled fire time of each run
+
+Revision ID: 8e5a1f3c7b24
+Revises: 6a4d2c8e1b93
+Create Date: 2026-10-18 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e5a1f3c7b24'
+down_revision: Union[str, Sequence[str], None] = '6a4d2c8e1b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('jobruns', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('scheduled_for', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_jobruns_scheduled_for'), ['scheduled_for'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('jobruns', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_jobruns_scheduled_for'))
+        batch_op.drop_column('scheduled_for')
@@ -0,0 +1,52 @@
+"""paymentoutbox table for post-payment side effects
+
+Revision ID: 9d3a6c1e7f25
+Revises: 5b8e2f4c9a71
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d3a6c1e7f25'
+down_revision: Union[str, Sequence[str], None] = '5b8e2f4c9a71'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('paymentoutbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('stage', sqlmodel.sql.sqltypes.AutoString(length=30), nullable=False),
+    sa.Column('sequence', sa.Integer(), nullable=False),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sqlmodel.sql.sqltypes.AutoString(length=500), nullable=True),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('available_at', sa.DateTime(), nullable=False),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('order_id', 'stage', name='uq_paymentoutbox_order_stage')
+    )
+    with op.batch_alter_table('paymentoutbox', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_paymentoutbox_available_at'), ['available_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_paymentoutbox_order_id'), ['order_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_paymentoutbox_status'), ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('paymentoutbox', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_paymentoutbox_status'))
+        batch_op.drop_index(batch_op.f('ix_paymentoutbox_order_id'))
+        batch_op.drop_index(batch_op.f('ix_paymentoutbox_available_at'))
+
+    op.drop_table('paymentoutbox')
@@ -2,9 +2,13 @@
 Script para calcular comisiones Uninivel del período actual.
 Las comisiones Uninivel normalmente se calculan al cierre del mes,
 pero este script permite calcularlas antes para ver la proyección.
+
+USO:
+    python calculate_uninivel_now.py              # Calcula y guarda
+    python calculate_uninivel_now.py --dry-run    # Solo muestra totales
 """
 
-def calculate_uninivel_now():
+def calculate_uninivel_now(dry_run: bool = False):
     import reflex as rx
     import sqlmodel
     from database.periods import Periods
@@ -48,42 +52,31 @@ def calculate_uninivel_now():
             print("⚠️  No hay usuarios")
             return
         
-        # 3. Calcular comisiones Uninivel para cada usuario
+        # 3. Liquidar Uninivel de toda la red con una sola agregación
         print(f"\n💰 Calculando comisiones Uninivel...")
-        
-        processed = 0
-        errors = 0
-        total_commissions = 0
-        
-        for user in users:
-            try:
-                # Usar CommissionService.calculate_unilevel_bonus
-                # Este método calcula Uninivel basado en el VN de la red
-                commission_ids = CommissionService.calculate_unilevel_bonus(
-                    session=session,
-                    member_id=user.member_id,
-                    period_id=current_period.id
-                )
-                
-                if commission_ids and len(commission_ids) > 0:
-                    processed += 1
-                    total_commissions += len(commission_ids)
-                    user_name = f"{user.first_name} {user.last_name}" if user.first_name else user.email_cache
-                    print(f"   ✅ {user_name}: {len(commission_ids)} comisiones")
-                
-            except Exception as e:
-                errors += 1
-                user_name = f"{user.first_name} {user.last_name}" if user.first_name else user.email_cache
-                print(f"   ❌ {user_name}: {str(e)}")
-        
+
+        settlement = CommissionService.calculate_unilevel_bonus_for_period(
+            session=session,
+            period_id=current_period.id,
+            member_ids=None,
+            dry_run=dry_run
+        )
+
         # 4. Commit cambios
-        session.commit()
-        
+        if dry_run:
+            print(f"\n🔎 Dry-run: no se escribieron comisiones")
+        else:
+            session.commit()
+
         print(f"\n📊 RESUMEN:")
-        print(f"   Usuarios con comisiones: {processed}/{len(users)}")
-        print(f"   Total comisiones creadas: {total_commissions}")
-        print(f"   Errores: {errors}")
-        
+        print(f"   Usuarios con comisiones: {settlement['members']}/{len(users)}")
+        print(f"   Total comisiones {'calculadas' if dry_run else 'creadas'}: {settlement['commissions']}")
+        print(f"   Total VN: {settlement['total_vn']:,.2f}")
+        print(f"   Total Uninivel: ${settlement['total_amount']:,.2f}")
+
+        if dry_run:
+            return
+
         # 5. Verificar comisiones creadas
         from database.comissions import Commissions, BonusType
         
@@ -120,4 +113,5 @@ def calculate_uninivel_now():
         print(f"\n🎯 Tu comisión Uninivel (member_id=1): ${user_uninivel:,.2f}")
 
 if __name__ == "__main__":
-    calculate_uninivel_now()
+    import sys
+    calculate_uninivel_now(dry_run="--dry-run" in sys.argv)
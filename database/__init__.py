@@ -3,10 +3,13 @@
 # Import all models so they're available for migrations
 from .addresses import Addresses, Countries
 from .auth_credentials import AuthCredentials
+from .closure_runs import ClosureRuns, ClosureStage, ClosureRunStatus
 from .comissions import Commissions
 from .exchange_rates import ExchangeRates
+from .job_runs import JobRuns, JobLocks, JobRunStatus
 from .orders import Orders, OrderStatus
 from .order_items import OrderItems
+from .payment_outbox import PaymentOutbox, OutboxStage, OutboxStatus
 from .periods import Periods
 from .products import Products, ProductType, ProductPresentation
 from .ranks import Ranks
@@ -18,6 +21,7 @@ from .user_rank_history import UserRankHistory
 from .userprofiles import UserProfiles, UserGender
 from .users_addresses import UserAddresses
 from .users import Users, UserStatus
+from .user_status_counters import UserStatusCounters
 from .usertreepaths import UserTreePath
 
 # ✅ Nuevos modelos: Wallet, Cashback, Loyalty y Travel Points
@@ -32,12 +36,14 @@ from .db_init import initialize_database
 __all__ = [
     "Addresses", "Countries",
     "AuthCredentials",
+    "ClosureRuns", "ClosureStage", "ClosureRunStatus",
     "Ranks",
     "Roles",
     "RolesUsers",
     "SocialAccounts", "SocialNetwork",
     "UserProfiles", "UserGender",
     "Users", "UserStatus",
+    "UserStatusCounters",
     "UserAddresses",
     "UserRankHistory",
     "UnilevelReports",
@@ -46,8 +52,10 @@ __all__ = [
     "Products", "ProductType", "ProductPresentation",
     "Commissions",
     "ExchangeRates",
+    "JobRuns", "JobLocks", "JobRunStatus",
     "Orders", "OrderStatus",
     "OrderItems",
+    "PaymentOutbox", "OutboxStage", "OutboxStatus",
     # Wallet system
     "Wallets", "WalletTransactions", "WalletWithdrawals",
     "WalletStatus", "WalletTransactionType", "WalletTransactionStatus", "WithdrawalStatus",
@@ -0,0 +1,68 @@
+import reflex as rx
+from sqlmodel import Field, func, UniqueConstraint
+from datetime import datetime, timezone
+from enum import Enum
+
+
+class ClosureStage(Enum):
+    """Etapas del cierre mensual (en orden de ejecución)"""
+    DEPOSIT_COMMISSIONS = "deposit_commissions"   # Comisiones PENDING → wallets
+    CLOSE_PERIOD = "close_period"                 # Marcar closed_at
+    CREATE_NEXT_PERIOD = "create_next_period"     # Crear período siguiente
+    RESET_USERS = "reset_users"                   # Reseteo de usuarios para el nuevo período
+
+
+class ClosureRunStatus(Enum):
+    """Estados de una etapa del cierre"""
+    PENDING = "pending"         # Aún no inicia
+    RUNNING = "running"         # En proceso (o interrumpida)
+    COMPLETED = "completed"     # Terminada
+    FAILED = "failed"           # Falló; se reanuda desde checkpoint
+
+
+class ClosureRuns(rx.Model, table=True):
+    """
+    Progreso del cierre mensual por (período, etapa).
+    Cada lote confirmado (commit) avanza checkpoint, así una re-ejecución
+    continúa desde el último lote sin repetir trabajo.
+    """
+    __tablename__ = "closureruns"
+
+    __table_args__ = (
+        UniqueConstraint('period_id', 'stage', name='uq_closureruns_period_stage'),
+    )
+
+    # Período que se está cerrando
+    period_id: int = Field(foreign_key="periods.id", index=True)
+
+    # Etapa y estado
+    stage: str = Field(max_length=50)  # Enum ClosureStage
+    status: str = Field(default=ClosureRunStatus.PENDING.value, max_length=20, index=True)
+
+    # Checkpoint: último member_id procesado (keyset de lotes)
+    checkpoint: int = Field(default=0)
+
+    # Métricas
+    rows_processed: int = Field(default=0)
+    chunks_committed: int = Field(default=0)
+    duration_seconds: float = Field(default=0.0)
+
+    # Resultado de la etapa (JSON: totales, período creado, etc.)
+    metadata_json: str | None = Field(default=None)
+    error: str | None = Field(default=None, max_length=500)
+
+    # Timestamps (UTC puro)
+    started_at: datetime | None = Field(default=None)
+    finished_at: datetime | None = Field(default=None)
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column_kwargs={"server_default": func.now(), "onupdate": func.now()}
+    )
+
+    @property
+    def rows_per_second(self) -> float:
+        """Throughput de la etapa."""
+        return self.rows_processed / self.duration_seconds if self.duration_seconds else 0.0
+
+    def __repr__(self):
+        return f"<ClosureRun(period_id={self.period_id}, stage={self.stage}, status={self.status}, checkpoint={self.checkpoint})>"
@@ -0,0 +1,59 @@
+import reflex as rx
+from sqlmodel import Field, func
+from datetime import datetime, timezone
+from enum import Enum
+
+
+class JobRunStatus(Enum):
+    """Estados de una ejecución de job programado"""
+    RUNNING = "running"         # En proceso
+    COMPLETED = "completed"     # Terminó sin errores
+    FAILED = "failed"           # Terminó con excepción
+
+
+class JobRuns(rx.Model, table=True):
+    """
+    Historial de ejecuciones de jobs programados (SchedulerService).
+    Solo registra ejecuciones del worker que obtuvo el lock del job.
+    """
+    __tablename__ = "jobruns"
+
+    # Job ejecutado y worker que lo corrió (host:pid)
+    job_id: str = Field(max_length=100, index=True)
+    worker: str = Field(max_length=255)
+
+    # Disparo programado al que corresponde (UTC sin tzinfo); None = ejecución manual
+    scheduled_for: datetime | None = Field(default=None, index=True)
+
+    # Resultado
+    status: str = Field(default=JobRunStatus.RUNNING.value, max_length=20, index=True)
+    rows_affected: int = Field(default=0)
+    duration_seconds: float = Field(default=0.0)
+    error: str | None = Field(default=None, max_length=500)
+
+    # Timestamps (UTC puro)
+    started_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column_kwargs={"server_default": func.now()},
+        index=True
+    )
+    finished_at: datetime | None = Field(default=None)
+
+    def __repr__(self):
+        return f"<JobRun(job_id={self.job_id}, status={self.status}, rows_affected={self.rows_affected})>"
+
+
+class JobLocks(rx.Model, table=True):
+    """
+    Lock por job para motores sin advisory locks (SQLite en desarrollo y tests).
+    En Postgres el lock es pg_try_advisory_lock y esta tabla no se usa.
+    """
+    __tablename__ = "joblocks"
+
+    job_id: str = Field(max_length=100, unique=True)
+    owner: str = Field(max_length=255)  # Token de la adquisición
+    acquired_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    expires_at: datetime  # Lock vencido (worker caído) se puede re-tomar
+
+    def __repr__(self):
+        return f"<JobLock(job_id={self.job_id}, owner={self.owner}, expires_at={self.expires_at})>"
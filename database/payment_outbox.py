@@ -0,0 +1,72 @@
+import reflex as rx
+from sqlmodel import Field, func, UniqueConstraint
+from datetime import datetime, timezone
+from enum import Enum
+
+
+class OutboxStage(Enum):
+    """Efectos posteriores al pago de una orden (en orden de ejecución)"""
+    PV_UPDATE = "pv_update"                 # PV del comprador y PVG de la línea ascendente
+    UNILEVEL_REPORT = "unilevel_report"     # Delta de la orden en unilevel_report
+    RANK_CHECK = "rank_check"               # Promoción de rango del comprador
+    DIRECT_BONUS = "direct_bonus"           # Bono Directo
+    FAST_START_BONUS = "fast_start_bonus"   # Bono Rápido (kits)
+    UNILEVEL_BONUS = "unilevel_bonus"       # Bono Uninivel incremental
+    MATCHING_BONUS = "matching_bonus"       # Bono Matching incremental
+
+
+class OutboxStatus(Enum):
+    """Estados de un evento del outbox"""
+    PENDING = "pending"         # Por procesar (o reintento programado)
+    COMPLETED = "completed"     # Aplicado
+    FAILED = "failed"           # Agotó reintentos; requiere revisión
+
+
+class PaymentOutbox(rx.Model, table=True):
+    """
+    Outbox de efectos posteriores al pago.
+    El pago confirma la orden y registra un evento por etapa en la misma
+    transacción; el worker los aplica después. (order_id, stage) es la llave
+    de idempotencia: cada etapa se aplica una sola vez por orden.
+    """
+    __tablename__ = "paymentoutbox"
+
+    __table_args__ = (
+        UniqueConstraint('order_id', 'stage', name='uq_paymentoutbox_order_stage'),
+    )
+
+    # Orden pagada y etapa a aplicar
+    order_id: int = Field(foreign_key="orders.id", index=True)
+    stage: str = Field(max_length=30)  # Enum OutboxStage
+    sequence: int = Field(default=0)   # Posición de la etapa (se aplican en orden)
+
+    # Estado y reintentos
+    status: str = Field(default=OutboxStatus.PENDING.value, max_length=20, index=True)
+    attempts: int = Field(default=0)
+    last_error: str | None = Field(default=None, max_length=500)
+
+    # Timestamps (UTC puro)
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column_kwargs={"server_default": func.now()}
+    )
+    available_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        index=True
+    )  # No se procesa antes (backoff de reintentos)
+    processed_at: datetime | None = Field(default=None)
+
+    @property
+    def lag_seconds(self) -> float:
+        """Segundos entre el pago y la aplicación del evento."""
+        if not self.processed_at or not self.created_at:
+            return 0.0
+        # Leídas de BD vienen sin tzinfo (UTC puro)
+        processed_at, created_at = (
+            value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+            for value in (self.processed_at, self.created_at)
+        )
+        return (processed_at - created_at).total_seconds()
+
+    def __repr__(self):
+        return f"<PaymentOutbox(order_id={self.order_id}, stage={self.stage}, status={self.status}, attempts={self.attempts})>"
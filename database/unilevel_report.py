@@ -1,11 +1,16 @@
 import reflex as rx
-from sqlmodel import Field, ForeignKey
+from sqlmodel import Field, ForeignKey, UniqueConstraint
 
 class UnilevelReports(rx.Model, table=True):
     """
     Tabla de reportes unilevel.
     Contiene información de reportes unilevel asociados a usuarios.
+    Un solo reporte por (usuario, período): requerido por el upsert delta.
     """
+    __table_args__ = (
+        UniqueConstraint('user_id', 'period_id', name='uq_unilevelreports_user_period'),
+    )
+
     # Vinculo con usuario
     user_id: int = Field(foreign_key="users.id", index=True)
 
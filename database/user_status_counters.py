@@ -0,0 +1,24 @@
+import reflex as rx
+from sqlmodel import Field, func
+from datetime import datetime, timezone
+
+
+class UserStatusCounters(rx.Model, table=True):
+    """
+    Conteo materializado de usuarios por status (QUALIFIED, NO_QUALIFIED, ...).
+    Se mantiene en la misma transacción que cambia el status del usuario
+    (UserStatusCounterService); el dashboard lo lee en lugar de contar users.
+    """
+    __tablename__ = "userstatuscounters"
+
+    status: str = Field(max_length=20, unique=True)
+    user_count: int = Field(default=0)
+
+    # Última actualización (UTC puro)
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column_kwargs={"server_default": func.now()}
+    )
+
+    def __repr__(self):
+        return f"<UserStatusCounter(status={self.status}, user_count={self.user_count})>"
@@ -1,5 +1,5 @@
 import reflex as rx
-from sqlmodel import Field, SQLModel
+from sqlmodel import Field, SQLModel, Index
 
 @rx.ModelRegistry.register
 class UserTreePath(SQLModel, table=True):
@@ -13,7 +13,13 @@ class UserTreePath(SQLModel, table=True):
     NOTA: No necesariamente el sponsor_id puede ser el ancestro directo (depth=1).
     Un usuario puede tener un sponsor diferente al usuario directamente arriba en la jerarquía.
     Por ejemplo, un usuario puede ser patrocinado por un member_id=1 pero estar ubicado en la rama de otro usuario.
+
+    El índice (ancestor_id, depth, descendant_id) sirve la paginación keyset de la red descendente.
     """
+    __table_args__ = (
+        Index('ix_usertreepath_ancestor_depth_descendant', 'ancestor_id', 'depth', 'descendant_id'),
+    )
+
     # Clave primaria compuesta
     sponsor_id: int = Field(foreign_key="users.member_id", index=True, nullable=True)  # Permitir NULL para el usuario master
     ancestor_id: int = Field(primary_key=True, foreign_key="users.member_id", index=True)
@@ -0,0 +1,54 @@
+"""
+═══════════════════════════════════════════════════════════════════════════════
+🔧 RECONCILIACIÓN: Reconstruir unilevel_report de un período
+═══════════════════════════════════════════════════════════════════════════════
+
+En operación normal unilevel_report se mantiene en modo DELTA: cada pago
+confirmado suma su PV/VN al reporte del comprador y de sus ancestros
+(MLMUserManager.apply_order_to_unilevel_report).
+
+Este script regenera los reportes desde cero a partir de las órdenes confirmadas
+(MLMUserManager.rebuild_unilevel_report) para reconciliar cualquier desviación.
+
+USO:
+    python rebuild_unilevel_report.py              # Período actual
+    python rebuild_unilevel_report.py <period_id>  # Período específico
+"""
+
+import sys
+
+
+def rebuild_unilevel_report_for_period(period_id=None):
+    import reflex as rx
+    from NNProtect_new_website.mlm_service.mlm_user_manager import MLMUserManager
+    from NNProtect_new_website.mlm_service.period_service import PeriodService
+
+    print("=" * 70)
+    print("RECONCILIACIÓN: Reconstrucción de unilevel_report")
+    print("=" * 70)
+
+    with rx.session() as session:
+        if period_id is None:
+            current_period = PeriodService.get_current_period(session)
+
+            if not current_period:
+                print("❌ No hay período activo")
+                return
+
+            period_id = current_period.id
+
+        print(f"\n📅 Período: ID={period_id}")
+
+        try:
+            reports = MLMUserManager.rebuild_unilevel_report(session, period_id)
+            session.commit()
+            print(f"\n✅ {reports} reportes regenerados para el período {period_id}")
+        except Exception as e:
+            session.rollback()
+            print(f"\n❌ Error reconstruyendo unilevel_report: {e}")
+            import traceback
+            traceback.print_exc()
+
+
+if __name__ == "__main__":
+    rebuild_unilevel_report_for_period(int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -46,7 +46,6 @@ from sqlmodel import select, func
 from datetime import date
 from database.users import Users, UserStatus
 from database.userprofiles import UserProfiles, UserGender
-from database.usertreepaths import UserTreePath
 from database.products import Products
 from database.orders import Orders, OrderStatus
 from database.order_items import OrderItems
@@ -59,6 +58,7 @@ from database.ranks import Ranks
 
 # Imports de servicios
 from NNProtect_new_website.mlm_service.period_service import PeriodService
+from NNProtect_new_website.mlm_service.genealogy_service import GenealogyService
 
 
 class MLMSeeder2x2:
@@ -88,6 +88,9 @@ class MLMSeeder2x2:
         self.created_rank_history = 0
         self.created_orders = 0
         self.created_tree_paths = 0
+
+        # Pares (member_id, sponsor_id) pendientes de escribir en usertreepath
+        self.pending_genealogy = []
     
     def run(self) -> bool:
         """Ejecuta el proceso completo de seeding."""
@@ -213,10 +216,12 @@ class MLMSeeder2x2:
                     
                     # Commit en lotes para performance
                     if self.created_users % self.COMMIT_BATCH_SIZE == 0:
+                        self._flush_genealogy()
                         self.session.commit()
                         print(f"   [{self.created_users}/{self.TOTAL_USERS}] Guardado lote...")
             
             # Flush final antes de commit
+            self._flush_genealogy()
             self.session.flush()
             print(f"\n✅ {self.created_users} usuarios creados")
             return True
@@ -294,42 +299,8 @@ class MLMSeeder2x2:
         )
         self.session.add(user_address)
         
-        # 4. USERTREEPATHS
-        if sponsor_id is None:
-            # Usuario raíz: solo auto-referencia (sin sponsor_id ya que es opcional)
-            self_path = UserTreePath(
-                ancestor_id=member_id,
-                descendant_id=member_id,
-                depth=0
-            )
-            self.session.add(self_path)
-            self.created_tree_paths += 1
-        else:
-            # Usuario con sponsor: copiar árbol del sponsor + agregar sponsor directo
-            # Auto-referencia
-            self_path = UserTreePath(
-                sponsor_id=sponsor_id,
-                ancestor_id=member_id,
-                descendant_id=member_id,
-                depth=0
-            )
-            self.session.add(self_path)
-            self.created_tree_paths += 1
-            
-            # Copiar ancestros del sponsor
-            sponsor_ancestors = self.session.exec(
-                select(UserTreePath).where(UserTreePath.descendant_id == sponsor_id)
-            ).all()
-            
-            for ancestor_path in sponsor_ancestors:
-                new_path = UserTreePath(
-                    sponsor_id=sponsor_id,
-                    ancestor_id=ancestor_path.ancestor_id,
-                    descendant_id=member_id,
-                    depth=ancestor_path.depth + 1
-                )
-                self.session.add(new_path)
-                self.created_tree_paths += 1
+        # 4. USERTREEPATHS (se escriben en lote antes de cada commit)
+        self.pending_genealogy.append((member_id, sponsor_id))
         
         # 5. WALLETS
         currency = self._get_currency(country)
@@ -358,6 +329,16 @@ class MLMSeeder2x2:
         
         return user
     
+    def _flush_genealogy(self):
+        """Escribe la genealogía de los usuarios pendientes con INSERTs multi-fila."""
+        if not self.pending_genealogy:
+            return
+        
+        self.created_tree_paths += GenealogyService.add_members_to_tree_bulk(
+            self.session, self.pending_genealogy
+        )
+        self.pending_genealogy = []
+    
     def _create_order(self, user: Users, country: str):
         """Crea 1 orden completada con 5 productos."""
         currency = self._get_currency(country)
@@ -0,0 +1,213 @@
+"""
+Benchmark: Histórico completo de inscripciones (CTE + N queries vs CTE con JOINs)
+
+OBJETIVO:
+- Comparar el patrón histórico de MLMUserManager.get_all_registrations (CTE recursivo
+  y luego un SELECT de UserProfiles por fila + SELECT del sponsor con caché)
+  contra el CTE recursivo que ya trae perfil y sponsor por JOIN
+- Medir la memoria pico del modo streaming (iter_all_registrations con yield_per)
+  contra materializar la red completa
+- Red 2x2 de 20,000 miembros con perfil; verificar que ambos caminos dan los mismos registros
+
+NOTAS:
+- Por defecto corre en SQLite en memoria (sin Supabase). Para medir contra Postgres:
+    BENCHMARK_DATABASE_URL=postgresql://... python test_all_registrations_performance.py
+"""
+
+import os
+import time
+import tracemalloc
+import sqlmodel
+from datetime import datetime, timezone
+from sqlmodel import Session, SQLModel, create_engine
+
+from database.users import Users
+from database.userprofiles import UserProfiles, UserGender
+from NNProtect_new_website.mlm_service.mlm_user_manager import MLMUserManager
+
+
+NETWORK_SIZE = 20_000
+BRANCH_FACTOR = 2
+
+# CTE recursivo original (sin JOINs), con el path portable para SQLite
+LEGACY_CTE = sqlmodel.text("""
+    WITH RECURSIVE network_tree AS (
+        SELECT u.id, u.member_id, u.first_name, u.last_name, u.email_cache, u.sponsor_id,
+               u.status, u.created_at, 1 AS level, ',' || u.member_id || ',' AS path
+        FROM users u
+        WHERE u.member_id = :root_member_id
+        UNION ALL
+        SELECT u.id, u.member_id, u.first_name, u.last_name, u.email_cache, u.sponsor_id,
+               u.status, u.created_at, nt.level + 1, nt.path || u.member_id || ','
+        FROM users u
+        INNER JOIN network_tree nt ON u.sponsor_id = nt.member_id
+        WHERE nt.path NOT LIKE '%,' || u.member_id || ',%'
+    )
+    SELECT id, member_id, first_name, last_name, email_cache, sponsor_id, status, created_at, level
+    FROM network_tree
+    WHERE level > 1
+    ORDER BY level, member_id
+""").columns(created_at=Users.__table__.c.created_at.type)
+
+
+def _get_benchmark_engine():
+    """Engine de benchmark: Postgres si se indica, SQLite en memoria por defecto."""
+    database_url = os.getenv("BENCHMARK_DATABASE_URL", "sqlite://")
+    engine = create_engine(database_url)
+    SQLModel.metadata.create_all(engine, tables=[Users.__table__, UserProfiles.__table__])
+    return engine
+
+
+def _seed_network(session, size: int) -> None:
+    """Red BRANCH_FACTOR x BRANCH_FACTOR de `size` miembros bajo member_id=1, con perfil."""
+    pairs = [(1, None)] + [
+        (member_id, (member_id - 2) // BRANCH_FACTOR + 1)
+        for member_id in range(2, size + 2)
+    ]
+    created_at = datetime.now(timezone.utc)
+
+    session.execute(sqlmodel.delete(UserProfiles))
+    session.execute(sqlmodel.delete(Users))
+    session.execute(
+        sqlmodel.insert(Users),
+        [
+            {
+                "id": member_id,
+                "member_id": member_id,
+                "sponsor_id": sponsor_id,
+                "first_name": f"Bench_{member_id}",
+                "last_name": "Network",
+                "created_at": created_at,
+            }
+            for member_id, sponsor_id in pairs
+        ]
+    )
+    session.execute(
+        sqlmodel.insert(UserProfiles),
+        [
+            {"user_id": member_id, "gender": UserGender.MALE, "phone_number": f"+52155{member_id:07d}"}
+            for member_id, _ in pairs
+        ]
+    )
+    session.commit()
+
+
+def _legacy_registrations(session, root_member_id: int) -> list:
+    """Reproducción del patrón original: perfil por fila y sponsor con caché."""
+    descendants = []
+    sponsor_cache = {}
+
+    for row in session.execute(LEGACY_CTE.bindparams(root_member_id=root_member_id)):
+        sponsor_data = {}
+        if row.sponsor_id:
+            if row.sponsor_id not in sponsor_cache:
+                sponsor_user, sponsor_profile = session.exec(
+                    sqlmodel.select(Users, UserProfiles)
+                    .outerjoin(UserProfiles, Users.id == UserProfiles.user_id)
+                    .where(Users.member_id == row.sponsor_id)
+                ).first()
+                sponsor_cache[row.sponsor_id] = {
+                    "member_id": sponsor_user.member_id,
+                    "full_name": f"{sponsor_user.first_name or ''} {sponsor_user.last_name or ''}".strip(),
+                    "phone": sponsor_profile.phone_number if sponsor_profile else "",
+                }
+            sponsor_data = sponsor_cache[row.sponsor_id]
+
+        user_profile = session.exec(
+            sqlmodel.select(UserProfiles).where(UserProfiles.user_id == row.id)
+        ).first()
+
+        descendants.append({
+            "member_id": row.member_id,
+            "phone": user_profile.phone_number if user_profile else "",
+            "sponsor_member_id": sponsor_data.get("member_id"),
+            "level": row.level,
+            "sponsor_full_name": sponsor_data.get("full_name", "N/A"),
+            "sponsor_phone": sponsor_data.get("phone", "N/A"),
+        })
+
+    return descendants
+
+
+def _joined_registrations(session, root_member_id: int) -> list:
+    return [
+        record
+        for batch in MLMUserManager.iter_all_registrations(root_member_id, session=session)
+        for record in batch
+    ]
+
+
+def _streamed_count(session, root_member_id: int) -> int:
+    """Recorre la red sin materializarla (memoria acotada al lote)."""
+    return sum(len(batch) for batch in MLMUserManager.iter_all_registrations(root_member_id, session=session))
+
+
+def _peak_mb(func, *args) -> float:
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def run_benchmark(size: int = NETWORK_SIZE) -> dict:
+    """
+    Siembra la red y mide ambos caminos más la memoria pico del streaming.
+
+    Returns:
+        Dict con size, legacy_s, joined_s, full_peak_mb y streamed_peak_mb
+    """
+    engine = _get_benchmark_engine()
+    comparable_keys = ("member_id", "phone", "sponsor_member_id", "level", "sponsor_full_name", "sponsor_phone")
+
+    with Session(engine) as session:
+        _seed_network(session, size)
+
+        start = time.perf_counter()
+        legacy = _legacy_registrations(session, 1)
+        legacy_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        joined = _joined_registrations(session, 1)
+        joined_s = time.perf_counter() - start
+
+        full_peak_mb = _peak_mb(_joined_registrations, session, 1)
+        streamed_peak_mb = _peak_mb(_streamed_count, session, 1)
+
+    engine.dispose()
+
+    assert len(joined) == size, f"Se esperaban {size} registros, se obtuvieron {len(joined)}"
+    assert [{key: record[key] for key in comparable_keys} for record in joined] == legacy, \
+        "Registros distintos entre implementaciones"
+
+    return {
+        "size": size,
+        "legacy_s": legacy_s,
+        "joined_s": joined_s,
+        "full_peak_mb": full_peak_mb,
+        "streamed_peak_mb": streamed_peak_mb,
+    }
+
+
+def test_all_registrations_performance():
+    """
+    Test rápido (2,000 miembros): mismos registros y el CTE con JOINs no es más lento.
+    """
+    result = run_benchmark(size=2_000)
+
+    assert result["joined_s"] <= result["legacy_s"]
+    assert result["streamed_peak_mb"] < result["full_peak_mb"]
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 80)
+    print(f"🚀 BENCHMARK: HISTÓRICO DE INSCRIPCIONES ({NETWORK_SIZE:,} miembros)")
+    print("=" * 80)
+
+    result = run_benchmark()
+
+    print(f"\n   CTE + query por fila (legacy):  {result['legacy_s']:.2f}s")
+    print(f"   CTE con JOINs:                  {result['joined_s']:.2f}s")
+    print(f"   Memoria pico (lista completa):  {result['full_peak_mb']:.1f} MB")
+    print(f"   Memoria pico (streaming):       {result['streamed_peak_mb']:.1f} MB")
+    print(f"\n✅ Ambos caminos producen los mismos registros")
@@ -0,0 +1,147 @@
+"""
+Benchmark: Creación de genealogía para redes de prueba (ORM por fila vs INSERT multi-fila)
+
+OBJETIVO:
+- Comparar el patrón histórico de AdminState._create_mlm_user / seed_mlm_network_2x2.py
+  (SELECT de los paths del sponsor + un UserTreePath ORM por fila, por cada usuario)
+  contra GenealogyService.add_member_to_tree (INSERT ... SELECT) y
+  GenealogyService.add_members_to_tree_bulk (INSERTs multi-fila del lote)
+- Red 2x2 de 10,000 usuarios (~13 niveles), igual que el máximo de create_network_tree
+- Verificar que los tres caminos producen la misma closure table
+
+NOTAS:
+- Por defecto corre en SQLite en memoria (sin Supabase). Para medir contra Postgres:
+    BENCHMARK_DATABASE_URL=postgresql://... python test_genealogy_bulk_insert_performance.py
+"""
+
+import os
+import time
+import sqlmodel
+from sqlmodel import Session, SQLModel, create_engine
+
+from database.users import Users
+from database.usertreepaths import UserTreePath
+from NNProtect_new_website.mlm_service.genealogy_service import GenealogyService
+
+
+NETWORK_SIZE = 10_000
+BRANCH_FACTOR = 2
+
+
+def _get_benchmark_engine():
+    """Engine de benchmark: Postgres si se indica, SQLite en memoria por defecto."""
+    database_url = os.getenv("BENCHMARK_DATABASE_URL", "sqlite://")
+    engine = create_engine(database_url)
+    SQLModel.metadata.create_all(engine, tables=[Users.__table__, UserTreePath.__table__])
+    return engine
+
+
+def _network_pairs(size: int) -> list:
+    """Pares (member_id, sponsor_id) de una red BRANCH_FACTOR x BRANCH_FACTOR en orden BFS."""
+    return [(1, None)] + [
+        (member_id, (member_id - 2) // BRANCH_FACTOR + 1)
+        for member_id in range(2, size + 1)
+    ]
+
+
+def _seed_users(session, pairs: list) -> None:
+    session.execute(sqlmodel.delete(UserTreePath))
+    session.execute(sqlmodel.delete(Users))
+    session.execute(
+        sqlmodel.insert(Users),
+        [
+            {"member_id": member_id, "sponsor_id": sponsor_id, "first_name": f"Bench_{member_id}", "last_name": "Tree"}
+            for member_id, sponsor_id in pairs
+        ]
+    )
+    session.commit()
+
+
+def _legacy_orm_copy(session, pairs: list) -> None:
+    """Reproducción del patrón original: cargar paths del sponsor y agregar un ORM por fila."""
+    for member_id, sponsor_id in pairs:
+        session.add(UserTreePath(sponsor_id=sponsor_id, ancestor_id=member_id, descendant_id=member_id, depth=0))
+
+        sponsor_paths = session.exec(
+            sqlmodel.select(UserTreePath).where(UserTreePath.descendant_id == sponsor_id)
+        ).all()
+
+        for path in sponsor_paths:
+            session.add(UserTreePath(
+                sponsor_id=sponsor_id,
+                ancestor_id=path.ancestor_id,
+                descendant_id=member_id,
+                depth=path.depth + 1
+            ))
+
+    session.flush()
+
+
+def _insert_select(session, pairs: list) -> None:
+    for member_id, sponsor_id in pairs:
+        GenealogyService.add_member_to_tree(session, member_id, sponsor_id)
+
+
+def _closure_snapshot(session) -> set:
+    return set(session.exec(
+        sqlmodel.select(UserTreePath.ancestor_id, UserTreePath.descendant_id, UserTreePath.depth)
+    ).all())
+
+
+def run_benchmark(size: int = NETWORK_SIZE) -> dict:
+    """
+    Ejecuta los tres caminos sobre la misma red y devuelve los tiempos.
+
+    Returns:
+        Dict con size, paths, legacy_s, insert_select_s y bulk_s
+    """
+    engine = _get_benchmark_engine()
+    pairs = _network_pairs(size)
+    timings = {}
+    snapshots = {}
+
+    with Session(engine) as session:
+        _seed_users(session, pairs)
+
+        for name, writer in [
+            ("legacy_s", _legacy_orm_copy),
+            ("insert_select_s", _insert_select),
+            ("bulk_s", GenealogyService.add_members_to_tree_bulk),
+        ]:
+            start = time.perf_counter()
+            writer(session, pairs)
+            session.flush()
+            timings[name] = time.perf_counter() - start
+            snapshots[name] = _closure_snapshot(session)
+            session.rollback()
+            session.expunge_all()
+
+    engine.dispose()
+
+    assert snapshots["legacy_s"] == snapshots["insert_select_s"] == snapshots["bulk_s"], \
+        "Closure table distinta entre implementaciones"
+
+    return {"size": size, "paths": len(snapshots["bulk_s"]), **timings}
+
+
+def test_genealogy_bulk_insert_performance():
+    """
+    Test rápido (1,000 usuarios): misma closure table y el lote no es más lento que el ORM.
+    """
+    result = run_benchmark(size=1_000)
+
+    assert result["bulk_s"] <= result["legacy_s"]
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 80)
+    print(f"🚀 BENCHMARK: GENEALOGÍA PARA RED {BRANCH_FACTOR}x{BRANCH_FACTOR} DE {NETWORK_SIZE:,} USUARIOS")
+    print("=" * 80)
+
+    result = run_benchmark()
+
+    print(f"\n   Paths creados:          {result['paths']:,}")
+    print(f"   ORM por fila (legacy):  {result['legacy_s']:.2f}s")
+    print(f"   INSERT ... SELECT:      {result['insert_select_s']:.2f}s")
+    print(f"   Lote multi-fila:        {result['bulk_s']:.2f}s")
+    print(f"\n✅ Los tres caminos producen la misma closure table")
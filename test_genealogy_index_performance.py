@@ -0,0 +1,130 @@
+"""
+Benchmark: Índice genealógico en memoria (GenealogyIndex)
+
+OBJETIVO:
+- Medir construcción, memoria y latencia de consultas del índice a 100k y 1M miembros
+- Consultas: is_ancestor, get_upline_ids, count_downline, get_downline_ids, add_member
+- Red sintética: árbol aleatorio (sponsor = miembro previo al azar) + una línea de 5,000 niveles
+  (mismo peor caso que test_extreme_depth_5000.py)
+
+NOTAS:
+- No usa base de datos: el índice se construye desde pares (member_id, sponsor_id), igual que
+  GenealogyIndex.from_session con SELECT member_id, sponsor_id FROM users.
+- Referencia de UserTreePath: una línea de 5,000 niveles son ~12.5M filas de closure.
+
+USO:
+    python test_genealogy_index_performance.py
+"""
+
+import random
+import time
+import tracemalloc
+
+from NNProtect_new_website.mlm_service.genealogy_index import GenealogyIndex
+
+
+SIZES = [100_000, 1_000_000]
+DEEP_LINE = 5_000
+QUERIES = 10_000
+SEED = 20251001
+
+
+def _synthetic_network(size: int, deep_line: int = DEEP_LINE) -> list:
+    """
+    Pares (member_id, sponsor_id): los primeros deep_line miembros forman una línea,
+    el resto cuelga de un miembro previo al azar.
+    """
+    rng = random.Random(SEED)
+    members = [(1, None)]
+
+    for member_id in range(2, size + 1):
+        if member_id <= deep_line:
+            sponsor_id = member_id - 1
+        else:
+            sponsor_id = rng.randint(1, member_id - 1)
+        members.append((member_id, sponsor_id))
+
+    return members
+
+
+def _per_call_us(func, args_list) -> float:
+    start = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return (time.perf_counter() - start) / len(args_list) * 1_000_000
+
+
+def run_benchmark(sizes=SIZES, queries: int = QUERIES) -> list:
+    """
+    Construye el índice para cada tamaño y mide memoria y latencias.
+
+    Returns:
+        Lista de dicts con size, build_s, array_mb, peak_mb y latencias en µs
+    """
+    results = []
+
+    for size in sizes:
+        members = _synthetic_network(size, deep_line=min(DEEP_LINE, size))
+        rng = random.Random(SEED + size)
+        member_pairs = [(rng.randint(1, size), rng.randint(1, size)) for _ in range(queries)]
+        member_ids = [(rng.randint(1, size),) for _ in range(queries)]
+
+        # Memoria pico de la construcción (tracemalloc distorsiona el tiempo: se mide aparte)
+        tracemalloc.start()
+        GenealogyIndex(members)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        index = GenealogyIndex(members)
+        build_s = time.perf_counter() - start
+
+        deepest = min(DEEP_LINE, size)
+        results.append({
+            "size": size,
+            "build_s": build_s,
+            "array_mb": index.memory_bytes() / 1024 / 1024,
+            "peak_mb": peak / 1024 / 1024,
+            "is_ancestor_us": _per_call_us(index.is_ancestor, member_pairs),
+            "upline_us": _per_call_us(index.get_upline_ids, member_ids),
+            "upline_deepest_us": _per_call_us(index.get_upline_ids, [(deepest,)] * 100),
+            "count_downline_us": _per_call_us(index.count_downline, member_ids),
+            "downline_root_ms": _per_call_us(index.get_downline_ids, [(1,)] * 3) / 1000,
+            "add_member_us": _per_call_us(
+                index.add_member, [(size + offset, rng.randint(1, size)) for offset in range(1, 1001)]
+            ),
+        })
+
+        # Sanity check: la línea profunda tiene toda su upline
+        assert index.get_upline_ids(deepest) == list(range(deepest - 1, 0, -1))
+        assert index.count_downline(1) == len(index) - 1
+
+    return results
+
+
+def test_genealogy_index_performance():
+    """
+    Test rápido (10k miembros): consultas O(1) por debajo de 1 ms.
+    """
+    results = run_benchmark(sizes=[10_000], queries=1_000)
+
+    for row in results:
+        assert row["is_ancestor_us"] < 1000
+        assert row["count_downline_us"] < 1000
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 100)
+    print("🚀 BENCHMARK: ÍNDICE GENEALÓGICO EN MEMORIA (parent arrays + recorrido de Euler)")
+    print("=" * 100)
+
+    benchmark_results = run_benchmark()
+
+    print(f"\n{'Miembros':>10} {'Build (s)':>10} {'Arrays MB':>10} {'Peak MB':>9} "
+          f"{'is_anc µs':>10} {'upline µs':>10} {'up5000 µs':>10} {'count µs':>9} "
+          f"{'down(1) ms':>11} {'add µs':>8}")
+    print("-" * 100)
+    for row in benchmark_results:
+        print(f"{row['size']:>10,} {row['build_s']:>10.2f} {row['array_mb']:>10.1f} {row['peak_mb']:>9.1f} "
+              f"{row['is_ancestor_us']:>10.2f} {row['upline_us']:>10.2f} {row['upline_deepest_us']:>10.1f} "
+              f"{row['count_downline_us']:>9.2f} {row['downline_root_ms']:>11.1f} {row['add_member_us']:>8.2f}")
@@ -0,0 +1,145 @@
+"""
+Benchmark: Primera página de la red descendente (keyset) con 50,000 descendientes
+
+OBJETIVO:
+- Medir MLMUserManager.get_network_descendants_page sobre una red 2x2 de 50,000 miembros
+- Objetivo: primera página en menos de 200 ms
+- Comparar contra cargar la red completa (get_network_descendants concatena todas las páginas)
+
+NOTAS:
+- Por defecto corre en SQLite en memoria (sin Supabase). Para medir contra Postgres:
+    BENCHMARK_DATABASE_URL=postgresql://... python test_network_descendants_page_performance.py
+- La genealogía se siembra con GenealogyService.add_members_to_tree_bulk.
+"""
+
+import os
+import time
+import sqlmodel
+from datetime import datetime, timezone
+from sqlmodel import Session, SQLModel, create_engine
+
+from database.users import Users
+from database.userprofiles import UserProfiles, UserGender
+from database.usertreepaths import UserTreePath
+from NNProtect_new_website.mlm_service.genealogy_service import GenealogyService
+from NNProtect_new_website.mlm_service.mlm_user_manager import MLMUserManager
+
+
+NETWORK_SIZE = 50_000
+BRANCH_FACTOR = 2
+FIRST_PAGE_TARGET_S = 0.200
+
+
+def _get_benchmark_engine():
+    """Engine de benchmark: Postgres si se indica, SQLite en memoria por defecto."""
+    database_url = os.getenv("BENCHMARK_DATABASE_URL", "sqlite://")
+    engine = create_engine(database_url)
+    SQLModel.metadata.create_all(
+        engine, tables=[Users.__table__, UserProfiles.__table__, UserTreePath.__table__]
+    )
+    return engine
+
+
+def _seed_network(session, size: int) -> None:
+    """Red BRANCH_FACTOR x BRANCH_FACTOR de `size` miembros bajo member_id=1, con perfil."""
+    pairs = [(1, None)] + [
+        (member_id, (member_id - 2) // BRANCH_FACTOR + 1)
+        for member_id in range(2, size + 2)
+    ]
+    created_at = datetime.now(timezone.utc)
+
+    session.execute(sqlmodel.delete(UserTreePath))
+    session.execute(sqlmodel.delete(UserProfiles))
+    session.execute(sqlmodel.delete(Users))
+    session.execute(
+        sqlmodel.insert(Users),
+        [
+            {
+                "id": member_id,
+                "member_id": member_id,
+                "sponsor_id": sponsor_id,
+                "first_name": f"Bench_{member_id}",
+                "last_name": "Network",
+                "created_at": created_at,
+            }
+            for member_id, sponsor_id in pairs
+        ]
+    )
+    session.execute(
+        sqlmodel.insert(UserProfiles),
+        [
+            {"user_id": member_id, "gender": UserGender.MALE, "phone_number": f"+52155{member_id:07d}"}
+            for member_id, _ in pairs
+        ]
+    )
+    GenealogyService.add_members_to_tree_bulk(session, pairs)
+    session.commit()
+
+
+def run_benchmark(size: int = NETWORK_SIZE) -> dict:
+    """
+    Siembra la red y mide primera página, página intermedia y red completa.
+
+    Returns:
+        Dict con size, first_page_s, deep_page_s y full_network_s
+    """
+    engine = _get_benchmark_engine()
+
+    with Session(engine) as session:
+        _seed_network(session, size)
+
+        # Calentar caché de sentencias
+        MLMUserManager.get_network_descendants_page(1, session=session)
+
+        start = time.perf_counter()
+        first_page = MLMUserManager.get_network_descendants_page(1, session=session)
+        first_page_s = time.perf_counter() - start
+
+        # Cursor a mitad de la red (árbol tipo heap: depth = floor(log2(member_id)))
+        middle_member_id = size // 2
+        middle_cursor = (middle_member_id.bit_length() - 1, middle_member_id)
+
+        start = time.perf_counter()
+        deep_page = MLMUserManager.get_network_descendants_page(1, after=middle_cursor, session=session)
+        deep_page_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        total = sum(len(page) for page in MLMUserManager.iter_network_descendants(1, session=session))
+        full_network_s = time.perf_counter() - start
+
+    engine.dispose()
+
+    assert len(first_page["items"]) == MLMUserManager.DESCENDANTS_PAGE_SIZE
+    assert deep_page["items"], "Página intermedia vacía"
+    assert total == size, f"Se esperaban {size} descendientes, se recorrieron {total}"
+
+    return {
+        "size": size,
+        "first_page_s": first_page_s,
+        "deep_page_s": deep_page_s,
+        "full_network_s": full_network_s,
+    }
+
+
+def test_network_descendants_page_performance():
+    """
+    Test rápido (5,000 descendientes): primera página dentro del objetivo.
+    """
+    result = run_benchmark(size=5_000)
+
+    assert result["first_page_s"] < FIRST_PAGE_TARGET_S
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 80)
+    print(f"🚀 BENCHMARK: RED DESCENDENTE PAGINADA ({NETWORK_SIZE:,} descendientes)")
+    print("=" * 80)
+
+    result = run_benchmark()
+
+    print(f"\n   Primera página ({MLMUserManager.DESCENDANTS_PAGE_SIZE}):   {result['first_page_s'] * 1000:.1f} ms")
+    print(f"   Página intermedia (keyset):  {result['deep_page_s'] * 1000:.1f} ms")
+    print(f"   Red completa (streaming):    {result['full_network_s']:.2f} s")
+
+    status = "✅" if result["first_page_s"] < FIRST_PAGE_TARGET_S else "❌"
+    print(f"\n{status} Objetivo primera página < {FIRST_PAGE_TARGET_S * 1000:.0f} ms")
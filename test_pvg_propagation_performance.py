@@ -0,0 +1,162 @@
+"""
+Benchmark: Propagación de PVG a la línea ascendente (loop por fila vs UPDATE set-based)
+
+OBJETIVO:
+- Comparar el loop histórico de _update_pvg_for_ancestors (1 SELECT + 1 UPDATE por ancestro)
+  contra PVUpdateService.propagate_pvg_to_upline (1 UPDATE ... FROM usertreepath)
+- Profundidades: 10 / 100 / 1000 / 5000 (mismo peor caso que test_extreme_depth_5000.py)
+- Verificar que ambos caminos dejan exactamente el mismo pvg_cache
+
+NOTAS:
+- Por defecto corre en SQLite en memoria (sin Supabase). Para medir contra Postgres:
+    BENCHMARK_DATABASE_URL=postgresql://... python test_pvg_propagation_performance.py
+- Ambas implementaciones solo leen los paths donde descendant_id = comprador, por lo que
+  la red lineal se siembra únicamente con los paths del comprador (depth filas), no con
+  las depth² / 2 filas de la closure completa.
+"""
+
+import os
+import time
+import sqlmodel
+from sqlmodel import Session, SQLModel, create_engine
+
+from database.users import Users
+from database.usertreepaths import UserTreePath
+from NNProtect_new_website.mlm_service.pv_update_service import PVUpdateService
+
+
+DEPTHS = [10, 100, 1000, 5000]
+ORDER_PV = 1465
+
+
+def _get_benchmark_engine():
+    """Engine de benchmark: Postgres si se indica, SQLite en memoria por defecto."""
+    database_url = os.getenv("BENCHMARK_DATABASE_URL", "sqlite://")
+    engine = create_engine(database_url)
+    SQLModel.metadata.create_all(engine, tables=[Users.__table__, UserTreePath.__table__])
+    return engine
+
+
+def _seed_linear_upline(session, depth: int) -> int:
+    """
+    Crea la red lineal 1 → 2 → ... → depth+1 y los paths del comprador (último nodo).
+
+    Returns:
+        member_id del comprador
+    """
+    buyer_id = depth + 1
+
+    session.execute(sqlmodel.delete(UserTreePath))
+    session.execute(sqlmodel.delete(Users))
+
+    session.add_all([
+        Users(
+            member_id=member_id,
+            first_name=f"Bench_{member_id}",
+            last_name="Depth",
+            sponsor_id=member_id - 1 if member_id > 1 else None,
+        )
+        for member_id in range(1, buyer_id + 1)
+    ])
+    session.flush()
+
+    session.add_all([
+        UserTreePath(
+            sponsor_id=ancestor_id - 1 if ancestor_id > 1 else None,
+            ancestor_id=ancestor_id,
+            descendant_id=buyer_id,
+            depth=buyer_id - ancestor_id,
+        )
+        for ancestor_id in range(1, buyer_id + 1)
+    ])
+    session.commit()
+    return buyer_id
+
+
+def _legacy_row_by_row(session, member_id: int, pv_amount: int) -> None:
+    """Reproducción del loop original: un SELECT Users + un UPDATE ORM por ancestro."""
+    ancestor_ids = session.exec(
+        sqlmodel.select(UserTreePath.ancestor_id).where(UserTreePath.descendant_id == member_id)
+    ).all()
+
+    for ancestor_id in ancestor_ids:
+        if ancestor_id == member_id:
+            continue
+        ancestor = session.exec(
+            sqlmodel.select(Users).where(Users.member_id == ancestor_id)
+        ).first()
+        if ancestor:
+            ancestor.pvg_cache += pv_amount
+            session.add(ancestor)
+
+    session.flush()
+
+
+def _pvg_snapshot(session) -> dict:
+    return dict(session.exec(sqlmodel.select(Users.member_id, Users.pvg_cache)).all())
+
+
+def run_benchmark(depths=DEPTHS) -> list:
+    """
+    Ejecuta ambas implementaciones por profundidad y devuelve los tiempos.
+
+    Returns:
+        Lista de dicts con depth, legacy_s, set_based_s y speedup
+    """
+    engine = _get_benchmark_engine()
+    results = []
+
+    for depth in depths:
+        with Session(engine) as session:
+            buyer_id = _seed_linear_upline(session, depth)
+
+            start = time.perf_counter()
+            _legacy_row_by_row(session, buyer_id, ORDER_PV)
+            legacy_elapsed = time.perf_counter() - start
+            legacy_snapshot = _pvg_snapshot(session)
+            session.rollback()
+
+            start = time.perf_counter()
+            updated = PVUpdateService.propagate_pvg_to_upline(session, buyer_id, ORDER_PV)
+            set_based_elapsed = time.perf_counter() - start
+            set_based_snapshot = _pvg_snapshot(session)
+            session.rollback()
+
+        assert len(updated) == depth, f"Se esperaban {depth} ancestros, RETURNING trajo {len(updated)}"
+        assert legacy_snapshot == set_based_snapshot, f"PVG distinto entre implementaciones (depth={depth})"
+
+        results.append({
+            "depth": depth,
+            "legacy_s": legacy_elapsed,
+            "set_based_s": set_based_elapsed,
+            "speedup": legacy_elapsed / set_based_elapsed if set_based_elapsed else float("inf"),
+        })
+
+    engine.dispose()
+    return results
+
+
+def test_pvg_propagation_performance():
+    """
+    Test rápido (10/100 niveles): mismo resultado y el camino set-based no es más lento.
+    """
+    results = run_benchmark(depths=[10, 100])
+
+    for row in results:
+        assert row["set_based_s"] <= row["legacy_s"], \
+            f"UPDATE set-based más lento que el loop en depth={row['depth']}"
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 80)
+    print("🚀 BENCHMARK: PROPAGACIÓN DE PVG (loop por fila vs UPDATE ... FROM usertreepath)")
+    print("=" * 80)
+
+    benchmark_results = run_benchmark()
+
+    print(f"\n{'Depth':>8} {'Loop (s)':>12} {'Set-based (s)':>15} {'Speedup':>10}")
+    print("-" * 50)
+    for row in benchmark_results:
+        print(f"{row['depth']:>8} {row['legacy_s']:>12.4f} {row['set_based_s']:>15.4f} {row['speedup']:>9.1f}x")
+
+    print("\n✅ Ambas implementaciones producen el mismo pvg_cache en todas las profundidades")
@@ -0,0 +1,195 @@
+"""
+Benchmark: Liquidación mensual por shards con 1/2/4/8 workers
+
+OBJETIVO:
+- Medir ShardedSettlementService.settle_period (Uninivel + Matching + depósito a wallets)
+  con 1, 2, 4 y 8 procesos sobre la misma red generada
+- Verificar que los totales de comisiones (por miembro y globales) son idénticos
+  byte a byte al camino secuencial (workers=1)
+
+NOTAS:
+- Los workers abren su propio engine, así que la BD debe ser compartible entre procesos:
+  por defecto un archivo SQLite temporal en modo WAL (las escrituras se serializan;
+  la agregación de lectura es lo que escala). Para medir contra Postgres usar una BD
+  desechable por corrida:
+    BENCHMARK_DATABASE_URL=postgresql://... python test_sharded_settlement_performance.py
+- El speedup depende de los núcleos disponibles (os.cpu_count()).
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import time
+import sqlmodel
+from datetime import datetime, timezone
+from sqlmodel import Session, SQLModel, create_engine
+
+from database.users import Users
+from database.ranks import Ranks
+from database.periods import Periods
+from database.products import Products
+from database.orders import Orders, OrderStatus
+from database.order_items import OrderItems
+from database.user_rank_history import UserRankHistory
+from database.wallet import Wallets, WalletStatus
+from NNProtect_new_website.mlm_service.genealogy_service import GenealogyService
+from NNProtect_new_website.mlm_service.sharded_settlement_service import ShardedSettlementService
+
+
+NETWORK_SIZE = 20_000
+BRANCH_FACTOR = 3
+WORKER_COUNTS = [1, 2, 4, 8]
+SEED = 20251031
+
+RANK_NAMES = [
+    "Sin rango", "Visionario", "Emprendedor", "Creativo", "Innovador",
+    "Embajador Transformador", "Embajador Inspirador", "Embajador Consciente", "Embajador Solidario",
+]
+RANK_WEIGHTS = [30, 30, 15, 8, 7, 4, 3, 2, 1]
+
+
+def _seed_database(database_url: str, size: int) -> int:
+    """Red BRANCH_FACTOR-aria con rangos, una orden confirmada por miembro y wallets. Regresa period_id."""
+    rng = random.Random(SEED)
+    engine = create_engine(database_url)
+    if database_url.startswith("sqlite"):
+        with engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+    SQLModel.metadata.create_all(engine)
+
+    pairs = [(1, None)] + [
+        (member_id, (member_id - 2) // BRANCH_FACTOR + 1)
+        for member_id in range(2, size + 1)
+    ]
+    now = datetime.now(timezone.utc)
+
+    with Session(engine) as session:
+        session.execute(sqlmodel.insert(Ranks), [
+            {"id": rank_id, "name": name, "pvg_required": 0}
+            for rank_id, name in enumerate(RANK_NAMES, start=1)
+        ])
+        period = Periods(name="2025-10", starts_on=now, ends_on=now)
+        product = Products(
+            product_name="Bench", active_ingredient="Bench", presentation="capsulas", type="suplemento",
+            quantity="1", vn_mx=0.0, vn_usa=0.0, vn_colombia=0.0, price_mx=0.0, price_usa=0.0,
+            price_colombia=0.0, public_mx=0.0, public_usa=0.0, public_colombia=0.0
+        )
+        session.add_all([period, product])
+        session.flush()
+
+        session.execute(sqlmodel.insert(Users), [
+            {"member_id": m, "sponsor_id": s, "first_name": f"Bench_{m}", "last_name": "Shard", "country_cache": "Mexico"}
+            for m, s in pairs
+        ])
+        GenealogyService.add_members_to_tree_bulk(session, pairs)
+        session.execute(sqlmodel.insert(UserRankHistory), [
+            {"member_id": m, "rank_id": rng.choices(range(1, 10), RANK_WEIGHTS)[0], "achieved_on": now}
+            for m, _ in pairs
+        ])
+        session.execute(sqlmodel.insert(Wallets), [
+            {"member_id": m, "balance": 0.0, "currency": "MXN", "status": WalletStatus.ACTIVE.value}
+            for m, _ in pairs
+        ])
+
+        orders = [
+            {"id": m, "member_id": m, "country": "Mexico", "currency": "MXN", "total_vn": vn,
+             "status": OrderStatus.PAYMENT_CONFIRMED.value, "period_id": period.id}
+            for m, vn in ((m, float(rng.randint(100, 3000))) for m, _ in pairs)
+        ]
+        session.execute(sqlmodel.insert(Orders), orders)
+        session.execute(sqlmodel.insert(OrderItems), [
+            {"order_id": order["id"], "product_id": product.id, "line_vn": order["total_vn"]}
+            for order in orders
+        ])
+
+        session.commit()
+        period_id = period.id
+
+    engine.dispose()
+    return period_id
+
+
+def _fresh_copy(template_path: str, workdir: str, workers: int) -> str:
+    """Copia del archivo SQLite sembrado para que cada corrida parta del mismo estado."""
+    target = os.path.join(workdir, f"settlement_{workers}.db")
+    shutil.copyfile(template_path, target)
+    return f"sqlite:///{target}"
+
+
+def run_benchmark(size: int = NETWORK_SIZE, worker_counts=WORKER_COUNTS) -> list:
+    """
+    Siembra la red una vez y liquida una copia con cada número de workers.
+
+    Returns:
+        Lista de dicts con workers, seconds, phase_seconds y totales por fase
+    """
+    external_url = os.getenv("BENCHMARK_DATABASE_URL")
+    results = []
+
+    with tempfile.TemporaryDirectory() as workdir:
+        template_path = os.path.join(workdir, "template.db")
+        period_id = _seed_database(external_url or f"sqlite:///{template_path}", size)
+
+        baseline = None
+        for workers in worker_counts:
+            database_url = external_url or _fresh_copy(template_path, workdir, workers)
+
+            start = time.perf_counter()
+            summary = ShardedSettlementService.settle_period(period_id, workers=workers, database_url=database_url)
+            seconds = time.perf_counter() - start
+
+            phases = summary["phases"]
+            totals = {
+                phase: (phases[phase]["commissions"], phases[phase]["total_amount"], phases[phase]["by_member"])
+                for phase in ("unilevel", "matching")
+            }
+            if baseline is None:
+                baseline = totals
+            assert totals == baseline, f"Totales distintos al camino secuencial con {workers} workers"
+
+            results.append({
+                "workers": workers,
+                "seconds": seconds,
+                "phase_seconds": {phase: phases[phase]["seconds"] for phase in phases},
+                "unilevel_total": phases["unilevel"]["total_amount"],
+                "matching_total": phases["matching"]["total_amount"],
+                "commissions": phases["unilevel"]["commissions"] + phases["matching"]["commissions"],
+                "deposited": phases["deposit"]["deposited_count"],
+            })
+
+            if external_url:
+                break  # Una BD externa ya quedó liquidada
+
+    return results
+
+
+def test_sharded_settlement_performance():
+    """
+    Test rápido (2,000 miembros): 2 workers dan los mismos totales que 1.
+    """
+    results = run_benchmark(size=2_000, worker_counts=[1, 2])
+
+    assert results[0]["commissions"] > 0
+    assert results[0]["deposited"] == results[1]["deposited"] == results[0]["commissions"]
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 80)
+    print(f"🚀 BENCHMARK: LIQUIDACIÓN POR SHARDS ({NETWORK_SIZE:,} miembros, {os.cpu_count()} CPUs)")
+    print("=" * 80)
+
+    benchmark_results = run_benchmark()
+    baseline_seconds = benchmark_results[0]["seconds"]
+
+    print(f"\n{'Workers':>8} {'Total (s)':>10} {'Uninivel':>9} {'Matching':>9} {'Depósito':>9} {'Speedup':>8}")
+    print("-" * 60)
+    for row in benchmark_results:
+        phase_seconds = row["phase_seconds"]
+        print(f"{row['workers']:>8} {row['seconds']:>10.2f} {phase_seconds['unilevel']:>9.2f} "
+              f"{phase_seconds['matching']:>9.2f} {phase_seconds['deposit']:>9.2f} "
+              f"{baseline_seconds / row['seconds']:>7.2f}x")
+
+    print(f"\n   Comisiones: {benchmark_results[0]['commissions']:,} | "
+          f"Uninivel: {benchmark_results[0]['unilevel_total']!r} | Matching: {benchmark_results[0]['matching_total']!r}")
+    print(f"\n✅ Totales idénticos al camino secuencial en todas las corridas")
@@ -0,0 +1,192 @@
+"""
+Benchmark: Liquidación de comisiones a wallets (deposit_commission por fila vs en bloque)
+
+OBJETIVO:
+- Comparar el patrón histórico del cierre mensual (WalletService.deposit_commission por
+  comisión: SELECT wallet + session.get + INSERT + flush) contra
+  WalletService.settle_pending_commissions (INSERT multi-fila + UPDATE ... FROM + UPDATE)
+- 1,000,000 de comisiones PENDING repartidas en 50,000 wallets
+- El camino por fila se mide sobre una muestra y se extrapola (a 1M tardaría horas)
+- Verificar que ambos caminos dejan los mismos balances
+
+NOTAS:
+- Por defecto corre en SQLite en memoria (sin Supabase). Para medir contra Postgres:
+    BENCHMARK_DATABASE_URL=postgresql://... python test_wallet_settlement_performance.py
+"""
+
+import contextlib
+import io
+import os
+import time
+import sqlmodel
+from datetime import datetime, timezone
+from sqlmodel import Session, SQLModel, create_engine
+
+from database.users import Users
+from database.periods import Periods
+from database.orders import Orders
+from database.comissions import Commissions, CommissionStatus
+from database.wallet import Wallets, WalletTransactions, WalletStatus
+from NNProtect_new_website.mlm_service.wallet_service import WalletService
+
+
+COMMISSIONS = 1_000_000
+MEMBERS = 50_000
+LEGACY_SAMPLE = 5_000
+SETTLEMENT_TARGET_S = 300
+
+
+def _get_benchmark_engine():
+    """Engine de benchmark: Postgres si se indica, SQLite en memoria por defecto."""
+    database_url = os.getenv("BENCHMARK_DATABASE_URL", "sqlite://")
+    engine = create_engine(database_url)
+    SQLModel.metadata.create_all(engine, tables=[
+        Users.__table__, Periods.__table__, Orders.__table__,
+        Commissions.__table__, Wallets.__table__, WalletTransactions.__table__,
+    ])
+    return engine
+
+
+def _seed(session, commissions: int, members: int) -> int:
+    """Siembra usuarios, wallets activas y comisiones PENDING. Regresa el period_id."""
+    session.execute(sqlmodel.delete(WalletTransactions))
+    session.execute(sqlmodel.delete(Commissions))
+    session.execute(sqlmodel.delete(Wallets))
+    session.execute(sqlmodel.delete(Periods))
+    session.execute(sqlmodel.delete(Users))
+
+    now = datetime.now(timezone.utc)
+    period = Periods(name="2025-10", starts_on=now, ends_on=now)
+    session.add(period)
+    session.flush()
+
+    session.execute(
+        sqlmodel.insert(Users),
+        [{"member_id": m, "first_name": f"Bench_{m}", "last_name": "Wallet"} for m in range(1, members + 1)]
+    )
+    session.execute(
+        sqlmodel.insert(Wallets),
+        [
+            {"member_id": m, "balance": 0.0, "currency": "MXN", "status": WalletStatus.ACTIVE.value}
+            for m in range(1, members + 1)
+        ]
+    )
+
+    chunk = 50_000
+    for offset in range(0, commissions, chunk):
+        session.execute(
+            sqlmodel.insert(Commissions),
+            [
+                {
+                    "member_id": i % members + 1,
+                    "bonus_type": "bono_uninivel",
+                    "period_id": period.id,
+                    "amount_vn": 1.5,
+                    "currency_origin": "MXN",
+                    "amount_converted": 1.5,
+                    "currency_destination": "MXN",
+                    "status": CommissionStatus.PENDING.value,
+                    "notes": f"Uninivel #{i}",
+                }
+                for i in range(offset, min(offset + chunk, commissions))
+            ]
+        )
+
+    session.commit()
+    return period.id
+
+
+def _legacy_deposit(session, period_id: int) -> None:
+    """Reproducción del patrón original del cierre: deposit_commission por comisión."""
+    pending = session.exec(
+        sqlmodel.select(Commissions).where(
+            (Commissions.period_id == period_id) &
+            (Commissions.status == CommissionStatus.PENDING.value)
+        )
+    ).all()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for commission in pending:
+            WalletService.deposit_commission(
+                session=session,
+                member_id=commission.member_id,
+                commission_id=commission.id,
+                amount=commission.amount_converted,
+                currency=commission.currency_destination,
+                description=commission.notes
+            )
+
+
+def _balances(session) -> dict:
+    return dict(session.exec(sqlmodel.select(Wallets.member_id, Wallets.balance)).all())
+
+
+def run_benchmark(commissions: int = COMMISSIONS, members: int = MEMBERS, legacy_sample: int = LEGACY_SAMPLE) -> dict:
+    """
+    Mide ambos caminos: por fila sobre la muestra y en bloque sobre el total.
+
+    Returns:
+        Dict con commissions, legacy_sample_s, legacy_extrapolated_s y bulk_s
+    """
+    engine = _get_benchmark_engine()
+
+    with Session(engine) as session:
+        # Camino por fila sobre la muestra
+        period_id = _seed(session, legacy_sample, members)
+        start = time.perf_counter()
+        _legacy_deposit(session, period_id)
+        session.flush()
+        legacy_sample_s = time.perf_counter() - start
+        legacy_balances = _balances(session)
+        session.rollback()
+
+        # Mismo resultado en bloque sobre la muestra
+        WalletService.settle_pending_commissions(session, period_id)
+        assert _balances(session) == legacy_balances, "Balances distintos entre implementaciones"
+        session.rollback()
+
+        # Camino en bloque sobre el total
+        period_id = _seed(session, commissions, members)
+        start = time.perf_counter()
+        settlement = WalletService.settle_pending_commissions(session, period_id)
+        session.flush()
+        bulk_s = time.perf_counter() - start
+
+        transactions = session.exec(sqlmodel.select(sqlmodel.func.count(WalletTransactions.id))).one()
+        session.rollback()
+
+    engine.dispose()
+
+    assert settlement["deposited_count"] == commissions
+    assert transactions == commissions
+
+    return {
+        "commissions": commissions,
+        "legacy_sample_s": legacy_sample_s,
+        "legacy_extrapolated_s": legacy_sample_s / legacy_sample * commissions,
+        "bulk_s": bulk_s,
+    }
+
+
+def test_wallet_settlement_performance():
+    """
+    Test rápido (20,000 comisiones): mismos balances y en bloque más rápido que por fila.
+    """
+    result = run_benchmark(commissions=20_000, members=2_000, legacy_sample=2_000)
+
+    assert result["bulk_s"] < result["legacy_extrapolated_s"]
+
+
+if __name__ == "__main__":
+    print("\n" + "=" * 80)
+    print(f"🚀 BENCHMARK: LIQUIDACIÓN DE {COMMISSIONS:,} COMISIONES A {MEMBERS:,} WALLETS")
+    print("=" * 80)
+
+    result = run_benchmark()
+
+    print(f"\n   Por fila (muestra {LEGACY_SAMPLE:,}):  {result['legacy_sample_s']:.2f}s")
+    print(f"   Por fila (extrapolado a {COMMISSIONS:,}): {result['legacy_extrapolated_s'] / 60:.1f} min")
+    print(f"   En bloque ({COMMISSIONS:,}):           {result['bulk_s']:.1f}s")
+
+    status = "✅" if result["bulk_s"] < SETTLEMENT_TARGET_S else "❌"
+    print(f"\n{status} Objetivo en bloque < {SETTLEMENT_TARGET_S // 60} min")
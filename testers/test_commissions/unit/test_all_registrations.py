@@ -0,0 +1,57 @@
+"""
+Tests Unitarios - Histórico completo de inscripciones de la red
+
+Objetivo: Validar que MLMUserManager.iter_all_registrations recorre la red por
+sponsor_id con un solo CTE recursivo que ya trae perfil y sponsor, y que el
+modo streaming entrega los mismos registros en lotes.
+
+Reglas de Negocio:
+- El usuario raíz no aparece en su propia red
+- Orden estable: nivel y luego member_id
+- Los directos del raíz reportan level = 2 (nivel del CTE, raíz = 1)
+"""
+
+import pytest
+
+from database.userprofiles import UserProfiles, UserGender
+from NNProtect_new_website.mlm_service.mlm_user_manager import MLMUserManager
+
+
+@pytest.mark.genealogy
+class TestAllRegistrations:
+    """
+    Suite de tests para el histórico completo de inscripciones.
+    """
+
+    def test_joined_records_in_order(self, db_session, test_network_4_levels):
+        """
+        Red A → B → C → D: cada registro trae teléfono propio y datos del sponsor.
+        """
+        users = test_network_4_levels
+        for key, phone in [('A', '+525500000000'), ('C', '+525500000002')]:
+            db_session.add(UserProfiles(user_id=users[key].id, gender=UserGender.MALE, phone_number=phone))
+        db_session.flush()
+
+        records = [
+            record
+            for batch in MLMUserManager.iter_all_registrations(1000, session=db_session)
+            for record in batch
+        ]
+        by_member = {record["member_id"]: record for record in records}
+
+        assert [record["member_id"] for record in records] == [1001, 1002, 1003]
+        assert [record["level"] for record in records] == [2, 3, 4]
+        assert by_member[1001]["sponsor_member_id"] == 1000
+        assert by_member[1001]["sponsor_full_name"] == "User_1000 Test"
+        assert by_member[1001]["sponsor_phone"] == "+525500000000"
+        assert by_member[1002]["sponsor_phone"] == ""
+        assert by_member[1002]["phone"] == "+525500000002"
+        assert by_member[1003]["phone"] == ""
+
+    def test_streaming_batches(self, db_session, test_network_4_levels):
+        """
+        Con batch_size=2 la red de 3 descendientes llega en lotes [2, 1].
+        """
+        batches = list(MLMUserManager.iter_all_registrations(1000, batch_size=2, session=db_session))
+
+        assert [[record["member_id"] for record in batch] for batch in batches] == [[1001, 1002], [1003]]
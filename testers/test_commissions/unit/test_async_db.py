@@ -0,0 +1,159 @@
+"""
+Tests Unitarios - AsyncDB (acceso a BD no bloqueante para event handlers)
+
+Objetivo: Validar que las consultas lanzadas desde handlers async corren en el
+pool de hilos (no en el event loop), que handlers concurrentes no se
+serializan y que cada llamada queda medida por etiqueta.
+
+Reglas de Negocio:
+- El event loop sigue atendiendo otras tareas mientras una consulta corre
+- N handlers concurrentes tardan ~ lo que el más lento, no la suma
+- Las excepciones de la consulta llegan al handler
+- Un iterador paginado abandonado se cierra (libera su sesión)
+"""
+
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlmodel import Session
+
+from NNProtect_new_website.utils.async_db import AsyncDB
+
+
+QUERY_SECONDS = 0.2
+CONCURRENT_HANDLERS = 5
+
+
+@pytest.fixture
+def stats_reset():
+    AsyncDB.reset_stats()
+    yield
+    AsyncDB.reset_stats()
+
+
+@pytest.fixture
+def slow_engine(tmp_path):
+    """
+    SQLite en archivo (una conexión por hilo) con una función sleep_ms para
+    simular una consulta lenta del lado de la BD.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'async_db.sqlite'}")
+
+    @event.listens_for(engine, "connect")
+    def _register_sleep(dbapi_connection, connection_record):
+        dbapi_connection.create_function("sleep_ms", 1, lambda ms: time.sleep(ms / 1000) or ms)
+
+    yield engine
+    engine.dispose()
+
+
+def _slow_query(engine) -> int:
+    """Consulta síncrona como las de los loaders (abre su propia sesión)."""
+    with Session(engine) as session:
+        return session.exec(text("SELECT sleep_ms(:ms)"), params={"ms": int(QUERY_SECONDS * 1000)}).scalar()
+
+
+async def _handler(engine) -> int:
+    """Handler async típico: la consulta va por AsyncDB."""
+    return await AsyncDB.run(_slow_query, engine, label="test.slow_query")
+
+
+@pytest.mark.performance
+class TestAsyncDB:
+    """
+    Suite de tests para AsyncDB.
+    """
+
+    def test_concurrent_handlers_are_not_serialized(self, slow_engine, stats_reset):
+        """
+        Given: 5 handlers cuya consulta tarda 0.2s cada una
+        When: Se ejecutan concurrentemente en el mismo event loop
+        Then: Terminan en mucho menos que 5 × 0.2s y el loop siguió atendiendo
+        """
+        async def scenario():
+            ticks = 0
+            done = asyncio.Event()
+
+            async def heartbeat():
+                nonlocal ticks
+                while not done.is_set():
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            beat = asyncio.create_task(heartbeat())
+            started = time.perf_counter()
+            results = await asyncio.gather(*[_handler(slow_engine) for _ in range(CONCURRENT_HANDLERS)])
+            elapsed = time.perf_counter() - started
+            done.set()
+            await beat
+            return results, elapsed, ticks
+
+        results, elapsed, ticks = asyncio.run(scenario())
+
+        assert results == [int(QUERY_SECONDS * 1000)] * CONCURRENT_HANDLERS
+        assert elapsed < QUERY_SECONDS * CONCURRENT_HANDLERS / 2
+        assert ticks >= 5  # El loop no quedó bloqueado durante las consultas
+
+        stats = AsyncDB.get_stats()["test.slow_query"]
+        assert stats["calls"] == CONCURRENT_HANDLERS
+        assert stats["max_seconds"] >= QUERY_SECONDS * 0.9
+        assert stats["total_seconds"] >= QUERY_SECONDS * CONCURRENT_HANDLERS * 0.9
+
+    def test_blocking_call_on_loop_would_serialize(self, slow_engine):
+        """
+        Given: Los mismos 5 handlers pero con la consulta directa en el loop
+        When: Se ejecutan concurrentemente
+        Then: Se serializan (referencia de lo que AsyncDB evita)
+        """
+        async def blocking_handler():
+            return _slow_query(slow_engine)
+
+        async def scenario():
+            started = time.perf_counter()
+            await asyncio.gather(*[blocking_handler() for _ in range(CONCURRENT_HANDLERS)])
+            return time.perf_counter() - started
+
+        assert asyncio.run(scenario()) >= QUERY_SECONDS * CONCURRENT_HANDLERS * 0.9
+
+    def test_exceptions_reach_the_handler(self, stats_reset):
+        """
+        Given: Una consulta que falla
+        When: Se ejecuta por AsyncDB
+        Then: La excepción llega al handler y la llamada queda medida
+        """
+        def failing_query():
+            raise ValueError("consulta inválida")
+
+        with pytest.raises(ValueError, match="consulta inválida"):
+            asyncio.run(AsyncDB.run(failing_query, label="test.failing"))
+
+        assert AsyncDB.get_stats()["test.failing"]["calls"] == 1
+
+    def test_iterate_pages_and_closes_abandoned_iterator(self, stats_reset):
+        """
+        Given: Un generador paginado (como iter_network_descendants)
+        When: Se consume con AsyncDB.iterate y se abandona a la mitad
+        Then: Entrega las páginas en orden y el generador se cierra
+        """
+        closed = []
+
+        def pages():
+            try:
+                for page in range(5):
+                    yield [page]
+            finally:
+                closed.append(True)
+
+        async def scenario():
+            received = []
+            async for page in AsyncDB.iterate(pages(), label="test.pages"):
+                received.extend(page)
+                if len(received) == 3:
+                    break
+            return received
+
+        assert asyncio.run(scenario()) == [0, 1, 2]
+        assert closed == [True]
+        assert AsyncDB.get_stats()["test.pages"]["calls"] >= 3
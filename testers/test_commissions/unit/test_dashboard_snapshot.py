@@ -0,0 +1,200 @@
+"""
+Tests Unitarios - DashboardSnapshotService (snapshot del dashboard)
+
+Objetivo: Validar que el dashboard de un miembro (PVG, progresión de rango,
+ganancias por tipo de bono y conteo de calificados) se obtiene con una sola
+consulta y que los renders repetidos se sirven desde el cache por miembro.
+
+Reglas de Negocio:
+- Rango actual = rango más alto del período actual (Sin rango si no hay)
+- Ganancias estimadas = Alcance + Uninivel + Matching del período actual
+- PVG en 0 (período reseteado) muestra ganancias en 0
+- Tras invalidar (ej. nueva orden) se vuelve a leer de BD
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event
+
+from database.comissions import Commissions, BonusType
+from database.periods import Periods
+from database.user_rank_history import UserRankHistory
+from database.users import UserStatus
+from NNProtect_new_website.mlm_service.dashboard_snapshot_service import DashboardSnapshotService
+from NNProtect_new_website.mlm_service.period_resolver import PeriodResolver
+from NNProtect_new_website.mlm_service.rank_ladder import RankLadder
+from NNProtect_new_website.mlm_service.user_status_counter_service import UserStatusCounterService
+
+
+@pytest.fixture
+def snapshot_reset():
+    """Caches por proceso: se descartan antes y después de cada test."""
+    DashboardSnapshotService.invalidate()
+    PeriodResolver.invalidate()
+    RankLadder.invalidate()
+    UserStatusCounterService.invalidate()
+    yield
+    DashboardSnapshotService.invalidate()
+    PeriodResolver.invalidate()
+    RankLadder.invalidate()
+    UserStatusCounterService.invalidate()
+
+
+@pytest.fixture
+def open_period(db_session, snapshot_reset):
+    """Período que cubre la fecha actual."""
+    now = datetime.now(timezone.utc)
+    period = Periods(name="Dashboard Period", starts_on=now - timedelta(days=1), ends_on=now + timedelta(days=30))
+    db_session.add(period)
+    db_session.flush()
+    return period
+
+
+def _add_commission(db_session, member_id, bonus_type, amount, period_id):
+    db_session.add(Commissions(
+        member_id=member_id, bonus_type=bonus_type.value, period_id=period_id,
+        amount_vn=amount, currency_origin="MXN", amount_converted=amount, currency_destination="MXN"
+    ))
+
+
+def _count_statements(db_session, action):
+    """Ejecuta action y regresa (resultado, sentencias SQL enviadas)."""
+    statements = []
+    engine = db_session.connection().engine
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        result = action()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+    return result, statements
+
+
+@pytest.fixture
+def dashboard_member(db_session, ranks, open_period, test_network_simple):
+    """
+    A: PVG 30,000, rango Emprendedor en el período, comisiones de los tres tipos
+    (más un Bono Directo y una comisión de otro período que no cuentan).
+    B calificado, A y C no calificados.
+    """
+    users = test_network_simple
+    users['A'].pvg_cache = 30000
+    users['B'].status = UserStatus.QUALIFIED
+    db_session.add(users['A'])
+    db_session.add(users['B'])
+    db_session.add(UserRankHistory(
+        member_id=1000, rank_id=ranks["Emprendedor"].id, achieved_on=datetime.now(timezone.utc),
+        period_id=open_period.id
+    ))
+
+    old_period = Periods(
+        name="Old Period",
+        starts_on=datetime.now(timezone.utc) - timedelta(days=90),
+        ends_on=datetime.now(timezone.utc) - timedelta(days=60)
+    )
+    db_session.add(old_period)
+    db_session.flush()
+
+    _add_commission(db_session, 1000, BonusType.BONO_ALCANCE, 1500, open_period.id)
+    _add_commission(db_session, 1000, BonusType.BONO_UNINIVEL, 300, open_period.id)
+    _add_commission(db_session, 1000, BonusType.BONO_UNINIVEL, 200, open_period.id)
+    _add_commission(db_session, 1000, BonusType.BONO_MATCHING, 100, open_period.id)
+    _add_commission(db_session, 1000, BonusType.BONO_DIRECTO, 999, open_period.id)
+    _add_commission(db_session, 1000, BonusType.BONO_UNINIVEL, 777, old_period.id)
+    db_session.commit()  # Períodos confirmados: el resolver del proceso los puede cachear
+    return users
+
+
+@pytest.mark.periods
+class TestDashboardSnapshot:
+    """
+    Suite de tests para DashboardSnapshotService.
+    """
+
+    def test_snapshot_values(self, db_session, ranks, dashboard_member):
+        """
+        Given: A con PVG 30,000 en Emprendedor y comisiones del período
+        When: Se obtiene su snapshot
+        Then: Progresión hacia Creativo, ganancias por tipo y conteos correctos
+        """
+        snapshot = DashboardSnapshotService.get_snapshot(db_session, 1000)
+
+        assert snapshot["pvg"] == 30000
+        assert snapshot["current_rank_id"] == ranks["Emprendedor"].id
+        assert snapshot["next_rank_pvg"] == 58000
+        assert snapshot["rank_progress_percentage"] == int(30000 / 58000 * 100)
+        assert snapshot["earnings"] == {
+            BonusType.BONO_ALCANCE.value: 1500.0,
+            BonusType.BONO_UNINIVEL.value: 500.0,
+            BonusType.BONO_MATCHING.value: 100.0,
+        }
+        assert snapshot["estimated_monthly_earnings"] == pytest.approx(2100.0)
+        assert snapshot["qualified_count"] == 1
+        assert snapshot["non_qualified_count"] == 2
+
+    def test_single_statement_then_cached(self, db_session, dashboard_member):
+        """
+        Given: Período, escalera de rangos y contadores por status ya en memoria
+        When: Se pide el snapshot dos veces seguidas
+        Then: La primera ejecuta una sola sentencia y la segunda ninguna
+        """
+        PeriodResolver.get_current(db_session)
+        RankLadder.get_shared(db_session)
+        UserStatusCounterService.get_counts(db_session)
+
+        first, statements = _count_statements(db_session, lambda: DashboardSnapshotService.get_snapshot(db_session, 1000))
+        assert len(statements) == 1
+
+        second, statements = _count_statements(db_session, lambda: DashboardSnapshotService.get_snapshot(db_session, 1000))
+        assert statements == []
+        assert second is first
+
+        assert (second["qualified_count"], second["non_qualified_count"]) == (1, 2)
+
+    def test_invalidate_reloads(self, db_session, dashboard_member, open_period):
+        """
+        Given: Un snapshot cacheado
+        When: Se agrega una comisión y se invalida el miembro
+        Then: El siguiente snapshot ya la incluye
+        """
+        assert DashboardSnapshotService.get_snapshot(db_session, 1000)["estimated_monthly_earnings"] == pytest.approx(2100.0)
+
+        _add_commission(db_session, 1000, BonusType.BONO_MATCHING, 400, open_period.id)
+        db_session.flush()
+
+        assert DashboardSnapshotService.get_snapshot(db_session, 1000)["estimated_monthly_earnings"] == pytest.approx(2100.0)
+        DashboardSnapshotService.invalidate(1000)
+        assert DashboardSnapshotService.get_snapshot(db_session, 1000)["estimated_monthly_earnings"] == pytest.approx(2500.0)
+        assert DashboardSnapshotService.get_snapshot(db_session, 1000, use_cache=False)["earnings"][BonusType.BONO_MATCHING.value] == pytest.approx(500.0)
+
+    def test_zero_pvg_shows_zero_earnings(self, db_session, dashboard_member):
+        """
+        Given: A con comisiones en el período pero PVG reseteado a 0
+        When: Se obtiene su snapshot
+        Then: Ganancias en 0 y progreso hacia Creativo en 0%
+        """
+        dashboard_member['A'].pvg_cache = 0
+        db_session.add(dashboard_member['A'])
+        db_session.flush()
+
+        snapshot = DashboardSnapshotService.get_snapshot(db_session, 1000)
+
+        assert snapshot["estimated_monthly_earnings"] == 0.0
+        assert set(snapshot["earnings"].values()) == {0.0}
+        assert snapshot["rank_progress_percentage"] == 0
+
+    def test_unknown_member_and_no_period(self, db_session, snapshot_reset, test_network_simple):
+        """
+        Given: Sin período que cubra hoy
+        When: Se pide el snapshot de un miembro inexistente y de uno existente
+        Then: None para el inexistente; Sin rango y sin ganancias para el existente
+        """
+        assert DashboardSnapshotService.get_snapshot(db_session, 9999) is None
+
+        snapshot = DashboardSnapshotService.get_snapshot(db_session, 1001)
+        assert snapshot["period_id"] is None
+        assert snapshot["current_rank_id"] == 1
+        assert snapshot["estimated_monthly_earnings"] == 0.0
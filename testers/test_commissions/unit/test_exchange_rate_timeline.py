@@ -0,0 +1,142 @@
+"""
+Tests Unitarios - ExchangeRateTimeline (tasas de cambio en memoria)
+
+Objetivo: Validar que las conversiones usan la tasa vigente desde la línea de
+tiempo en memoria (sin query por conversión), que create_exchange_rate la
+refresca y que las comisiones registran la tasa realmente aplicada.
+
+Reglas de Negocio:
+- Tasa vigente = effective_from más reciente <= fecha, con vigencia no terminada
+- Misma moneda o sin tasa: conversión 1:1 (tasa 1.0)
+- Una tasa nueva aplica desde la siguiente conversión
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event
+from sqlmodel import select
+
+from database.comissions import Commissions
+from database.periods import Periods
+from NNProtect_new_website.mlm_service.commission_service import CommissionService
+from NNProtect_new_website.mlm_service.exchange_rate_timeline import ExchangeRateTimeline
+from NNProtect_new_website.mlm_service.exchange_service import ExchangeService
+
+
+@pytest.fixture
+def timeline_reset():
+    """La línea de tiempo es por proceso: se descarta antes y después de cada test."""
+    ExchangeRateTimeline.invalidate()
+    yield
+    ExchangeRateTimeline.invalidate()
+
+
+def _utc(year, month, day):
+    return datetime(year, month, day, tzinfo=timezone.utc)
+
+
+@pytest.mark.currency
+class TestExchangeRateTimeline:
+    """
+    Suite de tests para la línea de tiempo de tasas de cambio.
+    """
+
+    def test_rate_for_respects_effective_dates(self, timeline_reset):
+        """
+        Given: MXN→USD 0.05 (2024, vence fin de 2024), 0.055 (2025) y 0.06 (jul 2025)
+        When: Se consulta la tasa en distintas fechas
+        Then: Se usa la vigencia más reciente ya iniciada y no vencida
+        """
+        timeline = ExchangeRateTimeline([
+            ("MXN", "USD", 0.055, datetime(2025, 1, 1), None),
+            ("MXN", "USD", 0.05, datetime(2024, 1, 1), datetime(2024, 12, 31)),
+            ("MXN", "USD", 0.06, datetime(2025, 7, 1), None),
+        ])
+
+        assert timeline.rate_for("MXN", "USD", _utc(2023, 6, 1)) is None
+        assert timeline.rate_for("MXN", "USD", _utc(2024, 6, 1)) == 0.05
+        assert timeline.rate_for("MXN", "USD", _utc(2025, 1, 1)) == 0.055
+        assert timeline.rate_for("MXN", "USD", _utc(2025, 6, 30)) == 0.055
+        assert timeline.rate_for("MXN", "USD", _utc(2026, 1, 1)) == 0.06
+        assert timeline.rate_for("USD", "MXN", _utc(2026, 1, 1)) is None
+
+    def test_convert_with_rate_exposes_rate(self, db_session, setup_exchange_rates, timeline_reset):
+        """
+        Given: Tasas de prueba (1 MXN = 0.055 USD)
+        When: Se convierte entre monedas distintas, iguales y sin tasa
+        Then: Regresa el monto y la tasa usada (1.0 si no hubo conversión)
+        """
+        as_of = _utc(2025, 10, 15)
+
+        assert ExchangeService.convert_with_rate(db_session, 1000, "MXN", "USD", as_of) == pytest.approx((55.0, 0.055))
+        assert ExchangeService.convert_with_rate(db_session, 1000, "MXN", "MXN", as_of) == (1000, 1.0)
+        assert ExchangeService.convert_with_rate(db_session, 1000, "MXN", "EUR", as_of) == (1000, 1.0)
+        assert ExchangeService.convert_amount(db_session, 1000, "USD", "MXN", as_of) == pytest.approx(18000.0)
+
+    def test_repeated_conversions_do_not_query(self, db_session, setup_exchange_rates, timeline_reset):
+        """
+        Given: Tasas confirmadas y la línea de tiempo ya cargada
+        When: Se hacen 300 conversiones
+        Then: No se ejecuta ningún SELECT sobre exchangerates
+        """
+        db_session.commit()
+        as_of = _utc(2025, 10, 15)
+        ExchangeService.convert_amount(db_session, 1, "MXN", "USD", as_of)
+
+        statements = []
+        engine = db_session.connection().engine
+
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            if "exchangerates" in statement:
+                statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_execute)
+        try:
+            for amount in range(100):
+                ExchangeService.convert_amount(db_session, amount, "MXN", "USD", as_of)
+                ExchangeService.convert_amount(db_session, amount, "USD", "COP", as_of)
+                ExchangeService.convert_amount(db_session, amount, "COP", "MXN", as_of)
+        finally:
+            event.remove(engine, "before_cursor_execute", before_execute)
+
+        assert statements == []
+
+    def test_create_exchange_rate_refreshes_timeline(self, db_session, setup_exchange_rates, timeline_reset):
+        """
+        Given: La línea de tiempo cargada con 1 MXN = 0.055 USD
+        When: Se crea una tasa nueva de 0.06 vigente desde hoy
+        Then: La siguiente conversión ya usa 0.06; el proceso la cachea solo tras el commit
+        """
+        assert ExchangeService.convert_amount(db_session, 100, "MXN", "USD") == pytest.approx(5.5)
+
+        ExchangeService.create_exchange_rate(
+            db_session, "MXN", "USD", 0.06, effective_from=datetime.now(timezone.utc) - timedelta(minutes=1)
+        )
+
+        assert ExchangeService.convert_with_rate(db_session, 100, "MXN", "USD") == pytest.approx((6.0, 0.06))
+        assert ExchangeRateTimeline._cache.peek() is None  # Sin commit: no se publica al proceso
+
+        db_session.commit()
+
+        assert ExchangeService.convert_with_rate(db_session, 100, "MXN", "USD") == pytest.approx((6.0, 0.06))
+        assert ExchangeRateTimeline._cache.peek() is not None
+
+    def test_direct_bonus_records_applied_rate(self, db_session, setup_exchange_rates, test_network_multi_country, timeline_reset):
+        """
+        Given: C (Colombia) compra; su sponsor B está en USA
+        When: Se procesa el Bono Directo de 100,000 COP de VN
+        Then: La comisión registra exchange_rate = 0.00025 (COP → USD)
+        """
+        now = datetime.now(timezone.utc)
+        db_session.add(Periods(name="Rates Period", starts_on=now - timedelta(days=1), ends_on=now + timedelta(days=30)))
+        db_session.flush()
+
+        commission_id = CommissionService.process_direct_bonus(
+            db_session, buyer_id=1002, order_id=None, vn_amount=100000
+        )
+
+        commission = db_session.exec(select(Commissions).where(Commissions.id == commission_id)).one()
+        assert commission.currency_origin == "COP"
+        assert commission.currency_destination == "USD"
+        assert commission.exchange_rate == pytest.approx(0.00025)
+        assert commission.amount_converted == pytest.approx(25000 * 0.00025)
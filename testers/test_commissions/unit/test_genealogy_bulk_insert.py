@@ -0,0 +1,82 @@
+"""
+Tests Unitarios - Inserción de genealogía (UserTreePath)
+
+Objetivo: Validar que GenealogyService.add_member_to_tree (INSERT ... SELECT) y
+add_members_to_tree_bulk (INSERTs multi-fila) producen exactamente la misma
+closure table.
+
+Reglas de Negocio:
+- Cada miembro tiene su path self (depth=0)
+- Cada miembro hereda los paths de su sponsor con depth + 1
+- El lote puede colgar de sponsors que ya existen en BD
+"""
+
+import pytest
+from sqlmodel import select
+
+from database.usertreepaths import UserTreePath
+from NNProtect_new_website.mlm_service.genealogy_service import GenealogyService
+
+
+def _paths(db_session, member_ids) -> set:
+    rows = db_session.exec(
+        select(UserTreePath.ancestor_id, UserTreePath.descendant_id, UserTreePath.depth)
+        .where(UserTreePath.descendant_id.in_(member_ids))
+    ).all()
+    return set(rows)
+
+
+@pytest.mark.genealogy
+class TestGenealogyBulkInsert:
+    """
+    Suite de tests para la inserción de UserTreePath.
+    """
+
+    def test_single_registration_copies_sponsor_paths(self, db_session, test_network_simple):
+        """
+        Escenario:
+            A → B → C
+
+        Esperado:
+            - C tiene paths (C,0), (B,1), (A,2) ✅
+        """
+        users = test_network_simple
+        c = users['C'].member_id
+
+        assert _paths(db_session, [c]) == {
+            (c, c, 0),
+            (users['B'].member_id, c, 1),
+            (users['A'].member_id, c, 2),
+        }
+
+    def test_bulk_matches_single_registration(self, db_session, test_network_simple):
+        """
+        Un lote 2x2 colgado de C produce los mismos paths que registrar uno por uno.
+        """
+        users = test_network_simple
+        c = users['C'].member_id
+        batch = [(5001, c), (5002, c), (5003, 5001), (5004, 5001), (5005, 5002), (5006, 5002)]
+        single = [(1000 + member_id, c if sponsor_id == c else 1000 + sponsor_id) for member_id, sponsor_id in batch]
+
+        created = GenealogyService.add_members_to_tree_bulk(db_session, batch)
+        for member_id, sponsor_id in single:
+            GenealogyService.add_member_to_tree(db_session, member_id, sponsor_id)
+
+        bulk_paths = _paths(db_session, [member_id for member_id, _ in batch])
+        single_paths = {
+            (ancestor_id if ancestor_id <= c else ancestor_id - 1000, descendant_id - 1000, depth)
+            for ancestor_id, descendant_id, depth in _paths(db_session, [member_id for member_id, _ in single])
+        }
+
+        # 2 hijos de C (4 paths c/u) + 4 nietos (5 paths c/u)
+        assert created == 2 * 4 + 4 * 5
+        assert bulk_paths == single_paths
+
+    def test_bulk_root_member(self, db_session):
+        """
+        Un miembro sin sponsor solo tiene su path self.
+        """
+        created = GenealogyService.add_members_to_tree_bulk(db_session, [(7000, None), (7001, 7000)])
+
+        assert created == 3
+        assert _paths(db_session, [7000, 7001]) == {(7000, 7000, 0), (7001, 7001, 0), (7000, 7001, 1)}
@@ -0,0 +1,145 @@
+"""
+Tests Unitarios - Índice genealógico en memoria
+
+Objetivo: Validar que GenealogyIndex (arreglos parent/first_child/next_sibling +
+recorrido de Euler) responde igual que UserTreePath, incluyendo miembros
+registrados después de construir el índice.
+
+Reglas de Negocio:
+- is_ancestor es estricto (un miembro no es ancestro de sí mismo)
+- Upline ordenado por cercanía, downline ordenado por profundidad
+- Los registros se aplican al índice compartido solo al hacer commit
+- Los registros de otros workers se ven tras FRESHNESS_CHECK_SECONDS
+"""
+
+import pytest
+
+from NNProtect_new_website.mlm_service.genealogy_index import GenealogyIndex
+from NNProtect_new_website.mlm_service.genealogy_service import GenealogyService
+
+
+# Árbol:
+#        1
+#      /   \
+#     2     3
+#    / \     \
+#   4   5     6
+#   |
+#   7
+TREE = [(1, None), (2, 1), (3, 1), (4, 2), (5, 2), (6, 3), (7, 4)]
+
+
+@pytest.fixture
+def shared_index():
+    GenealogyIndex.reset_shared()
+    yield
+    GenealogyIndex.reset_shared()
+
+
+@pytest.mark.genealogy
+class TestGenealogyIndex:
+    """
+    Suite de tests para GenealogyIndex.
+    """
+
+    def test_ancestor_checks(self):
+        index = GenealogyIndex(TREE)
+
+        assert index.is_ancestor(1, 7)
+        assert index.is_ancestor(2, 7)
+        assert not index.is_ancestor(3, 7)
+        assert not index.is_ancestor(7, 2)
+        assert not index.is_ancestor(4, 4)
+        assert index.get_depth(1, 7) == 3
+        assert index.get_depth(3, 7) is None
+
+    def test_upline_and_downline(self):
+        index = GenealogyIndex(TREE)
+
+        assert index.get_upline_ids(7) == [4, 2, 1]
+        assert index.get_upline_ids(7, max_depth=2) == [4, 2]
+        assert index.get_downline_ids(2) == [4, 5, 7]
+        assert index.get_downline_ids(1, max_depth=1) == [2, 3]
+        assert index.count_downline(1) == 6
+        assert index.count_downline(1, max_depth=2) == 5
+        assert index.count_downline(7) == 0
+
+    def test_pending_members_before_and_after_rebuild(self):
+        """
+        Registros nuevos se responden como pendientes y luego vía recorrido de Euler.
+        """
+        index = GenealogyIndex(TREE)
+        index.add_member(8, 7)
+        index.add_member(9, 8)
+        index.add_member(10, 6)
+
+        assert index.is_ancestor(2, 9)
+        assert index.is_ancestor(8, 9)
+        assert not index.is_ancestor(3, 9)
+        assert index.get_upline_ids(9) == [8, 7, 4, 2, 1]
+        assert index.get_downline_ids(4) == [7, 8, 9]
+        assert index.count_downline(1) == 9
+
+        index._build_euler_tour()
+
+        assert index.get_downline_ids(4) == [7, 8, 9]
+        assert index.count_downline(3) == 2
+        assert index.get_depth(1, 9) == 5
+
+    def test_matches_closure_table(self, db_session, test_network_4_levels, create_test_user, shared_index):
+        """
+        GenealogyService con use_index=True devuelve lo mismo que UserTreePath.
+        """
+        users = test_network_4_levels
+        create_test_user(member_id=1004, sponsor_id=1001)
+
+        for member_id in (1000, 1001, 1003, 1004):
+            assert [u.member_id for u in GenealogyService.get_upline(db_session, member_id, use_index=True)] == \
+                [u.member_id for u in GenealogyService.get_upline(db_session, member_id)]
+            assert GenealogyService.count_downline(db_session, member_id, use_index=True) == \
+                GenealogyService.count_downline(db_session, member_id)
+
+        assert sorted(u.member_id for u in GenealogyService.get_downline(db_session, 1001, use_index=True)) == \
+            [1002, 1003, 1004]
+        assert GenealogyService.is_ancestor(db_session, users['A'].member_id, 1004, use_index=True)
+        assert not GenealogyService.is_ancestor(db_session, users['C'].member_id, 1004, use_index=True)
+
+    def test_registration_applied_on_commit(self, db_session, test_network_simple, create_test_user, shared_index):
+        """
+        Un registro aparece en el índice compartido solo tras el commit.
+        """
+        index = GenealogyIndex.get_shared(db_session)
+        create_test_user(member_id=1005, sponsor_id=1002)
+
+        assert 1005 not in index
+
+        db_session.commit()
+
+        assert index.get_upline_ids(1005) == [1002, 1001, 1000]
+
+    def test_registrations_from_other_workers(self, db_session, test_network_simple, create_test_user,
+                                              shared_index, monkeypatch):
+        """
+        Registros hechos en otro proceso (sin register_on_commit en este) se
+        agregan al verificar frescura; un alta fuera de orden o MAX_AGE_SECONDS reconstruye.
+        """
+        index = GenealogyIndex.get_shared(db_session)
+
+        def register_elsewhere(member_id, sponsor_id):
+            create_test_user(member_id=member_id, sponsor_id=sponsor_id)
+            db_session.info.pop(GenealogyIndex.SESSION_PENDING_KEY, None)
+
+        register_elsewhere(1005, 1002)
+        assert 1005 not in GenealogyIndex.get_shared(db_session)  # Aún no toca verificar
+
+        monkeypatch.setattr(GenealogyIndex, "FRESHNESS_CHECK_SECONDS", -1)
+        assert GenealogyIndex.get_shared(db_session) is index
+        assert index.get_upline_ids(1005) == [1002, 1001, 1000]
+
+        register_elsewhere(999, 1000)
+        rebuilt = GenealogyIndex.get_shared(db_session)
+        assert rebuilt is not index
+        assert rebuilt.get_upline_ids(999) == [1000]
+
+        monkeypatch.setattr(GenealogyIndex, "MAX_AGE_SECONDS", -1)
+        assert GenealogyIndex.get_shared(db_session) is not rebuilt
@@ -0,0 +1,157 @@
+"""
+Tests Unitarios - JobRunner (lock por job e historial)
+
+Objetivo: Validar que JobRunner.run ejecuta un job solo si obtiene el lock de
+su job_id y registra cada ejecución (estado, filas, duración, error) en jobruns.
+
+Reglas de Negocio:
+- Mientras un worker tiene el lock, otro disparo del mismo job no se ejecuta
+- Jobs distintos no se bloquean entre sí
+- Un job fallido queda FAILED con su error y libera el lock
+- Un disparo programado (scheduled_for) ya COMPLETED no se repite; uno FAILED sí
+- Por default corre sobre SQLite (tabla joblocks); con JOB_RUNNER_TEST_POSTGRES_URL
+  también se prueba el advisory lock de Postgres
+"""
+
+import os
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlalchemy.pool import StaticPool
+
+from database.job_runs import JobRuns, JobLocks, JobRunStatus
+from NNProtect_new_website.jobs.job_runner import JobRunner
+
+
+POSTGRES_URL = os.getenv("JOB_RUNNER_TEST_POSTGRES_URL")
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def runner_engine(request):
+    """
+    Engine propio (el runner hace commit fuera de la transacción de db_session).
+    """
+    if request.param == "postgresql":
+        if not POSTGRES_URL:
+            pytest.skip("JOB_RUNNER_TEST_POSTGRES_URL no configurada")
+        engine = create_engine(POSTGRES_URL)
+    else:
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+    tables = [JobRuns.__table__, JobLocks.__table__]
+    SQLModel.metadata.create_all(engine, tables=tables)
+    yield engine
+    SQLModel.metadata.drop_all(engine, tables=tables)
+    engine.dispose()
+
+
+def _runs(engine, job_id=None):
+    with Session(engine) as session:
+        return JobRunner.get_recent_runs(session, job_id=job_id)
+
+
+@pytest.mark.periods
+class TestJobRunner:
+    """
+    Suite de tests para JobRunner.
+    """
+
+    def test_concurrent_trigger_is_skipped(self, runner_engine):
+        """
+        Mientras finalize_periods corre, un segundo disparo no se ejecuta;
+        otro job sí. Solo quedan registradas las ejecuciones reales.
+        """
+        calls = []
+
+        def other_job():
+            calls.append("other")
+            return 3
+
+        def finalize_job():
+            calls.append("finalize")
+            nested = JobRunner.run("finalize_periods", lambda: calls.append("duplicate"), engine=runner_engine)
+            other = JobRunner.run("other_job", other_job, engine=runner_engine)
+            return {"rows_affected": 2, "nested": nested, "other": other}
+
+        result = JobRunner.run("finalize_periods", finalize_job, engine=runner_engine)
+        runs = {run.job_id: run for run in _runs(runner_engine)}
+
+        assert calls == ["finalize", "other"]
+        assert result["nested"] is None and result["other"] == 3
+        assert len(_runs(runner_engine)) == 2
+        assert runs["finalize_periods"].status == JobRunStatus.COMPLETED.value
+        assert runs["finalize_periods"].rows_affected == 2
+        assert runs["other_job"].rows_affected == 3
+        assert runs["finalize_periods"].finished_at is not None
+
+    def test_failed_job_is_recorded_and_releases_lock(self, runner_engine):
+        """
+        El error queda en jobruns y el siguiente disparo obtiene el lock.
+        """
+        def failing_job():
+            raise RuntimeError("período sin cerrar")
+
+        assert JobRunner.run("monthly_period_and_reset", failing_job, engine=runner_engine) is None
+        assert JobRunner.run("monthly_period_and_reset", lambda: 5, engine=runner_engine) == 5
+
+        latest, failed = _runs(runner_engine, job_id="monthly_period_and_reset")
+
+        assert failed.status == JobRunStatus.FAILED.value
+        assert failed.error == "período sin cerrar"
+        assert latest.status == JobRunStatus.COMPLETED.value and latest.rows_affected == 5
+
+    def test_expired_table_lock_is_taken_over(self, runner_engine):
+        """
+        Un lock de tabla vencido (worker caído) no bloquea el job para siempre.
+        """
+        if runner_engine.dialect.name == "postgresql":
+            pytest.skip("El advisory lock se libera al cerrar la conexión del worker")
+
+        now = datetime.now(timezone.utc)
+        with Session(runner_engine) as session:
+            session.add(JobLocks(job_id="finalize_periods", owner="dead-worker",
+                                 acquired_at=now - timedelta(hours=7), expires_at=now - timedelta(hours=1)))
+            session.add(JobLocks(job_id="sharded_settlement", owner="live-worker",
+                                 acquired_at=now, expires_at=now + timedelta(hours=1)))
+            session.commit()
+
+        assert JobRunner.run("finalize_periods", lambda: 1, engine=runner_engine) == 1
+        assert JobRunner.run("sharded_settlement", lambda: 1, engine=runner_engine) is None
+
+        with Session(runner_engine) as session:
+            owners = session.exec(select(JobLocks.owner)).all()
+
+        assert owners == ["live-worker"]
+
+    def test_completed_slot_is_not_repeated(self, runner_engine):
+        """
+        Un worker atrasado que toma el lock después de que otro completó el mismo
+        disparo no lo repite; un disparo fallido o el siguiente disparo sí corren.
+        """
+        calls = []
+        first_of_month = datetime(2026, 11, 1, tzinfo=timezone.utc)
+        next_month = datetime(2026, 12, 1, tzinfo=timezone.utc)
+
+        def monthly_job():
+            calls.append(len(calls))
+            if len(calls) == 1:
+                raise RuntimeError("BD no disponible")
+            return 1
+
+        def run(scheduled_for):
+            return JobRunner.run("monthly_period_and_reset", monthly_job, engine=runner_engine,
+                                 scheduled_for=scheduled_for)
+
+        assert run(first_of_month) is None          # Falla: el disparo queda sin completar
+        assert run(first_of_month) == 1             # Reintento del mismo disparo
+        assert run(first_of_month) is None          # Worker atrasado: ya completado
+        assert run(next_month) == 1
+        assert run(None) == 1                       # Ejecución manual: sin deduplicar
+
+        runs = _runs(runner_engine, job_id="monthly_period_and_reset")
+        assert len(calls) == 4 and len(runs) == 4
+        assert sorted((run.scheduled_for, run.status) for run in runs if run.scheduled_for) == [
+            (datetime(2026, 11, 1), JobRunStatus.COMPLETED.value),
+            (datetime(2026, 11, 1), JobRunStatus.FAILED.value),
+            (datetime(2026, 12, 1), JobRunStatus.COMPLETED.value),
+        ]
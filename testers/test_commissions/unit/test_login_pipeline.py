@@ -0,0 +1,138 @@
+"""
+Tests Unitarios - LoginPipeline (login con fases en paralelo)
+
+Objetivo: Validar que el login corre Supabase Auth y la carga del perfil MLM
+en paralelo, que cada fase queda medida y que el prefetch por email solo se
+usa si corresponde al usuario autenticado. Supabase se sustituye por
+LocalSupabaseClient (sin red) con latencia simulada.
+
+Reglas de Negocio:
+- Login exitoso ≈ max(auth, BD), no la suma de ambas
+- Credenciales inválidas no exponen el perfil pre-cargado
+- Si el email_cache no coincide, el perfil se carga por supabase_user_id
+- El JWT se genera con los datos ya cargados
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+
+import jwt
+import pytest
+
+from NNProtect_new_website.auth_service.auth_state import LoginPipeline
+from NNProtect_new_website.auth_service.local_supabase_client import LocalSupabaseClient
+
+
+NETWORK_SECONDS = 0.3
+PASSWORD = "Secreto123!"
+
+
+@pytest.fixture
+def stats_reset():
+    LoginPipeline.reset_stats()
+    yield
+    LoginPipeline.reset_stats()
+
+
+@contextmanager
+def _nullsession(session):
+    """Usa la sesión del test como si la abriera el pipeline."""
+    yield session
+
+
+@pytest.fixture
+def slow_session_factory(db_session):
+    """Sesión del test con latencia de ida y vuelta a la BD remota."""
+    @contextmanager
+    def _factory():
+        time.sleep(NETWORK_SECONDS)
+        yield db_session
+
+    return _factory
+
+
+@pytest.fixture
+def login_user_a(db_session, test_network_simple):
+    """A registrado en Supabase (cliente local) y en el MLM con el mismo email."""
+    user_a = test_network_simple['A']
+    client = LocalSupabaseClient(latency_seconds=NETWORK_SECONDS)
+    supabase_user_id = client.add_user("user1000@test.com", PASSWORD, first_name="User_1000")
+
+    user_a.email_cache = "user1000@test.com"
+    user_a.supabase_user_id = supabase_user_id
+    db_session.add(user_a)
+    db_session.flush()
+    return client, user_a
+
+
+@pytest.mark.performance
+class TestLoginPipeline:
+    """
+    Suite de tests para LoginPipeline.
+    """
+
+    def test_auth_and_profile_run_in_parallel(self, login_user_a, slow_session_factory, stats_reset):
+        """
+        Given: Supabase y la BD tardan 0.3s cada uno
+        When: A inicia sesión
+        Then: Termina en ~0.3s (no 0.6s), con perfil, JWT y métricas por fase
+        """
+        client, user_a = login_user_a
+        pipeline = LoginPipeline(auth_client=client, session_factory=slow_session_factory)
+
+        result = asyncio.run(pipeline.run("user1000@test.com", PASSWORD))
+
+        assert result.success
+        assert result.user_data["member_id"] == 1000
+        assert result.supabase_user_data["id"] == user_a.supabase_user_id
+        token_payload = jwt.decode(result.token, options={"verify_signature": False})
+        assert token_payload["id"] == user_a.id
+        assert result.token_issued_at == token_payload["iat"]
+
+        metrics = result.metrics
+        assert metrics["prefetch_hit"] is True
+        assert set(metrics["steps"]) == {"supabase_auth", "profile_prefetch", "jwt"}
+        assert metrics["steps"]["supabase_auth"] >= NETWORK_SECONDS * 0.9
+        assert metrics["steps"]["profile_prefetch"] >= NETWORK_SECONDS * 0.9
+        assert metrics["total_seconds"] < NETWORK_SECONDS * 1.7
+        assert metrics["parallel_savings_seconds"] >= NETWORK_SECONDS * 0.5
+
+        stats = LoginPipeline.get_stats()
+        assert stats["supabase_auth"]["calls"] == 1
+        assert stats["total"]["calls"] == 1
+
+    def test_invalid_credentials(self, login_user_a, db_session):
+        """
+        Given: A registrado
+        When: Inicia sesión con contraseña incorrecta
+        Then: Falla con el mensaje de Supabase y sin datos del perfil
+        """
+        client, _ = login_user_a
+        pipeline = LoginPipeline(auth_client=client, session_factory=lambda: _nullsession(db_session))
+
+        result = asyncio.run(pipeline.run("user1000@test.com", "incorrecta"))
+
+        assert not result.success
+        assert result.message == "Email o contraseña incorrectos"
+        assert result.user_data is None and result.token == ""
+        assert result.metrics["success"] is False
+
+    def test_prefetch_mismatch_falls_back_to_supabase_id(self, login_user_a, db_session):
+        """
+        Given: El email_cache de A está desactualizado (otro email en Supabase)
+        When: A inicia sesión con su email de Supabase
+        Then: El perfil se carga por supabase_user_id (fase mlm_fallback)
+        """
+        client, user_a = login_user_a
+        user_a.email_cache = "viejo@test.com"
+        db_session.add(user_a)
+        db_session.flush()
+
+        pipeline = LoginPipeline(auth_client=client, session_factory=lambda: _nullsession(db_session))
+        result = asyncio.run(pipeline.run("user1000@test.com", PASSWORD))
+
+        assert result.success
+        assert result.user_data["member_id"] == 1000
+        assert result.metrics["prefetch_hit"] is False
+        assert "mlm_fallback" in result.metrics["steps"]
@@ -0,0 +1,132 @@
+"""
+Tests Unitarios - Bono Matching del período (motor batch)
+
+Objetivo: Validar que CommissionService.calculate_matching_bonus_for_period
+calcula el Matching de todos los Embajadores con una agregación del Uninivel,
+un join contra usertreepath y un INSERT multi-fila.
+
+Reglas de Negocio:
+- Receptor y descendiente deben tener rango Embajador (rango actual)
+- Porcentaje según rango del receptor y profundidad (MATCHING_BONUS_PERCENTAGES)
+- Base = Uninivel total del descendiente en el período
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlmodel import select
+
+from database.comissions import Commissions, BonusType
+from database.user_rank_history import UserRankHistory
+from NNProtect_new_website.mlm_service.commission_service import CommissionService
+
+
+def _promote(db_session, member_id: int, rank_id: int):
+    db_session.add(UserRankHistory(
+        member_id=member_id,
+        rank_id=rank_id,
+        achieved_on=datetime.now(timezone.utc) + timedelta(minutes=1)
+    ))
+    db_session.flush()
+
+
+def _unilevel_commission(db_session, member_id: int, period_id: int, amount: float):
+    db_session.add(Commissions(
+        member_id=member_id,
+        bonus_type=BonusType.BONO_UNINIVEL.value,
+        period_id=period_id,
+        amount_vn=amount,
+        currency_origin="MXN",
+        amount_converted=amount,
+        currency_destination="MXN"
+    ))
+    db_session.flush()
+
+
+def _matching_by_pair(db_session, period_id: int) -> dict:
+    commissions = db_session.exec(
+        select(Commissions).where(
+            (Commissions.bonus_type == BonusType.BONO_MATCHING.value) &
+            (Commissions.period_id == period_id)
+        )
+    ).all()
+    return {
+        (commission.member_id, commission.source_member_id): commission
+        for commission in commissions
+    }
+
+
+@pytest.mark.critical
+@pytest.mark.matching_bonus
+class TestMatchingBonusPeriod:
+    """
+    Suite de tests para el motor de Matching del período.
+    """
+
+    def test_matching_for_whole_network(self, db_session, ranks, test_network_4_levels, test_period_current):
+        """
+        Escenario:
+            A (Solidario) → B (Inspirador) → C (Innovador) → D (Transformador)
+
+        Uninivel del período: B=1,000 / C=2,000 / D=500 (dos comisiones)
+
+        Esperado:
+            - A sobre B (nivel 1, 30%) = 300 ✅
+            - A sobre D (nivel 3, 10%) = 50 ✅
+            - B sobre D (nivel 2, 20%) = 100 ✅
+            - C no es Embajador: no genera ni recibe Matching ✅
+        """
+        users = test_network_4_levels
+        period_id = test_period_current.id
+
+        _promote(db_session, users['A'].member_id, ranks["Embajador Solidario"].id)
+        _promote(db_session, users['B'].member_id, ranks["Embajador Inspirador"].id)
+        _promote(db_session, users['C'].member_id, ranks["Innovador"].id)
+        _promote(db_session, users['D'].member_id, ranks["Embajador Transformador"].id)
+
+        _unilevel_commission(db_session, users['B'].member_id, period_id, 1000.0)
+        _unilevel_commission(db_session, users['C'].member_id, period_id, 2000.0)
+        _unilevel_commission(db_session, users['D'].member_id, period_id, 200.0)
+        _unilevel_commission(db_session, users['D'].member_id, period_id, 300.0)
+
+        commission_ids = CommissionService.calculate_matching_bonus_for_period(db_session, period_id)
+        matching = _matching_by_pair(db_session, period_id)
+
+        a, b, d = users['A'].member_id, users['B'].member_id, users['D'].member_id
+        assert len(commission_ids) == 3
+        assert set(matching) == {(a, b), (a, d), (b, d)}
+        assert matching[(a, b)].level_depth == 1
+        assert matching[(a, b)].amount_converted == pytest.approx(300.0)
+        assert matching[(a, d)].level_depth == 3
+        assert matching[(a, d)].amount_converted == pytest.approx(50.0)
+        assert matching[(b, d)].amount_vn == pytest.approx(500.0)
+        assert matching[(b, d)].amount_converted == pytest.approx(100.0)
+
+    def test_depth_limited_by_receiver_rank(self, db_session, ranks, test_network_4_levels, test_period_current):
+        """
+        Embajador Transformador solo cobra nivel 1: D (nivel 3) no le genera Matching.
+        """
+        users = test_network_4_levels
+        period_id = test_period_current.id
+
+        _promote(db_session, users['A'].member_id, ranks["Embajador Transformador"].id)
+        _promote(db_session, users['D'].member_id, ranks["Embajador Transformador"].id)
+        _unilevel_commission(db_session, users['D'].member_id, period_id, 500.0)
+
+        assert CommissionService.calculate_matching_bonus_for_period(db_session, period_id) == []
+
+    def test_single_member_uses_period_engine(self, db_session, ranks, test_network_simple, test_period_current):
+        """
+        calculate_matching_bonus(member) solo crea las comisiones de ese miembro.
+        """
+        users = test_network_simple
+        period_id = test_period_current.id
+
+        for member in ('A', 'B', 'C'):
+            _promote(db_session, users[member].member_id, ranks["Embajador Solidario"].id)
+        _unilevel_commission(db_session, users['C'].member_id, period_id, 1000.0)
+
+        CommissionService.calculate_matching_bonus(db_session, users['B'].member_id, period_id)
+        matching = _matching_by_pair(db_session, period_id)
+
+        assert set(matching) == {(users['B'].member_id, users['C'].member_id)}
+        assert matching[(users['B'].member_id, users['C'].member_id)].amount_converted == pytest.approx(300.0)
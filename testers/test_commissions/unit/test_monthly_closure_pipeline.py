@@ -0,0 +1,139 @@
+"""
+Tests Unitarios - Cierre mensual reanudable por etapas
+
+Objetivo: Validar que MonthlyClosureJob.run_closure ejecuta las etapas del
+cierre en lotes con checkpoint en closureruns, registra métricas por etapa y
+que una re-ejecución continúa desde el último checkpoint sin repetir trabajo.
+
+Reglas de Negocio:
+- Etapas: depósitos → cierre de período → nuevo período → reseteo de usuarios
+- Un commit por lote de miembros; el checkpoint es el último member_id del lote
+- Re-ejecutar un cierre completado no vuelve a depositar ni resetear
+- El período siguiente es el mes posterior a ends_on, completo (del 1 al último día)
+"""
+
+import pytest
+from datetime import datetime
+from sqlmodel import select
+
+from database.closure_runs import ClosureRuns, ClosureStage, ClosureRunStatus
+from database.comissions import Commissions, CommissionStatus
+from database.periods import Periods
+from database.users import Users, UserStatus
+from database.wallet import Wallets, WalletStatus
+from NNProtect_new_website.jobs.monthly_closure import MonthlyClosureJob
+from NNProtect_new_website.mlm_service.wallet_service import WalletService
+
+
+@pytest.fixture
+def closure_ready(db_session, test_network_simple, test_period_current, create_test_wallet):
+    """Red A → B → C, cada uno con wallet activa y una comisión PENDING de 10 MXN."""
+    for member_id in (1000, 1001, 1002):
+        wallet = create_test_wallet(member_id=member_id)
+        wallet.status = WalletStatus.ACTIVE.value
+        db_session.add(wallet)
+        db_session.add(Commissions(
+            member_id=member_id,
+            bonus_type="bono_uninivel",
+            period_id=test_period_current.id,
+            amount_vn=10.0,
+            currency_origin="MXN",
+            amount_converted=10.0,
+            currency_destination="MXN",
+        ))
+
+    for user in test_network_simple.values():
+        user.status = UserStatus.QUALIFIED
+        user.pv_cache = 1500
+        db_session.add(user)
+
+    db_session.flush()
+    return test_period_current
+
+
+def _runs(db_session, period_id) -> dict:
+    return {
+        run.stage: run
+        for run in db_session.exec(select(ClosureRuns).where(ClosureRuns.period_id == period_id)).all()
+    }
+
+
+@pytest.mark.periods
+@pytest.mark.wallet
+class TestMonthlyClosurePipeline:
+    """
+    Suite de tests para el cierre mensual por etapas.
+    """
+
+    def test_stages_in_chunks_with_metrics(self, db_session, closure_ready):
+        summary = MonthlyClosureJob.run_closure(db_session, closure_ready, chunk_size=2)
+
+        assert summary["deposited_count"] == 3
+        assert summary["deposited_total"] == 30.0
+        assert summary["users_reset"] == 3
+
+        runs = _runs(db_session, closure_ready.id)
+        assert all(run.status == ClosureRunStatus.COMPLETED.value for run in runs.values())
+        assert runs[ClosureStage.DEPOSIT_COMMISSIONS.value].chunks_committed == 2
+        assert runs[ClosureStage.DEPOSIT_COMMISSIONS.value].checkpoint == 1002
+        assert runs[ClosureStage.RESET_USERS.value].rows_processed == 3
+        assert summary["stages"]["deposit_commissions"]["rows_per_second"] > 0
+
+        db_session.refresh(closure_ready)
+        assert closure_ready.closed_at is not None
+        assert MonthlyClosureJob.get_unfinished_closure_period(db_session) is None
+
+        statuses = db_session.exec(select(Users.status)).all()
+        assert set(statuses) == {UserStatus.NO_QUALIFIED}
+
+    def test_resume_from_checkpoint(self, db_session, closure_ready):
+        """
+        Un cierre interrumpido tras el primer lote (1000 pagado) continúa en 1001.
+        """
+        WalletService.settle_pending_commissions(db_session, closure_ready.id, member_id_range=(0, 1000))
+        db_session.add(ClosureRuns(
+            period_id=closure_ready.id,
+            stage=ClosureStage.DEPOSIT_COMMISSIONS.value,
+            status=ClosureRunStatus.FAILED.value,
+            checkpoint=1000,
+            rows_processed=1,
+            chunks_committed=1,
+        ))
+        db_session.flush()
+
+        assert MonthlyClosureJob.get_unfinished_closure_period(db_session).id == closure_ready.id
+
+        summary = MonthlyClosureJob.run_closure(db_session, closure_ready, chunk_size=1)
+
+        deposit_run = _runs(db_session, closure_ready.id)[ClosureStage.DEPOSIT_COMMISSIONS.value]
+        assert deposit_run.rows_processed == 3
+        assert deposit_run.chunks_committed == 3
+        assert summary["deposited_count"] == 3
+
+        balances = db_session.exec(select(Wallets.balance).order_by(Wallets.member_id)).all()
+        assert balances == [10.0, 10.0, 10.0]
+
+    def test_rerun_is_idempotent(self, db_session, closure_ready):
+        MonthlyClosureJob.run_closure(db_session, closure_ready)
+        second = MonthlyClosureJob.run_closure(db_session, closure_ready)
+
+        assert second["deposited_count"] == 3
+        assert second["users_reset"] == 3
+        assert db_session.exec(select(Wallets.balance).where(Wallets.member_id == 1000)).one() == 10.0
+        assert set(db_session.exec(select(Commissions.status)).all()) == {CommissionStatus.PAID.value}
+
+    def test_next_period_follows_closed_period_ends_on(self, db_session, test_network_simple):
+        """
+        Diciembre 2025 se cierra (en cualquier fecha): se crea 2026-01 del 1 al 31 de enero.
+        """
+        december = Periods(
+            name="2025-12", starts_on=datetime(2025, 12, 1), ends_on=datetime(2025, 12, 31, 23, 59, 59)
+        )
+        db_session.add(december)
+        db_session.flush()
+
+        MonthlyClosureJob.run_closure(db_session, december)
+
+        january = db_session.exec(select(Periods).where(Periods.name == "2026-01")).one()
+        assert january.starts_on.replace(tzinfo=None) == datetime(2026, 1, 1)
+        assert january.ends_on.replace(tzinfo=None) == datetime(2026, 1, 31, 23, 59, 59)
@@ -0,0 +1,84 @@
+"""
+Tests Unitarios - Red descendente paginada (keyset)
+
+Objetivo: Validar que MLMUserManager.get_network_descendants_page pagina con
+keyset sobre (depth, member_id), aplica filtros de fecha y nivel en SQL y trae
+los datos del sponsor en el mismo JOIN.
+
+Reglas de Negocio:
+- Orden estable: nivel y luego member_id
+- El rango de fechas es inclusive en ambos extremos
+- El sponsor raíz no aparece en su propia red
+"""
+
+import pytest
+from datetime import date, datetime
+
+from NNProtect_new_website.mlm_service.mlm_user_manager import MLMUserManager
+
+
+@pytest.fixture
+def network_2x2(db_session, create_test_user):
+    """
+    Red 1000 → (1001, 1002), 1001 → (1003, 1004), 1002 → (1005, 1006)
+    Registros: 1001-1004 en octubre 2025, 1005-1006 en noviembre 2025
+    """
+    create_test_user(member_id=1000, sponsor_id=None)
+    for member_id, sponsor_id in [(1001, 1000), (1002, 1000), (1003, 1001), (1004, 1001), (1005, 1002), (1006, 1002)]:
+        user = create_test_user(member_id=member_id, sponsor_id=sponsor_id)
+        user.created_at = datetime(2025, 11, 3, 12) if member_id >= 1005 else datetime(2025, 10, 15, 12)
+        db_session.add(user)
+    db_session.flush()
+
+
+@pytest.mark.genealogy
+class TestNetworkDescendantsPage:
+    """
+    Suite de tests para la red descendente paginada.
+    """
+
+    def test_keyset_pages_cover_network_in_order(self, db_session, network_2x2):
+        """
+        Páginas de 4: [1001, 1002, 1003, 1004] y [1005, 1006].
+        """
+        first = MLMUserManager.get_network_descendants_page(1000, page_size=4, session=db_session)
+        second = MLMUserManager.get_network_descendants_page(
+            1000, page_size=4, after=first["next_cursor"], session=db_session
+        )
+
+        assert [item["member_id"] for item in first["items"]] == [1001, 1002, 1003, 1004]
+        assert first["next_cursor"] == (2, 1004)
+        assert [item["member_id"] for item in second["items"]] == [1005, 1006]
+        assert second["next_cursor"] is None
+
+    def test_sponsor_data_from_join(self, db_session, network_2x2):
+        """
+        Cada registro trae nivel y nombre del sponsor sin queries adicionales.
+        """
+        page = MLMUserManager.get_network_descendants_page(1000, session=db_session)
+        by_member = {item["member_id"]: item for item in page["items"]}
+
+        assert by_member[1003]["level"] == 2
+        assert by_member[1003]["sponsor_member_id"] == 1001
+        assert by_member[1003]["sponsor_full_name"] == "User_1001 Test"
+        assert by_member[1003]["created_at"] == "15/10/2025"
+
+    def test_date_and_level_filters(self, db_session, network_2x2):
+        """
+        Noviembre solo trae 1005 y 1006; nivel 1 solo trae directos.
+        """
+        november = MLMUserManager.get_network_descendants_page(
+            1000, start_date=date(2025, 11, 1), end_date=date(2025, 11, 3), session=db_session
+        )
+        level_1 = MLMUserManager.get_network_descendants_page(1000, max_level=1, session=db_session)
+
+        assert [item["member_id"] for item in november["items"]] == [1005, 1006]
+        assert [item["member_id"] for item in level_1["items"]] == [1001, 1002]
+
+    def test_iter_streams_all_pages(self, db_session, network_2x2):
+        """
+        iter_network_descendants entrega la red completa página por página.
+        """
+        pages = list(MLMUserManager.iter_network_descendants(1001, page_size=1, session=db_session))
+
+        assert [[item["member_id"] for item in page] for page in pages] == [[1003], [1004]]
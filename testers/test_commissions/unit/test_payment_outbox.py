@@ -0,0 +1,137 @@
+"""
+Tests Unitarios - Outbox de efectos posteriores al pago
+
+Objetivo: Validar que PaymentService.process_wallet_payment solo debita,
+confirma la orden y encola etapas, y que PaymentOutboxService las aplica
+de forma asíncrona, una sola vez por (order_id, stage) y con reintentos.
+
+Reglas de Negocio:
+- El pago no toca PV/PVG ni comisiones; quedan como eventos PENDING
+- Cada etapa se aplica una vez (idempotencia por orden y etapa)
+- Si una etapa falla, se reintenta con backoff y las siguientes esperan
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlmodel import select
+
+from database.orders import Orders, OrderStatus
+from database.periods import Periods
+from database.comissions import Commissions, BonusType
+from database.payment_outbox import PaymentOutbox, OutboxStage, OutboxStatus
+from database.wallet import WalletStatus
+from NNProtect_new_website.mlm_service.commission_service import CommissionService
+from NNProtect_new_website.payment_service.payment_service import PaymentService
+from NNProtect_new_website.payment_service.payment_outbox_service import PaymentOutboxService
+
+
+@pytest.fixture
+def paid_order(db_session, ranks, test_network_simple, create_test_wallet):
+    """
+    C (1002) paga con wallet una orden de 1,500 MXN (500 PV, 1,000 VN); su sponsor es B (1001).
+    """
+    now = datetime.now(timezone.utc)
+    db_session.add(Periods(name="Outbox Period", starts_on=now - timedelta(days=1), ends_on=now + timedelta(days=30)))
+
+    wallet = create_test_wallet(member_id=1002, balance=5000.0)
+    wallet.status = WalletStatus.ACTIVE.value
+    db_session.add(wallet)
+
+    order = Orders(
+        member_id=1002,
+        country="Mexico",
+        currency="MXN",
+        subtotal=1500.0,
+        total=1500.0,
+        total_pv=500,
+        total_vn=1000.0,
+        status=OrderStatus.PENDING_PAYMENT.value
+    )
+    db_session.add(order)
+    db_session.flush()
+
+    result = PaymentService.process_wallet_payment(db_session, order.id, 1002)
+    assert result["success"], result["message"]
+    return order
+
+
+def _events(db_session, order_id: int) -> dict:
+    return {
+        event.stage: event
+        for event in db_session.exec(select(PaymentOutbox).where(PaymentOutbox.order_id == order_id)).all()
+    }
+
+
+@pytest.mark.critical
+class TestPaymentOutbox:
+    """
+    Suite de tests para el outbox de pagos.
+    """
+
+    def test_payment_only_enqueues_side_effects(self, db_session, paid_order, test_network_simple):
+        """
+        El pago confirma la orden y encola las 7 etapas; PV y comisiones quedan pendientes.
+        """
+        events = _events(db_session, paid_order.id)
+
+        assert paid_order.status == OrderStatus.PAYMENT_CONFIRMED.value
+        assert paid_order.period_id is not None
+        assert list(events) == [stage.value for stage in OutboxStage]
+        assert all(event.status == OutboxStatus.PENDING.value for event in events.values())
+        assert test_network_simple['C'].pv_cache == 0
+        assert db_session.exec(select(Commissions).where(Commissions.source_order_id == paid_order.id)).all() == []
+
+    def test_worker_applies_each_stage_once(self, db_session, paid_order, test_network_simple):
+        """
+        Un ciclo aplica todas las etapas; re-procesar o re-encolar no duplica nada.
+        """
+        summary = PaymentOutboxService.process_pending(db_session)
+        second = PaymentOutboxService.process_pending(db_session)
+        requeued = PaymentOutboxService.enqueue_order(db_session, paid_order.id)
+
+        users = test_network_simple
+        direct_bonus = db_session.exec(
+            select(Commissions).where(
+                (Commissions.source_order_id == paid_order.id) &
+                (Commissions.bonus_type == BonusType.BONO_DIRECTO.value)
+            )
+        ).all()
+
+        assert summary["completed"] == len(OutboxStage)
+        assert second["completed"] == 0 and requeued == 0
+        assert users['C'].pv_cache == 500 and users['C'].pvg_cache == 500
+        assert users['B'].pvg_cache == 500 and users['A'].pvg_cache == 500
+        assert [commission.member_id for commission in direct_bonus] == [1001]
+        assert PaymentOutboxService.get_metrics(db_session)["pending"] == 0
+
+    def test_failed_stage_retries_and_blocks_later_stages(self, db_session, paid_order, test_network_simple, monkeypatch):
+        """
+        El núcleo del Bono Directo falla: la etapa queda PENDING con backoff (el error
+        no se traga), las etapas siguientes esperan y las anteriores no se repiten.
+        """
+        original = CommissionService._apply_direct_bonus.__func__
+
+        def failing_core(cls, session, buyer_id, order_id, vn_amount):
+            raise RuntimeError("Servicio de comisiones no disponible")
+
+        monkeypatch.setattr(CommissionService, "_apply_direct_bonus", classmethod(failing_core))
+        summary = PaymentOutboxService.process_pending(db_session)
+        events = _events(db_session, paid_order.id)
+
+        assert summary["completed"] == 3 and summary["retried"] == 1
+        assert events["direct_bonus"].attempts == 1
+        assert events["direct_bonus"].available_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc)
+        assert events["matching_bonus"].status == OutboxStatus.PENDING.value
+        assert PaymentOutboxService.process_pending(db_session)["completed"] == 0
+
+        # Reintento disponible con la etapa ya sana
+        monkeypatch.setattr(CommissionService, "_apply_direct_bonus", classmethod(original))
+        events["direct_bonus"].available_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+        db_session.add(events["direct_bonus"])
+        db_session.flush()
+
+        retry = PaymentOutboxService.process_pending(db_session)
+
+        assert retry["completed"] == 4
+        assert events["direct_bonus"].attempts == 2
+        assert test_network_simple['C'].pv_cache == 500
@@ -0,0 +1,82 @@
+"""
+Tests Unitarios - Reseteo de usuarios al iniciar período (basado en conjuntos)
+
+Objetivo: Validar que PeriodResetService.bulk_reset_users resetea a todos los
+usuarios con un UPDATE y asigna rank inicial con un INSERT ... SELECT, y que
+PeriodService y PVResetService usan el mismo primitivo.
+
+Reglas de Negocio:
+- Al iniciar período: status NO_QUALIFIED, pv/pvg/vn en 0, rank_id=1 en el nuevo período
+- El reseteo mensual de PV/PVG no toca status ni historial de rangos
+- Se regresan conteos de filas para auditoría
+"""
+
+import pytest
+from sqlmodel import select, func
+
+from database.users import UserStatus
+from database.user_rank_history import UserRankHistory
+from NNProtect_new_website.mlm_service.period_reset_service import PeriodResetService
+from NNProtect_new_website.mlm_service.period_service import PeriodService
+from NNProtect_new_website.mlm_service.pv_reset_service import PVResetService
+
+
+@pytest.fixture
+def qualified_network(db_session, test_network_simple):
+    """Red A → B → C con volumen y status calificado."""
+    for user in test_network_simple.values():
+        user.status = UserStatus.QUALIFIED
+        user.pv_cache = 1500
+        user.pvg_cache = 3000
+        user.vn_cache = 1200.0
+        db_session.add(user)
+    db_session.flush()
+    return test_network_simple
+
+
+def _rank_history_count(db_session, period_id) -> int:
+    return db_session.exec(
+        select(func.count()).select_from(UserRankHistory).where(UserRankHistory.period_id == period_id)
+    ).one()
+
+
+@pytest.mark.periods
+class TestPeriodReset:
+    """
+    Suite de tests para el reseteo de período.
+    """
+
+    def test_new_period_reset_counts(self, db_session, qualified_network, test_period_current):
+        """
+        3 usuarios reseteados y 3 registros de rank inicial en el período.
+        """
+        before = _rank_history_count(db_session, test_period_current.id)
+
+        users_reset = PeriodResetService.reset_all_users_for_new_period(db_session, test_period_current.id)
+
+        assert users_reset == 3
+        assert _rank_history_count(db_session, test_period_current.id) == before + 3
+
+        for user in qualified_network.values():
+            db_session.refresh(user)
+            assert user.status == UserStatus.NO_QUALIFIED
+            assert (user.pv_cache, user.pvg_cache, user.vn_cache) == (0, 0, 0.0)
+
+    def test_period_service_returns_counts(self, db_session, qualified_network, test_period_current):
+        counts = PeriodService.reset_users_for_new_period(db_session, test_period_current)
+
+        assert counts == {"users_updated": 3, "rank_history_created": 3}
+
+    def test_pv_reset_keeps_status_and_history(self, db_session, qualified_network, test_period_current):
+        """
+        PVResetService solo resetea pv_cache y pvg_cache.
+        """
+        before = _rank_history_count(db_session, test_period_current.id)
+
+        assert PVResetService.reset_all_users_pv_pvg(db_session) == 3
+
+        user = qualified_network['A']
+        db_session.refresh(user)
+        assert (user.pv_cache, user.pvg_cache, user.vn_cache) == (0, 0, 1200.0)
+        assert user.status == UserStatus.QUALIFIED
+        assert _rank_history_count(db_session, test_period_current.id) == before
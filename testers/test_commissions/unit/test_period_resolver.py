@@ -0,0 +1,165 @@
+"""
+Tests Unitarios - PeriodResolver (período actual en memoria)
+
+Objetivo: Validar que el período actual se resuelve una vez por proceso y se
+comparte entre servicios sin consultar Periods en cada operación, y que se
+recarga al crear o cerrar un período o al terminar el período cacheado.
+
+Reglas de Negocio:
+- Período actual = starts_on <= ahora (hora de México) <= ends_on
+- PeriodService solo considera períodos sin cerrar (open_only)
+- Crear o cerrar un período se refleja en la siguiente resolución
+- "No hay período actual" no se cachea por MAX_AGE_SECONDS
+- Un período sin confirmar solo lo ve la sesión que lo creó
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event
+
+from database.periods import Periods
+from NNProtect_new_website.mlm_service.commission_service import CommissionService
+from NNProtect_new_website.mlm_service.period_resolver import PeriodResolver, PeriodSnapshot
+from NNProtect_new_website.mlm_service.period_service import PeriodService
+from NNProtect_new_website.mlm_service.rank_service import RankService
+
+
+@pytest.fixture
+def resolver_reset():
+    """El resolver es por proceso: se descarta antes y después de cada test."""
+    PeriodResolver.invalidate()
+    yield
+    PeriodResolver.invalidate()
+
+
+@pytest.fixture
+def open_period(db_session, resolver_reset):
+    """Período confirmado que cubre la fecha actual."""
+    now = datetime.now(timezone.utc)
+    period = Periods(name="Resolver Period", starts_on=now - timedelta(days=1), ends_on=now + timedelta(days=30))
+    db_session.add(period)
+    db_session.commit()
+    return period
+
+
+@pytest.mark.periods
+class TestPeriodResolver:
+    """
+    Suite de tests para PeriodResolver.
+    """
+
+    def test_services_share_current_period_without_queries(self, db_session, open_period):
+        """
+        Given: Un período abierto que cubre hoy y el resolver ya cargado
+        When: Comisiones, rangos y PeriodService piden el período actual 100 veces
+        Then: Todos regresan el mismo período y no se consulta Periods
+        """
+        assert PeriodResolver.get_current(db_session).id == open_period.id
+
+        statements = []
+        engine = db_session.connection().engine
+
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            if "FROM periods" in statement:
+                statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_execute)
+        try:
+            for _ in range(100):
+                assert CommissionService._get_current_period(db_session).id == open_period.id
+                assert RankService._get_current_period(db_session).id == open_period.id
+                assert PeriodService.get_current_period(db_session) is open_period
+        finally:
+            event.remove(engine, "before_cursor_execute", before_execute)
+
+        assert statements == []
+
+    def test_created_period_is_resolved_next_call(self, db_session, resolver_reset):
+        """
+        Given: Sin período que cubra hoy (resolver cargado vacío)
+        When: Se crea el período del mes
+        Then: La siguiente resolución ya lo encuentra
+        """
+        assert PeriodResolver.get_current(db_session) is None
+
+        now = datetime.now(timezone.utc)
+        period = Periods(name="Created Period", starts_on=now - timedelta(days=1), ends_on=now + timedelta(days=10))
+        db_session.add(period)
+        db_session.flush()
+
+        assert PeriodResolver.get_current(db_session).id == period.id
+
+    def test_closed_period_excluded_for_open_only(self, db_session, open_period):
+        """
+        Given: El período actual resuelto
+        When: Se finaliza (closed_at)
+        Then: open_only ya no lo regresa; sin open_only sigue siendo el actual
+        """
+        assert PeriodService.get_current_period(db_session) is open_period
+
+        PeriodService.finalize_period(db_session, open_period.id)
+        db_session.flush()
+
+        assert PeriodService.get_current_period(db_session) is None
+        assert PeriodResolver.get_current(db_session, open_only=True) is None
+        assert PeriodResolver.get_current(db_session).id == open_period.id
+
+    def test_snapshot_expires_when_current_period_ends(self):
+        """
+        Given: Un resolver cargado durante un período que termina el 31 de octubre
+        When: La fecha pasa de ends_on
+        Then: El resolver vence (se recarga para encontrar el siguiente período)
+        """
+        october = PeriodSnapshot(
+            id=1, name="2025-10", starts_on=datetime(2025, 10, 1), ends_on=datetime(2025, 10, 31, 23, 59, 59)
+        )
+        november = PeriodSnapshot(
+            id=2, name="2025-11", starts_on=datetime(2025, 11, 1), ends_on=datetime(2025, 11, 30, 23, 59, 59)
+        )
+        resolver = PeriodResolver([october, november], loaded_on=datetime(2025, 10, 15))
+
+        assert resolver.find(datetime(2025, 10, 15)) == october
+        assert resolver.find(datetime(2025, 11, 2)) == november
+        assert not resolver.is_expired(datetime(2025, 10, 31, 12))
+        assert resolver.is_expired(datetime(2025, 11, 1, 0, 0, 1))
+
+    def test_missing_period_is_not_cached_for_max_age(self, db_session, resolver_reset, monkeypatch):
+        """
+        Given: El resolver cargado sin período actual
+        When: Otro proceso crea el período (sin eventos ORM en este proceso)
+        Then: Se encuentra al pasar MISS_MAX_AGE_SECONDS, aunque MAX_AGE_SECONDS no haya vencido
+        """
+        assert PeriodResolver.get_current(db_session) is None
+        assert not PeriodResolver._cache.peek().is_expired(datetime(2025, 10, 15))
+
+        now = datetime.now(timezone.utc)
+        db_session.execute(
+            Periods.__table__.insert().values(
+                name="Other Process Period", starts_on=now - timedelta(days=1), ends_on=now + timedelta(days=10)
+            )
+        )
+        assert PeriodResolver.get_current(db_session) is None  # Aún dentro de la vigencia corta
+
+        monkeypatch.setattr(PeriodResolver, "MISS_MAX_AGE_SECONDS", -1)
+        assert PeriodResolver.get_current(db_session).name == "Other Process Period"
+        assert PeriodResolver._cache.peek().valid_until is not None
+        assert not PeriodResolver._cache.peek().is_expired(datetime(2025, 10, 15))
+
+    def test_uncommitted_period_is_not_shared(self, db_session, resolver_reset):
+        """
+        Given: Una sesión que creó un período y aún no hace commit
+        When: Esa sesión resuelve el período actual
+        Then: Lo ve, pero el resolver del proceso no lo publica hasta el commit
+        """
+        now = datetime.now(timezone.utc)
+        period = Periods(name="Uncommitted Period", starts_on=now - timedelta(days=1), ends_on=now + timedelta(days=10))
+        db_session.add(period)
+        db_session.flush()
+
+        assert PeriodResolver.get_current(db_session).id == period.id
+        assert PeriodResolver._cache.peek() is None
+
+        db_session.commit()
+
+        assert PeriodResolver.get_current(db_session).id == period.id
+        assert PeriodResolver._cache.peek() is not None
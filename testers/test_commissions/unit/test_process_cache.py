@@ -0,0 +1,62 @@
+"""
+Tests Unitarios - ProcessCache (regla común de los caches por proceso)
+
+Objetivo: Validar la regla de invalidación que comparten PeriodResolver,
+ExchangeRateTimeline, RankLadder, UserStatusCounterService y ProfileCache.
+
+Reglas de Negocio:
+- Un valor se carga una vez y se reutiliza mientras no venza ni se invalide
+- Una sesión marcada (cambios sin confirmar) carga un valor propio sin publicarlo
+- Lo cargado mientras alguien invalida no se publica
+- Al terminar la transacción raíz de la sesión marcada se invalida otra vez
+"""
+
+import pytest
+
+from NNProtect_new_website.utils.process_cache import ProcessCache
+
+
+@pytest.fixture
+def counting_cache():
+    """Cache cuyo valor es el número de cargas realizadas."""
+    loads = []
+
+    def load(session):
+        loads.append(session)
+        return len(loads)
+
+    return ProcessCache("test_process_cache", load=load, is_expired=lambda value, age_seconds: age_seconds > 60), loads
+
+
+@pytest.mark.performance
+class TestProcessCache:
+    """
+    Suite de tests para ProcessCache.
+    """
+
+    def test_dirty_session_reads_privately_until_transaction_end(self, db_session, counting_cache):
+        cache, loads = counting_cache
+
+        assert cache.get(db_session) == 1
+        assert cache.get(db_session) == 1
+
+        cache.mark_dirty(db_session)
+        assert cache.get(db_session) == 2
+        assert cache.get(db_session) == 3
+        assert cache.peek() is None
+
+        db_session.commit()
+
+        assert db_session.info.get(cache.dirty_key) is None
+        assert cache.get(db_session) == 4
+        assert cache.peek() == 4 and len(loads) == 4
+
+    def test_value_invalidated_during_load_is_not_published(self, db_session):
+        def load(session):
+            cache.invalidate()  # Ej. autoflush de un cambio durante la carga (mismo hilo)
+            return "snapshot"
+
+        cache = ProcessCache("test_process_cache_race", load=load, is_expired=lambda value, age_seconds: False)
+
+        assert cache.get(db_session) == "snapshot"
+        assert cache.peek() is None
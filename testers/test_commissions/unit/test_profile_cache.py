@@ -0,0 +1,207 @@
+"""
+Tests Unitarios - ProfileCache (cache de perfiles de sesión)
+
+Objetivo: Validar que load_user_from_token se sirve desde el cache por
+(user_id, iat) sin consultas mientras nada cambie, y que los cambios de wallet,
+rango o perfil (ORM o masivos) descartan solo las entradas afectadas.
+
+Reglas de Negocio:
+- Navegar entre páginas con el mismo token no consulta la BD
+- Cambio de wallet / rango / perfil / PV del usuario o su sponsor invalida
+- Un UPDATE masivo sin miembros conocidos (reseteo de período) limpia todo
+- El cache está acotado (LRU) y las entradas viejas expiran
+- Cambios de otro worker (sin invalidación local) se ven en <= MAX_AGE_SECONDS (30s)
+"""
+
+import pytest
+from datetime import datetime, timezone
+from sqlalchemy import event
+
+from database.user_rank_history import UserRankHistory
+from database.userprofiles import UserProfiles, UserGender
+from NNProtect_new_website.auth_service.auth_state import AuthState
+from NNProtect_new_website.mlm_service.period_reset_service import PeriodResetService
+from NNProtect_new_website.mlm_service.profile_cache import ProfileCache
+from NNProtect_new_website.mlm_service.pv_update_service import PVUpdateService
+
+
+TOKEN_IAT = 1760000000
+
+
+@pytest.fixture
+def cache_reset():
+    """El cache es por proceso: se descarta antes y después de cada test."""
+    ProfileCache.clear()
+    yield
+    ProfileCache.clear()
+
+
+@pytest.fixture
+def cached_network(db_session, test_network_simple, cache_reset):
+    """A → B → C con el perfil de sesión de cada uno ya cacheado."""
+    users = test_network_simple
+    for user in users.values():
+        ProfileCache.put(user.id, TOKEN_IAT, AuthState._load_token_user_data(db_session, user.id))
+    return users
+
+
+def _is_cached(user) -> bool:
+    return ProfileCache.get(user.id, TOKEN_IAT) is not None
+
+
+def _count_statements(db_session, action):
+    """Ejecuta action y regresa (resultado, sentencias SQL enviadas)."""
+    statements = []
+    engine = db_session.connection().engine
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        result = action()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+    return result, statements
+
+
+@pytest.mark.performance
+class TestProfileCache:
+    """
+    Suite de tests para ProfileCache.
+    """
+
+    def test_cached_profile_costs_zero_queries(self, db_session, cached_network):
+        """
+        Given: El perfil de A cacheado para su token
+        When: Se navega 50 veces con el mismo token
+        Then: Ninguna sentencia SQL y los mismos datos; otro iat no es hit
+        """
+        user_a = cached_network['A']
+        expected = AuthState._load_token_user_data(db_session, user_a.id)
+
+        results, statements = _count_statements(
+            db_session, lambda: [ProfileCache.get(user_a.id, TOKEN_IAT) for _ in range(50)]
+        )
+
+        assert statements == []
+        assert results[0] == expected
+        assert results[0]["logged_user_data"]["member_id"] == 1000
+        assert ProfileCache.get(user_a.id, TOKEN_IAT + 1) is None
+
+        # Las copias entregadas no alteran el cache
+        results[0]["profile_data"]["pv_cache"] = 999
+        assert ProfileCache.get(user_a.id, TOKEN_IAT)["profile_data"]["pv_cache"] == expected["profile_data"]["pv_cache"]
+
+    def test_wallet_rank_and_profile_changes_invalidate(self, db_session, cached_network, create_test_wallet):
+        """
+        Given: Perfiles de A, B y C cacheados
+        When: Cambia la wallet de A, el rango de B y el perfil (UserProfiles) de C
+        Then: Cada cambio descarta solo la entrada del afectado
+        """
+        users = cached_network
+        wallet = create_test_wallet(member_id=1000, balance=100.0)
+        ProfileCache.put(users['A'].id, TOKEN_IAT, AuthState._load_token_user_data(db_session, users['A'].id))
+
+        wallet.balance += 50.0
+        db_session.add(wallet)
+        db_session.flush()
+        assert not _is_cached(users['A'])
+        assert _is_cached(users['B']) and _is_cached(users['C'])
+
+        db_session.add(UserRankHistory(
+            member_id=1001, rank_id=2, achieved_on=datetime.now(timezone.utc)
+        ))
+        db_session.flush()
+        assert not _is_cached(users['B'])
+        assert _is_cached(users['C'])
+
+        db_session.add(UserProfiles(user_id=users['C'].id, gender=UserGender.FEMALE, phone_number="5550001111"))
+        db_session.flush()
+        assert not _is_cached(users['C'])
+
+    def test_entries_read_mid_transaction_are_dropped_on_commit(self, db_session, cached_network):
+        """
+        Given: A cambia su PV y alguien vuelve a cachear su perfil antes del commit
+        When: La transacción termina
+        Then: La entrada se descarta otra vez (refleja el valor confirmado)
+        """
+        user_a = cached_network['A']
+        user_a.pv_cache = 1500
+        db_session.add(user_a)
+        db_session.flush()
+        assert not _is_cached(user_a)
+
+        ProfileCache.put(user_a.id, TOKEN_IAT, {"logged_user_data": {"id": user_a.id, "member_id": 1000}})
+        db_session.commit()
+
+        assert not _is_cached(user_a)
+
+    def test_bulk_updates_invalidate_affected_members(self, db_session, cached_network):
+        """
+        Given: Perfiles de A, B y C cacheados
+        When: C genera PV (UPDATE masivo del PVG de su línea ascendente) y después se resetea el período
+        Then: La propagación descarta solo a A y B; el reseteo limpia todo
+        """
+        users = cached_network
+
+        PVUpdateService.propagate_pvg_to_upline(db_session, 1002, 100)
+        assert not _is_cached(users['A']) and not _is_cached(users['B'])
+        assert _is_cached(users['C'])
+
+        PeriodResetService.bulk_reset_users(db_session, PeriodResetService.NEW_PERIOD_RESET_VALUES)
+        assert ProfileCache.size() == 0
+
+    def test_lru_bound_and_expiration(self, cache_reset, monkeypatch):
+        """
+        Given: Un cache de 3 entradas
+        When: Se guardan 4 perfiles (leyendo el primero entre medio)
+        Then: Se descarta el menos usado; el sponsor también es dependencia; las viejas expiran
+        """
+        monkeypatch.setattr(ProfileCache, "MAX_ENTRIES", 3)
+
+        def profile(user_id, member_id, sponsor_member_id=None):
+            sponsor = {"id": 100 + user_id, "member_id": sponsor_member_id} if sponsor_member_id else {}
+            return {
+                "logged_user_data": {"id": user_id, "member_id": member_id},
+                "profile_data": {"id": user_id, "member_id": member_id, "sponsor_data": sponsor},
+            }
+
+        ProfileCache.put(1, TOKEN_IAT, profile(1, 1000))
+        ProfileCache.put(2, TOKEN_IAT, profile(2, 1001, sponsor_member_id=1000))
+        ProfileCache.put(3, TOKEN_IAT, profile(3, 1002))
+        assert ProfileCache.get(1, TOKEN_IAT) is not None
+        ProfileCache.put(4, TOKEN_IAT, profile(4, 1003))
+
+        assert ProfileCache.size() == 3
+        assert ProfileCache.get(2, TOKEN_IAT) is None
+        assert ProfileCache.get(1, TOKEN_IAT) is not None
+
+        ProfileCache.put(2, TOKEN_IAT, profile(2, 1001, sponsor_member_id=1000))
+        ProfileCache.invalidate(member_ids=[1000])
+        assert ProfileCache.get(1, TOKEN_IAT) is None
+        assert ProfileCache.get(2, TOKEN_IAT) is None  # Cambió su sponsor
+
+        monkeypatch.setattr(ProfileCache, "MAX_AGE_SECONDS", -1)
+        assert ProfileCache.get(4, TOKEN_IAT) is None
+        assert ProfileCache.size() == 0
+
+    def test_changes_from_other_workers_seen_within_max_age(self, db_session, cached_network, monkeypatch):
+        """
+        Given: El perfil de A cacheado en este worker
+        When: Otro worker cambia su PV (aquí no se invalida nada) y pasan 31 segundos
+        Then: La entrada vence y la siguiente carga ve el valor nuevo
+        """
+        import NNProtect_new_website.mlm_service.profile_cache as profile_cache_module
+
+        user_a = cached_network['A']
+        db_session.connection().exec_driver_sql("UPDATE users SET pv_cache = 777 WHERE member_id = 1000")
+        db_session.expire_all()
+
+        assert ProfileCache.get(user_a.id, TOKEN_IAT) is not None  # Aún vigente
+
+        stored_at = profile_cache_module.time.monotonic()
+        monkeypatch.setattr(profile_cache_module.time, "monotonic", lambda: stored_at + 31)
+
+        assert ProfileCache.get(user_a.id, TOKEN_IAT) is None
+        assert AuthState._load_token_user_data(db_session, user_a.id)["profile_data"]["pv_cache"] == 777
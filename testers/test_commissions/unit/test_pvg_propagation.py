@@ -0,0 +1,86 @@
+"""
+Tests Unitarios - Propagación de PVG a la línea ascendente
+
+Objetivo: Validar que PVUpdateService.propagate_pvg_to_upline actualiza el
+pvg_cache de TODOS los ancestros en un solo UPDATE y devuelve las filas
+actualizadas para evaluar rangos en memoria.
+
+Reglas de Negocio:
+- Todos los ancestros (depth > 0) suman el PV de la orden a su PVG
+- El comprador NO se actualiza aquí (su PV/PVG se actualiza aparte)
+- Miembros fuera de la línea ascendente no cambian
+"""
+
+import pytest
+from sqlmodel import select
+
+from database.users import Users
+from NNProtect_new_website.mlm_service.pv_update_service import PVUpdateService
+from NNProtect_new_website.mlm_service.rank_service import RankService
+
+
+@pytest.mark.critical
+@pytest.mark.genealogy
+class TestPVGPropagation:
+    """
+    Suite de tests para la propagación set-based de PVG.
+    """
+
+    def test_propagation_updates_whole_upline(self, db_session, test_network_4_levels, create_test_user):
+        """
+        Escenario:
+            A → B → C → D, y X → (fuera de la red)
+
+        Acción:
+            D genera 1,465 PV
+
+        Esperado:
+            - A, B y C suman 1,465 a pvg_cache ✅
+            - D y X no cambian ✅
+        """
+        users = test_network_4_levels
+        outsider = create_test_user(member_id=2000, sponsor_id=None)
+
+        updated = PVUpdateService.propagate_pvg_to_upline(db_session, users['D'].member_id, 1465)
+
+        assert sorted(member_id for member_id, _, _ in updated) == [1000, 1001, 1002]
+        assert all(pvg_cache == 1465 for _, _, pvg_cache in updated)
+
+        pvg_by_member = dict(db_session.exec(select(Users.member_id, Users.pvg_cache)).all())
+        assert pvg_by_member[1000] == 1465
+        assert pvg_by_member[1001] == 1465
+        assert pvg_by_member[1002] == 1465
+        assert pvg_by_member[1003] == 0
+        assert pvg_by_member[outsider.member_id] == 0
+
+    def test_propagation_is_cumulative(self, db_session, test_network_simple):
+        """
+        Dos órdenes consecutivas de C suman ambas al PVG de A y B.
+        """
+        users = test_network_simple
+
+        PVUpdateService.propagate_pvg_to_upline(db_session, users['C'].member_id, 1000)
+        updated = PVUpdateService.propagate_pvg_to_upline(db_session, users['C'].member_id, 500)
+
+        assert dict((member_id, pvg) for member_id, _, pvg in updated) == {1000: 1500, 1001: 1500}
+
+    def test_root_member_has_no_upline(self, db_session, test_network_simple):
+        """
+        El usuario raíz no tiene ancestros: no se actualiza ninguna fila.
+        """
+        users = test_network_simple
+
+        updated = PVUpdateService.propagate_pvg_to_upline(db_session, users['A'].member_id, 1465)
+
+        assert updated == []
+
+    def test_rank_from_returned_rows_without_reloading_user(self, db_session, ranks):
+        """
+        Las filas devueltas alcanzan para calcular el rango sin consultar Users.
+        """
+        # member_id inexistente: si se consultara Users devolvería None
+        rank_id = RankService.calculate_rank_from_cache(
+            db_session, member_id=999999, pv_cache=1465, pvg_cache=21000
+        )
+
+        assert rank_id == ranks["Emprendedor"].id
@@ -0,0 +1,127 @@
+"""
+Tests Unitarios - RankLadder (escalera de rangos en memoria)
+
+Objetivo: Validar que la escalera cacheada resuelve rangos igual que la tabla
+ranks, sin consultar la BD en cada llamada, y que se recarga al cambiar.
+
+Reglas de Negocio:
+- El rango de un PVG es el más alto cuyo pvg_required <= PVG ("Sin rango" si ninguno)
+- Llamadas repetidas no ejecutan queries sobre ranks
+- Un cambio a Ranks se comparte con el proceso solo tras el commit
+"""
+
+import pytest
+from sqlalchemy import event
+
+from database.ranks import Ranks
+from NNProtect_new_website.mlm_service.rank_ladder import RankLadder
+from NNProtect_new_website.mlm_service.rank_service import RankService
+
+
+@pytest.fixture
+def ladder_reset():
+    """La escalera es por proceso: se descarta antes y después de cada test."""
+    RankLadder.invalidate()
+    yield
+    RankLadder.invalidate()
+
+
+def _count_rank_queries(db_session):
+    """Lista donde se registran los SELECT sobre ranks de la conexión del test."""
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if "FROM ranks" in statement:
+            statements.append(statement)
+
+    connection = db_session.connection()
+    event.listen(connection.engine, "before_cursor_execute", before_execute)
+    return statements, lambda: event.remove(connection.engine, "before_cursor_execute", before_execute)
+
+
+@pytest.mark.rank_system
+class TestRankLadder:
+    """
+    Suite de tests para RankLadder.
+    """
+
+    @pytest.mark.parametrize("pvg, expected_rank", [
+        (0, "Sin rango"),
+        (1464, "Sin rango"),
+        (1465, "Visionario"),
+        (20999, "Visionario"),
+        (21000, "Emprendedor"),
+        (299999, "Innovador"),
+        (300000, "Embajador Transformador"),
+        (5_000_000, "Embajador Solidario"),
+    ])
+    def test_rank_for_pvg_matches_thresholds(self, db_session, ranks, ladder_reset, pvg, expected_rank):
+        """
+        Given: Los 9 rangos del sistema
+        When: Se calcula el rango para un PVG (en el umbral, justo debajo y arriba)
+        Then: Coincide con el rango esperado de la tabla
+        """
+        rank_id = RankService.calculate_rank_from_cache(db_session, 0, pv_cache=1465, pvg_cache=pvg)
+
+        assert rank_id == ranks[expected_rank].id
+
+    def test_names_and_next_rank(self, db_session, ranks, ladder_reset):
+        """
+        Given: La escalera cargada
+        When: Se consultan nombres, ids y siguiente rango
+        Then: Regresan los valores de la tabla; el rango máximo no tiene siguiente
+        """
+        ladder = RankLadder.get_shared(db_session)
+
+        assert ladder.name(ranks["Creativo"].id) == "Creativo"
+        assert ladder.name(999, "Desconocido") == "Desconocido"
+        assert ladder.id_for("Sin rango") == ranks["Sin rango"].id
+        assert ladder.next_rank_id(ranks["Visionario"].id) == ranks["Emprendedor"].id
+        assert ladder.next_rank_id(ranks["Embajador Solidario"].id) is None
+        assert ladder.pvg_required[ranks["Innovador"].id] == 120000
+        assert [name for _, name in ladder.ranks_between(ranks["Visionario"].id, ranks["Innovador"].id)] == [
+            "Emprendedor", "Creativo", "Innovador"
+        ]
+
+    def test_repeated_calls_do_not_query_ranks(self, db_session, ranks, ladder_reset):
+        """
+        Given: La escalera ya cargada
+        When: Se calculan 500 rangos y nombres
+        Then: No se ejecuta ningún SELECT sobre ranks
+        """
+        RankLadder.get_shared(db_session)
+        statements, stop = _count_rank_queries(db_session)
+
+        try:
+            for pvg in range(0, 500_000, 1000):
+                RankService.calculate_rank_from_cache(db_session, 0, pv_cache=1465, pvg_cache=pvg)
+                RankLadder.get_shared(db_session).name(ranks["Creativo"].id)
+        finally:
+            stop()
+
+        assert statements == []
+
+    def test_rank_change_invalidates_after_commit(self, db_session, ranks, ladder_reset):
+        """
+        Given: La escalera cargada
+        When: Se modifica pvg_required de un rango (sin commit y luego con commit)
+        Then: Antes del commit solo la sesión que lo cambió ve el umbral nuevo
+              (escalera propia, no se publica); después del commit se comparte
+        """
+        ladder = RankLadder.get_shared(db_session)
+        visionario = ranks["Visionario"]
+
+        visionario.pvg_required = 1000
+        db_session.add(visionario)
+        db_session.flush()
+
+        private = RankLadder.get_shared(db_session)
+        assert private is not ladder
+        assert private.rank_for_pvg(1000, RankService.DEFAULT_RANK_ID) == visionario.id
+        assert RankLadder._cache.peek() is None
+
+        db_session.commit()
+
+        reloaded = RankLadder.get_shared(db_session)
+        assert reloaded is RankLadder._cache.peek()
+        assert reloaded.rank_for_pvg(1000, RankService.DEFAULT_RANK_ID) == visionario.id
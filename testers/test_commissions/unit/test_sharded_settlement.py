@@ -0,0 +1,161 @@
+"""
+Tests Unitarios - Liquidación mensual por shards
+
+Objetivo: Validar que ShardedSettlementService reparte a los receptores en
+shards disjuntos (hash o piernas bajo la raíz) y que el merge de las fases
+Uninivel y Matching da exactamente los mismos montos que el camino secuencial.
+
+Reglas de Negocio:
+- Cada receptor pertenece a un solo shard
+- Matching corre después de que TODOS los shards terminaron Uninivel
+- Totales con math.fsum: idénticos sin importar el número de shards
+"""
+
+import math
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlmodel import select
+
+from database.comissions import Commissions, BonusType
+from database.orders import Orders, OrderStatus
+from database.order_items import OrderItems
+from database.products import Products
+from database.user_rank_history import UserRankHistory
+from NNProtect_new_website.mlm_service.commission_service import CommissionService
+from NNProtect_new_website.mlm_service.sharded_settlement_service import ShardedSettlementService
+
+
+@pytest.fixture
+def network_with_orders(db_session, test_network_4_levels, create_test_user, test_period_current, ranks):
+    """
+    A(1000, Solidario) → B(1001, Transformador) → C(1002) → D(1003); A → E(1004)
+    Órdenes confirmadas: C 1000 VN, D 500 VN, E 300 VN
+    """
+    create_test_user(member_id=1004, sponsor_id=1000)
+
+    for member_id, rank_id in [(1000, 9), (1001, 6)]:
+        db_session.add(UserRankHistory(
+            member_id=member_id,
+            rank_id=rank_id,
+            achieved_on=datetime.now(timezone.utc) + timedelta(minutes=1)
+        ))
+
+    product = Products(
+        product_name="Shard", active_ingredient="Shard", presentation="capsulas", type="suplemento",
+        quantity="1", vn_mx=0.0, vn_usa=0.0, vn_colombia=0.0, price_mx=0.0, price_usa=0.0,
+        price_colombia=0.0, public_mx=0.0, public_usa=0.0, public_colombia=0.0
+    )
+    db_session.add(product)
+    db_session.flush()
+
+    for member_id, vn in [(1002, 1000.0), (1003, 500.0), (1004, 300.0)]:
+        order = Orders(
+            member_id=member_id, country="Mexico", currency="MXN", total_vn=vn,
+            status=OrderStatus.PAYMENT_CONFIRMED.value, period_id=test_period_current.id
+        )
+        db_session.add(order)
+        db_session.flush()
+        db_session.add(OrderItems(order_id=order.id, product_id=product.id, line_vn=vn))
+
+    db_session.flush()
+    return test_period_current
+
+
+def _run_phase(db_session, phase, period_id, shards):
+    results = [
+        ShardedSettlementService.run_shard_phase(db_session, phase, period_id, shard)
+        for shard in shards
+    ]
+    return ShardedSettlementService.merge_phase_results(phase, results)
+
+
+@pytest.mark.critical
+@pytest.mark.unilevel_bonus
+@pytest.mark.matching_bonus
+class TestShardedSettlement:
+    """
+    Suite de tests para la liquidación por shards.
+    """
+
+    def test_hash_shards_match_sequential(self, db_session, network_with_orders):
+        period_id = network_with_orders.id
+        shards = ShardedSettlementService.build_shards(db_session, ShardedSettlementService.STRATEGY_HASH, 3)
+
+        sequential = CommissionService.calculate_unilevel_bonus_for_period(db_session, period_id, dry_run=True)
+        unilevel = _run_phase(db_session, "unilevel", period_id, shards)
+
+        assert unilevel["by_member"] == sequential["by_member"]
+        assert unilevel["commissions"] == sequential["commissions"]
+        assert unilevel["total_amount"] == math.fsum(sequential["by_member"].values())
+
+        expected_matching = {}
+        for row in CommissionService.build_matching_commission_rows(db_session, period_id):
+            expected_matching[row["member_id"]] = expected_matching.get(row["member_id"], 0.0) + row["amount_converted"]
+
+        matching = _run_phase(db_session, "matching", period_id, shards)
+
+        assert matching["by_member"] == expected_matching
+        assert matching["by_member"]  # A recibe Matching de B (Embajador)
+
+    def test_subtree_shards_are_disjoint(self, db_session, network_with_orders):
+        """
+        Piernas bajo la raíz: 1001 (3 miembros) y 1004 (1); la raíz va al shard 0.
+        """
+        shards = ShardedSettlementService.build_shards(db_session, ShardedSettlementService.STRATEGY_SUBTREE, 2)
+
+        members = [
+            set(db_session.scalars(ShardedSettlementService.shard_member_ids(shard)))
+            for shard in shards
+        ]
+
+        assert [shard["leg_roots"] for shard in shards] == [[1001], [1004]]
+        assert members == [{1000, 1001, 1002, 1003}, {1004}]
+
+    def test_deposit_phase_across_shards(self, db_session, network_with_orders, create_test_wallet):
+        from database.wallet import Wallets, WalletStatus
+
+        for member_id in (1000, 1001, 1002, 1003, 1004):
+            wallet = create_test_wallet(member_id=member_id)
+            wallet.status = WalletStatus.ACTIVE.value
+            db_session.add(wallet)
+        db_session.flush()
+
+        period_id = network_with_orders.id
+        shards = ShardedSettlementService.build_shards(db_session, ShardedSettlementService.STRATEGY_HASH, 2)
+
+        unilevel = _run_phase(db_session, "unilevel", period_id, shards)
+        deposit = _run_phase(db_session, "deposit", period_id, shards)
+
+        assert deposit["deposited_count"] == unilevel["commissions"]
+        balances = dict(db_session.exec(select(Wallets.member_id, Wallets.balance)).all())
+        assert math.fsum(balances.values()) == pytest.approx(unilevel["total_amount"])
+
+    def test_rerun_after_partial_failure_does_not_duplicate(self, db_session, network_with_orders):
+        """
+        Given: El shard 0 ya confirmó Uninivel y Matching y el resto falló
+        When: Se re-ejecutan ambas fases para todos los shards
+        Then: El shard 0 no inserta nada y el total coincide con una sola corrida
+        """
+        period_id = network_with_orders.id
+        shards = ShardedSettlementService.build_shards(db_session, ShardedSettlementService.STRATEGY_SUBTREE, 2)
+
+        _run_phase(db_session, "unilevel", period_id, shards[:1])
+        _run_phase(db_session, "matching", period_id, shards[:1])
+
+        shard_0_members = {1000, 1001, 1002, 1003}
+        unilevel = _run_phase(db_session, "unilevel", period_id, shards)
+        matching = _run_phase(db_session, "matching", period_id, shards)
+        assert not set(unilevel["by_member"]) & shard_0_members
+        assert not set(matching["by_member"]) & shard_0_members
+
+        # Otra corrida completa: todo ya liquidado
+        assert _run_phase(db_session, "unilevel", period_id, shards)["commissions"] == 0
+        assert _run_phase(db_session, "matching", period_id, shards)["commissions"] == 0
+
+        sequential = CommissionService.calculate_unilevel_bonus_for_period(db_session, period_id, dry_run=True)
+        settled = db_session.exec(
+            select(Commissions.member_id, Commissions.level_depth)
+            .where((Commissions.period_id == period_id) & (Commissions.bonus_type == BonusType.BONO_UNINIVEL.value))
+        ).all()
+        assert len(settled) == sequential["commissions"]
+        assert len(settled) == len(set(settled))
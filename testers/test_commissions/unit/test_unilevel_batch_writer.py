@@ -0,0 +1,108 @@
+"""
+Tests Unitarios - Bono Uninivel incremental (writer batch)
+
+Objetivo: Validar que PaymentService._trigger_unilevel_for_ancestors obtiene
+rango/país de toda la línea ascendente en un query, calcula en memoria e
+inserta todas las comisiones en un solo INSERT.
+
+Reglas de Negocio:
+- Solo ancestros con rango en el período de la orden
+- Se usa el rango MÁS ALTO del período
+- Porcentaje según rango y profundidad (UNILEVEL_BONUS_PERCENTAGES)
+"""
+
+import pytest
+from datetime import datetime, timezone
+from sqlmodel import select
+
+from database.orders import Orders, OrderStatus
+from database.comissions import Commissions, BonusType
+from database.user_rank_history import UserRankHistory
+from NNProtect_new_website.payment_service.payment_service import PaymentService
+
+
+def _assign_period_rank(db_session, member_id: int, rank_id: int, period_id: int):
+    db_session.add(UserRankHistory(
+        member_id=member_id,
+        rank_id=rank_id,
+        achieved_on=datetime.now(timezone.utc),
+        period_id=period_id
+    ))
+    db_session.flush()
+
+
+@pytest.mark.critical
+@pytest.mark.unilevel_bonus
+class TestUnilevelBatchWriter:
+    """
+    Suite de tests para el writer batch del Bono Uninivel.
+    """
+
+    def test_commissions_for_ranked_ancestors(self, db_session, ranks, test_network_4_levels, test_period_current):
+        """
+        Escenario:
+            A (Emprendedor) → B (Visionario → Emprendedor) → C (sin rango en período) → D
+
+        Acción:
+            D compra 1,000 VN
+
+        Esperado:
+            - C: sin comisión (no tiene rango en el período) ✅
+            - B: nivel 2 con su rango más alto (Emprendedor 8%) = 80 ✅
+            - A: nivel 3 Emprendedor 10% = 100 ✅
+        """
+        users = test_network_4_levels
+        period_id = test_period_current.id
+
+        _assign_period_rank(db_session, users['A'].member_id, ranks["Emprendedor"].id, period_id)
+        _assign_period_rank(db_session, users['B'].member_id, ranks["Visionario"].id, period_id)
+        _assign_period_rank(db_session, users['B'].member_id, ranks["Emprendedor"].id, period_id)
+
+        order = Orders(
+            member_id=users['D'].member_id,
+            country="Mexico",
+            currency="MXN",
+            total_vn=1000.0,
+            total_pv=1000,
+            status=OrderStatus.PAYMENT_CONFIRMED.value,
+            payment_confirmed_at=datetime.now(timezone.utc),
+            period_id=period_id
+        )
+        db_session.add(order)
+        db_session.flush()
+
+        PaymentService._trigger_unilevel_for_ancestors(db_session, order)
+
+        commissions = db_session.exec(
+            select(Commissions).where(
+                (Commissions.source_order_id == order.id) &
+                (Commissions.bonus_type == BonusType.BONO_UNINIVEL.value)
+            )
+        ).all()
+        by_member = {commission.member_id: commission for commission in commissions}
+
+        assert set(by_member) == {users['A'].member_id, users['B'].member_id}
+        assert by_member[users['B'].member_id].level_depth == 2
+        assert by_member[users['B'].member_id].amount_converted == pytest.approx(80.0)
+        assert by_member[users['A'].member_id].level_depth == 3
+        assert by_member[users['A'].member_id].amount_converted == pytest.approx(100.0)
+
+    def test_level_10_plus_only_for_ambassadors(self):
+        """
+        Cálculo en memoria: nivel 12 solo paga a Embajadores (porcentaje de nivel 10+).
+        """
+        order = Orders(
+            id=1, member_id=50, country="Mexico", currency="MXN",
+            total_vn=1000.0, period_id=1
+        )
+        ancestors = [
+            (10, 12, "Innovador", "Mexico"),
+            (11, 12, "Embajador Solidario", "Mexico"),
+            (12, 1, "Sin rango", "Mexico"),
+        ]
+
+        rows = PaymentService._compute_unilevel_commission_rows(order, ancestors)
+
+        assert [row["member_id"] for row in rows] == [11]
+        assert rows[0]["level_depth"] == 10
+        assert rows[0]["amount_converted"] == pytest.approx(20.0)
@@ -0,0 +1,178 @@
+"""
+Tests Unitarios - Liquidación Uninivel del período (matriz agrupada)
+
+Objetivo: Validar que CommissionService.calculate_unilevel_bonus_for_period
+arma la matriz (ancestor_id, nivel) → VN con un solo GROUP BY, aplica
+UNILEVEL_BONUS_PERCENTAGES e inserta todas las comisiones en un INSERT.
+
+Reglas de Negocio:
+- Solo órdenes PAYMENT_CONFIRMED del período
+- Kits NO generan VN para Uninivel
+- Porcentaje según rango actual del receptor y nivel
+- dry_run devuelve los totales sin escribir
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlmodel import select
+
+from database.comissions import Commissions, BonusType
+from database.orders import Orders, OrderStatus
+from database.order_items import OrderItems
+from database.products import Products
+from database.user_rank_history import UserRankHistory
+from NNProtect_new_website.mlm_service.commission_service import CommissionService
+
+
+def _promote(db_session, member_id: int, rank_id: int):
+    db_session.add(UserRankHistory(
+        member_id=member_id,
+        rank_id=rank_id,
+        achieved_on=datetime.now(timezone.utc) + timedelta(minutes=1)
+    ))
+    db_session.flush()
+
+
+def _product(db_session, name: str, presentation: str) -> Products:
+    product = Products(
+        product_name=name,
+        active_ingredient=name,
+        presentation=presentation,
+        type="suplemento",
+        quantity="1",
+        vn_mx=0.0, vn_usa=0.0, vn_colombia=0.0,
+        price_mx=0.0, price_usa=0.0, price_colombia=0.0,
+        public_mx=0.0, public_usa=0.0, public_colombia=0.0
+    )
+    db_session.add(product)
+    db_session.flush()
+    return product
+
+
+def _order_with_item(db_session, member_id: int, period_id: int, product: Products,
+                     vn: float, status: str = OrderStatus.PAYMENT_CONFIRMED.value):
+    order = Orders(
+        member_id=member_id,
+        country="Mexico",
+        currency="MXN",
+        total_vn=vn,
+        status=status,
+        period_id=period_id
+    )
+    db_session.add(order)
+    db_session.flush()
+    db_session.add(OrderItems(order_id=order.id, product_id=product.id, line_vn=vn))
+    db_session.flush()
+
+
+def _unilevel_by_member(db_session, period_id: int) -> dict:
+    commissions = db_session.exec(
+        select(Commissions).where(
+            (Commissions.bonus_type == BonusType.BONO_UNINIVEL.value) &
+            (Commissions.period_id == period_id)
+        )
+    ).all()
+    result = {}
+    for commission in commissions:
+        result.setdefault(commission.member_id, {})[commission.level_depth] = commission.amount_converted
+    return result
+
+
+@pytest.mark.critical
+@pytest.mark.unilevel_bonus
+class TestUnilevelPeriodSettlement:
+    """
+    Suite de tests para la liquidación Uninivel del período.
+    """
+
+    def test_settlement_for_whole_network(self, db_session, ranks, test_network_4_levels, test_period_current):
+        """
+        Escenario:
+            A (Emprendedor) → B (Visionario) → C (Sin rango) → D
+
+        Órdenes del período:
+            - C: 1,000 VN producto
+            - D: 2,000 VN producto + 5,000 VN kit (no cuenta) + 9,000 VN sin pagar (no cuenta)
+
+        Esperado:
+            - B: nivel 1 (C) 5% = 50, nivel 2 (D) 8% = 160 ✅
+            - A: nivel 2 (C) 8% = 80, nivel 3 (D) 10% = 200 ✅
+            - C (Sin rango): sin comisiones ✅
+        """
+        users = test_network_4_levels
+        period_id = test_period_current.id
+        product = _product(db_session, "Producto", "líquido")
+        kit = _product(db_session, "Kit", "kit")
+
+        _promote(db_session, users['A'].member_id, ranks["Emprendedor"].id)
+        _promote(db_session, users['B'].member_id, ranks["Visionario"].id)
+
+        _order_with_item(db_session, users['C'].member_id, period_id, product, 1000.0)
+        _order_with_item(db_session, users['D'].member_id, period_id, product, 2000.0)
+        _order_with_item(db_session, users['D'].member_id, period_id, kit, 5000.0)
+        _order_with_item(db_session, users['D'].member_id, period_id, product, 9000.0,
+                         status=OrderStatus.PENDING_PAYMENT.value)
+
+        settlement = CommissionService.calculate_unilevel_bonus_for_period(db_session, period_id)
+        commissions = _unilevel_by_member(db_session, period_id)
+
+        a, b = users['A'].member_id, users['B'].member_id
+        assert settlement["commissions"] == 4
+        assert len(settlement["commission_ids"]) == 4
+        assert commissions[b] == {1: pytest.approx(50.0), 2: pytest.approx(160.0)}
+        assert commissions[a] == {2: pytest.approx(80.0), 3: pytest.approx(200.0)}
+        assert settlement["total_amount"] == pytest.approx(490.0)
+
+    def test_level_10_plus_bucket_for_ambassadors(self, db_session, ranks, create_test_user, test_period_current):
+        """
+        Red lineal de 12 niveles: el Embajador Solidario cobra niveles 10, 11 y 12
+        agrupados en un solo bucket 10+ al 2%.
+        """
+        period_id = test_period_current.id
+        product = _product(db_session, "Producto", "líquido")
+
+        for member_id in range(3000, 3013):
+            create_test_user(member_id=member_id, sponsor_id=member_id - 1 if member_id > 3000 else None)
+        _promote(db_session, 3000, ranks["Embajador Solidario"].id)
+
+        for member_id in (3010, 3011, 3012):
+            _order_with_item(db_session, member_id, period_id, product, 1000.0)
+
+        CommissionService.calculate_unilevel_bonus_for_period(db_session, period_id)
+        commissions = _unilevel_by_member(db_session, period_id)
+
+        assert commissions[3000] == {10: pytest.approx(60.0)}
+
+    def test_dry_run_does_not_write(self, db_session, ranks, test_network_simple, test_period_current):
+        """
+        dry_run devuelve los mismos totales sin insertar comisiones.
+        """
+        users = test_network_simple
+        period_id = test_period_current.id
+        product = _product(db_session, "Producto", "líquido")
+
+        _promote(db_session, users['A'].member_id, ranks["Visionario"].id)
+        _order_with_item(db_session, users['C'].member_id, period_id, product, 1000.0)
+
+        settlement = CommissionService.calculate_unilevel_bonus_for_period(db_session, period_id, dry_run=True)
+
+        assert settlement["commission_ids"] == []
+        assert settlement["by_member"] == {users['A'].member_id: pytest.approx(80.0)}
+        assert _unilevel_by_member(db_session, period_id) == {}
+
+    def test_single_member_uses_period_engine(self, db_session, ranks, test_network_simple, test_period_current):
+        """
+        calculate_unilevel_bonus(member) solo crea las comisiones de ese miembro.
+        """
+        users = test_network_simple
+        period_id = test_period_current.id
+        product = _product(db_session, "Producto", "líquido")
+
+        _promote(db_session, users['A'].member_id, ranks["Visionario"].id)
+        _promote(db_session, users['B'].member_id, ranks["Visionario"].id)
+        _order_with_item(db_session, users['C'].member_id, period_id, product, 1000.0)
+
+        commission_ids = CommissionService.calculate_unilevel_bonus(db_session, users['B'].member_id, period_id)
+
+        assert len(commission_ids) == 1
+        assert _unilevel_by_member(db_session, period_id) == {users['B'].member_id: {1: pytest.approx(50.0)}}
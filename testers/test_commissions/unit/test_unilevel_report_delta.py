@@ -0,0 +1,125 @@
+"""
+Tests Unitarios - unilevel_report en modo delta
+
+Objetivo: Validar que MLMUserManager.apply_order_to_unilevel_report suma el
+PV/VN de una orden en la columna de nivel correcta de cada ancestro, y que
+rebuild_unilevel_report reconstruye exactamente el mismo estado.
+
+Reglas de Negocio:
+- Comprador (depth=0): pv / vn
+- Ancestros (depth=N): pvg_N / vng_N (10+ en pvg_10_plus / vng_10_plus)
+- pvg_total / vng_total = suma de los niveles (sin volumen personal)
+"""
+
+import pytest
+from datetime import datetime, timezone
+from sqlmodel import select
+
+from database.orders import Orders, OrderStatus
+from database.unilevel_report import UnilevelReports
+from NNProtect_new_website.mlm_service.mlm_user_manager import MLMUserManager
+
+
+REPORT_COLUMNS = ["pv", "vn", "pvg_1", "vng_1", "pvg_2", "vng_2", "pvg_total", "vng_total"]
+
+
+def _confirmed_order(db_session, member_id: int, period_id: int, pv: int, vn: float) -> Orders:
+    order = Orders(
+        member_id=member_id,
+        country="Mexico",
+        currency="MXN",
+        total_pv=pv,
+        total_vn=vn,
+        status=OrderStatus.PAYMENT_CONFIRMED.value,
+        payment_confirmed_at=datetime.now(timezone.utc),
+        period_id=period_id
+    )
+    db_session.add(order)
+    db_session.flush()
+    return order
+
+
+def _reports_by_user(db_session, period_id: int) -> dict:
+    reports = db_session.exec(
+        select(UnilevelReports).where(UnilevelReports.period_id == period_id)
+    ).all()
+    return {
+        report.user_id: {column: getattr(report, column) for column in REPORT_COLUMNS}
+        for report in reports
+    }
+
+
+@pytest.mark.integration
+@pytest.mark.genealogy
+class TestUnilevelReportDelta:
+    """
+    Suite de tests para el upsert delta de unilevel_report.
+    """
+
+    def test_delta_fills_level_columns(self, db_session, test_network_simple, test_period_current):
+        """
+        Escenario:
+            A → B → C
+
+        Acción:
+            C compra 1,000 PV / 500 VN
+
+        Esperado:
+            - C: pv=1000, vn=500 ✅
+            - B: pvg_1=1000, vng_1=500 ✅
+            - A: pvg_2=1000, vng_2=500 ✅
+        """
+        users = test_network_simple
+        order = _confirmed_order(db_session, users['C'].member_id, test_period_current.id, 1000, 500.0)
+
+        affected = MLMUserManager.apply_order_to_unilevel_report(db_session, order)
+        reports = _reports_by_user(db_session, test_period_current.id)
+
+        assert affected == 3
+        assert reports[users['C'].id]["pv"] == 1000
+        assert reports[users['C'].id]["pvg_total"] == 0
+        assert reports[users['B'].id]["pvg_1"] == 1000
+        assert reports[users['B'].id]["vng_1"] == 500.0
+        assert reports[users['A'].id]["pvg_2"] == 1000
+        assert reports[users['A'].id]["pvg_total"] == 1000
+        assert reports[users['A'].id]["vng_total"] == 500.0
+
+    def test_delta_accumulates_on_existing_report(self, db_session, test_network_simple, test_period_current):
+        """
+        B compra y luego C compra: A acumula nivel 1 y nivel 2 en el MISMO reporte.
+        """
+        users = test_network_simple
+        period_id = test_period_current.id
+
+        MLMUserManager.apply_order_to_unilevel_report(
+            db_session, _confirmed_order(db_session, users['B'].member_id, period_id, 300, 150.0)
+        )
+        MLMUserManager.apply_order_to_unilevel_report(
+            db_session, _confirmed_order(db_session, users['C'].member_id, period_id, 1000, 500.0)
+        )
+        reports = _reports_by_user(db_session, period_id)
+
+        assert reports[users['A'].id]["pvg_1"] == 300
+        assert reports[users['A'].id]["pvg_2"] == 1000
+        assert reports[users['A'].id]["pvg_total"] == 1300
+        assert reports[users['B'].id]["pv"] == 300
+        assert reports[users['B'].id]["pvg_1"] == 1000
+
+    def test_rebuild_matches_delta(self, db_session, test_network_simple, test_period_current):
+        """
+        La reconstrucción completa produce exactamente el mismo estado que los deltas.
+        """
+        users = test_network_simple
+        period_id = test_period_current.id
+
+        for member, pv, vn in [('A', 200, 100.0), ('B', 300, 150.0), ('C', 1000, 500.0), ('C', 50, 25.0)]:
+            MLMUserManager.apply_order_to_unilevel_report(
+                db_session, _confirmed_order(db_session, users[member].member_id, period_id, pv, vn)
+            )
+        delta_state = _reports_by_user(db_session, period_id)
+
+        rebuilt = MLMUserManager.rebuild_unilevel_report(db_session, period_id)
+        db_session.expire_all()
+
+        assert rebuilt == 3
+        assert _reports_by_user(db_session, period_id) == delta_state
@@ -0,0 +1,176 @@
+"""
+Tests Unitarios - Evaluación de rangos en lote para la línea ascendente
+
+Objetivo: Validar que RankService.evaluate_upline_ranks promueve al comprador y
+a todos sus ancestros cuyo PVG alcanzó un nuevo rango, con las mismas reglas
+que check_and_update_rank y un número fijo de queries.
+
+Reglas de Negocio:
+- Rango = más alto cuyo PVG requerido se cumple, con PV personal >= 1,465
+- Solo se promueve si el rango calculado es mayor al actual (último por achieved_on)
+- Cada rango intermedio genera su Bono por Alcance una sola vez
+- Las queries no crecen con el tamaño de la línea ascendente
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import event
+from sqlmodel import select
+
+from database.comissions import Commissions, BonusType
+from database.periods import Periods
+from database.user_rank_history import UserRankHistory
+from database.users import Users
+from NNProtect_new_website.mlm_service.rank_ladder import RankLadder
+from NNProtect_new_website.mlm_service.rank_service import RankService
+
+
+@pytest.fixture
+def open_period(db_session):
+    """Período que cubre la fecha actual (las comisiones lo requieren)."""
+    now = datetime.now(timezone.utc)
+    period = Periods(name="Rank Batch Period", starts_on=now - timedelta(days=1), ends_on=now + timedelta(days=30))
+    db_session.add(period)
+    db_session.flush()
+    return period
+
+
+def _set_caches(db_session, user, pv_cache, pvg_cache):
+    user.pv_cache = pv_cache
+    user.pvg_cache = pvg_cache
+    db_session.add(user)
+    db_session.flush()
+
+
+def _current_rank(db_session, member_id):
+    return RankService.get_user_current_rank(db_session, member_id)
+
+
+def _count_statements(db_session, action):
+    """Ejecuta action y regresa cuántas sentencias SQL envió."""
+    statements = []
+    engine = db_session.connection().engine
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_execute)
+    try:
+        action()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_execute)
+    return len(statements)
+
+
+@pytest.mark.rank_system
+@pytest.mark.achievement_bonus
+class TestUplineRankBatch:
+    """
+    Suite de tests para la evaluación de rangos en lote.
+    """
+
+    def test_promotes_buyer_and_ancestors(self, db_session, ranks, open_period, test_network_4_levels):
+        """
+        Escenario:
+            A → B → C → D; la orden de D deja a A en Emprendedor, a B y C en
+            Visionario y a D sin PV suficiente.
+
+        Esperado:
+            - A, B y C promovidos en una sola llamada ✅
+            - D se queda en "Sin rango" ✅
+            - A recibe Bono por Alcance de Emprendedor (Visionario no tiene bono) ✅
+        """
+        users = test_network_4_levels
+        _set_caches(db_session, users['A'], 1465, 21000)
+        _set_caches(db_session, users['B'], 1465, 5000)
+        _set_caches(db_session, users['C'], 1465, 1465)
+        _set_caches(db_session, users['D'], 1000, 1000)
+
+        promotions = RankService.evaluate_upline_ranks(db_session, users['D'].member_id)
+
+        assert promotions == {
+            1000: ranks["Emprendedor"].id,
+            1001: ranks["Visionario"].id,
+            1002: ranks["Visionario"].id,
+        }
+        assert _current_rank(db_session, 1000) == ranks["Emprendedor"].id
+        assert _current_rank(db_session, 1003) == ranks["Sin rango"].id
+
+        bonuses = db_session.exec(
+            select(Commissions).where(Commissions.bonus_type == BonusType.BONO_ALCANCE.value)
+        ).all()
+        assert [(bonus.member_id, bonus.amount_converted, bonus.period_id) for bonus in bonuses] == [
+            (1000, 1500, open_period.id)
+        ]
+
+    def test_rank_jump_pays_each_intermediate_bonus_once(self, db_session, ranks, open_period, test_network_simple):
+        """
+        A salta de "Sin rango" a Innovador: cobra Emprendedor, Creativo e Innovador.
+        Una segunda evaluación (ya en Innovador) no genera nada.
+        """
+        users = test_network_simple
+        _set_caches(db_session, users['A'], 1465, 120000)
+
+        RankService.evaluate_upline_ranks(db_session, users['C'].member_id)
+        second = RankService.evaluate_upline_ranks(db_session, users['C'].member_id)
+
+        notes = db_session.exec(
+            select(Commissions.notes).where(
+                (Commissions.member_id == 1000) & (Commissions.bonus_type == BonusType.BONO_ALCANCE.value)
+            )
+        ).all()
+        assert len(notes) == 3
+        assert all(any(name in note for note in notes) for name in ("Emprendedor", "Creativo", "Innovador"))
+        assert second == {}
+
+    def test_current_rank_is_latest_not_highest(self, db_session, ranks, open_period, test_network_simple):
+        """
+        Tras el reset de período el último rango es "Sin rango" aunque antes fue Creativo:
+        se vuelve a promover, pero el bono de Creativo ya cobrado no se repite.
+        """
+        users = test_network_simple
+        earlier = datetime.now(timezone.utc) - timedelta(days=40)
+        db_session.add(UserRankHistory(member_id=1000, rank_id=ranks["Creativo"].id, achieved_on=earlier - timedelta(days=1)))
+        db_session.add(Commissions(
+            member_id=1000, bonus_type=BonusType.BONO_ALCANCE.value, period_id=open_period.id,
+            amount_vn=3000, currency_origin="MXN", amount_converted=3000, currency_destination="MXN",
+            notes="Bono por Alcance - Rango: Creativo (primera vez)"
+        ))
+        _set_caches(db_session, users['A'], 1465, 58000)
+
+        promotions = RankService.evaluate_upline_ranks(db_session, users['B'].member_id)
+
+        assert promotions == {1000: ranks["Creativo"].id}
+        creativo_bonuses = db_session.exec(
+            select(Commissions).where(
+                (Commissions.member_id == 1000) & Commissions.notes.contains("Creativo")
+            )
+        ).all()
+        assert len(creativo_bonuses) == 1
+
+    def test_query_count_does_not_grow_with_upline(self, db_session, ranks, open_period, create_test_user):
+        """
+        Una línea de 5 y otra de 40 miembros, todos promovidos, ejecutan las mismas queries.
+        """
+        def build_chain(root_id, size):
+            create_test_user(member_id=root_id, sponsor_id=None)
+            for offset in range(1, size):
+                create_test_user(member_id=root_id + offset, sponsor_id=root_id + offset - 1)
+            return root_id + size - 1
+
+        short_leaf = build_chain(3000, 5)
+        long_leaf = build_chain(4000, 40)
+
+        for user in db_session.exec(select(Users).where(Users.member_id >= 3000)).all():
+            _set_caches(db_session, user, 1465, 21000)
+
+        # Escalera de rangos y período actual ya cargados (caches por proceso)
+        RankLadder.get_shared(db_session)
+        RankService._get_current_period(db_session)
+
+        short_count = _count_statements(db_session, lambda: RankService.evaluate_upline_ranks(db_session, short_leaf))
+        long_count = _count_statements(db_session, lambda: RankService.evaluate_upline_ranks(db_session, long_leaf))
+
+        assert short_count == long_count
+        assert _current_rank(db_session, 4000) == ranks["Emprendedor"].id
+        assert _current_rank(db_session, long_leaf) == ranks["Emprendedor"].id
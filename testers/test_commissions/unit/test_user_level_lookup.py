@@ -0,0 +1,53 @@
+"""
+Tests Unitarios - Nivel de un usuario respecto a un sponsor raíz
+
+Objetivo: Validar que MLMUserManager.get_user_level / get_user_levels resuelven
+el nivel con una búsqueda directa por (ancestor_id, descendant_id) en UserTreePath.
+
+Reglas de Negocio:
+- El sponsor raíz es nivel 0
+- Usuarios fuera de la red del sponsor: nivel 0 (no aparecen en la forma batch)
+"""
+
+import pytest
+
+from NNProtect_new_website.mlm_service.mlm_user_manager import MLMUserManager
+
+
+@pytest.mark.genealogy
+class TestUserLevelLookup:
+    """
+    Suite de tests para la resolución de niveles.
+    """
+
+    def test_single_level(self, db_session, test_network_4_levels, create_test_user):
+        """
+        Escenario:
+            A → B → C → D, y X fuera de la red
+
+        Esperado:
+            - D está en nivel 3 de A y nivel 2 de B ✅
+            - A respecto a sí mismo: nivel 0 ✅
+            - X y los ancestros de B: nivel 0 ✅
+        """
+        users = test_network_4_levels
+        create_test_user(member_id=2000, sponsor_id=None)
+
+        assert MLMUserManager.get_user_level(users['D'].member_id, users['A'].member_id, session=db_session) == 3
+        assert MLMUserManager.get_user_level(users['D'].member_id, users['B'].member_id, session=db_session) == 2
+        assert MLMUserManager.get_user_level(users['A'].member_id, users['A'].member_id, session=db_session) == 0
+        assert MLMUserManager.get_user_level(2000, users['A'].member_id, session=db_session) == 0
+        assert MLMUserManager.get_user_level(users['A'].member_id, users['B'].member_id, session=db_session) == 0
+
+    def test_batch_levels(self, db_session, test_network_4_levels, create_test_user):
+        """
+        La forma batch resuelve toda la lista en un query y omite a los que no están en la red.
+        """
+        users = test_network_4_levels
+        create_test_user(member_id=2000, sponsor_id=None)
+        member_ids = [users[key].member_id for key in ('B', 'C', 'D')] + [2000]
+
+        levels = MLMUserManager.get_user_levels(member_ids, users['A'].member_id, session=db_session)
+
+        assert levels == {users['B'].member_id: 1, users['C'].member_id: 2, users['D'].member_id: 3}
+        assert MLMUserManager.get_user_levels([], users['A'].member_id, session=db_session) == {}
@@ -0,0 +1,182 @@
+"""
+Tests Unitarios - UserStatusCounterService (contadores materializados por status)
+
+Objetivo: Validar que el conteo de usuarios calificados / no calificados se
+mantiene en userstatuscounters con cada cambio de status (ORM y reseteo
+masivo) y que la lectura no vuelve a contar la tabla users.
+
+Reglas de Negocio:
+- Alta / baja / cambio de status ajustan el contador en la misma transacción
+- La lectura nunca escribe la tabla (rebuild es la reparación explícita)
+- El reseteo de período (bulk_reset_users) deja a todos en NO_QUALIFIED
+- La lectura se sirve desde el cache del proceso hasta que termina una
+  transacción que modificó los contadores (esa transacción lee sin cache)
+- Las filas de contadores se bloquean siempre en el mismo orden (sin deadlocks)
+"""
+
+import pytest
+from sqlalchemy import event
+from sqlmodel import select, func
+
+from database.users import Users, UserStatus
+from database.user_status_counters import UserStatusCounters
+from NNProtect_new_website.mlm_service.period_reset_service import PeriodResetService
+from NNProtect_new_website.mlm_service.user_status_counter_service import UserStatusCounterService
+
+
+@pytest.fixture
+def counters_reset():
+    """El cache de conteos es por proceso: se descarta antes y después de cada test."""
+    UserStatusCounterService.invalidate()
+    yield
+    UserStatusCounterService.invalidate()
+
+
+def _actual_counts(db_session):
+    """Conteo real (GROUP BY sobre users) para comparar."""
+    rows = db_session.exec(select(Users.status, func.count(Users.id)).group_by(Users.status)).all()
+    counts = {status.value: 0 for status in UserStatus}
+    counts.update({status.value: user_count for status, user_count in rows})
+    return counts
+
+
+def _stored_counts(db_session):
+    """Conteos guardados en userstatuscounters (sin cache)."""
+    UserStatusCounterService.invalidate()
+    return UserStatusCounterService.get_counts(db_session)
+
+
+def _set_status(db_session, user, status):
+    user.status = status
+    db_session.add(user)
+    db_session.flush()
+
+
+@pytest.mark.critical
+class TestUserStatusCounters:
+    """
+    Suite de tests para los contadores de usuarios por status.
+    """
+
+    def test_uninitialized_table_is_read_only(self, db_session, test_network_4_levels, counters_reset):
+        """
+        Given: 4 usuarios NO_QUALIFIED y la tabla de contadores vacía
+        When: Se leen los contadores y después se reconstruyen (reparación)
+        Then: La lectura cuenta users sin escribir; rebuild inicializa la tabla
+        """
+        counts = UserStatusCounterService.get_counts(db_session)
+
+        assert counts[UserStatus.NO_QUALIFIED.value] == 4
+        assert counts[UserStatus.QUALIFIED.value] == 0
+        assert counts == _actual_counts(db_session)
+        assert db_session.exec(select(UserStatusCounters)).all() == []
+
+        UserStatusCounterService.rebuild(db_session)
+        stored = {row.status: row.user_count for row in db_session.exec(select(UserStatusCounters)).all()}
+        assert stored == counts
+
+    def test_orm_changes_keep_counters_in_sync(self, db_session, create_test_user, test_network_simple, counters_reset):
+        """
+        Given: Contadores inicializados
+        When: Se califica a dos usuarios, se da de alta uno y se suspende otro (status expirado)
+        Then: Los contadores coinciden con el conteo real sin reconstruir
+        """
+        users = test_network_simple
+        UserStatusCounterService.rebuild(db_session)
+
+        _set_status(db_session, users['A'], UserStatus.QUALIFIED)
+        _set_status(db_session, users['B'], UserStatus.QUALIFIED)
+        _set_status(db_session, users['B'], UserStatus.QUALIFIED)  # Sin cambio real
+        create_test_user(member_id=1003, sponsor_id=1002)
+
+        db_session.expire(users['A'])
+        _set_status(db_session, users['A'], UserStatus.SUSPENDED)  # Status anterior expirado
+
+        assert _stored_counts(db_session) == _actual_counts(db_session)
+        assert _stored_counts(db_session) == {
+            UserStatus.NO_QUALIFIED.value: 2,
+            UserStatus.QUALIFIED.value: 1,
+            UserStatus.SUSPENDED.value: 1,
+        }
+
+    def test_bulk_reset_adjusts_counters(self, db_session, test_network_4_levels, counters_reset):
+        """
+        Given: A, B y D calificados (contadores inicializados)
+        When: Se resetea el rango (1000, 1002] y después todos
+        Then: Los contadores siguen al UPDATE masivo (sin eventos ORM)
+        """
+        users = test_network_4_levels
+        UserStatusCounterService.rebuild(db_session)
+        for key in ("A", "B", "D"):
+            _set_status(db_session, users[key], UserStatus.QUALIFIED)
+
+        PeriodResetService.bulk_reset_users(
+            db_session, PeriodResetService.NEW_PERIOD_RESET_VALUES, member_id_range=(1000, 1002)
+        )
+        db_session.expire_all()
+        assert _stored_counts(db_session)[UserStatus.QUALIFIED.value] == 2
+        assert _stored_counts(db_session) == _actual_counts(db_session)
+
+        PeriodResetService.bulk_reset_users(db_session, PeriodResetService.NEW_PERIOD_RESET_VALUES)
+        db_session.expire_all()
+        assert _stored_counts(db_session) == {
+            UserStatus.NO_QUALIFIED.value: 4,
+            UserStatus.QUALIFIED.value: 0,
+            UserStatus.SUSPENDED.value: 0,
+        }
+
+    def test_reads_served_from_process_cache(self, db_session, test_network_simple, counters_reset):
+        """
+        Given: Contadores ya leídos
+        When: Se leen 100 veces más
+        Then: No se ejecuta ninguna sentencia; tras el commit de un cambio se recargan
+        """
+        UserStatusCounterService.rebuild(db_session)
+        db_session.commit()
+        UserStatusCounterService.get_counts(db_session)
+
+        statements = []
+        engine = db_session.connection().engine
+
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", before_execute)
+        try:
+            for _ in range(100):
+                UserStatusCounterService.get_counts(db_session)
+        finally:
+            event.remove(engine, "before_cursor_execute", before_execute)
+
+        assert statements == []
+
+        _set_status(db_session, test_network_simple['C'], UserStatus.QUALIFIED)
+        db_session.commit()
+
+        assert UserStatusCounterService.get_counts(db_session)[UserStatus.QUALIFIED.value] == 1
+
+    def test_counter_rows_updated_in_fixed_order(self, db_session, counters_reset):
+        """
+        Given: Transiciones opuestas ({viejo: -1, nuevo: +1} en ambos sentidos)
+        When: Se aplican los deltas
+        Then: Las filas se actualizan (y bloquean) en el mismo orden, por status
+        """
+        updated = []
+        engine = db_session.connection().engine
+
+        def before_execute(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("UPDATE userstatuscounters"):
+                updated.append(parameters[-1])
+
+        event.listen(engine, "before_cursor_execute", before_execute)
+        try:
+            for deltas in (
+                {UserStatus.NO_QUALIFIED.value: -1, UserStatus.QUALIFIED.value: 1},
+                {UserStatus.QUALIFIED.value: -1, UserStatus.NO_QUALIFIED.value: 1},
+            ):
+                UserStatusCounterService.apply_deltas(db_session.connection(), deltas)
+        finally:
+            event.remove(engine, "before_cursor_execute", before_execute)
+
+        ordered = sorted([UserStatus.NO_QUALIFIED.value, UserStatus.QUALIFIED.value])
+        assert updated == ordered + ordered
@@ -0,0 +1,138 @@
+"""
+Tests Unitarios - Liquidación masiva de comisiones a wallets
+
+Objetivo: Validar que WalletService.settle_pending_commissions deposita todas
+las comisiones PENDING del período con un INSERT multi-fila, un UPDATE ... FROM
+sobre wallets y un UPDATE de status, con el mismo resultado que deposit_commission.
+
+Reglas de Negocio:
+- Una WalletTransaction por comisión (trazabilidad por commission_id)
+- balance_before/balance_after encadenados por miembro en orden de comisión
+- Sin wallet activa en la moneda de la comisión → queda PENDING (fallida)
+"""
+
+import pytest
+from sqlmodel import select
+
+from database.comissions import Commissions, CommissionStatus
+from database.wallet import Wallets, WalletTransactions, WalletStatus
+from NNProtect_new_website.mlm_service.wallet_service import WalletService
+
+
+@pytest.fixture
+def pending_commissions(db_session, test_network_simple, test_period_current, create_test_wallet):
+    """
+    A: wallet MXN con 100 y dos comisiones (50, 25)
+    B: wallet MXN con una comisión (10)
+    C: wallet suspendida con una comisión (99)
+    """
+    for member_id, balance, status in [
+        (1000, 100.0, WalletStatus.ACTIVE),
+        (1001, 0.0, WalletStatus.ACTIVE),
+        (1002, 5.0, WalletStatus.SUSPENDED),
+    ]:
+        wallet = create_test_wallet(member_id=member_id, balance=balance)
+        wallet.status = status.value
+        db_session.add(wallet)
+
+    commissions = [
+        Commissions(
+            member_id=member_id,
+            bonus_type="bono_uninivel",
+            period_id=test_period_current.id,
+            amount_vn=amount,
+            currency_origin="MXN",
+            amount_converted=amount,
+            currency_destination="MXN",
+            notes=f"Uninivel {member_id}"
+        )
+        for member_id, amount in [(1000, 50.0), (1000, 25.0), (1001, 10.0), (1002, 99.0)]
+    ]
+    db_session.add_all(commissions)
+    db_session.flush()
+    return commissions
+
+
+@pytest.mark.wallet
+class TestWalletSettlement:
+    """
+    Suite de tests para la liquidación masiva de comisiones.
+    """
+
+    def test_balances_and_counts(self, db_session, pending_commissions, test_period_current):
+        settlement = WalletService.settle_pending_commissions(db_session, test_period_current.id)
+
+        assert settlement == {"deposited_count": 3, "deposited_total": 85.0, "failed_count": 1}
+
+        balances = dict(db_session.exec(select(Wallets.member_id, Wallets.balance)).all())
+        assert balances == {1000: 175.0, 1001: 10.0, 1002: 5.0}
+
+    def test_transactions_chain_per_commission(self, db_session, pending_commissions, test_period_current):
+        WalletService.settle_pending_commissions(db_session, test_period_current.id, chunk_size=1)
+
+        transactions = db_session.exec(
+            select(WalletTransactions).order_by(WalletTransactions.commission_id)
+        ).all()
+
+        assert [t.commission_id for t in transactions] == [c.id for c in pending_commissions[:3]]
+        assert [(t.balance_before, t.balance_after) for t in transactions] == [
+            (100.0, 150.0), (150.0, 175.0), (0.0, 10.0)
+        ]
+        assert transactions[0].description == "Uninivel 1000"
+
+    def test_status_flip_and_idempotency(self, db_session, pending_commissions, test_period_current):
+        """
+        Pagadas quedan PAID; la de wallet suspendida sigue PENDING.
+        Una segunda liquidación no vuelve a depositar.
+        """
+        WalletService.settle_pending_commissions(db_session, test_period_current.id)
+        second = WalletService.settle_pending_commissions(db_session, test_period_current.id)
+
+        statuses = [db_session.get(Commissions, c.id).status for c in pending_commissions]
+        assert statuses == [CommissionStatus.PAID.value] * 3 + [CommissionStatus.PENDING.value]
+        assert second["deposited_count"] == 0
+        assert db_session.exec(select(Wallets.balance).where(Wallets.member_id == 1000)).one() == 175.0
+
+    def test_commission_arriving_mid_settlement_is_left_pending(self, db_session, pending_commissions, test_period_current):
+        """
+        Given: Una comisión PENDING de A que se confirma después del SELECT del paso 1
+        When: Se liquida el período
+        Then: No se acredita ni se marca PAID (no tiene WalletTransaction); el ledger cuadra
+        """
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session as SASession
+
+        late = []
+
+        def add_late_commission(orm_execute_state):
+            """Al insertar las transacciones (paso 1 ya leyó), otra transacción confirma una comisión."""
+            statement = orm_execute_state.statement
+            if late or not orm_execute_state.is_insert or statement.table.name != WalletTransactions.__tablename__:
+                return
+            late.append(True)
+            orm_execute_state.session.connection().execute(
+                Commissions.__table__.insert().values(
+                    member_id=1000, bonus_type="bono_uninivel", period_id=test_period_current.id,
+                    amount_vn=7.0, currency_origin="MXN", amount_converted=7.0, currency_destination="MXN",
+                    status=CommissionStatus.PENDING.value, calculated_at=pending_commissions[0].calculated_at
+                )
+            )
+
+        event.listen(SASession, "do_orm_execute", add_late_commission)
+        try:
+            settlement = WalletService.settle_pending_commissions(db_session, test_period_current.id)
+        finally:
+            event.remove(SASession, "do_orm_execute", add_late_commission)
+
+        assert late
+        assert settlement["deposited_count"] == 3
+
+        balances = dict(db_session.exec(select(Wallets.member_id, Wallets.balance)).all())
+        assert balances[1000] == 175.0
+
+        still_pending = db_session.exec(
+            select(Commissions.amount_converted).where(
+                (Commissions.member_id == 1000) & (Commissions.status == CommissionStatus.PENDING.value)
+            )
+        ).all()
+        assert still_pending == [7.0]